@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+scripts/bench_angles.py
+
+角度工具（offnav.models.angles）的 micro-benchmark：
+  1) wrap：np.vectorize(wrap_angle_pm_pi)（IMU 预处理原来的写法）vs wrap_pm_pi（整段 / 原地）；
+  2) unwrap：np.unwrap vs unwrap_with_reset（含 NaN、复位）；
+  3) 滑窗圆周均值 / 标准差：pandas rolling(sin/cos) vs rolling_circular_mean_std；
+并检查 wrap 结果逐位一致。
+
+使用示例（在 offline_nav 目录下）：
+python scripts/bench_angles.py --n 360000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from offnav.models.angles import rolling_circular_mean_std, unwrap_with_reset, wrap_pm_pi
+from offnav.models.attitude import wrap_angle_pm_pi
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _report(name: str, t_ref: float, t_new: float, n: int) -> None:
+    print(
+        f"[BENCH] {name:<34s} ref={t_ref * 1e3:9.2f} ms  new={t_new * 1e3:8.2f} ms  "
+        f"speedup={t_ref / max(t_new, 1e-12):7.1f}x  ({n / max(t_new, 1e-12) / 1e6:.1f} M samples/s)"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Micro-benchmark for offnav.models.angles")
+    ap.add_argument("--n", type=int, default=360_000, help="样本数（默认 360000 = 100 Hz IMU 1 小时）")
+    ap.add_argument("--repeat", type=int, default=5, help="每项重复次数，取最快一次")
+    ap.add_argument("--win", type=int, default=101, help="滑窗圆周统计的窗口长度（样本）")
+    args = ap.parse_args()
+
+    n = int(args.n)
+    rng = np.random.default_rng(0)
+    yaw = np.cumsum(rng.normal(0.0, 0.05, n)) + 40.0
+    yaw[::997] = np.nan
+    yaw_w = wrap_pm_pi(yaw)
+
+    # 1) wrap
+    ref = np.vectorize(wrap_angle_pm_pi)(yaw)
+    new = wrap_pm_pi(yaw)
+    print(f"[CHECK] wrap bit-identical: {np.array_equal(ref, new, equal_nan=True)}")
+    buf = np.empty_like(yaw)
+    _report(
+        "wrap (vectorize -> ufunc)",
+        _best_of(lambda: np.vectorize(wrap_angle_pm_pi)(yaw), args.repeat),
+        _best_of(lambda: wrap_pm_pi(yaw), args.repeat),
+        n,
+    )
+    _report(
+        "wrap in-place (out=)",
+        _best_of(lambda: np.vectorize(wrap_angle_pm_pi)(yaw), args.repeat),
+        _best_of(lambda: wrap_pm_pi(yaw, out=buf), args.repeat),
+        n,
+    )
+
+    # 2) unwrap（np.unwrap 遇 NaN 后全部变 NaN，这里给它去掉 NaN 的输入，仅比速度）
+    finite = yaw_w[np.isfinite(yaw_w)]
+    reset = np.zeros(n, dtype=bool)
+    reset[:: max(1, n // 10)] = True
+    ok = np.array_equal(np.unwrap(finite), unwrap_with_reset(finite))
+    print(f"[CHECK] unwrap_with_reset == np.unwrap (no NaN/reset): {ok}")
+    t_np = _best_of(lambda: np.unwrap(finite), args.repeat)
+    _report("unwrap (dense)", t_np, _best_of(lambda: unwrap_with_reset(finite), args.repeat), finite.size)
+    _report("unwrap (+NaN +reset)", t_np, _best_of(lambda: unwrap_with_reset(yaw_w, reset), args.repeat), n)
+
+    # 3) 滑窗圆周均值 / 标准差
+    def _pandas_circ() -> None:
+        s = pd.Series(np.sin(yaw_w)).rolling(args.win, center=True, min_periods=1).mean()
+        c = pd.Series(np.cos(yaw_w)).rolling(args.win, center=True, min_periods=1).mean()
+        np.arctan2(s.to_numpy(), c.to_numpy())
+        np.sqrt(-2.0 * np.log(np.hypot(s.to_numpy(), c.to_numpy())))
+
+    _report(
+        f"rolling circ mean/std (w={args.win})",
+        _best_of(_pandas_circ, args.repeat),
+        _best_of(lambda: rolling_circular_mean_std(yaw_w, args.win, min_periods=1), args.repeat),
+        n,
+    )
+
+
+if __name__ == "__main__":
+    main()
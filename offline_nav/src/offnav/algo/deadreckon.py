@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Tuple, List, Any
+from typing import Tuple, Any
 
 import numpy as np
 import pandas as pd
 
 from offnav.core.types import ImuRawData, DvlRawData, Trajectory
 from offnav.core.nav_config import DeadReckonConfig
-from offnav.models.attitude import AttitudeRPY, rpy_to_R_nb, wrap_angle_pm_pi
+from offnav.core.traj_recorder import TrajectoryRecorder
+from offnav.models.attitude import AttitudeRPY, wrap_angle_pm_pi
+from offnav.models.attitude_series import AttitudeTimeSeries, pick_yaw_column
+
+
+# 三种模式共用的轨迹记录列
+DR_TRAJ_FIELDS = ("t_s", "E", "N", "U", "yaw_rad")
 
 
 # =============================================================================
@@ -222,44 +228,6 @@ def _select_dvl_indices(df: pd.DataFrame, t_dvl: np.ndarray, cfg: DeadReckonConf
 # =============================================================================
 # 姿态插值（重点：yaw 列的正确使用）
 # =============================================================================
-def _pick_yaw_column(df_imu: pd.DataFrame) -> str | None:
-    """
-    从 IMU DataFrame 中挑选一个“最合理的 yaw 列名”：
-
-      优先级（从高到低）：
-        1) yaw_nav_rad, yaw_device_rad, yaw_rad
-        2) YawEst_rad, YawEst_unwrapped_rad
-        3) YawEst_deg, YawDeg, AngZ_deg, AngZ
-
-      返回列名字符串；如果一个都找不到，返回 None。
-    """
-    # 1) 明确标成 rad 的 yaw
-    cand_rad = [
-        "yaw_nav_rad",
-        "yaw_device_rad",
-        "yaw_rad",
-        "YawEst_rad",
-        "YawEst_unwrapped_rad",
-    ]
-    for c in cand_rad:
-        if c in df_imu.columns:
-            return c
-
-    # 2) 退回到 deg 版本
-    cand_deg = [
-        "YawEst_deg",
-        "YawEst_unwrapped_deg",
-        "YawDeg",
-        "AngZ_deg",
-        "AngZ",
-    ]
-    for c in cand_deg:
-        if c in df_imu.columns:
-            return c
-
-    return None
-
-
 def _interp_attitude_from_imu(
     df_imu: pd.DataFrame,
     t_imu: np.ndarray,
@@ -302,7 +270,7 @@ def _interp_attitude_from_imu(
         roll = float(row["roll_rad"])
         pitch = float(row["pitch_rad"])
 
-        yaw_col = _pick_yaw_column(df_imu)
+        yaw_col = pick_yaw_column(df_imu)
 
         if yaw_col is None:
             # 第一次缺失 yaw 时，打印一次完整表头，方便排查
@@ -345,6 +313,63 @@ def _interp_attitude_from_imu(
     return AttitudeRPY(roll=roll, pitch=pitch, yaw=yaw)
 
 
+def _attitude_series_from_imu(df_imu: pd.DataFrame, t_imu: np.ndarray) -> AttitudeTimeSeries:
+    """
+    一次性构建 IMU 姿态序列（选列 / 单位 / NaN 规则与 _interp_attitude_from_imu 相同），
+    之后对所有 DVL / IMU 查询时刻做批量 nearest / linear / slerp 查询。
+    """
+    if not hasattr(_interp_attitude_from_imu, "_debug_printed_cols"):
+        print("[IMU-YAW][DEBUG] IMU columns used in deadreckon:")
+        print("    ", list(df_imu.columns))
+        _interp_attitude_from_imu._debug_printed_cols = True
+    return AttitudeTimeSeries.from_imu_df(df_imu, t_imu)
+
+
+# =============================================================================
+# 批量积分工具：dt 门控 + 掩码累加
+# =============================================================================
+
+def _dt_guard_from_times(t: np.ndarray, cfg: DeadReckonConfig) -> float:
+    """
+    由采样间隔中位数与 cfg.max_gap_s 得到 dt 门限（三种模式共用）：
+      - max_gap_s <= 0         -> 5 * dt_med
+      - max_gap_s < 1.5*dt_med -> 3 * dt_med（配置过小，避免把正常采样全判为断流）
+      - 否则                   -> max_gap_s
+    """
+    dt_all = np.diff(t)
+    dt_all = dt_all[np.isfinite(dt_all) & (dt_all > 0.0)]
+    dt_med = float(np.median(dt_all)) if dt_all.size > 0 else 0.0
+
+    cfg_max_gap = float(getattr(cfg, "max_gap_s", 0.0) or 0.0)
+    if dt_med > 0.0:
+        if cfg_max_gap <= 0.0:
+            return 5.0 * dt_med
+        if cfg_max_gap < 1.5 * dt_med:
+            return 3.0 * dt_med
+        return cfg_max_gap
+    return float("inf")
+
+
+def _masked_dt(t: np.ndarray, dt_guard: float) -> np.ndarray:
+    """逐样本积分步长：首样本、非有限 / 非正 / 超过 dt_guard 的间隔记为 0（断流不积分）。"""
+    dt = np.zeros(len(t), dtype=float)
+    if len(t) >= 2:
+        d = np.diff(t)
+        ok = np.isfinite(d) & (d > 0.0) & (d <= dt_guard)
+        dt[1:] = np.where(ok, d, 0.0)
+    return dt
+
+
+def _integrate_masked(x0: np.ndarray, rate: np.ndarray, dt: np.ndarray) -> np.ndarray:
+    """
+    x_k = x_{k-1} + rate_k * dt_k（x_{-1} = x0）的累加形式，
+    逐样本加法顺序与原循环一致，因此结果逐位相同。
+    """
+    incr = rate * dt[:, None]
+    incr[0] += x0
+    return np.cumsum(incr, axis=0)
+
+
 # =============================================================================
 # 诊断信息
 # =============================================================================
@@ -410,80 +435,37 @@ def _run_deadreckon_imu_only(
 
     acc_body = _extract_imu_acc_body(df_imu)  # (N_imu, 3)
 
-    # ---- dt 统计与时间守恒 ----
-    dt_all = np.diff(t_imu)
-    dt_all = dt_all[np.isfinite(dt_all) & (dt_all > 0.0)]
-    if dt_all.size > 0:
-        dt_med = float(np.median(dt_all))
-        dt_p95 = float(np.percentile(dt_all, 95))
-    else:
-        dt_med = dt_p95 = 0.0
-
-    cfg_max_gap = float(getattr(cfg, "max_gap_s", 0.0) or 0.0)
-    if dt_med > 0.0:
-        if cfg_max_gap <= 0.0:
-            dt_guard = 5.0 * dt_med
-        elif cfg_max_gap < 1.5 * dt_med:
-            dt_guard = 3.0 * dt_med
-        else:
-            dt_guard = cfg_max_gap
-    else:
-        dt_guard = float("inf")
+    # ---- dt 门控（断流处 dt=0，不积分）----
+    dt_guard = _dt_guard_from_times(t_imu, cfg)
+    dt = _masked_dt(t_imu, dt_guard)
 
     # 初始状态
-    p = np.array(
+    p0 = np.array(
         [cfg.init_pose.E, cfg.init_pose.N, cfg.init_pose.U],
         dtype=float,
     )
-    v = np.zeros(3, dtype=float)
-
-    t_out: List[float] = []
-    E_out: List[float] = []
-    N_out: List[float] = []
-    U_out: List[float] = []
-    yaw_out: List[float] = []
 
     use_angles = True  # IMU_only 必须依赖 IMU 姿态
-    yaw_arr_collect: List[float] = []
+    interp = getattr(cfg, "attitude_interp", "nearest")
 
-    for k in range(n_imu):
-        tk = float(t_imu[k])
-        if k == 0:
-            dt = 0.0
-        else:
-            dt_raw = tk - float(t_imu[k - 1])
-            if (not np.isfinite(dt_raw)) or (dt_raw <= 0.0):
-                dt = 0.0
-            elif dt_raw > dt_guard:
-                dt = 0.0
-            else:
-                dt = dt_raw
+    # 姿态：一次性对全部 IMU 时刻取值，批量取 R_nb（nav(ENU) <- body(FRD)）
+    att = _attitude_series_from_imu(df_imu, t_imu)
+    _, _, yaw = att.rpy(t_imu, interp)
+    R_nb = att.R_nb_at(t_imu, interp)                    # (N_imu,3,3)
+    a_n = np.einsum("nij,nj->ni", R_nb, acc_body)        # 转到 ENU
 
-        if use_angles:
-            att = _interp_attitude_from_imu(df_imu, t_imu, tk)
-        else:
-            att = AttitudeRPY(roll=0.0, pitch=0.0, yaw=0.0)
+    # 这里不做额外的重力补偿假设，只作为“IMU-only 漂移基线”使用
+    v = _integrate_masked(np.zeros(3, dtype=float), a_n, dt)
+    p = _integrate_masked(p0, v, dt)
 
-        R_nb = rpy_to_R_nb(att)                # nav(ENU) <- body(FRD)
-        a_b = acc_body[k, :]                   # 体坐标加速度
-        a_n = R_nb @ a_b                       # 转到 ENU
+    rec = TrajectoryRecorder(DR_TRAJ_FIELDS, n_imu)
+    rec.extend({"t_s": t_imu, "E": p[:, 0], "N": p[:, 1], "U": p[:, 2], "yaw_rad": yaw})
 
-        # 这里不做额外的重力补偿假设，只作为“IMU-only 漂移基线”使用
-        v = v + a_n * dt
-        p = p + v * dt
-
-        t_out.append(tk)
-        E_out.append(float(p[0]))
-        N_out.append(float(p[1]))
-        U_out.append(float(p[2]))
-        yaw_out.append(float(att.yaw))
-        yaw_arr_collect.append(float(att.yaw))
-
-    t_out_arr = np.asarray(t_out, dtype=float)
-    E_arr = np.asarray(E_out, dtype=float)
-    N_arr = np.asarray(N_out, dtype=float)
-    U_arr = np.asarray(U_out, dtype=float)
-    yaw_arr = np.asarray(yaw_out, dtype=float)
+    t_out_arr = rec.column("t_s")
+    E_arr = rec.column("E")
+    N_arr = rec.column("N")
+    U_arr = rec.column("U")
+    yaw_arr = rec.column("yaw_rad")
 
     duration_s = float(t_out_arr[-1] - t_out_arr[0]) if len(t_out_arr) >= 2 else 0.0
 
@@ -511,12 +493,12 @@ def _run_deadreckon_imu_only(
         max_speed_body=max_speed,
     )
 
-    if use_angles and len(yaw_arr_collect) > 0:
+    if use_angles and len(yaw_arr) > 0:
         print(
             f"[DEADRECKON][IMU_ONLY][YAW] "
-            f"min={np.nanmin(yaw_arr_collect):.3f} rad  "
-            f"max={np.nanmax(yaw_arr_collect):.3f} rad  "
-            f"mean={np.nanmean(yaw_arr_collect):.3f} rad"
+            f"min={np.nanmin(yaw_arr):.3f} rad  "
+            f"max={np.nanmax(yaw_arr):.3f} rad  "
+            f"mean={np.nanmean(yaw_arr):.3f} rad"
         )
 
     return traj, diag
@@ -553,25 +535,9 @@ def _run_deadreckon_dvl_be_only(
     t_d = t_dvl[idx_used]
     vel_enu = vel_enu_all[idx_used, :]
 
-    # dt 统计
-    dt_all = np.diff(t_d)
-    dt_all = dt_all[np.isfinite(dt_all) & (dt_all > 0.0)]
-    if dt_all.size > 0:
-        dt_med = float(np.median(dt_all))
-        dt_p95 = float(np.percentile(dt_all, 95))
-    else:
-        dt_med = dt_p95 = 0.0
-
-    cfg_max_gap = float(getattr(cfg, "max_gap_s", 0.0) or 0.0)
-    if dt_med > 0.0:
-        if cfg_max_gap <= 0.0:
-            dt_guard = 5.0 * dt_med
-        elif cfg_max_gap < 1.5 * dt_med:
-            dt_guard = 3.0 * dt_med
-        else:
-            dt_guard = cfg_max_gap
-    else:
-        dt_guard = float("inf")
+    # dt 门控
+    dt_guard = _dt_guard_from_times(t_d, cfg)
+    dt = _masked_dt(t_d, dt_guard)
 
     # 速度统计（ENU 速度）
     speed = np.linalg.norm(vel_enu, axis=1)
@@ -579,54 +545,28 @@ def _run_deadreckon_dvl_be_only(
     max_speed = float(np.nanmax(speed))
 
     # 积分位置（ENU）
-    p = np.array(
+    p0 = np.array(
         [cfg.init_pose.E, cfg.init_pose.N, cfg.init_pose.U],
         dtype=float,
     )
+    p = _integrate_masked(p0, vel_enu, dt)
 
-    t_out: List[float] = []
-    E_out: List[float] = []
-    N_out: List[float] = []
-    U_out: List[float] = []
-    yaw_out: List[float] = []
-
-    # yaw：从 DVL 速度方向估计；若速度太小，则保持上一帧 yaw
-    yaw_cur = float(np.deg2rad(cfg.init_pose.yaw_deg))
+    # yaw：从 DVL 水平速度方向估计；若速度太小，则保持上一帧 yaw（前向填充，首段用初值）
+    yaw_init = float(np.deg2rad(cfg.init_pose.yaw_deg))
+    spd_h = np.hypot(vel_enu[:, 0], vel_enu[:, 1])
+    has_dir = spd_h > 1e-3
+    yaw_dir = np.asarray(wrap_angle_pm_pi(np.arctan2(vel_enu[:, 1], vel_enu[:, 0])), dtype=float)
+    last = np.maximum.accumulate(np.where(has_dir, np.arange(len(t_d)), -1))
+    yaw_arr_in = np.where(last >= 0, yaw_dir[np.maximum(last, 0)], yaw_init)
 
-    for k in range(len(t_d)):
-        tk = float(t_d[k])
-        if k == 0:
-            dt = 0.0
-        else:
-            dt_raw = tk - float(t_d[k - 1])
-            if (not np.isfinite(dt_raw)) or (dt_raw <= 0.0):
-                dt = 0.0
-            elif dt_raw > dt_guard:
-                dt = 0.0
-            else:
-                dt = dt_raw
-
-        v_n = vel_enu[k, :]  # ENU 速度
-
-        # 推一个基于水平速度的 yaw
-        vE, vN = float(v_n[0]), float(v_n[1])
-        spd_h = float(np.hypot(vE, vN))
-        if spd_h > 1e-3:
-            yaw_cur = float(wrap_angle_pm_pi(np.arctan2(vN, vE)))
-
-        p = p + v_n * dt
-
-        t_out.append(tk)
-        E_out.append(float(p[0]))
-        N_out.append(float(p[1]))
-        U_out.append(float(p[2]))
-        yaw_out.append(yaw_cur)
+    rec = TrajectoryRecorder(DR_TRAJ_FIELDS, len(t_d))
+    rec.extend({"t_s": t_d, "E": p[:, 0], "N": p[:, 1], "U": p[:, 2], "yaw_rad": yaw_arr_in})
 
-    t_out_arr = np.asarray(t_out, dtype=float)
-    E_arr = np.asarray(E_out, dtype=float)
-    N_arr = np.asarray(N_out, dtype=float)
-    U_arr = np.asarray(U_out, dtype=float)
-    yaw_arr = np.asarray(yaw_out, dtype=float)
+    t_out_arr = rec.column("t_s")
+    E_arr = rec.column("E")
+    N_arr = rec.column("N")
+    U_arr = rec.column("U")
+    yaw_arr = rec.column("yaw_rad")
 
     duration_s = float(t_out_arr[-1] - t_out_arr[0]) if len(t_out_arr) >= 2 else 0.0
 
@@ -697,29 +637,9 @@ def _run_deadreckon_imu_plus_dvl(
     # ★ 把 DVL_BI 认为是“IMU 坐标系”，统一转到 FRD
     vel_body = (R_BODY_FRD_FROM_IMU @ vel_body_raw.T).T   # (N_used, 3)
 
-    # ---- dt 统计：估计 DVL 真实采样周期 ----
-    if len(t_d) >= 2:
-        dt_all = np.diff(t_d)
-        dt_all = dt_all[np.isfinite(dt_all) & (dt_all > 0.0)]
-        if dt_all.size > 0:
-            dt_med = float(np.median(dt_all))
-            dt_p95 = float(np.percentile(dt_all, 95))
-        else:
-            dt_med = dt_p95 = 0.0
-    else:
-        dt_med = dt_p95 = 0.0
-
-    cfg_max_gap = float(getattr(cfg, "max_gap_s", 0.0) or 0.0)
-
-    if dt_med > 0.0:
-        if cfg_max_gap <= 0.0:
-            dt_guard = 5.0 * dt_med
-        elif cfg_max_gap < 1.5 * dt_med:
-            dt_guard = 3.0 * dt_med
-        else:
-            dt_guard = cfg_max_gap
-    else:
-        dt_guard = float("inf")
+    # ---- dt 门控：按 DVL 真实采样周期估计断流门限 ----
+    dt_guard = _dt_guard_from_times(t_d, cfg)
+    dt = _masked_dt(t_d, dt_guard)
 
     # 体速度统计
     speed_body = np.linalg.norm(vel_body, axis=1)
@@ -731,56 +651,34 @@ def _run_deadreckon_imu_plus_dvl(
         [cfg.init_pose.E, cfg.init_pose.N, cfg.init_pose.U],
         dtype=float,
     )
-    p = p0.copy()
-
-    t_out: List[float] = []
-    E_out: List[float] = []
-    N_out: List[float] = []
-    U_out: List[float] = []
-    yaw_out: List[float] = []  # 记录每一步使用的 yaw，方便下游可视化 / 对比
 
     use_angles = _as_bool(getattr(cfg, "use_imu_angles", True), default=True)
 
-    for k in range(len(t_d)):
-        tk = float(t_d[k])
-        if k == 0:
-            dt = 0.0
-        else:
-            dt_raw = tk - float(t_d[k - 1])
-            if (not np.isfinite(dt_raw)) or (dt_raw <= 0.0):
-                dt = 0.0
-            elif dt_raw > dt_guard:
-                dt = 0.0
-            else:
-                dt = dt_raw
-
-        # 姿态对齐
-        if use_angles:
-            att = _interp_attitude_from_imu(df_imu, t_imu, tk)
-        else:
-            att = AttitudeRPY(roll=0.0, pitch=0.0, yaw=0.0)
-
-        # 体速度 -> ENU 速度
-        v_b = vel_body[k, :]        # (3,)
-        R_nb = rpy_to_R_nb(att)     # nav(ENU) <- body(FRD)
-        v_n = R_nb @ v_b            # (3,)
+    # 姿态对齐：一次 searchsorted 取全部 DVL 时刻的 IMU 姿态，批量体速度 -> ENU 速度
+    if use_angles:
+        interp = getattr(cfg, "attitude_interp", "nearest")
+        att = _attitude_series_from_imu(df_imu, t_imu)
+        _, _, yaw = att.rpy(t_d, interp)
+        R_nb = att.R_nb_at(t_d, interp)                    # nav(ENU) <- body(FRD)
+        v_n = np.einsum("nij,nj->ni", R_nb, vel_body)
+    else:
+        yaw = np.zeros(len(t_d), dtype=float)
+        v_n = vel_body.copy()
 
-        # 积分位置
-        p = p + v_n * dt
+    # 积分位置
+    p = _integrate_masked(p0, v_n, dt)
 
-        t_out.append(tk)
-        E_out.append(float(p[0]))
-        N_out.append(float(p[1]))
-        U_out.append(float(p[2]))
-        yaw_out.append(float(att.yaw))
+    # 记录每一步使用的 yaw，方便下游可视化 / 对比
+    rec = TrajectoryRecorder(DR_TRAJ_FIELDS, len(t_d))
+    rec.extend({"t_s": t_d, "E": p[:, 0], "N": p[:, 1], "U": p[:, 2], "yaw_rad": yaw})
 
-    t_out_arr = np.asarray(t_out, dtype=float)
-    E_arr = np.asarray(E_out, dtype=float)
-    N_arr = np.asarray(N_out, dtype=float)
+    t_out_arr = rec.column("t_s")
+    E_arr = rec.column("E")
+    N_arr = rec.column("N")
     E_world = E_arr
     N_world = N_arr
-    U_arr = np.asarray(U_out, dtype=float)
-    yaw_arr = np.asarray(yaw_out, dtype=float)
+    U_arr = rec.column("U")
+    yaw_arr = rec.column("yaw_rad")
 
     duration_s = float(t_out_arr[-1] - t_out_arr[0]) if len(t_out_arr) >= 2 else 0.0
 
@@ -77,11 +77,6 @@ def _safe_numeric(s: pd.Series) -> np.ndarray:
     return pd.to_numeric(s, errors="coerce").to_numpy(dtype=float)
 
 
-def _wrap_pm_pi(a: np.ndarray) -> np.ndarray:
-    a = np.asarray(a, dtype=float)
-    return (a + np.pi) % (2.0 * np.pi) - np.pi
-
-
 def _corr(a: np.ndarray, b: np.ndarray) -> float:
     a = np.asarray(a, dtype=float)
     b = np.asarray(b, dtype=float)
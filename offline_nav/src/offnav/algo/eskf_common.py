@@ -2,17 +2,20 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any, Dict, List, Tuple,Optional
 
 import numpy as np
 import pandas as pd
 
+from offnav.io.colcache import read_csv_cached
 from offnav.models.attitude import AttitudeRPY, rpy_to_R_nb
+from offnav.models.attitude_series import AttitudeTimeSeries
 from offnav.algo.eskf_audit import audit_dataframe
 from offnav.algo.event_timeline import TimeAlignmentReport
 from offnav.models.eskf_state import EskfDiagnostics
 
-from offnav.preprocess.imu_processing import ImuProcessedData
+from offnav.preprocess.imu_processing import ImuProcessedData, load_imu_processed_csv
 
 # 尝试复用 deadreckon 里的姿态插值 & BI 体速度提取函数（如果存在）
 try:
@@ -111,6 +114,37 @@ def get_roll_pitch_rad(imu_proc: Any, k: int) -> Tuple[float, float]:
     return 0.0, 0.0
 
 
+def get_roll_pitch_rad_batch(imu_proc: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    get_roll_pitch_rad 的整轴版本：返回所有 IMU 样本的 (roll, pitch) 数组 (N,)。
+
+    常见路径（deadreckon 最近邻 + roll_rad/pitch_rad 或 AngX/AngY 列）
+    用 AttitudeTimeSeries 按列向量化；其它情况逐样本回退到 get_roll_pitch_rad，结果一致。
+    """
+    t_imu = np.asarray(getattr(imu_proc, "t_s", []), dtype=float).reshape(-1)
+    n = int(t_imu.size)
+    if n == 0:
+        return np.zeros(0, dtype=float), np.zeros(0, dtype=float)
+
+    if _interp_att_from_imu_dr is not None:
+        df = getattr(imu_proc, "raw_df", None)
+        if df is None:
+            df = getattr(imu_proc, "df", None)
+
+        if isinstance(df, pd.DataFrame) and len(df) >= n and np.all(np.isfinite(t_imu)):
+            # 与 _interp_attitude_from_imu 相同的选列 + 最近邻规则（查询点即 t_imu 本身）
+            att = AttitudeTimeSeries.from_imu_df(df.iloc[:n], t_imu)
+            roll, pitch, _ = att.rpy(t_imu)
+            return roll, pitch
+
+    # 回退：逐样本
+    roll = np.empty(n, dtype=float)
+    pitch = np.empty(n, dtype=float)
+    for k in range(n):
+        roll[k], pitch[k] = get_roll_pitch_rad(imu_proc, k)
+    return roll, pitch
+
+
 # -----------------------------------------------------------------------------
 # 轨迹输出后处理：翻转 N 轴 + 平滑
 # -----------------------------------------------------------------------------
@@ -171,7 +205,57 @@ class EskfOutputs:
       - traj_df: 轨迹（E,N,U,yaw 等）
       - diag:   诊断统计（EskfDiagnostics）
       - audit_df: DVL 更新审计日志（供 eskf_audit 使用）
+      - focus_df: FocusMonitor 记录（供 eskf/metrics.compute_focus_metrics 使用）
     """
     traj_df: pd.DataFrame
     diag: "EskfDiagnostics"
     audit_df: pd.DataFrame
+    focus_df: Optional[pd.DataFrame] = None
+
+
+def _first_existing(*paths: Path) -> Optional[Path]:
+    for p in paths:
+        if p.exists():
+            return p
+    return None
+
+
+def find_eskf_input_csvs(proc_run_dir: Path, run_id: str) -> Tuple[Path, Path, Optional[Path]]:
+    """
+    定位 cli_proc 的输出（proc_dir/run_id）中的 ESKF 输入文件：
+      - {run_id}_imu_filtered.csv（必需）
+      - {run_id}_dvl_BE.csv 或 {run_id}_dvl_filtered_BE.csv（必需）
+      - {run_id}_dvl_BI.csv 或 {run_id}_dvl_filtered_BI.csv（可选，缺失时为 None）
+    """
+    proc_run_dir = Path(proc_run_dir)
+
+    imu_csv = proc_run_dir / f"{run_id}_imu_filtered.csv"
+    if not imu_csv.exists():
+        raise FileNotFoundError(f"IMU processed CSV not found: {imu_csv}")
+
+    dvl_be_csv = _first_existing(
+        proc_run_dir / f"{run_id}_dvl_BE.csv",
+        proc_run_dir / f"{run_id}_dvl_filtered_BE.csv",
+    )
+    if dvl_be_csv is None:
+        raise FileNotFoundError(
+            f"DVL BE processed CSV not found: {proc_run_dir}/{run_id}_dvl_BE.csv "
+            f"(also tried {proc_run_dir}/{run_id}_dvl_filtered_BE.csv)"
+        )
+
+    dvl_bi_csv = _first_existing(
+        proc_run_dir / f"{run_id}_dvl_BI.csv",
+        proc_run_dir / f"{run_id}_dvl_filtered_BI.csv",
+    )
+    return imu_csv, dvl_be_csv, dvl_bi_csv
+
+
+def load_eskf_inputs(proc_run_dir: Path, run_id: str) -> EskfInputs:
+    """从 cli_proc 的输出目录（proc_dir/run_id）读取 ESKF 输入（文件约定见 find_eskf_input_csvs）."""
+    imu_csv, dvl_be_csv, dvl_bi_csv = find_eskf_input_csvs(proc_run_dir, run_id)
+
+    imu_proc = load_imu_processed_csv(str(imu_csv))
+    df_dvl_be = read_csv_cached(dvl_be_csv, low_memory=False)
+    df_dvl_bi = read_csv_cached(dvl_bi_csv, low_memory=False) if dvl_bi_csv is not None else None
+
+    return EskfInputs(imu_proc=imu_proc, dvl_be_df=df_dvl_be, dvl_bi_df=df_dvl_bi)
@@ -8,18 +8,19 @@ import numpy as np
 import pandas as pd
 
 from offnav.core.nav_config import NavConfig
+from offnav.core.traj_recorder import TrajectoryRecorder
 from offnav.models.eskf_state import EskfFilter, EskfDiagnostics  # noqa: F401
 
 from offnav.algo.eskf_common import (
     EskfInputs,
     EskfOutputs,
-    get_roll_pitch_rad,
     postprocess_traj_df,
     audit_dataframe,
 )
 
 from offnav.algo.event_timeline import (
     EventKind,
+    Timeline,
     TimeAlignmentReport,
 )
 
@@ -29,7 +30,9 @@ from offnav.algo.eskf_measurements import (
     DvlDerivedSignals,
     build_dvl_be_measurement,
     build_dvl_bi_measurement,
+    build_imu_attitude_series,
 )
+from offnav.models.attitude_series import AttitudeTimeSeries
 
 
 # =============================================================================
@@ -224,7 +227,7 @@ def _nanmax(a: float, b: float) -> float:
 def run_eskf_pipeline(
     nav_cfg: NavConfig,
     inputs: EskfInputs,
-    timeline: list[Any] | None = None,
+    timeline: Timeline | list[Any] | None = None,
 ) -> EskfOutputs:
     """
     在给定 IMU/DVL 输入（以及可选 timeline）上运行 ESKF。
@@ -249,6 +252,8 @@ def run_eskf_pipeline(
     if timeline is None:
         timeline, rep = build_eskf_timeline(nav_cfg, inputs)
     else:
+        # 外部传入的 TimelineEvent 列表统一转成列式
+        timeline = Timeline.from_events(timeline)
         rep = _estimate_time_report_from_inputs(imu_t, df_be, timeline=timeline)
 
     # ---------- mode dispatch (quiet fallback) ----------
@@ -268,11 +273,13 @@ def run_eskf_pipeline(
 # full_ins engine
 # =============================================================================
 
+TRAJ_COLUMNS = ("t_s", "E", "N", "U", "yaw_rad", "yaw_deg", "vE", "vN", "vU")
+
 def _run_eskf_full_ins(
     nav_cfg: NavConfig,
     inputs: EskfInputs,
     imu_t: np.ndarray,
-    timeline: List[Any],
+    timeline: Timeline,
     rep: TimeAlignmentReport,
 ) -> EskfOutputs:
     """
@@ -317,8 +324,14 @@ def _run_eskf_full_ins(
 
     nav_t_start, nav_t_end = _compute_nav_window(imu_t, rep)
 
-    # buffers
-    traj_rows: list[tuple] = []
+    # buffers（轨迹按 IMU 事件数预分配）
+    n_imu_events = int(np.count_nonzero(timeline.kind_mask(EventKind.IMU)))
+    traj_rec = TrajectoryRecorder(
+        TRAJ_COLUMNS,
+        n_imu_events,
+        decimate=int(getattr(nav_cfg.eskf, "traj_decimate", 1)),
+        float32=bool(getattr(nav_cfg.eskf, "traj_float32", False)),
+    )
     audit_rows: list[Dict[str, Any]] = []
 
     stats = {
@@ -340,60 +353,77 @@ def _run_eskf_full_ins(
         out_csv=getattr(nav_cfg.eskf, "focus_out_csv", None),
     )
 
-    # main loop
-    for ev in timeline:
-        if ev.kind == EventKind.IMU:
-            _step_imu_propagate_and_log(
-                eskf=eskf,
-                imu_proc=imu_proc,
-                imu_t=imu_t,
-                ev=ev,
-                traj_rows=traj_rows,
-            )
-            continue
-
-        if ev.kind == EventKind.DVL_BE:
-            _handle_dvl_be_event(
-                eskf=eskf,
-                nav_cfg=nav_cfg,
-                imu_proc=imu_proc,
-                imu_t=imu_t,
-                ev=ev,
-                derived=derived,
-                nav_t_start=nav_t_start,
-                nav_t_end=nav_t_end,
-                use_dvl_update=use_dvl_be_update,
-                has_explicit_R=has_explicit_R,
-                audit_rows=audit_rows,
-                stats=stats,
-                mon=mon,
-            )
-            continue
-
-        # NEW: DVL_BI event support
-        if hasattr(EventKind, "DVL_BI") and ev.kind == EventKind.DVL_BI:
-            _handle_dvl_bi_event(
-                eskf=eskf,
-                nav_cfg=nav_cfg,
-                imu_proc=imu_proc,
-                imu_t=imu_t,
-                ev=ev,
-                derived=derived,
-                nav_t_start=nav_t_start,
-                nav_t_end=nav_t_end,
-                use_dvl_update=use_dvl_bi_update,
-                has_explicit_R=has_explicit_R,
-                audit_rows=audit_rows,
-                stats=stats,
-                mon=mon,
-            )
+    # --- IMU 姿态序列：每个航次构建一次，IMU 传播与 DVL 观测构造共用 ---
+    att = build_imu_attitude_series(imu_proc)
+
+    # --- batch IMU propagation: 相邻 DVL 事件之间的纯 IMU 段一次传播 ---
+    batch_imu = bool(getattr(nav_cfg.eskf, "batch_propagate", False))
+
+    # main loop：按同类事件段（index range）推进；IMU 段不构造事件对象
+    for kind, a, b in timeline.segments():
+        if kind == EventKind.IMU:
+            ks = timeline.imu_k[a:b]
+            if batch_imu:
+                # 相邻 DVL 事件之间的纯 IMU 段一次传播
+                _propagate_imu_run_and_log(
+                    eskf=eskf,
+                    imu_proc=imu_proc,
+                    imu_t=imu_t,
+                    ks=ks,
+                    att=att,
+                    traj_rec=traj_rec,
+                )
+            else:
+                for k in ks.tolist():
+                    _step_imu_propagate_and_log(
+                        eskf=eskf,
+                        imu_proc=imu_proc,
+                        imu_t=imu_t,
+                        k=k,
+                        att=att,
+                        traj_rec=traj_rec,
+                    )
             continue
 
-    traj_df = pd.DataFrame(
-        traj_rows,
-        columns=["t_s", "E", "N", "U", "yaw_rad", "yaw_deg", "vE", "vN", "vU"],
-    )
-    traj_df = postprocess_traj_df(traj_df, nav_cfg.eskf)
+        for i in range(a, b):
+            ev = timeline.event(i)
+
+            if kind == EventKind.DVL_BE:
+                _handle_dvl_be_event(
+                    eskf=eskf,
+                    nav_cfg=nav_cfg,
+                    imu_proc=imu_proc,
+                    imu_t=imu_t,
+                    ev=ev,
+                    derived=derived,
+                    nav_t_start=nav_t_start,
+                    nav_t_end=nav_t_end,
+                    use_dvl_update=use_dvl_be_update,
+                    has_explicit_R=has_explicit_R,
+                    audit_rows=audit_rows,
+                    stats=stats,
+                    mon=mon,
+                    att=att,
+                )
+            elif kind == EventKind.DVL_BI:
+                _handle_dvl_bi_event(
+                    eskf=eskf,
+                    nav_cfg=nav_cfg,
+                    imu_proc=imu_proc,
+                    imu_t=imu_t,
+                    ev=ev,
+                    derived=derived,
+                    nav_t_start=nav_t_start,
+                    nav_t_end=nav_t_end,
+                    use_dvl_update=use_dvl_bi_update,
+                    has_explicit_R=has_explicit_R,
+                    audit_rows=audit_rows,
+                    stats=stats,
+                    mon=mon,
+                    att=att,
+                )
+
+    traj_df = postprocess_traj_df(traj_rec.to_dataframe(), nav_cfg.eskf)
 
     diag: EskfDiagnostics = eskf.diag
     audit_df = audit_dataframe(audit_rows)
@@ -403,11 +433,13 @@ def _run_eskf_full_ins(
     # =========================
     focus_csv: Optional[str] = None
     focus_sum: Optional[Dict[str, Any]] = None
+    focus_df: Optional[pd.DataFrame] = None
 
     if mon.enabled:
         out_path = str(mon.out_csv) if mon.out_csv else "out/diag/eskf_focus_monitor.csv"
         focus_csv = mon.flush_csv(out_path)
         focus_sum = mon.summary()
+        focus_df = pd.DataFrame(mon.rows)
 
     # =========================
     # final one-line summary
@@ -430,7 +462,7 @@ def _run_eskf_full_ins(
             msg += f" focus_csv={focus_csv}"
         print(msg)
 
-    return EskfOutputs(traj_df=traj_df, diag=diag, audit_df=audit_df)
+    return EskfOutputs(traj_df=traj_df, diag=diag, audit_df=audit_df, focus_df=focus_df)
 
 # =============================================================================
 # Helpers: IMU step
@@ -440,17 +472,17 @@ def _step_imu_propagate_and_log(
     eskf: EskfFilter,
     imu_proc: Any,
     imu_t: np.ndarray,
-    ev: Any,
-    traj_rows: list[tuple],
+    k: int,
+    att: AttitudeTimeSeries,
+    traj_rec: TrajectoryRecorder,
 ) -> None:
-    k = int(ev.imu_k)
     tk = float(imu_t[k])
     if not np.isfinite(tk):
         return
 
     acc_b = imu_proc.acc_mps2[k]
     gyro_b = imu_proc.gyro_in_rad_s[k]
-    roll_rad, pitch_rad = get_roll_pitch_rad(imu_proc, k)
+    roll_rad, pitch_rad = float(att.roll[k]), float(att.pitch[k])
 
     eskf.propagate_imu(tk, acc_b, gyro_b, roll_rad, pitch_rad)
 
@@ -459,7 +491,51 @@ def _step_imu_propagate_and_log(
     vE, vN, vU = eskf.v_enu
     yaw_rad = float(getattr(eskf, "yaw_rad", np.nan))
 
-    traj_rows.append((tk, E, Nn, U, yaw_rad, float(np.rad2deg(yaw_rad)), vE, vN, vU))
+    traj_rec.append(tk, E, Nn, U, yaw_rad, float(np.rad2deg(yaw_rad)), vE, vN, vU)
+
+
+def _propagate_imu_run_and_log(
+    eskf: EskfFilter,
+    imu_proc: Any,
+    imu_t: np.ndarray,
+    ks: np.ndarray,
+    att: AttitudeTimeSeries,
+    traj_rec: TrajectoryRecorder,
+) -> None:
+    """
+    _step_imu_propagate_and_log 的批量版本：一段连续 IMU 事件一次传播，
+    逐样本记录的轨迹行与逐样本版本一致（舍入量级）。
+    """
+    k_arr = np.asarray(ks, dtype=int)
+    tk = imu_t[k_arr]
+    ok = np.isfinite(tk)
+    if not np.all(ok):
+        k_arr = k_arr[ok]
+        tk = tk[ok]
+    if k_arr.size == 0:
+        return
+
+    p, v, yaw = eskf.propagate_imu_batch(
+        tk,
+        np.asarray(imu_proc.acc_mps2)[k_arr],
+        np.asarray(imu_proc.gyro_in_rad_s)[k_arr],
+        att.roll[k_arr],
+        att.pitch[k_arr],
+    )
+
+    traj_rec.extend(
+        {
+            "t_s": tk,
+            "E": p[:, 0],
+            "N": p[:, 1],
+            "U": p[:, 2],
+            "yaw_rad": yaw,
+            "yaw_deg": np.rad2deg(yaw),
+            "vE": v[:, 0],
+            "vN": v[:, 1],
+            "vU": v[:, 2],
+        }
+    )
 
 
 # =============================================================================
@@ -480,6 +556,7 @@ def _handle_dvl_be_event(
     audit_rows: list[Dict[str, Any]],
     stats: Dict[str, int],
     mon: FocusMonitor,
+    att: Optional[AttitudeTimeSeries] = None,
 ) -> None:
     j = int(ev.dvl_j)
     k = int(ev.imu_anchor_k) if getattr(ev, "imu_anchor_k", None) is not None else None
@@ -523,6 +600,7 @@ def _handle_dvl_be_event(
             eskf=eskf,
             nav_cfg=nav_cfg,
             derived=derived,
+            att=att,
         )
     except Exception as e:
         _append_skip_audit(
@@ -627,6 +705,7 @@ def _handle_dvl_bi_event(
     audit_rows: list[Dict[str, Any]],
     stats: Dict[str, int],
     mon: Any,
+    att: Optional[AttitudeTimeSeries] = None,
 ) -> None:
     j = int(ev.dvl_j)
     k = int(ev.imu_anchor_k) if ev.imu_anchor_k is not None else None
@@ -670,6 +749,7 @@ def _handle_dvl_bi_event(
             eskf=eskf,
             nav_cfg=nav_cfg,
             derived=derived,
+            att=att,
         )
     except Exception as e:
         _append_skip_audit(
@@ -880,7 +960,7 @@ def _compute_nav_window(imu_t: np.ndarray, rep: TimeAlignmentReport) -> Tuple[fl
 def _estimate_time_report_from_inputs(
     imu_t: np.ndarray,
     df_be: Optional[pd.DataFrame],
-    timeline: Optional[list[Any]] = None,
+    timeline: Optional[Timeline] = None,
 ) -> TimeAlignmentReport:
     """
     当外部传入 timeline 时，构造一个尽量完整且对 TimeAlignmentReport 字段自适配的报告。
@@ -930,17 +1010,13 @@ def _estimate_time_report_from_inputs(
 
     if timeline is not None and len(timeline) > 0:
         # nav_k0/nav_t0：取 timeline 中第一条 IMU 事件（更贴近“实际导航起点”）
-        for ev in timeline:
-            if getattr(ev, "kind", None) == EventKind.IMU and getattr(ev, "imu_k", None) is not None:
-                nav_k0 = int(ev.imu_k)
-                nav_t0 = float(getattr(ev, "t_s", t_imu0))
-                break
+        i_imu = np.flatnonzero(timeline.kind_mask(EventKind.IMU) & (timeline.imu_k >= 0))
+        if i_imu.size > 0:
+            nav_k0 = int(timeline.imu_k[i_imu[0]])
+            nav_t0 = float(timeline.t_s[i_imu[0]])
 
         # n_dvl_used：统计 timeline 里 used=True 的 DVL_BE 事件数
-        for ev in timeline:
-            if getattr(ev, "kind", None) == EventKind.DVL_BE:
-                if bool(getattr(ev, "used", True)):
-                    n_dvl_used += 1
+        n_dvl_used = int(np.count_nonzero(timeline.kind_mask(EventKind.DVL_BE) & timeline.used))
 
     # --- 自适配构造 TimeAlignmentReport ---
     rep_kwargs: Dict[str, Any] = {
@@ -7,13 +7,14 @@ from typing import Any, Dict, Optional, Tuple
 import numpy as np
 import pandas as pd
 
-from offnav.algo.eskf_common import EskfInputs, get_roll_pitch_rad
+from offnav.algo.eskf_common import EskfInputs, get_roll_pitch_rad, get_roll_pitch_rad_batch
 from offnav.algo.event_timeline import (
     extract_dvl_be_vel_enu,
     extract_dvl_bi_vel_body_frd,
     extract_dvl_quality_row,
 )
 from offnav.models.attitude import AttitudeRPY, rpy_to_R_nb
+from offnav.models.attitude_series import AttitudeTimeSeries
 
 
 # =============================================================================
@@ -71,7 +72,43 @@ class DvlDerivedSignals:
 # 工具：按时间索引从 IMU 序列里取 yaw
 # =============================================================================
 
-def _pick_yaw_at_index(imu_proc: Any, k: int, eskf: Any) -> float:
+# imu_proc 上的 yaw 数组字段（按优先级）
+IMU_YAW_FIELDS = ("yaw_nav_rad", "yaw_rad", "yaw_imu_rad")
+
+
+def build_imu_attitude_series(imu_proc: Any) -> AttitudeTimeSeries:
+    """
+    每个航次构建一次的 IMU 姿态序列（ESKF 观测构造 / IMU 传播共用）：
+      - roll/pitch：get_roll_pitch_rad_batch（与逐样本 get_roll_pitch_rad 一致）；
+      - yaw：逐样本取 IMU_YAW_FIELDS 中第一个有限值，全部缺失处为 NaN
+        （查询时再回退到 eskf.yaw_rad，见 _pick_yaw_at_index）。
+    """
+    t_imu = np.asarray(getattr(imu_proc, "t_s", []), dtype=float).reshape(-1)
+    n = int(t_imu.size)
+    roll, pitch = get_roll_pitch_rad_batch(imu_proc)
+
+    yaw = np.full(n, np.nan, dtype=float)
+    for name in IMU_YAW_FIELDS:
+        arr = getattr(imu_proc, name, None)
+        if arr is None:
+            continue
+        try:
+            a = np.asarray(arr, dtype=float).reshape(-1)[:n]
+        except (TypeError, ValueError):
+            continue
+        seg = yaw[:a.size]
+        fill = ~np.isfinite(seg) & np.isfinite(a)
+        seg[fill] = a[fill]
+
+    return AttitudeTimeSeries(t_imu, roll, pitch, yaw)
+
+
+def _pick_yaw_at_index(
+    imu_proc: Any,
+    k: int,
+    eskf: Any,
+    att: Optional[AttitudeTimeSeries] = None,
+) -> float:
     """
     从 IMU 预处理结果/ESKF 里“尽量合理”地取出时刻 k 的 yaw（rad）。
 
@@ -81,23 +118,25 @@ def _pick_yaw_at_index(imu_proc: Any, k: int, eskf: Any) -> float:
       3) imu_proc.yaw_imu_rad[k]
       4) eskf.yaw_rad （若存在）
       5) 0.0 作为兜底
+
+    给定 att（build_imu_attitude_series）时 1)~3) 直接查预计算的数组。
     """
-    yaw_field_candidates = (
-        "yaw_nav_rad",
-        "yaw_rad",
-        "yaw_imu_rad",
-    )
-
-    for name in yaw_field_candidates:
-        if hasattr(imu_proc, name):
-            arr = getattr(imu_proc, name)
-            try:
-                if arr is not None and len(arr) > k:
-                    val = float(arr[k])
-                    if np.isfinite(val):
-                        return val
-            except Exception:
-                continue
+    if att is not None:
+        if 0 <= k < len(att):
+            val = float(att.yaw[k])
+            if np.isfinite(val):
+                return val
+    else:
+        for name in IMU_YAW_FIELDS:
+            if hasattr(imu_proc, name):
+                arr = getattr(imu_proc, name)
+                try:
+                    if arr is not None and len(arr) > k:
+                        val = float(arr[k])
+                        if np.isfinite(val):
+                            return val
+                except Exception:
+                    continue
 
     if hasattr(eskf, "yaw_rad"):
         try:
@@ -110,6 +149,23 @@ def _pick_yaw_at_index(imu_proc: Any, k: int, eskf: Any) -> float:
     return 0.0
 
 
+def _attitude_R_nb_at_index(
+    imu_proc: Any,
+    k: int,
+    eskf: Any,
+    att: Optional[AttitudeTimeSeries] = None,
+) -> np.ndarray:
+    """IMU 样本 k 的 R_nb（nav(ENU) <- body(FRD)）；有 att 且 yaw 有效时直接取预计算矩阵."""
+    if att is not None and 0 <= k < len(att) and np.isfinite(att.yaw[k]):
+        return att.R_nb[k]
+    if att is not None and 0 <= k < len(att):
+        roll_rad, pitch_rad = float(att.roll[k]), float(att.pitch[k])
+    else:
+        roll_rad, pitch_rad = get_roll_pitch_rad(imu_proc, k)
+    yaw_rad = _pick_yaw_at_index(imu_proc, k, eskf, att)
+    return rpy_to_R_nb(AttitudeRPY(roll_rad, pitch_rad, yaw_rad))
+
+
 # =============================================================================
 # DVL-BE 观测构造：BE/BI + IMU 姿态 → nav(ENU) 速度测量
 # =============================================================================
@@ -123,6 +179,7 @@ def build_dvl_be_measurement(
     eskf: Any,
     nav_cfg: Any,
     derived: DvlDerivedSignals,
+    att: Optional[AttitudeTimeSeries] = None,
 ) -> Tuple[np.ndarray, Dict[str, Any]]:
     """
     针对 DVL-BE 事件 (j, k, t_dvl)，生成：
@@ -161,12 +218,8 @@ def build_dvl_be_measurement(
             # 1) BI 提供的 body(FRD) 速度
             v_b = np.asarray(derived.v_bi_body[j], dtype=float).reshape(3)
 
-            # 2) IMU 提供 roll/pitch + yaw
-            roll_rad, pitch_rad = get_roll_pitch_rad(imu_proc, k)
-            yaw_rad = _pick_yaw_at_index(imu_proc, k, eskf)
-
-            # R_nb: nav(ENU) <- body(FRD)
-            R_nb = rpy_to_R_nb(AttitudeRPY(roll_rad, pitch_rad, yaw_rad))
+            # 2) IMU 提供 roll/pitch + yaw -> R_nb: nav(ENU) <- body(FRD)
+            R_nb = _attitude_R_nb_at_index(imu_proc, k, eskf, att)
             v_nav = R_nb @ v_b
 
             # 仅替换水平分量；垂向仍以 BE 的 U 为主（更稳健）
@@ -226,6 +279,7 @@ def build_dvl_bi_measurement(
     eskf: Any,
     nav_cfg: Any,
     derived: Any,
+    att: Optional[AttitudeTimeSeries] = None,
 ) -> Tuple[np.ndarray, Dict[str, Any]]:
     """
     针对 DVL-BI 事件 (j,k,t_dvl)，生成：
@@ -242,10 +296,7 @@ def build_dvl_bi_measurement(
 
     v_b = np.asarray(derived.v_bi_body[j], dtype=float).reshape(3)
 
-    roll_rad, pitch_rad = get_roll_pitch_rad(imu_proc, k)
-    yaw_rad = _pick_yaw_at_index(imu_proc, k, eskf)  # 你工程已有的 yaw 取法
-
-    R_nb = rpy_to_R_nb(AttitudeRPY(roll_rad, pitch_rad, yaw_rad))
+    R_nb = _attitude_R_nb_at_index(imu_proc, k, eskf, att)  # 你工程已有的 roll/pitch/yaw 取法
     v_nav = (R_nb @ v_b).astype(float).reshape(3)
 
     speed_h = float(np.hypot(v_nav[0], v_nav[1]))
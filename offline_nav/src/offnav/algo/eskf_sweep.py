@@ -0,0 +1,386 @@
+# src/offnav/algo/eskf_sweep.py
+from __future__ import annotations
+
+"""
+ESKF 参数扫描（grid / random search）。
+
+调参以前的做法是改 nav.yaml -> 重跑 offnav-nav eskf。这里改为：
+
+- 每个 run 只读一次预处理 CSV、只构造一次 timeline（load_eskf_inputs + build_eskf_timeline）；
+- 参数用点路径覆盖 NavConfig 字段，例如
+      eskf.imu_noise.sigma_acc_mps2
+      eskf.sigma_dvl_xy_mps
+      eskf.max_gap_s
+  每个 trial 只在基线配置的深拷贝上改这些字段；
+- 共享数据通过进程池 initializer 交给 worker（fork 下为写时复制，spawn 下每个 worker 只序列化一次），
+  worker 只读使用；
+- 每个 trial 用 FocusMonitor 记录 + eskf/metrics.compute_focus_metrics 打分，按 score 升序排名。
+
+注意：timeline 只构造一次，因此决定 timeline 的字段（dvl_match_* / require_* / enable_bi_timeline）
+不能参与扫描；dvl_gate.* 由预处理（cli_proc）消费，ESKF 管线本身不读，同样不能在这里扫描。
+ESKF 管线从不读取的字段（UNUSED_FIELDS，如 eskf.dvl_noise.*：DVL 观测噪声 R 只由
+sigma_dvl_xy_mps / sigma_dvl_z_mps 构造）扫描后每个 trial 结果相同，也直接拒绝。
+"""
+
+import copy
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from offnav.core.nav_config import NavConfig
+from offnav.algo.eskf_common import EskfInputs
+from offnav.algo.eskf_engine import run_eskf_pipeline
+from offnav.algo.eskf_timeline import TIMELINE_CONFIG_FIELDS
+from offnav.algo.event_timeline import Timeline
+from offnav.eskf.metrics import MetricsConfig, compute_focus_metrics
+
+
+# 构造 timeline 时读取的字段：timeline 只建一次，这些字段不能参与扫描
+TIMELINE_FIELDS = tuple(f"eskf.{name}" for name in TIMELINE_CONFIG_FIELDS)
+
+# ESKF 管线不读取的字段（含子段前缀）：engine 的 DVL 更新走 correct_dvl_vel_enu_R，
+# R 由 sigma_dvl_xy_mps / sigma_dvl_z_mps 构造；其余为 EskfCoreParams 不接收或仅 graph 使用的旧字段
+UNUSED_FIELDS = (
+    "eskf.dvl_noise",
+    "eskf.min_speed_for_dvl_update",
+    "eskf.min_speed_for_yaw_dvl",
+    "eskf.q_vel",
+    "eskf.q_yaw",
+    "eskf.q_ba",
+    "eskf.q_bgz",
+    "eskf.r_dvl_bi_vel",
+    "eskf.r_dvl_be_vel",
+    "eskf.r_dvl_yaw",
+)
+
+
+# =============================================================================
+# 扫描定义
+# =============================================================================
+
+
+@dataclass
+class SweepSpec:
+    """
+    扫描定义（对应 sweep YAML）：
+
+      mode: grid | random
+      n_samples: 32            # random 模式的采样数
+      seed: 0
+      nis_dof: 3               # NIS 期望值（3 维速度观测）
+      params:
+        eskf.imu_noise.sigma_acc_mps2: [0.005, 0.01, 0.02]        # grid / choice
+        eskf.sigma_dvl_xy_mps: {log_uniform: [0.05, 0.5]}         # random
+        eskf.sigma_dvl_z_mps: {uniform: [0.1, 1.0]}               # random
+    """
+    params: Dict[str, Any]
+    mode: str = "grid"
+    n_samples: int = 32
+    seed: int = 0
+    nis_dof: float = 3.0
+    metrics: MetricsConfig = field(
+        default_factory=lambda: MetricsConfig(kind_filter=None, min_rows=20)
+    )
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any]) -> "SweepSpec":
+        params = dict(d.get("params") or {})
+        if not params:
+            raise ValueError("sweep spec has no 'params'")
+        m = dict(d.get("metrics") or {})
+        metrics = MetricsConfig(
+            kind_filter=m.get("kind_filter", None),
+            use_only_used_rows=bool(m.get("use_only_used_rows", True)),
+            min_rows=int(m.get("min_rows", 20)),
+        )
+        return cls(
+            params=params,
+            mode=str(d.get("mode", "grid")).lower(),
+            n_samples=int(d.get("n_samples", 32)),
+            seed=int(d.get("seed", 0)),
+            nis_dof=float(d.get("nis_dof", 3.0)),
+            metrics=metrics,
+        )
+
+
+def load_sweep_spec(path: str | Path) -> SweepSpec:
+    p = Path(path)
+    if not p.is_file():
+        raise FileNotFoundError(f"sweep spec not found: {p}")
+    with p.open("r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict):
+        raise TypeError(f"sweep spec root must be a mapping, got {type(data)!r}")
+    return SweepSpec.from_dict(data)
+
+
+def _sample_param(rng: np.random.Generator, spec: Any) -> Any:
+    if isinstance(spec, (list, tuple)):
+        return spec[int(rng.integers(len(spec)))]
+    if isinstance(spec, Mapping):
+        if "choice" in spec:
+            return _sample_param(rng, list(spec["choice"]))
+        if "uniform" in spec:
+            lo, hi = (float(x) for x in spec["uniform"])
+            return float(rng.uniform(lo, hi))
+        if "log_uniform" in spec:
+            lo, hi = (float(x) for x in spec["log_uniform"])
+            if lo <= 0 or hi <= 0:
+                raise ValueError(f"log_uniform bounds must be > 0, got {spec!r}")
+            return float(math.exp(rng.uniform(math.log(lo), math.log(hi))))
+    return spec
+
+
+def expand_trials(spec: SweepSpec) -> List[Dict[str, Any]]:
+    """SweepSpec -> 每个 trial 的覆盖字典 {点路径: 值}."""
+    names = list(spec.params.keys())
+    for name in names:
+        if name in TIMELINE_FIELDS:
+            raise ValueError(f"{name!r} drives the timeline, which is built once per run")
+        if name.startswith("dvl_gate."):
+            raise ValueError(
+                f"{name!r} is consumed by DVL preprocessing (cli_proc), not by the ESKF; "
+                "re-run preprocessing to vary it"
+            )
+        if any(name == f or name.startswith(f + ".") for f in UNUSED_FIELDS):
+            raise ValueError(
+                f"{name!r} is never read by the ESKF pipeline "
+                "(DVL measurement noise comes from eskf.sigma_dvl_xy_mps / eskf.sigma_dvl_z_mps)"
+            )
+
+    if spec.mode == "grid":
+        axes = []
+        for name in names:
+            v = spec.params[name]
+            if isinstance(v, Mapping) and "choice" in v:
+                v = list(v["choice"])
+            if not isinstance(v, (list, tuple)):
+                v = [v]
+            axes.append(list(v))
+        return [dict(zip(names, combo)) for combo in itertools.product(*axes)]
+
+    if spec.mode == "random":
+        rng = np.random.default_rng(spec.seed)
+        return [
+            {name: _sample_param(rng, spec.params[name]) for name in names}
+            for _ in range(max(1, spec.n_samples))
+        ]
+
+    raise ValueError(f"Unknown sweep mode: {spec.mode!r} (expected 'grid' or 'random')")
+
+
+def apply_overrides(nav_cfg: NavConfig, overrides: Mapping[str, Any]) -> NavConfig:
+    """在 nav_cfg 的深拷贝上按点路径覆盖字段；路径必须已存在，值按原字段类型转换."""
+    cfg = copy.deepcopy(nav_cfg)
+    for path, value in overrides.items():
+        parts = str(path).split(".")
+        obj: Any = cfg
+        for name in parts[:-1]:
+            if not hasattr(obj, name):
+                raise KeyError(f"Unknown config path: {path!r}")
+            obj = getattr(obj, name)
+        leaf = parts[-1]
+        if not hasattr(obj, leaf):
+            raise KeyError(f"Unknown config path: {path!r}")
+        old = getattr(obj, leaf)
+        if isinstance(old, bool):
+            value = bool(value)
+        elif isinstance(old, (int, float)) and not isinstance(value, bool):
+            value = type(old)(value)
+        setattr(obj, leaf, value)
+    return cfg
+
+
+# =============================================================================
+# 打分
+# =============================================================================
+
+
+def _with_horizontal_columns(focus_df: pd.DataFrame) -> pd.DataFrame:
+    """engine 的 FocusMonitor 只记 ENU 三分量；补上 metrics 需要的水平量列."""
+    d = focus_df
+    need = ("vE_meas", "vN_meas", "vE_pre", "vN_pre")
+    if d.empty or not all(c in d.columns for c in need):
+        return d
+    d = d.copy()
+    d["speed_meas_h"] = np.hypot(d["vE_meas"].to_numpy(float), d["vN_meas"].to_numpy(float))
+    d["speed_pre_h"] = np.hypot(d["vE_pre"].to_numpy(float), d["vN_pre"].to_numpy(float))
+    d["verr_h"] = np.hypot(
+        d["vE_pre"].to_numpy(float) - d["vE_meas"].to_numpy(float),
+        d["vN_pre"].to_numpy(float) - d["vN_meas"].to_numpy(float),
+    )
+    return d
+
+
+def score_metrics(m: Mapping[str, Any], nis_dof: float) -> float:
+    """
+    越小越好：
+      |ln(nis_mean / nis_dof)|  —— 滤波器一致性（NIS 均值应接近观测维数）
+      + |ln(ratio_p50)|         —— 预测/观测速度比例应接近 1
+    指标缺失（empty / NaN）时返回 inf.
+    """
+    if m.get("empty", True):
+        return float("inf")
+    nis = float(m.get("nis_mean", float("nan")))
+    ratio = float(m.get("ratio_p50", float("nan")))
+    if not (np.isfinite(nis) and nis > 0 and np.isfinite(ratio) and ratio > 0):
+        return float("inf")
+    return abs(math.log(nis / nis_dof)) + abs(math.log(ratio))
+
+
+# =============================================================================
+# worker
+# =============================================================================
+
+
+@dataclass
+class _SweepShared:
+    nav_cfg: NavConfig
+    inputs: EskfInputs
+    timeline: Timeline
+    spec: SweepSpec
+    out_dir: str
+
+
+_SHARED: Optional[_SweepShared] = None
+
+
+def _init_worker(shared: _SweepShared) -> None:
+    global _SHARED
+    _SHARED = shared
+
+
+def _eval_trial(trial_id: int, overrides: Dict[str, Any]) -> Dict[str, Any]:
+    sh = _SHARED
+    if sh is None:
+        raise RuntimeError("sweep worker not initialised")
+
+    t0 = time.time()
+    row: Dict[str, Any] = {"trial": int(trial_id), **overrides}
+    try:
+        cfg = apply_overrides(sh.nav_cfg, overrides)
+        # engine 通过 getattr 读取这些可选项
+        setattr(cfg.eskf, "print_summary", False)
+        setattr(cfg.eskf, "focus_enabled", True)
+        setattr(cfg.eskf, "focus_record_every_used", 1)
+        setattr(
+            cfg.eskf,
+            "focus_out_csv",
+            str(Path(sh.out_dir) / "trials" / f"trial_{trial_id:04d}_focus.csv"),
+        )
+
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            out = run_eskf_pipeline(cfg, sh.inputs, sh.timeline)
+
+        focus_df = out.focus_df if out.focus_df is not None else pd.DataFrame()
+        m = compute_focus_metrics(_with_horizontal_columns(focus_df), sh.spec.metrics)
+        row.update(
+            {
+                k: v for k, v in m.items()
+                if not isinstance(v, (list, dict)) and k != "kind"
+            }
+        )
+        row["issues"] = ";".join(m.get("issues", []))
+        row["n_dvl_used_vel_BE"] = int(getattr(out.diag, "n_dvl_used_vel_BE", 0))
+        row["n_dvl_used_vel_BI"] = int(getattr(out.diag, "n_dvl_used_vel_BI", 0))
+        row["score"] = score_metrics(m, sh.spec.nis_dof)
+        row["error"] = ""
+    except Exception as e:
+        row["score"] = float("inf")
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["elapsed_s"] = time.time() - t0
+    return row
+
+
+# =============================================================================
+# 对外 API
+# =============================================================================
+
+
+def run_eskf_sweep(
+    nav_cfg: NavConfig,
+    inputs: EskfInputs,
+    timeline: Timeline,
+    spec: SweepSpec,
+    out_dir: str | Path,
+    max_workers: int = 0,
+) -> pd.DataFrame:
+    """
+    在同一份输入 / timeline 上并行评估 spec 展开的全部 trial，
+    返回按 score 升序排好的结果表，并写出 <out_dir>/sweep_results.csv 与 sweep_best.yaml.
+    """
+    out_root = Path(out_dir)
+    (out_root / "trials").mkdir(parents=True, exist_ok=True)
+
+    trials = expand_trials(spec)
+    # 先在主进程检查一遍路径，避免在 worker 里 N 次报同样的错
+    apply_overrides(nav_cfg, trials[0])
+
+    shared = _SweepShared(
+        nav_cfg=nav_cfg,
+        inputs=inputs,
+        timeline=timeline,
+        spec=spec,
+        out_dir=str(out_root),
+    )
+    n_workers = int(max_workers) if max_workers and max_workers > 0 else (os.cpu_count() or 1)
+    n_workers = max(1, min(n_workers, len(trials)))
+
+    print(f"[SWEEP] mode={spec.mode} trials={len(trials)} workers={n_workers}", flush=True)
+
+    rows: List[Dict[str, Any]] = []
+
+    def _report(row: Dict[str, Any]) -> None:
+        rows.append(row)
+        status = f"score={row['score']:.4f}" if not row["error"] else f"FAIL ({row['error']})"
+        print(f"[SWEEP] [{len(rows)}/{len(trials)}] trial={row['trial']} {status}", flush=True)
+
+    if n_workers == 1:
+        _init_worker(shared)
+        for i, ov in enumerate(trials):
+            _report(_eval_trial(i, ov))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(shared,),
+        ) as ex:
+            futs = [ex.submit(_eval_trial, i, ov) for i, ov in enumerate(trials)]
+            for fut in as_completed(futs):
+                _report(fut.result())
+
+    df = pd.DataFrame(rows).sort_values(["score", "trial"], kind="stable").reset_index(drop=True)
+    df.insert(0, "rank", np.arange(1, len(df) + 1))
+    df.to_csv(out_root / "sweep_results.csv", index=False)
+
+    best = df.iloc[0]
+    best_overrides = {name: _to_builtin(best[name]) for name in spec.params}
+    with (out_root / "sweep_best.yaml").open("w", encoding="utf-8") as f:
+        yaml.safe_dump(
+            {"score": _to_builtin(best["score"]), "overrides": best_overrides},
+            f,
+            sort_keys=False,
+            allow_unicode=True,
+        )
+    return df
+
+
+def _to_builtin(v: Any) -> Any:
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def summarize_sweep(df: pd.DataFrame, param_names: Sequence[str], top: int = 10) -> str:
+    cols = ["rank", "trial", *param_names, "score", "nis_mean", "nis_p95", "ratio_p50", "ratio_p95"]
+    cols = [c for c in cols if c in df.columns]
+    with pd.option_context("display.width", 200, "display.max_columns", 30):
+        return df[cols].head(top).to_string(index=False)
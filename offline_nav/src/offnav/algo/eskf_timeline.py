@@ -1,16 +1,18 @@
 # src/offnav/algo/eskf_timeline.py
 from __future__ import annotations
 
-from typing import Any, List, Tuple, Optional
+from typing import Any, Dict, Tuple, Optional
 
 import numpy as np
 
 from offnav.core.nav_config import NavConfig
 from offnav.algo.event_timeline import (
+    EventKind,
+    Timeline,
     TimelineConfig,
-    build_imu_events,
-    build_dvl_be_events,
-    merge_timeline,
+    build_dvl_timeline,
+    build_imu_timeline,
+    merge_timelines,
     TimeAlignmentReport,
 )
 
@@ -23,6 +25,24 @@ except Exception:  # pragma: no cover
 from .eskf_common import EskfInputs
 
 
+# build_eskf_timeline 读取的 nav_cfg.eskf 字段：
+# timeline 的缓存 key、参数扫描的“不可扫描字段”都以此为准
+TIMELINE_CONFIG_FIELDS = (
+    "dvl_match_policy",
+    "dvl_match_window_s",
+    "dvl_drop_older_than_s",
+    "require_gate_ok",
+    "require_speed_ok",
+    "require_valid",
+    "enable_bi_timeline",
+)
+
+
+def timeline_config_snapshot(nav_cfg: NavConfig) -> Dict[str, Any]:
+    """决定 timeline 的配置子集（缺省字段记为 None）."""
+    return {name: getattr(nav_cfg.eskf, name, None) for name in TIMELINE_CONFIG_FIELDS}
+
+
 def _pick_nav_start_from_rep(rep_be: Optional[TimeAlignmentReport],
                             rep_bi: Optional[TimeAlignmentReport]) -> Tuple[int, float]:
     """
@@ -107,9 +127,9 @@ def _merge_time_reports(rep_be: Optional[TimeAlignmentReport],
 def build_eskf_timeline(
     nav_cfg: NavConfig,
     inputs: EskfInputs,
-) -> Tuple[List[Any], TimeAlignmentReport]:
+) -> Tuple[Timeline, TimeAlignmentReport]:
     """
-    根据 nav_config.eskf 的时间匹配策略，把 IMU/DVL 组合成一个事件流 timeline。
+    根据 nav_config.eskf 的时间匹配策略，把 IMU/DVL 组合成一个列式事件流 timeline。
 
     本版支持：
       - DVL_BE 事件流（原有）
@@ -119,7 +139,7 @@ def build_eskf_timeline(
       - 若 BI 不存在或无 USED，则退回 BE
 
     输出：
-      - timeline   : [IMU, DVL_BE, DVL_BI, ...] 事件列表（已按 anchor IMU + 时间排序）
+      - timeline   : Timeline（列式；已按 anchor IMU + 时间排序，可迭代出 TimelineEvent）
       - time_report: IMU/DVL 覆盖时间段统计（包含 nav_k0/nav_t0/n_dvl_used 等）
     """
     imu_proc = inputs.imu_proc
@@ -144,32 +164,34 @@ def build_eskf_timeline(
     )
 
     # 1) DVL BE events（必做）
-    dvl_be_events, rep_be = build_dvl_be_events(imu_t, df_be, tl_cfg)
+    dvl_be_tl, rep_be = build_dvl_timeline(imu_t, df_be, tl_cfg, EventKind.DVL_BE)
 
     # 2) DVL BI events（可选做：有 df_bi 且 event_timeline 支持）
     #    注意：这里只生成“事件流”；是否消费更新在 engine 决定。
-    dvl_bi_events: List[Any] = []
+    dvl_bi_tl = Timeline.empty()
     rep_bi: Optional[TimeAlignmentReport] = None
 
     enable_bi_timeline = bool(getattr(nav_cfg.eskf, "enable_bi_timeline", True))
     if enable_bi_timeline and (df_bi is not None) and (build_dvl_bi_events is not None):
         try:
             dvl_bi_events, rep_bi = build_dvl_bi_events(imu_t, df_bi, tl_cfg)  # type: ignore[misc]
+            dvl_bi_tl = Timeline.from_events(dvl_bi_events)
         except Exception:
             # 不炸管线：退化为只用 BE timeline
-            dvl_bi_events, rep_bi = [], None
+            dvl_bi_tl, rep_bi = Timeline.empty(), None
 
     # 3) 严格起点：优先 BI，否则 BE
     nav_k0, nav_t0 = _pick_nav_start_from_rep(rep_be, rep_bi)
 
     # 4) IMU events 从 nav_k0 起算
-    imu_events = build_imu_events(imu_t, k0=int(nav_k0))
-
-    # 5) 合并事件流：IMU + DVL_BE + DVL_BI
-    #    merge_timeline 支持两两合并；这里采用串联合并，保证排序逻辑复用且行为一致。
-    timeline = merge_timeline(imu_events, dvl_be_events)
-    if len(dvl_bi_events) > 0:
-        timeline = merge_timeline(timeline, dvl_bi_events)
+    imu_tl = build_imu_timeline(imu_t, k0=int(nav_k0))
+
+    # 5) 合并事件流：IMU + DVL_BI + DVL_BE
+    #    同一 anchor 下依次为 IMU、BI、BE（与原先串联两次 merge_timeline 的顺序一致）。
+    if len(dvl_bi_tl) > 0:
+        timeline = merge_timelines(imu_tl, dvl_bi_tl, dvl_be_tl)
+    else:
+        timeline = merge_timelines(imu_tl, dvl_be_tl)
 
     # 6) 合并 time report（保持下游接口为一个 rep）
     rep = _merge_time_reports(rep_be, rep_bi, nav_k0=nav_k0, nav_t0=nav_t0)
@@ -4,11 +4,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
+from offnav.io.colcache import read_csv_cached
+
 
 # =============================================================================
 # Event definition
@@ -44,6 +46,129 @@ class TimelineEvent:
     used_reason: str = UseReason.USED_OK
 
 
+_KINDS: Tuple[EventKind, ...] = tuple(EventKind)
+_REASONS: Tuple[UseReason, ...] = tuple(UseReason)
+_KIND_CODE: Dict[EventKind, int] = {k: i for i, k in enumerate(_KINDS)}
+_REASON_CODE: Dict[UseReason, int] = {r: i for i, r in enumerate(_REASONS)}
+
+
+def _none_if_neg(x: int) -> Optional[int]:
+    return None if x < 0 else int(x)
+
+
+@dataclass
+class Timeline:
+    """
+    Columnar event stream: one row per event, all columns equal length.
+
+    kind / reason are int8 codes into EventKind / UseReason; -1 stands for None
+    in imu_k / dvl_j / anchor_k and NaN for a missing dt. Iterating (or
+    indexing with an int) yields TimelineEvent objects for compatibility;
+    engines should prefer segments() and the column arrays.
+    """
+    kind: np.ndarray
+    t_s: np.ndarray
+    imu_k: np.ndarray
+    dvl_j: np.ndarray
+    anchor_k: np.ndarray
+    dt_imu_minus_dvl_s: np.ndarray
+    used: np.ndarray
+    reason: np.ndarray
+
+    _COLUMNS = (
+        "kind", "t_s", "imu_k", "dvl_j", "anchor_k",
+        "dt_imu_minus_dvl_s", "used", "reason",
+    )
+
+    @classmethod
+    def empty(cls) -> "Timeline":
+        return cls(
+            kind=np.zeros(0, dtype=np.int8),
+            t_s=np.zeros(0, dtype=float),
+            imu_k=np.zeros(0, dtype=np.int64),
+            dvl_j=np.zeros(0, dtype=np.int64),
+            anchor_k=np.zeros(0, dtype=np.int64),
+            dt_imu_minus_dvl_s=np.zeros(0, dtype=float),
+            used=np.zeros(0, dtype=bool),
+            reason=np.zeros(0, dtype=np.int8),
+        )
+
+    @classmethod
+    def from_events(cls, events: Iterable[TimelineEvent]) -> "Timeline":
+        """Build from TimelineEvent objects (e.g. a timeline passed in by a caller)."""
+        if isinstance(events, Timeline):
+            return events
+        ev = list(events)
+
+        def _opt_int(x: Optional[int]) -> int:
+            return -1 if x is None else int(x)
+
+        return cls(
+            kind=np.array([_KIND_CODE[EventKind(e.kind)] for e in ev], dtype=np.int8),
+            t_s=np.array([e.t_s for e in ev], dtype=float),
+            imu_k=np.array([_opt_int(e.imu_k) for e in ev], dtype=np.int64),
+            dvl_j=np.array([_opt_int(e.dvl_j) for e in ev], dtype=np.int64),
+            anchor_k=np.array([_opt_int(e.imu_anchor_k) for e in ev], dtype=np.int64),
+            dt_imu_minus_dvl_s=np.array(
+                [np.nan if e.dt_imu_minus_dvl_s is None else e.dt_imu_minus_dvl_s for e in ev],
+                dtype=float,
+            ),
+            used=np.array([bool(e.used) for e in ev], dtype=bool),
+            reason=np.array([_REASON_CODE[UseReason(e.used_reason)] for e in ev], dtype=np.int8),
+        )
+
+    @classmethod
+    def concat(cls, parts: Sequence["Timeline"]) -> "Timeline":
+        if not parts:
+            return cls.empty()
+        return cls(**{c: np.concatenate([getattr(p, c) for p in parts]) for c in cls._COLUMNS})
+
+    def take(self, idx: np.ndarray) -> "Timeline":
+        return Timeline(**{c: getattr(self, c)[idx] for c in self._COLUMNS})
+
+    def __len__(self) -> int:
+        return int(self.t_s.shape[0])
+
+    def event(self, i: int) -> TimelineEvent:
+        """Row i as a TimelineEvent."""
+        dt = float(self.dt_imu_minus_dvl_s[i])
+        return TimelineEvent(
+            kind=_KINDS[int(self.kind[i])],
+            t_s=float(self.t_s[i]),
+            imu_k=_none_if_neg(int(self.imu_k[i])),
+            dvl_j=_none_if_neg(int(self.dvl_j[i])),
+            imu_anchor_k=_none_if_neg(int(self.anchor_k[i])),
+            dt_imu_minus_dvl_s=None if np.isnan(dt) else dt,
+            used=bool(self.used[i]),
+            used_reason=_REASONS[int(self.reason[i])],
+        )
+
+    def __getitem__(self, i: Any) -> Any:
+        if isinstance(i, slice):
+            return self.take(np.arange(len(self))[i])
+        return self.event(int(i))
+
+    def __iter__(self) -> Iterator[TimelineEvent]:
+        for i in range(len(self)):
+            yield self.event(i)
+
+    def to_list(self) -> List[TimelineEvent]:
+        return list(self)
+
+    def kind_mask(self, kind: EventKind) -> np.ndarray:
+        return self.kind == _KIND_CODE[EventKind(kind)]
+
+    def segments(self) -> Iterator[Tuple[EventKind, int, int]]:
+        """Yield (kind, start, stop) for each maximal run of same-kind events."""
+        n = len(self)
+        if n == 0:
+            return
+        cuts = np.flatnonzero(np.diff(self.kind)) + 1
+        bounds = np.concatenate([[0], cuts, [n]])
+        for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            yield _KINDS[int(self.kind[a])], a, b
+
+
 def _as_bool(val: Any, default: bool = False) -> bool:
     """
     Parse common "bool-like" values robustly:
@@ -118,7 +243,7 @@ def extract_dvl_bi_vel_body_frd(df: pd.DataFrame) -> np.ndarray:
 
 
 def load_csv_sorted(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path, low_memory=False)
+    df = read_csv_cached(path, low_memory=False)
     if df is None or df.empty:
         raise RuntimeError(f"CSV is empty: {path}")
     if "Src" in df.columns:
@@ -221,18 +346,51 @@ def _find_anchor_k(imu_t: np.ndarray, t_meas: float, policy: str) -> Optional[in
     raise ValueError(f"Unknown match_policy: {policy}")
 
 
-def build_dvl_be_events(
+def _as_bool_column(col: pd.Series, default: bool = False) -> np.ndarray:
+    """Column-wise _as_bool: parse each distinct value once, then look up."""
+    codes, uniq = pd.factorize(col, use_na_sentinel=True)
+    lut = np.array([_as_bool(v, default=default) for v in uniq] + [default], dtype=bool)
+    return lut[codes]
+
+
+def _find_anchor_k_array(imu_t: np.ndarray, t_meas: np.ndarray, policy: str) -> np.ndarray:
+    """Vectorized _find_anchor_k; -1 means no anchor."""
+    n = int(imu_t.size)
+    k = np.searchsorted(imu_t, t_meas, side="left").astype(np.int64)
+
+    if policy == "anchor_next":
+        return np.where(k >= n, -1, k)
+
+    if policy == "nearest":
+        if n == 1:
+            return np.zeros_like(k)
+        kc = np.clip(k, 1, n - 1)
+        take_hi = np.abs(imu_t[kc] - t_meas) <= np.abs(imu_t[kc - 1] - t_meas)
+        out = np.where(take_hi, kc, kc - 1)
+        out = np.where(k <= 0, 0, out)
+        return np.where(k >= n, n - 1, out).astype(np.int64)
+
+    raise ValueError(f"Unknown match_policy: {policy}")
+
+
+def build_dvl_timeline(
     imu_t: np.ndarray,
     dvl_df: pd.DataFrame,
     cfg: TimelineConfig,
-) -> Tuple[List[TimelineEvent], TimeAlignmentReport]:
+    kind: EventKind = EventKind.DVL_BE,
+) -> Tuple[Timeline, TimeAlignmentReport]:
     """
-    Build DVL-BE events with per-row gating and IMU anchoring.
+    Build DVL events (columnar) with per-row gating and IMU anchoring.
+
+    Gating order per row (first hit wins), same as the former per-row loop:
+      DROP_TOO_OLD -> DROP_INVALID (GateOk / SpeedOk / Valid)
+      -> DROP_OUT_OF_WINDOW (no anchor, or |dt| > match_window_s) -> USED_OK
 
-    Notes:
-      - This function DOES NOT build IMU events nor merge timeline.
-      - It also computes a TimeAlignmentReport including nav start (first USED event).
+    Rows are sorted by (anchor_k, t_s) with a stable lexsort; rows without
+    anchor go last. The TimeAlignmentReport carries the nav start
+    (anchor of the first USED event).
     """
+    imu_t = np.asarray(imu_t, dtype=float).reshape(-1)
     t_dvl = _extract_time_s(dvl_df)
     n_dvl = int(t_dvl.size)
 
@@ -251,129 +409,71 @@ def build_dvl_be_events(
             nav_t0=float(imu_t[0]) if imu_n else np.nan,
             n_dvl_used=0,
         )
-        return [], rep
+        return Timeline.empty(), rep
 
     imu_t0 = float(imu_t[0])
     imu_t1 = float(imu_t[-1])
     dvl_t0 = float(t_dvl[0])
     dvl_t1 = float(t_dvl[-1])
 
-    events: List[TimelineEvent] = []
-    n_used = 0
-
-    for j in range(n_dvl):
-        tm = float(t_dvl[j])
-
-        # 1) Strict: drop anything earlier than IMU start
-        if tm < imu_t0:
-            events.append(
-                TimelineEvent(
-                    kind=EventKind.DVL_BE,
-                    t_s=tm,
-                    dvl_j=j,
-                    imu_anchor_k=None,
-                    dt_imu_minus_dvl_s=None,
-                    used=False,
-                    used_reason=UseReason.DROP_TOO_OLD,
-                )
-            )
-            continue
-
-        # 2) Quality gates (conservative, only applied if column exists)
-        if cfg.require_gate_ok and ("GateOk" in dvl_df.columns):
-            if not _as_bool(dvl_df.at[j, "GateOk"], default=False):
-                events.append(
-                    TimelineEvent(
-                        kind=EventKind.DVL_BE,
-                        t_s=tm,
-                        dvl_j=j,
-                        used=False,
-                        used_reason=UseReason.DROP_INVALID,
-                    )
-                )
-                continue
-
-        if cfg.require_speed_ok and ("SpeedOk" in dvl_df.columns):
-            if not _as_bool(dvl_df.at[j, "SpeedOk"], default=False):
-                events.append(
-                    TimelineEvent(
-                        kind=EventKind.DVL_BE,
-                        t_s=tm,
-                        dvl_j=j,
-                        used=False,
-                        used_reason=UseReason.DROP_INVALID,
-                    )
-                )
-                continue
-
-        if cfg.require_valid and ("Valid" in dvl_df.columns):
-            if not _as_bool(dvl_df.at[j, "Valid"], default=False):
-                events.append(
-                    TimelineEvent(
-                        kind=EventKind.DVL_BE,
-                        t_s=tm,
-                        dvl_j=j,
-                        used=False,
-                        used_reason=UseReason.DROP_INVALID,
-                    )
-                )
-                continue
-
-        # 3) Find anchor IMU sample
-        k = _find_anchor_k(imu_t, tm, cfg.match_policy)
-        if k is None:
-            events.append(
-                TimelineEvent(
-                    kind=EventKind.DVL_BE,
-                    t_s=tm,
-                    dvl_j=j,
-                    used=False,
-                    used_reason=UseReason.DROP_OUT_OF_WINDOW,
-                )
-            )
-            continue
-
-        dt = float(imu_t[k] - tm)
-        if abs(dt) > cfg.match_window_s:
-            events.append(
-                TimelineEvent(
-                    kind=EventKind.DVL_BE,
-                    t_s=tm,
-                    dvl_j=j,
-                    imu_anchor_k=k,
-                    dt_imu_minus_dvl_s=dt,
-                    used=False,
-                    used_reason=UseReason.DROP_OUT_OF_WINDOW,
-                )
-            )
-            continue
-
-        events.append(
-            TimelineEvent(
-                kind=EventKind.DVL_BE,
-                t_s=tm,
-                dvl_j=j,
-                imu_anchor_k=k,
-                dt_imu_minus_dvl_s=dt,
-                used=True,
-                used_reason=UseReason.USED_OK,
-            )
-        )
-        n_used += 1
-
-    # Sort by anchor IMU index primarily, then by time
-    events.sort(
-        key=lambda e: (e.imu_anchor_k if e.imu_anchor_k is not None else 10**18, e.t_s)
-    )
+    # 1) Strict: drop anything earlier than IMU start
+    too_old = t_dvl < imu_t0
+
+    # 2) Quality gates (conservative, only applied if column exists)
+    invalid = np.zeros(n_dvl, dtype=bool)
+    for enabled, col in (
+        (cfg.require_gate_ok, "GateOk"),
+        (cfg.require_speed_ok, "SpeedOk"),
+        (cfg.require_valid, "Valid"),
+    ):
+        if enabled and (col in dvl_df.columns):
+            invalid |= ~_as_bool_column(dvl_df[col], default=False)
+    invalid &= ~too_old
+
+    # 3) Find anchor IMU sample
+    anchor = _find_anchor_k_array(imu_t, t_dvl, cfg.match_policy)
+    has_anchor = anchor >= 0
+    dt = np.full(n_dvl, np.nan, dtype=float)
+    dt[has_anchor] = imu_t[anchor[has_anchor]] - t_dvl[has_anchor]
+
+    gated = too_old | invalid
+    out_of_window = ~gated & (~has_anchor | (np.abs(dt) > cfg.match_window_s))
+    used = ~gated & ~out_of_window
+
+    reason = np.select(
+        [too_old, invalid, out_of_window],
+        [_REASON_CODE[UseReason.DROP_TOO_OLD],
+         _REASON_CODE[UseReason.DROP_INVALID],
+         _REASON_CODE[UseReason.DROP_OUT_OF_WINDOW]],
+        default=_REASON_CODE[UseReason.USED_OK],
+    ).astype(np.int8)
+
+    # gated rows carry no anchor / dt
+    anchor = np.where(gated, -1, anchor)
+    dt = np.where(gated, np.nan, dt)
+
+    # Sort by anchor IMU index primarily, then by time (stable)
+    sort_key = np.where(anchor >= 0, anchor, np.iinfo(np.int64).max)
+    order = np.lexsort((t_dvl, sort_key))
+
+    tl = Timeline(
+        kind=np.full(n_dvl, _KIND_CODE[kind], dtype=np.int8),
+        t_s=t_dvl.astype(float, copy=True),
+        imu_k=np.full(n_dvl, -1, dtype=np.int64),
+        dvl_j=np.arange(n_dvl, dtype=np.int64),
+        anchor_k=anchor.astype(np.int64),
+        dt_imu_minus_dvl_s=dt,
+        used=used,
+        reason=reason,
+    ).take(order)
 
     # nav start = first USED event's anchor (if any)
     nav_k0 = 0
     nav_t0 = imu_t0
-    for e in events:
-        if e.used and (e.imu_anchor_k is not None):
-            nav_k0 = int(e.imu_anchor_k)
-            nav_t0 = float(imu_t[nav_k0])
-            break
+    i_used = np.flatnonzero(tl.used & (tl.anchor_k >= 0))
+    if i_used.size > 0:
+        nav_k0 = int(tl.anchor_k[i_used[0]])
+        nav_t0 = float(imu_t[nav_k0])
 
     rep = TimeAlignmentReport(
         imu_t0=imu_t0,
@@ -386,10 +486,65 @@ def build_dvl_be_events(
         dt1_imu_minus_dvl=imu_t1 - dvl_t1,
         nav_k0=nav_k0,
         nav_t0=nav_t0,
-        n_dvl_used=int(n_used),
+        n_dvl_used=int(np.count_nonzero(used)),
+    )
+
+    return tl, rep
+
+
+def build_dvl_be_events(
+    imu_t: np.ndarray,
+    dvl_df: pd.DataFrame,
+    cfg: TimelineConfig,
+) -> Tuple[List[TimelineEvent], TimeAlignmentReport]:
+    """
+    List-of-events wrapper around build_dvl_timeline (DVL_BE), kept for callers
+    that still consume TimelineEvent objects.
+    """
+    tl, rep = build_dvl_timeline(imu_t, dvl_df, cfg, EventKind.DVL_BE)
+    return tl.to_list(), rep
+
+
+def build_imu_timeline(imu_t: np.ndarray, *, k0: int = 0) -> Timeline:
+    """Columnar IMU events for imu_t[k0:]."""
+    imu_t = np.asarray(imu_t, dtype=float).reshape(-1)
+    n = int(imu_t.size)
+    k0i = min(max(int(k0), 0), n)
+    ks = np.arange(k0i, n, dtype=np.int64)
+    m = int(ks.size)
+    return Timeline(
+        kind=np.full(m, _KIND_CODE[EventKind.IMU], dtype=np.int8),
+        t_s=imu_t[k0i:].copy(),
+        imu_k=ks,
+        dvl_j=np.full(m, -1, dtype=np.int64),
+        anchor_k=np.full(m, -1, dtype=np.int64),
+        dt_imu_minus_dvl_s=np.full(m, np.nan, dtype=float),
+        used=np.ones(m, dtype=bool),
+        reason=np.full(m, _REASON_CODE[UseReason.USED_OK], dtype=np.int8),
     )
 
-    return events, rep
+
+def merge_timelines(imu_tl: Timeline, *dvl_tls: Timeline) -> Timeline:
+    """
+    Columnar merge: for each IMU event (k), the IMU event comes first, then the
+    DVL events anchored to k — source by source in argument order, each sorted
+    by time.
+
+    DVL events without an anchor, or anchored to an IMU index not present in
+    imu_tl, are dropped (same as merge_timeline).
+    """
+    parts: List[Timeline] = [imu_tl]
+    groups: List[np.ndarray] = [np.zeros(len(imu_tl), dtype=np.int64)]
+    for g, d in enumerate(dvl_tls, start=1):
+        keep = np.flatnonzero((d.anchor_k >= 0) & np.isin(d.anchor_k, imu_tl.imu_k))
+        parts.append(d.take(keep))
+        groups.append(np.full(keep.size, g, dtype=np.int64))
+
+    tl = Timeline.concat(parts)
+    group = np.concatenate(groups)
+    key = np.where(tl.kind == _KIND_CODE[EventKind.IMU], tl.imu_k, tl.anchor_k)
+    order = np.lexsort((tl.t_s, group, key))
+    return tl.take(order)
 
 
 def build_imu_events(imu_t: np.ndarray, *, k0: int = 0) -> List[TimelineEvent]:
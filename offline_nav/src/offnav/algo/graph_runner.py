@@ -20,19 +20,21 @@ LV1 版主要思路：
     * yaw-from-vel 因子：用 DVL ENU 速度构造“航向角”观测约束 yaw_k
 """
 
+import dataclasses
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 
 import numpy as np
+import pandas as pd
 
 from offnav.core.types import ImuRawData, DvlRawData, Trajectory
 from offnav.core.nav_config import GraphConfig
 from offnav.graph.states import (
-    GraphState,
+    GraphStateArray,
     BiasState,
     pack_theta,
-    unpack_theta,
+    unpack_theta_array,
     wrap_yaw,
 )
 from offnav.graph.factors import (
@@ -41,9 +43,14 @@ from offnav.graph.factors import (
     DvlBEVelFactor,
     DvlBIVelFactor,
     YawFromVelFactor,
+    check_jacobians,
 )
 from offnav.graph.smoothing import gauss_newton_solve, GaussNewtonStats
-from offnav.models.attitude import AttitudeRPY, rpy_to_R_nb
+from offnav.graph.incremental import IncrementalSmoother
+from offnav.graph.sliding_window import sliding_window_solve
+from offnav.models.angles import wrap_pm_pi
+from offnav.models.attitude import rpy_to_R_nb_batch
+from offnav.models.attitude_series import AttitudeTimeSeries, TimeIndex
 from offnav.preprocess.imu_processing import (
     ImuProcessedData,
     load_imu_processed_csv,
@@ -86,41 +93,6 @@ def _get_time_s_from_dvl_df(df) -> np.ndarray:
         raise KeyError("DVL df has no EstS/MonoS/EstNS/MonoNS time column.")
 
 
-def _find_nearest_index(
-    t_array: np.ndarray,
-    t_q: float,
-    max_gap_s: float,
-) -> Optional[int]:
-    """
-    在给定时间轴 t_array 上找到与 t_q 最近的索引 k，
-    如果最近时间差 > max_gap_s 则返回 None。
-    """
-    n = t_array.shape[0]
-    if n == 0:
-        return None
-
-    idx = np.searchsorted(t_array, t_q)
-    candidates: List[int] = []
-    if 0 <= idx < n:
-        candidates.append(idx)
-    if 0 <= idx - 1 < n:
-        candidates.append(idx - 1)
-    if not candidates:
-        return None
-
-    best_k: Optional[int] = None
-    best_dt: Optional[float] = None
-    for k in candidates:
-        dt = abs(float(t_array[k]) - t_q)
-        if best_dt is None or dt < best_dt:
-            best_dt = dt
-            best_k = k
-
-    if best_dt is not None and best_dt <= max_gap_s:
-        return best_k
-    return None
-
-
 def _select_keyframe_indices(
     t_imu: np.ndarray,
     *,
@@ -167,6 +139,11 @@ class GraphDiagnostics:
     gn_initial_cost: float
     gn_final_cost: float
 
+    gn_method: str = "gn"
+    gn_accepted: int = 0
+    gn_rejected: int = 0
+    n_windows: int = 1         # 滑窗模式下的窗口数（全局批处理为 1）
+
 
 # ============================================================
 # 初始状态构造：基于 IMU 的粗略 dead-reckon（每帧一个）
@@ -178,16 +155,17 @@ def _build_initial_guess(
     cfg: GraphConfig,
     proc_dir: Optional[Path],
     run_id: Optional[str],
-) -> Tuple[List[GraphState], BiasState, np.ndarray]:
+) -> Tuple[GraphStateArray, BiasState, np.ndarray]:
     """
-    基于 IMU 做一个简单 dead-reckon，构造“每一帧 IMU”的 GraphState 序列
-    和全局 BiasState 初值。
+    基于 IMU 做一个简单 dead-reckon，构造“每一帧 IMU”的状态
+    （struct-of-arrays: GraphStateArray）和全局 BiasState 初值。
 
     - 支持通过 cfg.max_imu_samples 对 IMU 进行前缀裁剪；
     - yaw 初值来自 cfg.init_yaw_rad 或 IMU AngZ[0]；
     - p, v 初值从 0 开始，使用简化的欧拉积分：
         v_{k+1} = v_k + a_n * dt
-        p_{k+1} = p_k + v_k * dt + 0.5 * a_n * dt^2
+        p_{k+1} = p_k + v_{k+1} * dt + 0.5 * a_n * dt^2
+      整段一次完成：旋转矩阵一次 einsum，v/p 用累加和积分
     - bias 初值设为 0（后续由先验因子收紧）
     """
     # ---------- 0) 读取完整 IMU DataFrame + 时间轴 ----------
@@ -252,84 +230,40 @@ def _build_initial_guess(
         yaw0 = 0.0
     yaw0 = wrap_yaw(yaw0)
 
-    roll0 = np.deg2rad(float(df_imu["AngX"].iloc[0]))
-    pitch0 = np.deg2rad(float(df_imu["AngY"].iloc[0]))
-    _ = roll0  # 当前未直接使用，预留
-
-    # ---------- 5) 初始 p, v ----------
-    p = np.array([0.0, 0.0, 0.0], dtype=float)
-    v = np.zeros(3, dtype=float)
-    yaw = yaw0
-
-    states: List[GraphState] = []
-    # k=0
-    states.append(
-        GraphState(
-            t_s=float(t_imu[0]),
-            p=p.copy(),
-            v=v.copy(),
-            yaw=yaw,
-        )
-    )
+    # ---------- 5) 整列读取姿态 / 加速度 / 角速度 ----------
+    roll = np.deg2rad(df_imu["AngX"].to_numpy(dtype=float)[:n_imu])
+    pitch = np.deg2rad(df_imu["AngY"].to_numpy(dtype=float)[:n_imu])
 
-    # ---------- 6) 主循环：粗略 dead-reckon ----------
-    for k in range(1, n_imu):
-        t_prev = float(t_imu[k - 1])
-        t_curr = float(t_imu[k])
-        dt = t_curr - t_prev
-        if dt <= 0.0:
-            # 时间轴异常时，保持上一状态
-            states.append(
-                GraphState(
-                    t_s=t_curr,
-                    p=p.copy(),
-                    v=v.copy(),
-                    yaw=yaw,
-                )
-            )
-            continue
-
-        # roll/pitch：仍用原始 IMU
-        roll = np.deg2rad(float(df_imu["AngX"].iloc[k]))
-        pitch = np.deg2rad(float(df_imu["AngY"].iloc[k]))
-
-        # 加速度/角速度：processed or raw
-        if imu_proc is not None:
-            acc_body = imu_proc.acc_mps2[k, :].reshape(3)
-            gyro_body = imu_proc.gyro_rad_s[k, :].reshape(3)
-        else:
-            ax = float(df_imu["AccX"].iloc[k])
-            ay = float(df_imu["AccY"].iloc[k])
-            az = float(df_imu["AccZ"].iloc[k])
-            acc_body = np.array([ax, ay, az], dtype=float) * g_to_mps2_raw
-
-            gx = float(df_imu["GyroX"].iloc[k])
-            gy = float(df_imu["GyroY"].iloc[k])
-            gz = float(df_imu["GyroZ"].iloc[k])
-            gyro_body = np.deg2rad(np.array([gx, gy, gz], dtype=float))
-
-        yaw_rate = float(gyro_body[2])
-
-        att = AttitudeRPY(
-            roll=roll,
-            pitch=pitch,
-            yaw=yaw,
-        )
-        R_nb = rpy_to_R_nb(att)
-        a_n = R_nb @ acc_body + g_n
-
-        v = v + a_n * dt
-        p = p + v * dt + 0.5 * a_n * dt * dt
-        yaw = wrap_yaw(yaw + yaw_rate * dt)
-
-        states.append(
-            GraphState(
-                t_s=t_curr,
-                p=p.copy(),
-                v=v.copy(),
-                yaw=yaw,
-            )
-        )
+    if imu_proc is not None:
+        acc_body = np.asarray(imu_proc.acc_mps2, dtype=float)[:n_imu, :3]
+        gyro_z = np.asarray(imu_proc.gyro_rad_s, dtype=float)[:n_imu, 2]
+    else:
+        acc_body = df_imu[["AccX", "AccY", "AccZ"]].to_numpy(dtype=float)[:n_imu] * g_to_mps2_raw
+        gyro_z = np.deg2rad(df_imu["GyroZ"].to_numpy(dtype=float)[:n_imu])
+
+    # ---------- 6) 批量 dead-reckon ----------
+    # dt_k = t_k - t_{k-1}；时间轴异常 (dt<=0) 的样本增量置零，即保持上一状态
+    dt = np.zeros(n_imu, dtype=float)
+    dt[1:] = np.diff(t_imu[:n_imu])
+    dt[dt <= 0.0] = 0.0
+
+    # yaw_k = yaw0 + Σ_{j<=k} gz_j dt_j；第 k 步旋转使用步前航向 yaw_{k-1}
+    yaw_unwrapped = yaw0 + np.cumsum(gyro_z * dt)
+    yaw_prev = np.empty(n_imu, dtype=float)
+    yaw_prev[0] = yaw0
+    yaw_prev[1:] = yaw_unwrapped[:-1]
+
+    R_nb = rpy_to_R_nb_batch(roll, pitch, yaw_prev)                 # (N,3,3)
+    a_n = np.einsum("nij,nj->ni", R_nb, acc_body) + g_n              # (N,3)
+    a_n[0] = 0.0
+
+    # v_k = v_{k-1} + a_n dt；p_k = p_{k-1} + v_k dt + 0.5 a_n dt^2
+    # 直接累加进 θ 缓冲区的视图
+    states = GraphStateArray(t_imu[:n_imu])
+    dt_col = dt[:, None]
+    np.cumsum(a_n * dt_col, axis=0, out=states.v)
+    np.cumsum(states.v * dt_col + 0.5 * a_n * dt_col * dt_col, axis=0, out=states.p)
+    wrap_pm_pi(yaw_unwrapped, out=states.yaw)
 
     # ---------- 7) 全局 bias 初值 ----------
     bias = BiasState(
@@ -340,20 +274,37 @@ def _build_initial_guess(
     return states, bias, t_imu
 
 # ============================================================
-# 主管线：构图 + GN 平滑（关键帧 LV1 版）
+# 构图工具：IMU 侧（关键帧 + 先验 + IMU 因子）/ DVL 因子
 # ============================================================
-def run_graph_pipeline(
+
+
+@dataclass
+class _GraphSetup:
+    """与 DVL 无关、同一航次可复用的构图结果."""
+
+    df_imu: pd.DataFrame
+    t_imu: np.ndarray
+    att: AttitudeTimeSeries    # 原始 IMU 姿态（AngX/AngY/AngZ），整列解析一次
+    kfs: np.ndarray            # 关键帧 -> 原始 IMU 索引
+    t_nodes: np.ndarray        # 节点时间轴
+    n_imu: int
+    n_states: int
+    theta0: np.ndarray
+    base_factors: List[object]  # 先验 + IMU 过程因子
+    n_f_prior: int
+    n_f_imu: int
+
+
+def _build_graph_setup(
     imu_raw: ImuRawData,
-    dvl_raw: DvlRawData,
     cfg: GraphConfig,
-    proc_dir: Optional[Path] = None,
-    run_id: Optional[str] = None,
-) -> Tuple[Trajectory, GraphDiagnostics]:
-    """
-    因子图导航离线轨迹求解主入口（关键帧 LV1 版）.
-    """
+    proc_dir: Optional[Path],
+    run_id: Optional[str],
+    *,
+    max_nodes: Optional[int],
+) -> _GraphSetup:
+    """初值 + 关键帧选择 + 先验因子 + IMU 过程因子."""
     df_imu = imu_raw.df
-    df_dvl_raw = dvl_raw.df
 
     # ---------- 1) 构造“每帧 IMU”的初始状态与 bias（内部可裁剪 IMU） ----------
     states_full, bias_init, t_imu = _build_initial_guess(imu_raw, cfg, proc_dir, run_id)
@@ -363,8 +314,6 @@ def run_graph_pipeline(
 
     # ---------- 1.1 关键帧下采样 ----------
     keyframe_stride = int(getattr(cfg, "keyframe_stride", 10))
-    max_nodes = getattr(cfg, "max_nodes", 1000)
-
     kfs = _select_keyframe_indices(
         t_imu,
         keyframe_stride=keyframe_stride,
@@ -375,44 +324,39 @@ def run_graph_pipeline(
             f"关键帧数量过少：{kfs.size} (< 2)，请检查 keyframe_stride/max_nodes 或 IMU 数据长度"
         )
 
+    # 原始 IMU 姿态序列（IMU / DVL-BI 因子的 roll/pitch 均从这里按索引取）
+    yaw_raw = (
+        np.deg2rad(df_imu["AngZ"].to_numpy(dtype=float)[:n_imu])
+        if "AngZ" in df_imu.columns else np.zeros(n_imu, dtype=float)
+    )
+    att = AttitudeTimeSeries(
+        t_imu[:n_imu],
+        np.deg2rad(df_imu["AngX"].to_numpy(dtype=float)[:n_imu]),
+        np.deg2rad(df_imu["AngY"].to_numpy(dtype=float)[:n_imu]),
+        yaw_raw,
+    )
+
     # 关键帧状态列表 + 节点时间轴（图中的真实节点）
-    states_init: List[GraphState] = [states_full[int(k)] for k in kfs]
+    states_init = states_full.take(kfs)
     t_nodes = t_imu[kfs]
     n_states = len(states_init)
 
-    # ---------- 2) 载入/统一 DVL 源 ----------
-    dvl_proc: DvlProcessedData | None = None
-    use_dvl_proc = getattr(cfg, "use_processed_dvl", False)
-    if use_dvl_proc:
-        if proc_dir is None or run_id is None:
-            raise ValueError("GraphConfig.use_processed_dvl=True，但未提供 proc_dir/run_id")
-        dvl_proc = load_dvl_processed_csv(proc_dir, run_id)
-
-    if dvl_proc is not None:
-        df_dvl = dvl_proc.df_all
-    else:
-        df_dvl = df_dvl_raw
-
-    t_dvl = _get_time_s_from_dvl_df(df_dvl)
-    n_dvl_all = len(df_dvl)
-
-    # ---------- 3) pack θ 初值（只针对关键帧节点） ----------
+    # ---------- 2) pack θ 初值（只针对关键帧节点） ----------
     theta0 = pack_theta(states_init, bias_init)
-    D = theta0.size
 
-    # ---------- 4) 构造因子列表 ----------
+    # ---------- 3) 先验 + IMU 因子 ----------
     factors: List[object] = []  # 每个元素需实现 Factor 协议
 
-    # 4.1 先验因子（第一个关键帧 + bias）
+    # 3.1 先验因子（第一个关键帧 + bias）
     prior_p_std = float(getattr(cfg, "prior_p_std", 0.10))  # m
     prior_v_std = float(getattr(cfg, "prior_v_std", 0.10))  # m/s
     prior_yaw_std = float(getattr(cfg, "prior_yaw_std", np.deg2rad(10.0)))  # rad
     prior_ba_std = float(getattr(cfg, "prior_ba_std", 1.0e-2))  # m/s^2
     prior_bgz_std = float(getattr(cfg, "prior_bgz_std", np.deg2rad(1.0)))  # rad/s
 
-    p0_mean = states_init[0].p.copy()
-    v0_mean = states_init[0].v.copy()
-    yaw0_mean = states_init[0].yaw
+    p0_mean = states_init.p[0].copy()
+    v0_mean = states_init.v[0].copy()
+    yaw0_mean = float(states_init.yaw[0])
     ba_mean = bias_init.ba.copy()
     bgz_mean = bias_init.bgz
 
@@ -433,7 +377,7 @@ def run_graph_pipeline(
     )
     n_f_prior = 1
 
-    # 4.2 IMU 过程因子（仅在相邻关键帧之间建边，LV1 模型）
+    # 3.2 IMU 过程因子（仅在相邻关键帧之间建边，LV1 模型）
     g_val = float(getattr(cfg, "gravity", 9.78))
     g_to_mps2_raw = float(getattr(cfg, "imu_raw_g_to_mps2", 9.78))
 
@@ -463,8 +407,8 @@ def run_graph_pipeline(
                 continue
 
             # roll/pitch 取起点关键帧的 IMU 姿态（LV1 简化）
-            roll = np.deg2rad(float(df_imu["AngX"].iloc[k0]))
-            pitch = np.deg2rad(float(df_imu["AngY"].iloc[k0]))
+            roll = float(att.roll[k0])
+            pitch = float(att.pitch[k0])
 
             if imu_proc is not None:
                 acc_body = imu_proc.acc_mps2[k0, :].reshape(3)
@@ -500,7 +444,59 @@ def run_graph_pipeline(
         # 不用 IMU 因子时，n_f_imu 保持 0 即可
         n_f_imu = 0
 
-    # 4.3 DVL 因子（对齐到关键帧时间轴 t_nodes）
+    return _GraphSetup(
+        df_imu=df_imu,
+        t_imu=t_imu,
+        att=att,
+        kfs=kfs,
+        t_nodes=t_nodes,
+        n_imu=n_imu,
+        n_states=n_states,
+        theta0=theta0,
+        base_factors=factors,
+        n_f_prior=n_f_prior,
+        n_f_imu=n_f_imu,
+    )
+
+
+def _load_dvl_df(
+    dvl_raw: DvlRawData,
+    cfg: GraphConfig,
+    proc_dir: Optional[Path],
+    run_id: Optional[str],
+) -> pd.DataFrame:
+    """载入/统一 DVL 源（processed 优先）."""
+    dvl_proc: DvlProcessedData | None = None
+    use_dvl_proc = getattr(cfg, "use_processed_dvl", False)
+    if use_dvl_proc:
+        if proc_dir is None or run_id is None:
+            raise ValueError("GraphConfig.use_processed_dvl=True，但未提供 proc_dir/run_id")
+        dvl_proc = load_dvl_processed_csv(proc_dir, run_id)
+
+    if dvl_proc is not None:
+        return dvl_proc.df_all
+    return dvl_raw.df
+
+
+def _build_dvl_factors(
+    df_dvl: pd.DataFrame,
+    setup: _GraphSetup,
+    cfg: GraphConfig,
+) -> Tuple[List[object], int, int, int]:
+    """
+    DVL 因子（对齐到关键帧时间轴 t_nodes）.
+
+    返回 (factors, n_be, n_bi, n_yaw).
+    """
+    att = setup.att
+    kfs = setup.kfs
+    node_index = TimeIndex(setup.t_nodes)
+    n_states = setup.n_states
+
+    t_dvl = _get_time_s_from_dvl_df(df_dvl)
+    n_dvl_all = len(df_dvl)
+
+    factors: List[object] = []
     use_dvl_BI_vel = bool(getattr(cfg, "use_dvl_BI_vel", True))
     use_dvl_BE_vel = bool(getattr(cfg, "use_dvl_BE_vel", True))
     use_dvl_yaw_from_vel = bool(getattr(cfg, "use_dvl_yaw_from_vel", True))
@@ -515,11 +511,12 @@ def run_graph_pipeline(
     n_f_dvl_bi = 0
     n_f_yaw = 0
 
+    # 一次性在关键帧时间轴上为全部 DVL 样本找最近节点（超出 max_gap_s 为 -1）
+    k_states = node_index.nearest(t_dvl, max_gap_s)
+
     for j in range(n_dvl_all):
-        t_d = float(t_dvl[j])
-        # 在关键帧时间轴上找最近节点
-        k_state = _find_nearest_index(t_nodes, t_d, max_gap_s)
-        if k_state is None:
+        k_state = int(k_states[j])
+        if k_state < 0:
             continue
 
         row = df_dvl.iloc[j]
@@ -537,8 +534,8 @@ def run_graph_pipeline(
             else:
                 # roll/pitch ：使用对应关键帧的原始 IMU 姿态
                 k_imu_idx = int(kfs[k_state])  # 映射回原始 IMU 索引
-                roll = np.deg2rad(float(df_imu["AngX"].iloc[k_imu_idx]))
-                pitch = np.deg2rad(float(df_imu["AngY"].iloc[k_imu_idx]))
+                roll = float(att.roll[k_imu_idx])
+                pitch = float(att.pitch[k_imu_idx])
                 vel_body = np.array([vx_b, vy_b, vz_b], dtype=float)
 
                 factors.append(
@@ -588,60 +585,119 @@ def run_graph_pipeline(
                         )
                         n_f_yaw += 1
 
-    n_f_total = len(factors)
+    return factors, n_f_dvl_be, n_f_dvl_bi, n_f_yaw
 
-    # 调试输出：当前问题规模
-    print(
-        f"[GRAPH] n_imu={n_imu}  n_states={n_states}  "
-        f"dim(theta)={D}  n_factors={n_f_total}"
+
+def _solve_kwargs_from_cfg(cfg: GraphConfig) -> dict:
+    """GraphConfig -> gauss_newton_solve 关键字参数（默认值以 GraphConfig 为准；tol_* 不在配置里）."""
+    return dict(
+        max_iters=int(cfg.max_iterations),
+        tol_step=float(getattr(cfg, "tol_step", 1e-6)),
+        tol_cost_rel=float(getattr(cfg, "tol_cost_rel", 1e-6)),
+        robust_loss="huber" if cfg.use_robust_loss else None,
+        robust_param=float(cfg.robust_loss_param),
+        linear_solver=str(cfg.linear_solver),
+        group_factors=bool(cfg.group_factors),
+        method=str(cfg.optimizer),
+        line_search=bool(cfg.line_search),
+        lambda_init=float(cfg.lambda_init),
+        lambda_min=float(cfg.lambda_min),
+        lambda_max=float(cfg.lambda_max),
     )
 
-    # ---------- 5) Gauss-Newton 平滑 ----------
-    max_iters = int(getattr(cfg, "max_iterations", 20))
-    use_robust_loss = bool(getattr(cfg, "use_robust_loss", True))
-    robust_param = float(getattr(cfg, "robust_loss_param", 1.0))
 
-    robust_loss_type = "huber" if use_robust_loss else None
+def _theta_to_trajectory(theta_opt: np.ndarray, t_nodes: np.ndarray) -> Trajectory:
+    """解包 θ -> Trajectory（关键帧时间轴）."""
+    states_opt = unpack_theta_array(theta_opt, t_nodes)
 
-    theta_opt, gn_stats = gauss_newton_solve(
-        factors=factors,
-        theta0=theta0,
-        max_iters=max_iters,
-        tol_step=float(getattr(cfg, "tol_step", 1e-6)),
-        tol_cost_rel=float(getattr(cfg, "tol_cost_rel", 1e-6)),
-        robust_loss=robust_loss_type,
-        robust_param=robust_param,
-        verbose=bool(getattr(cfg, "verbose", False)),
+    return Trajectory(
+        t_s=states_opt.t_s.copy(),
+        E=states_opt.p[:, 0].copy(),
+        N=states_opt.p[:, 1].copy(),
+        U=states_opt.p[:, 2].copy(),
+        yaw_rad=wrap_pm_pi(states_opt.yaw),
     )
 
-    # ---------- 6) 解包 θ -> states + bias ----------
-    # 注意：这里用的是关键帧时间轴 t_nodes
-    states_opt, bias_opt = unpack_theta(theta_opt, t_nodes)
-    _ = bias_opt  # 当前仅做调试，可在后续扩展输出
-
-    # ---------- 7) 打包 Trajectory ----------
-    t_arr = np.asarray([st.t_s for st in states_opt], dtype=float)
-    E_arr = np.asarray([st.p[0] for st in states_opt], dtype=float)
-    N_arr = np.asarray([st.p[1] for st in states_opt], dtype=float)
-    U_arr = np.asarray([st.p[2] for st in states_opt], dtype=float)
-    yaw_arr = np.asarray([st.yaw for st in states_opt], dtype=float)
-
-    traj = Trajectory(
-        t_s=t_arr,
-        E=E_arr,
-        N=N_arr,
-        U=U_arr,
-        yaw_rad=yaw_arr,
+
+# ============================================================
+# 主管线：构图 + GN 平滑（关键帧 LV1 版）
+# ============================================================
+def run_graph_pipeline(
+    imu_raw: ImuRawData,
+    dvl_raw: DvlRawData,
+    cfg: GraphConfig,
+    proc_dir: Optional[Path] = None,
+    run_id: Optional[str] = None,
+) -> Tuple[Trajectory, GraphDiagnostics]:
+    """
+    因子图导航离线轨迹求解主入口（关键帧 LV1 版）.
+    """
+    max_nodes = getattr(cfg, "max_nodes", 1000)
+
+    # 滑窗模式下每个窗口规模固定，不再需要 max_nodes 截断整段航次
+    window_size = int(cfg.window_size)
+    if window_size > 0:
+        max_nodes = None
+
+    # ---------- 1) 初值 + 关键帧 + 先验/IMU 因子 ----------
+    setup = _build_graph_setup(imu_raw, cfg, proc_dir, run_id, max_nodes=max_nodes)
+    n_states = setup.n_states
+    theta0 = setup.theta0
+    D = theta0.size
+
+    # ---------- 2) DVL 因子 ----------
+    df_dvl = _load_dvl_df(dvl_raw, cfg, proc_dir, run_id)
+    n_dvl_all = len(df_dvl)
+    dvl_factors, n_f_dvl_be, n_f_dvl_bi, n_f_yaw = _build_dvl_factors(df_dvl, setup, cfg)
+
+    factors: List[object] = list(setup.base_factors) + dvl_factors
+    n_f_total = len(factors)
+
+    # 调试输出：当前问题规模
+    print(
+        f"[GRAPH] n_imu={setup.n_imu}  n_states={n_states}  "
+        f"dim(theta)={D}  n_factors={n_f_total}"
     )
 
-    # ---------- 8) 诊断信息 ----------
+    # 测试模式：在初值处校验解析雅可比
+    if cfg.check_jacobians:
+        check_jacobians(factors, theta0, verbose=True)
+
+    # ---------- 3) Gauss-Newton 平滑 ----------
+    solve_kwargs = _solve_kwargs_from_cfg(cfg)
+
+    n_windows = 1
+    if window_size > 0 and n_states > window_size:
+        # 3') 滑窗平滑：每个窗口 GN/LM + 边缘化最旧结点
+        theta_opt, gn_stats, win_stats = sliding_window_solve(
+            factors,
+            theta0,
+            n_states,
+            window_size=window_size,
+            window_step=int(cfg.window_step),
+            verbose=bool(getattr(cfg, "verbose", False)),
+            **solve_kwargs,
+        )
+        n_windows = len(win_stats)
+    else:
+        theta_opt, gn_stats = gauss_newton_solve(
+            factors=factors,
+            theta0=theta0,
+            verbose=bool(getattr(cfg, "verbose", False)),
+            **solve_kwargs,
+        )
+
+    # ---------- 4) 打包 Trajectory（关键帧时间轴 t_nodes） ----------
+    traj = _theta_to_trajectory(theta_opt, setup.t_nodes)
+
+    # ---------- 5) 诊断信息 ----------
     diag = GraphDiagnostics(
-        n_imu=n_imu,
+        n_imu=setup.n_imu,
         n_dvl_all=n_dvl_all,
         n_states=n_states,
         n_factors_total=n_f_total,
-        n_factors_prior=n_f_prior,
-        n_factors_imu=n_f_imu,
+        n_factors_prior=setup.n_f_prior,
+        n_factors_imu=setup.n_f_imu,
         n_factors_dvl_be=n_f_dvl_be,
         n_factors_dvl_bi=n_f_dvl_bi,
         n_factors_yaw=n_f_yaw,
@@ -649,6 +705,142 @@ def run_graph_pipeline(
         gn_iters=gn_stats.num_iters,
         gn_initial_cost=gn_stats.initial_cost,
         gn_final_cost=gn_stats.final_cost,
+        gn_method=gn_stats.method,
+        gn_accepted=gn_stats.n_accepted,
+        gn_rejected=gn_stats.n_rejected,
+        n_windows=n_windows,
     )
 
     return traj, diag
+
+
+# ============================================================
+# 增量会话：同一航次的参数扫描
+# ============================================================
+
+
+def _factor_key(f: object) -> Tuple:
+    """因子内容键（类型 + 全部数值字段），用于在两次构图之间 diff 因子."""
+    vals: List[float] = []
+    for fld in dataclasses.fields(f):
+        v = getattr(f, fld.name)
+        if isinstance(v, (bool, int, float, np.number, np.ndarray)):
+            vals.extend(np.ravel(np.asarray(v, dtype=float)).tolist())
+    return (type(f).__name__, tuple(vals))
+
+
+class GraphSession:
+    """
+    同一航次的增量因子图会话.
+
+    IMU 侧（初值、关键帧、先验 + IMU 因子）只构建并线性化一次；
+    每次 solve(dvl_raw) 重新构造 DVL 因子，与上一次按内容 diff，
+    只增删发生变化的因子，再由 IncrementalSmoother 部分重分解 +
+    按阈值重线性化。用于在同一航次上扫描 DVL 门限等参数:
+
+        session = GraphSession(imu_raw, cfg)
+        for dvl_raw in gated_variants:
+            traj, diag = session.solve(dvl_raw)
+
+    始终做全局平滑（不走滑窗），max_nodes 照常生效。
+    """
+
+    def __init__(
+        self,
+        imu_raw: ImuRawData,
+        cfg: GraphConfig,
+        proc_dir: Optional[Path] = None,
+        run_id: Optional[str] = None,
+    ) -> None:
+        self.cfg = cfg
+        self.proc_dir = proc_dir
+        self.run_id = run_id
+
+        self.setup = _build_graph_setup(
+            imu_raw,
+            cfg,
+            proc_dir,
+            run_id,
+            max_nodes=getattr(cfg, "max_nodes", 1000),
+        )
+
+        kw = _solve_kwargs_from_cfg(cfg)
+        self._max_iters = kw["max_iters"]
+        self._tol_step = kw["tol_step"]
+        self._tol_cost_rel = kw["tol_cost_rel"]
+
+        self.smoother = IncrementalSmoother(
+            self.setup.theta0,
+            self.setup.n_states,
+            robust_loss=kw["robust_loss"],
+            robust_param=kw["robust_param"],
+            relin_threshold=float(cfg.relin_threshold),
+            verbose=bool(getattr(cfg, "verbose", False)),
+        )
+        self.smoother.add_factors(self.setup.base_factors)
+
+        # DVL 因子内容键 -> 句柄列表（允许内容相同的重复因子）
+        self._dvl_handles: Dict[Tuple, List[int]] = {}
+
+    def solve(self, dvl_raw: DvlRawData) -> Tuple[Trajectory, GraphDiagnostics]:
+        """以新的 DVL 数据更新因子图并增量求解."""
+        setup = self.setup
+        df_dvl = _load_dvl_df(dvl_raw, self.cfg, self.proc_dir, self.run_id)
+        dvl_factors, n_f_dvl_be, n_f_dvl_bi, n_f_yaw = _build_dvl_factors(
+            df_dvl, setup, self.cfg
+        )
+
+        wanted: Dict[Tuple, List[object]] = {}
+        for f in dvl_factors:
+            wanted.setdefault(_factor_key(f), []).append(f)
+
+        # diff：多余的删除，缺少的新增，其余保留（不重线性化）
+        to_remove: List[int] = []
+        for key, hs in self._dvl_handles.items():
+            n_keep = len(wanted.get(key, ()))
+            if len(hs) > n_keep:
+                to_remove.extend(hs[n_keep:])
+                del hs[n_keep:]
+        self.smoother.remove_factors(to_remove)
+
+        n_added = 0
+        for key, fs in wanted.items():
+            hs = self._dvl_handles.setdefault(key, [])
+            if len(fs) > len(hs):
+                n_new = len(fs) - len(hs)
+                hs.extend(self.smoother.add_factors(fs[len(hs):]))
+                n_added += n_new
+        self._dvl_handles = {k: hs for k, hs in self._dvl_handles.items() if hs}
+
+        n_f_total = self.smoother.num_factors
+        print(
+            f"[GRAPH][ISAM] n_states={setup.n_states}  n_factors={n_f_total}  "
+            f"dvl +{n_added} / -{len(to_remove)}"
+        )
+
+        theta_opt, gn_stats = self.smoother.update(
+            max_iters=self._max_iters,
+            tol_step=self._tol_step,
+            tol_cost_rel=self._tol_cost_rel,
+        )
+
+        traj = _theta_to_trajectory(theta_opt, setup.t_nodes)
+        diag = GraphDiagnostics(
+            n_imu=setup.n_imu,
+            n_dvl_all=len(df_dvl),
+            n_states=setup.n_states,
+            n_factors_total=n_f_total,
+            n_factors_prior=setup.n_f_prior,
+            n_factors_imu=setup.n_f_imu,
+            n_factors_dvl_be=n_f_dvl_be,
+            n_factors_dvl_bi=n_f_dvl_bi,
+            n_factors_yaw=n_f_yaw,
+            gn_converged=gn_stats.converged,
+            gn_iters=gn_stats.num_iters,
+            gn_initial_cost=gn_stats.initial_cost,
+            gn_final_cost=gn_stats.final_cost,
+            gn_method=gn_stats.method,
+            gn_accepted=gn_stats.n_accepted,
+            gn_rejected=gn_stats.n_rejected,
+        )
+        return traj, diag
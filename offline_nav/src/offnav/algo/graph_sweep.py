@@ -0,0 +1,182 @@
+# src/offnav/algo/graph_sweep.py
+from __future__ import annotations
+
+"""
+因子图 DVL 门限扫描（GraphSession 增量求解）。
+
+offnav-nav graph 每次都从头构图、线性化、求解。扫描 DVL 门限时 IMU 侧
+（初值、关键帧、先验 + IMU 因子）并不变化，这里改为：
+
+- 每个 run 只构造一次 GraphSession（IMU 侧只构建、线性化一次）；
+- 每个 trial 用覆盖后的 DvlEventsConfig 对原始 DVL 做 gate + 离群 + 低通（preprocess_dvl_events），
+  BI/BE 事件按时间合并后交给 session.solve：只增删发生变化的 DVL 因子，
+  部分重分解 + 按阈值重线性化；
+- trial 按 expand_trials 的顺序串行求解（grid 模式下相邻 trial 只差一个取值，因子变化最小）。
+
+参数键为 dvl.<DvlEventsConfig 字段>，例如
+    dvl.speed_max_m_s / dvl.dv_xy_max_m_s / dvl.outlier_k / dvl.lowpass_window_s
+没有真值，不打分：结果表记录每个 trial 的 DVL 事件 / 因子数、GN 迭代数、cost 与耗时，
+轨迹逐 trial 落盘，供离线对比。
+
+注意：graph.use_processed_dvl 会让 session 忽略传入的 DVL，扫描时强制关闭。
+"""
+
+import copy
+import dataclasses
+import os
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence
+
+import pandas as pd
+
+from offnav.algo.eskf_sweep import SweepSpec, expand_trials
+from offnav.algo.graph_runner import GraphSession
+from offnav.core.nav_config import GraphConfig
+from offnav.core.types import DvlRawData, ImuRawData
+from offnav.preprocess.dvl_processing import DvlEventsConfig, preprocess_dvl_events
+
+
+# 扫描参数键前缀：dvl.<DvlEventsConfig 字段>
+DVL_PARAM_PREFIX = "dvl."
+
+
+# =============================================================================
+# trial -> DVL 输入
+# =============================================================================
+
+
+def dvl_events_config(overrides: Mapping[str, Any]) -> DvlEventsConfig:
+    """在默认 DvlEventsConfig 上按 dvl.<字段> 覆盖；字段必须已存在，值按原字段类型转换."""
+    base = DvlEventsConfig()
+    fields = {f.name for f in dataclasses.fields(base)}
+    changes: Dict[str, Any] = {}
+    for path, value in overrides.items():
+        path = str(path)
+        name = path[len(DVL_PARAM_PREFIX):] if path.startswith(DVL_PARAM_PREFIX) else ""
+        if name not in fields:
+            raise KeyError(f"Unknown graph sweep param: {path!r} (expected dvl.<DvlEventsConfig field>)")
+        old = getattr(base, name)
+        if isinstance(old, bool):
+            value = bool(value)
+        elif isinstance(old, (int, float)) and not isinstance(value, bool):
+            value = type(old)(value)
+        changes[name] = value
+    return dataclasses.replace(base, **changes)
+
+
+def gated_dvl_raw(dvl_raw: DvlRawData, ev_cfg: DvlEventsConfig) -> DvlRawData:
+    """按 ev_cfg 预处理原始 DVL，BI/BE 事件按时间合并成 graph 可直接消费的 DvlRawData."""
+    ev = preprocess_dvl_events(dvl_raw, ev_cfg)
+    parts = [d for d in (ev.df_bi, ev.df_be) if d is not None and not d.empty]
+    if not parts:
+        return DvlRawData(df=pd.DataFrame(), source_path=dvl_raw.source_path)
+    df = pd.concat(parts, ignore_index=True)
+    if ev_cfg.time_col in df.columns:
+        df = df.sort_values(ev_cfg.time_col, kind="stable").reset_index(drop=True)
+    return DvlRawData(df=df, source_path=dvl_raw.source_path)
+
+
+# =============================================================================
+# 对外 API
+# =============================================================================
+
+
+def run_graph_sweep(
+    imu_raw: ImuRawData,
+    dvl_raw: DvlRawData,
+    cfg: GraphConfig,
+    spec: SweepSpec,
+    out_dir: str | Path,
+    proc_dir: Path | None = None,
+    run_id: str | None = None,
+) -> pd.DataFrame:
+    """
+    在同一个 GraphSession 上依次求解 spec 展开的全部 trial，
+    返回按 trial 顺序的结果表，并写出 <out_dir>/graph_sweep_results.csv
+    与 <out_dir>/trials/trial_XXXX_traj_graph.csv.
+    """
+    out_root = Path(out_dir)
+    (out_root / "trials").mkdir(parents=True, exist_ok=True)
+
+    trials = expand_trials(spec)
+    # 先把全部 trial 的键检查一遍，避免构图后才报错
+    for ov in trials:
+        dvl_events_config(ov)
+
+    if not any(
+        bool(getattr(cfg, name, True))
+        for name in ("use_dvl_BI_vel", "use_dvl_BE_vel", "use_dvl_yaw_from_vel")
+    ):
+        raise ValueError(
+            "graph.use_dvl_BI_vel / use_dvl_BE_vel / use_dvl_yaw_from_vel are all false; "
+            "DVL gating params have no effect on the graph"
+        )
+
+    # graph 通过 getattr 读取该可选项
+    cfg = copy.copy(cfg)
+    setattr(cfg, "use_processed_dvl", False)
+
+    t0 = time.time()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        session = GraphSession(imu_raw, cfg, proc_dir=proc_dir, run_id=run_id)
+    print(
+        f"[GSWEEP] mode={spec.mode} trials={len(trials)}  "
+        f"session built in {time.time() - t0:.2f}s (n_states={session.setup.n_states})",
+        flush=True,
+    )
+
+    rows: List[Dict[str, Any]] = []
+    for i, ov in enumerate(trials):
+        t0 = time.time()
+        row: Dict[str, Any] = {"trial": int(i), **ov}
+        try:
+            dvl_i = gated_dvl_raw(dvl_raw, dvl_events_config(ov))
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                traj, diag = session.solve(dvl_i)
+            traj.as_dataframe().to_csv(
+                out_root / "trials" / f"trial_{i:04d}_traj_graph.csv", index=False
+            )
+            row.update(
+                {
+                    "n_dvl_events": int(diag.n_dvl_all),
+                    "n_factors_dvl_be": int(diag.n_factors_dvl_be),
+                    "n_factors_dvl_bi": int(diag.n_factors_dvl_bi),
+                    "n_factors_yaw": int(diag.n_factors_yaw),
+                    "n_factors_total": int(diag.n_factors_total),
+                    "gn_iters": int(diag.gn_iters),
+                    "gn_converged": bool(diag.gn_converged),
+                    "gn_final_cost": float(diag.gn_final_cost),
+                }
+            )
+            row["error"] = ""
+        except Exception as e:
+            row["error"] = f"{type(e).__name__}: {e}"
+        row["elapsed_s"] = time.time() - t0
+        rows.append(row)
+
+        status = (
+            f"iters={row['gn_iters']} cost={row['gn_final_cost']:.4g} "
+            f"dvl_f={row['n_factors_dvl_be'] + row['n_factors_dvl_bi']}"
+            if not row["error"]
+            else f"FAIL ({row['error']})"
+        )
+        print(
+            f"[GSWEEP] [{i + 1}/{len(trials)}] trial={i} {status}  {row['elapsed_s']:.2f}s",
+            flush=True,
+        )
+
+    df = pd.DataFrame(rows)
+    df.to_csv(out_root / "graph_sweep_results.csv", index=False)
+    return df
+
+
+def summarize_graph_sweep(df: pd.DataFrame, param_names: Sequence[str], top: int = 10) -> str:
+    cols = [
+        "trial", *param_names, "n_factors_dvl_be", "n_factors_dvl_bi",
+        "gn_iters", "gn_converged", "gn_final_cost", "elapsed_s",
+    ]
+    cols = [c for c in cols if c in df.columns]
+    with pd.option_context("display.width", 200, "display.max_columns", 30):
+        return df[cols].head(top).to_string(index=False)
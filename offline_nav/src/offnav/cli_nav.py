@@ -4,24 +4,34 @@ from __future__ import annotations
 import argparse
 from contextlib import redirect_stdout
 from pathlib import Path
+from typing import Optional, Tuple
 
 import pandas as pd
 
 from offnav.core.nav_config import NavConfig, load_nav_config
+from offnav.core.stage_cache import DEFAULT_STAGE_CACHE_DIR, DEFAULT_STAGE_CACHE_MB, StageCache
 from offnav.core.types import DvlRawData, ImuRawData
+from offnav.io.colcache import read_csv_cached
 from offnav.io.dataset import DatasetIndex
 
 # ------------------------------
 # 导航管线导入
 # ------------------------------
 
-from offnav.algo.deadreckon import run_deadreckon_pipeline
+from offnav.algo.deadreckon import DeadReckonDiagnostics, run_deadreckon_pipeline
+from offnav.algo.graph_runner import GraphDiagnostics, run_graph_pipeline
+from offnav.algo.eskf_timeline import timeline_config_snapshot
+from offnav.algo.event_timeline import TimeAlignmentReport
+from offnav.algo.eskf_sweep import load_sweep_spec, run_eskf_sweep, summarize_sweep
+from offnav.algo.graph_sweep import run_graph_sweep, summarize_graph_sweep
 
 # 直接使用已经成熟的 eskf_runner 管线，而不是 eskf_engine 封装
 from offnav.algo.eskf_runner import (
     EskfInputs,
     EskfOutputs,
     build_eskf_timeline,
+    find_eskf_input_csvs,
+    load_eskf_inputs,
     run_eskf_pipeline,
 )
 
@@ -34,8 +44,8 @@ from offnav.algo.eskf_audit import (
     print_frame_consistency_diagnostics,
 )
 
-from offnav.preprocess import load_imu_processed_csv
 from offnav.viz.traj_basic import save_depth_ut, save_planar_en
+from offnav.nav_batch import METHODS as BATCH_METHODS, run_nav_batch
 
 
 # =============================================================================
@@ -46,7 +56,7 @@ from offnav.viz.traj_basic import save_depth_ut, save_planar_en
 def _build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
         prog="offnav-nav",
-        description="Offline navigation pipelines (dead-reckon / ESKF)",
+        description="Offline navigation pipelines (dead-reckon / ESKF / graph / sweep / graph-sweep)",
     )
     p.add_argument(
         "--dataset-config",
@@ -60,6 +70,23 @@ def _build_parser() -> argparse.ArgumentParser:
         default="configs/nav.yaml",
         help="Navigation config YAML (deadreckon / eskf / frames / dvl_gate sections)",
     )
+    p.add_argument(
+        "--stage-cache-dir",
+        type=str,
+        default=str(DEFAULT_STAGE_CACHE_DIR),
+        help="Stage cache for raw load / ESKF timeline / filter outputs (content-addressed)",
+    )
+    p.add_argument(
+        "--stage-cache-mb",
+        type=float,
+        default=DEFAULT_STAGE_CACHE_MB,
+        help="Disk budget of the stage cache in MB; least recently used entries are evicted",
+    )
+    p.add_argument(
+        "--no-stage-cache",
+        action="store_true",
+        help="Always recompute every stage (do not read or write the stage cache)",
+    )
 
     sub = p.add_subparsers(dest="cmd", required=True)
 
@@ -129,6 +156,143 @@ def _build_parser() -> argparse.ArgumentParser:
         ),
     )
 
+    # --------------------------------------------------
+    # offnav-nav graph --run ... [--out-dir ...] [--proc-dir ...]
+    # --------------------------------------------------
+    p_graph = sub.add_parser("graph", help="Run factor-graph smoothing pipeline")
+    p_graph.add_argument("--run", required=True, help="run_id defined in dataset.yaml")
+    p_graph.add_argument(
+        "--out-dir",
+        type=str,
+        default="out/nav_graph",
+        help="Root directory to save outputs (default: out/nav_graph)",
+    )
+    p_graph.add_argument(
+        "--proc-dir",
+        type=str,
+        default="../out/proc",
+        help="Root directory of preprocessed IMU/DVL (same as cli_proc --out-dir).",
+    )
+
+    # --------------------------------------------------
+    # offnav-nav batch [--runs a,b] [--methods eskf,graph] [--max-workers N]
+    # --------------------------------------------------
+    p_batch = sub.add_parser(
+        "batch",
+        help="Run several pipelines over several runs in a process pool",
+    )
+    p_batch.add_argument(
+        "--runs",
+        type=str,
+        default="all",
+        help="Comma-separated run_ids from dataset.yaml, or 'all' (default)",
+    )
+    p_batch.add_argument(
+        "--methods",
+        type=str,
+        default=",".join(BATCH_METHODS),
+        help=f"Comma-separated pipelines out of {','.join(BATCH_METHODS)} (default: all)",
+    )
+    p_batch.add_argument(
+        "--out-dir",
+        type=str,
+        default="out/nav_batch",
+        help="Root directory; each method writes to <out-dir>/<method>/<run_id>",
+    )
+    p_batch.add_argument(
+        "--proc-dir",
+        type=str,
+        default="../out/proc",
+        help="Root directory of preprocessed IMU/DVL (same as cli_proc --out-dir).",
+    )
+    p_batch.add_argument(
+        "--max-workers",
+        type=int,
+        default=0,
+        help="Upper bound on worker processes (0 = CPU count)",
+    )
+    p_batch.add_argument(
+        "--mem-per-worker-mb",
+        type=float,
+        default=0.0,
+        help=(
+            "Expected peak memory per task in MB, used to cap workers by available RAM "
+            "(0 = estimate from input CSV sizes)"
+        ),
+    )
+
+    # --------------------------------------------------
+    # offnav-nav sweep --run ... --spec configs/eskf_sweep.yaml [--max-workers N]
+    # --------------------------------------------------
+    p_sweep = sub.add_parser(
+        "sweep",
+        help="Grid / random search over ESKF config fields, ranked by focus metrics",
+    )
+    p_sweep.add_argument("--run", required=True, help="run_id defined in dataset.yaml")
+    p_sweep.add_argument(
+        "--spec",
+        type=str,
+        default="configs/eskf_sweep.yaml",
+        help="Sweep spec YAML (mode / params / n_samples / seed)",
+    )
+    p_sweep.add_argument(
+        "--out-dir",
+        type=str,
+        default="out/nav_sweep",
+        help="Root directory; results go to <out-dir>/<run_id>",
+    )
+    p_sweep.add_argument(
+        "--proc-dir",
+        type=str,
+        default="../out/proc",
+        help="Root directory of preprocessed IMU/DVL (same as cli_proc --out-dir).",
+    )
+    p_sweep.add_argument(
+        "--max-workers",
+        type=int,
+        default=0,
+        help="Worker processes (0 = CPU count)",
+    )
+    p_sweep.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of ranked trials to print",
+    )
+
+    # --------------------------------------------------
+    # offnav-nav graph-sweep --run ... --spec configs/graph_sweep.yaml
+    # --------------------------------------------------
+    p_gsweep = sub.add_parser(
+        "graph-sweep",
+        help="Sweep DVL gating params on one incremental factor graph (GraphSession)",
+    )
+    p_gsweep.add_argument("--run", required=True, help="run_id defined in dataset.yaml")
+    p_gsweep.add_argument(
+        "--spec",
+        type=str,
+        default="configs/graph_sweep.yaml",
+        help="Sweep spec YAML (mode / params / n_samples / seed); params are dvl.<DvlEventsConfig field>",
+    )
+    p_gsweep.add_argument(
+        "--out-dir",
+        type=str,
+        default="out/nav_graph_sweep",
+        help="Root directory; results go to <out-dir>/<run_id>",
+    )
+    p_gsweep.add_argument(
+        "--proc-dir",
+        type=str,
+        default="../out/proc",
+        help="Root directory of preprocessed IMU/DVL (same as cli_proc --out-dir).",
+    )
+    p_gsweep.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of trials to print",
+    )
+
     return p
 
 
@@ -211,339 +375,545 @@ def _dump_eskf_update_diag_if_any(
 
 
 # =============================================================================
-# Main
+# Per-run pipelines (single-run CLI and batch workers)
 # =============================================================================
 
 
-def main(argv: list[str] | None = None) -> int:
-    parser = _build_parser()
-    args = parser.parse_args(argv)
+def run_deadreckon_for_run(
+    idx: DatasetIndex,
+    nav_cfg: NavConfig,
+    run_id: str,
+    out_dir: str | Path,
+    proc_dir: str | Path,
+    cli_mode: Optional[str] = None,
+) -> DeadReckonDiagnostics:
+    """
+    单个 run 的 dead-reckon：读预处理 CSV、求解、落盘轨迹与图，返回诊断。
+    `offnav-nav deadreckon` 与 `offnav-nav batch` 共用。
+    """
+    _ = idx.load_run(run_id)
+
+    out_root = Path(out_dir) / run_id
+    out_root.mkdir(parents=True, exist_ok=True)
+
+    proc_root = Path(proc_dir)
+    proc_dir = proc_root / run_id
+
+    imu_csv = proc_dir / f"{run_id}_imu_filtered.csv"
+    if not imu_csv.exists():
+        raise FileNotFoundError(f"IMU processed CSV not found: {imu_csv}")
+
+    dr_cfg = nav_cfg.deadreckon
+    if cli_mode is not None:
+        dr_cfg.mode = str(cli_mode)
+        print(f"[DEADRECKON] Override mode from CLI: {dr_cfg.mode!r}")
+
+    mode = getattr(dr_cfg, "mode", "IMU+DVL") or "IMU+DVL"
+    dr_cfg.mode = mode
+    mode_norm = str(mode).upper()
+    print(f"[DEADRECKON] Running mode = {mode_norm!r}")
+
+    # 选择 DVL CSV
+    dvl_csv = None
+    if mode_norm == "DVL_BE_ONLY":
+        candidates = [
+            proc_dir / f"{run_id}_dvl_BE.csv",
+            proc_dir / f"{run_id}_dvl_filtered_BE.csv",
+        ]
+    elif mode_norm in ("IMU+DVL", "IMU_DVL", "IMU_PLUS_DVL"):
+        candidates = [
+            proc_dir / f"{run_id}_dvl_BI.csv",
+            proc_dir / f"{run_id}_dvl_filtered_BI.csv",
+        ]
+    elif mode_norm == "IMU_ONLY":
+        candidates = [
+            proc_dir / f"{run_id}_dvl_BI.csv",
+            proc_dir / f"{run_id}_dvl_filtered_BI.csv",
+            proc_dir / f"{run_id}_dvl_BE.csv",
+            proc_dir / f"{run_id}_dvl_filtered_BE.csv",
+        ]
+    else:
+        print(
+            f"[DEADRECKON][WARN] Unknown deadreckon.mode={mode!r}, "
+            "fallback to 'IMU+DVL' (BI)."
+        )
+        dr_cfg.mode = "IMU+DVL"
+        mode_norm = "IMU+DVL"
+        candidates = [
+            proc_dir / f"{run_id}_dvl_BI.csv",
+            proc_dir / f"{run_id}_dvl_filtered_BI.csv",
+        ]
+
+    for c in candidates:
+        if c.exists():
+            dvl_csv = c
+            break
+
+    if dvl_csv is None:
+        cand_str = ", ".join(str(p.name) for p in candidates)
+        raise FileNotFoundError(
+            f"DVL processed CSV not found for deadreckon.mode={mode!r} under {proc_dir}\n"
+            f"  Tried: {cand_str}"
+        )
 
-    dataset_cfg = Path(args.dataset_config)
-    idx = DatasetIndex(dataset_cfg)
+    print(f"[DEADRECKON] Using DVL CSV: {dvl_csv.name}")
 
-    nav_cfg: NavConfig = load_nav_config(args.nav_config)
+    df_imu = read_csv_cached(imu_csv, low_memory=False)
+    df_dvl = read_csv_cached(dvl_csv, low_memory=False)
 
-    # --------------------------------------------------
-    # deadreckon pipeline
-    # --------------------------------------------------
-    if args.cmd == "deadreckon":
-        run_id: str = args.run
-        _ = idx.load_run(run_id)
-
-        out_root = Path(args.out_dir) / run_id
-        out_root.mkdir(parents=True, exist_ok=True)
-
-        proc_root = Path(args.proc_dir)
-        proc_dir = proc_root / run_id
-
-        imu_csv = proc_dir / f"{run_id}_imu_filtered.csv"
-        if not imu_csv.exists():
-            raise FileNotFoundError(f"IMU processed CSV not found: {imu_csv}")
-
-        dr_cfg = nav_cfg.deadreckon
-        cli_mode = getattr(args, "mode", None)
-        if cli_mode is not None:
-            dr_cfg.mode = str(cli_mode)
-            print(f"[DEADRECKON] Override mode from CLI: {dr_cfg.mode!r}")
-
-        mode = getattr(dr_cfg, "mode", "IMU+DVL") or "IMU+DVL"
-        dr_cfg.mode = mode
-        mode_norm = str(mode).upper()
-        print(f"[DEADRECKON] Running mode = {mode_norm!r}")
-
-        # 选择 DVL CSV
-        dvl_csv = None
-        if mode_norm == "DVL_BE_ONLY":
-            candidates = [
-                proc_dir / f"{run_id}_dvl_BE.csv",
-                proc_dir / f"{run_id}_dvl_filtered_BE.csv",
-            ]
-        elif mode_norm in ("IMU+DVL", "IMU_DVL", "IMU_PLUS_DVL"):
-            candidates = [
-                proc_dir / f"{run_id}_dvl_BI.csv",
-                proc_dir / f"{run_id}_dvl_filtered_BI.csv",
-            ]
-        elif mode_norm == "IMU_ONLY":
-            candidates = [
-                proc_dir / f"{run_id}_dvl_BI.csv",
-                proc_dir / f"{run_id}_dvl_filtered_BI.csv",
-                proc_dir / f"{run_id}_dvl_BE.csv",
-                proc_dir / f"{run_id}_dvl_filtered_BE.csv",
-            ]
-        else:
-            print(
-                f"[DEADRECKON][WARN] Unknown deadreckon.mode={mode!r}, "
-                "fallback to 'IMU+DVL' (BI)."
-            )
-            dr_cfg.mode = "IMU+DVL"
-            mode_norm = "IMU+DVL"
-            candidates = [
-                proc_dir / f"{run_id}_dvl_BI.csv",
-                proc_dir / f"{run_id}_dvl_filtered_BI.csv",
-            ]
-
-        for c in candidates:
-            if c.exists():
-                dvl_csv = c
-                break
-
-        if dvl_csv is None:
-            cand_str = ", ".join(str(p.name) for p in candidates)
-            raise FileNotFoundError(
-                f"DVL processed CSV not found for deadreckon.mode={mode!r} under {proc_dir}\n"
-                f"  Tried: {cand_str}"
-            )
+    imu_data = ImuRawData(df=df_imu, source_path=str(imu_csv))
+    dvl_data = DvlRawData(df=df_dvl, source_path=str(dvl_csv))
 
-        print(f"[DEADRECKON] Using DVL CSV: {dvl_csv.name}")
+    traj, diag = run_deadreckon_pipeline(imu_data, dvl_data, dr_cfg)
 
-        df_imu = pd.read_csv(imu_csv, low_memory=False)
-        df_dvl = pd.read_csv(dvl_csv, low_memory=False)
+    suffix = mode_norm.replace("+", "plus")
+    traj_path = out_root / f"{run_id}_traj_deadreckon_{suffix}.csv"
+    traj.to_csv(traj_path)
 
-        imu_data = ImuRawData(df=df_imu, source_path=str(imu_csv))
-        dvl_data = DvlRawData(df=df_dvl, source_path=str(dvl_csv))
+    method_name = f"Dead-reckon-{mode_norm}"
+    fig_en = save_planar_en(traj=traj, out_dir=out_root, run_id=run_id, method_name=method_name)
+    fig_depth = save_depth_ut(traj=traj, out_dir=out_root, run_id=run_id, method_name=method_name)
 
-        traj, diag = run_deadreckon_pipeline(imu_data, dvl_data, dr_cfg)
+    print(f"[DEADRECKON] Trajectory saved to: {traj_path}")
+    print(f"[DEADRECKON] EN figure saved to:  {fig_en}")
+    print(f"[DEADRECKON] Depth figure saved:  {fig_depth}")
+    if hasattr(diag, "n_imu") and hasattr(diag, "n_dvl"):
+        print(f"[DEADRECKON] n_imu={diag.n_imu}  n_dvl={diag.n_dvl}")
+    return diag
 
-        suffix = mode_norm.replace("+", "plus")
-        traj_path = out_root / f"{run_id}_traj_deadreckon_{suffix}.csv"
-        traj.to_csv(traj_path, index=False)
 
-        method_name = f"Dead-reckon-{mode_norm}"
-        fig_en = save_planar_en(traj=traj, out_dir=out_root, run_id=run_id, method_name=method_name)
-        fig_depth = save_depth_ut(traj=traj, out_dir=out_root, run_id=run_id, method_name=method_name)
+def run_eskf_for_run(
+    idx: DatasetIndex,
+    nav_cfg: NavConfig,
+    run_id: str,
+    out_dir: str | Path,
+    proc_dir: str | Path,
+    cli_mode: Optional[str] = None,
+    cache: Optional[StageCache] = None,
+) -> EskfDiagnostics:
+    """
+    单个 run 的 ESKF：读预处理 CSV、构造 timeline、求解、落盘轨迹/审计/诊断，返回诊断。
+    `offnav-nav eskf` 与 `offnav-nav batch` 共用。
 
-        print(f"[DEADRECKON] Trajectory saved to: {traj_path}")
-        print(f"[DEADRECKON] EN figure saved to:  {fig_en}")
-        print(f"[DEADRECKON] Depth figure saved:  {fig_depth}")
-        if hasattr(diag, "n_imu") and hasattr(diag, "n_dvl"):
-            print(f"[DEADRECKON] n_imu={diag.n_imu}  n_dvl={diag.n_dvl}")
-        return 0
+    cache 启用时 timeline / 滤波结果按内容寻址缓存：只改 ESKF 参数时 timeline 命中，
+    输入与配置都没变时滤波也直接命中。
+    """
+    if cache is None:
+        cache = StageCache(enabled=False, verbose=False)
+
+    _ = idx.load_run_cached(run_id, cache)
+
+    out_root = Path(out_dir) / run_id
+    out_root.mkdir(parents=True, exist_ok=True)
+
+    proc_root = Path(proc_dir)
+    proc_dir = proc_root / run_id
+
+    # IMU / DVL-BE（必需）+ DVL-BI（可选）
+    imu_csv, dvl_be_csv, dvl_bi_csv = find_eskf_input_csvs(proc_dir, run_id)
+    if dvl_bi_csv is not None:
+        print(f"[ESKF] Using DVL BI CSV: {dvl_bi_csv.name}")
+    else:
+        print(
+            "[ESKF] DVL BI CSV not found "
+            f"({run_id}_dvl_BI[_filtered].csv), "
+            "ESKF will fall back to BE velocities only for horizontals."
+        )
 
-    # --------------------------------------------------
-    # ESKF pipeline
-    # --------------------------------------------------
-    if args.cmd == "eskf":
-        run_id: str = args.run
-        _ = idx.load_run(run_id)
-
-        out_root = Path(args.out_dir) / run_id
-        out_root.mkdir(parents=True, exist_ok=True)
-
-        proc_root = Path(args.proc_dir)
-        proc_dir = proc_root / run_id
-
-        # IMU
-        imu_csv = proc_dir / f"{run_id}_imu_filtered.csv"
-        if not imu_csv.exists():
-            raise FileNotFoundError(f"IMU processed CSV not found: {imu_csv}")
-        imu_proc = load_imu_processed_csv(str(imu_csv))
-
-        # DVL-BE
-        dvl_be_csv = proc_dir / f"{run_id}_dvl_BE.csv"
-        if not dvl_be_csv.exists():
-            alt_be = proc_dir / f"{run_id}_dvl_filtered_BE.csv"
-            if alt_be.exists():
-                dvl_be_csv = alt_be
-        if not dvl_be_csv.exists():
-            raise FileNotFoundError(
-                f"DVL BE processed CSV not found: {proc_dir}/{run_id}_dvl_BE.csv "
-                f"(also tried {proc_dir}/{run_id}_dvl_filtered_BE.csv)"
-            )
-        df_dvl_be = pd.read_csv(dvl_be_csv, low_memory=False)
-
-        # DVL-BI（可选）
-        dvl_bi_csv = proc_dir / f"{run_id}_dvl_BI.csv"
-        df_dvl_bi = None
-        if not dvl_bi_csv.exists():
-            alt_bi = proc_dir / f"{run_id}_dvl_filtered_BI.csv"
-            if alt_bi.exists():
-                dvl_bi_csv = alt_bi
-        if dvl_bi_csv.exists():
-            df_dvl_bi = pd.read_csv(dvl_bi_csv, low_memory=False)
-            print(f"[ESKF] Using DVL BI CSV: {dvl_bi_csv.name}")
-        else:
-            print(
-                "[ESKF] DVL BI CSV not found "
-                f"({run_id}_dvl_BI[_filtered].csv), "
-                "ESKF will fall back to BE velocities only for horizontals."
-            )
+    # 模式覆盖
+    cfg_mode = getattr(nav_cfg.eskf, "mode", "full_ins")
+    if cli_mode is not None:
+        mode = str(cli_mode)
+        setattr(nav_cfg.eskf, "mode", mode)
+        print(f"[ESKF] Override mode from CLI: {mode!r}")
+    else:
+        mode = str(cfg_mode) if cfg_mode is not None else "full_ins"
+    mode = mode.lower()
+    if mode not in ("full_ins", "local_vel"):
+        print(f"[ESKF] Unknown eskf.mode={mode!r} in config, fallback to 'full_ins'")
+        mode = "full_ins"
+        setattr(nav_cfg.eskf, "mode", mode)
+    print(f"[ESKF] Running mode = {mode!r}")
+
+    # 打印 ESKF 配置快照
+    # eskf_cfg = nav_cfg.eskf
+    # try:
+    #     eskf_kwargs = eskf_cfg.to_eskf_kwargs()
+    #     print("[ESKF][CFG] kwargs snapshot:")
+    #     for k, v in eskf_kwargs.items():
+    #         print(f"  {k}: {v}")
+    # except Exception:
+    #     print("[ESKF][CFG] (no to_eskf_kwargs, fallback to attributes)")
+    #     print(f"  mode: {getattr(eskf_cfg, 'mode', None)!r}")
+    #     imu_noise = getattr(eskf_cfg, "imu_noise", None)
+    #     if imu_noise is not None:
+    #         print(
+    #             f"  imu_noise.sigma_acc_mps2: "
+    #             f"{getattr(imu_noise, 'sigma_acc_mps2', None)}"
+    #         )
+    #         print(
+    #             f"  imu_noise.sigma_gyro_rad_s: "
+    #             f"{getattr(imu_noise, 'sigma_gyro_rad_s', None)}"
+    #         )
+    #     dvl_noise = getattr(eskf_cfg, "dvl_noise", None)
+    #     if dvl_noise is not None:
+    #         print(f"  dvl_noise.percent: {getattr(dvl_noise, 'percent', None)}")
+    #         print(
+    #             f"  dvl_noise.floor_bi_mps: "
+    #             f"{getattr(dvl_noise, 'floor_bi_mps', None)}"
+    #         )
+    #         print(
+    #             f"  dvl_noise.floor_be_mps: "
+    #             f"{getattr(dvl_noise, 'floor_be_mps', None)}"
+    #         )
+    #         print(f"  dvl_noise.be_inflate: {getattr(dvl_noise, 'be_inflate', None)}")
+
+    #     print(f"  sigma_dvl_xy_mps: {getattr(eskf_cfg, 'sigma_dvl_xy_mps', None)}")
+    #     print(f"  sigma_dvl_z_mps:  {getattr(eskf_cfg, 'sigma_dvl_z_mps', None)}")
+    #     print(f"  use_dvl_BI_vel: {getattr(eskf_cfg, 'use_dvl_BI_vel', None)}")
+    #     print(f"  use_dvl_BE_vel: {getattr(eskf_cfg, 'use_dvl_BE_vel', None)}")
+    #     print(
+    #         f"  imu_yaw_source: "
+    #         f"{getattr(eskf_cfg, 'imu_yaw_source', None)!r}"
+    #     )
+    #     print(
+    #         f"  imu_rollpitch_source: "
+    #         f"{getattr(eskf_cfg, 'imu_rollpitch_source', None)!r}"
+    #     )
+    #     print(
+    #         f"  init_yaw_source: "
+    #         f"{getattr(eskf_cfg, 'init_yaw_source', None)!r}"
+    #     )
+    #     print(
+    #         f"  use_dvl_yaw_from_vel: "
+    #         f"{getattr(eskf_cfg, 'use_dvl_yaw_from_vel', None)}"
+    #     )
+
+    # 阶段 key：timeline 只依赖输入文件 + timeline 相关字段；滤波再加上 eskf / frames / init_pose
+    if cache.enabled:
+        in_key = cache.file_key([p for p in (imu_csv, dvl_be_csv, dvl_bi_csv) if p is not None])
+        k_timeline = cache.key("eskf_timeline", in_key, timeline_config_snapshot(nav_cfg))
+        k_filter = cache.key(
+            "eskf_filter",
+            k_timeline,
+            nav_cfg.eskf,
+            nav_cfg.frames,
+            nav_cfg.deadreckon.init_pose,
+        )
+    else:
+        k_timeline = k_filter = ""
+
+    # 输入只在 timeline / 滤波未命中时才读
+    loaded: list[EskfInputs] = []
 
-        # 模式覆盖
-        cfg_mode = getattr(nav_cfg.eskf, "mode", "full_ins")
-        cli_mode = getattr(args, "mode", None)
-        if cli_mode is not None:
-            mode = str(cli_mode)
-            setattr(nav_cfg.eskf, "mode", mode)
-            print(f"[ESKF] Override mode from CLI: {mode!r}")
-        else:
-            mode = str(cfg_mode) if cfg_mode is not None else "full_ins"
-        mode = mode.lower()
-        if mode not in ("full_ins", "local_vel"):
-            print(f"[ESKF] Unknown eskf.mode={mode!r} in config, fallback to 'full_ins'")
-            mode = "full_ins"
-            setattr(nav_cfg.eskf, "mode", mode)
-        print(f"[ESKF] Running mode = {mode!r}")
-
-        # 打印 ESKF 配置快照
-        # eskf_cfg = nav_cfg.eskf
-        # try:
-        #     eskf_kwargs = eskf_cfg.to_eskf_kwargs()
-        #     print("[ESKF][CFG] kwargs snapshot:")
-        #     for k, v in eskf_kwargs.items():
-        #         print(f"  {k}: {v}")
-        # except Exception:
-        #     print("[ESKF][CFG] (no to_eskf_kwargs, fallback to attributes)")
-        #     print(f"  mode: {getattr(eskf_cfg, 'mode', None)!r}")
-        #     imu_noise = getattr(eskf_cfg, "imu_noise", None)
-        #     if imu_noise is not None:
-        #         print(
-        #             f"  imu_noise.sigma_acc_mps2: "
-        #             f"{getattr(imu_noise, 'sigma_acc_mps2', None)}"
-        #         )
-        #         print(
-        #             f"  imu_noise.sigma_gyro_rad_s: "
-        #             f"{getattr(imu_noise, 'sigma_gyro_rad_s', None)}"
-        #         )
-        #     dvl_noise = getattr(eskf_cfg, "dvl_noise", None)
-        #     if dvl_noise is not None:
-        #         print(f"  dvl_noise.percent: {getattr(dvl_noise, 'percent', None)}")
-        #         print(
-        #             f"  dvl_noise.floor_bi_mps: "
-        #             f"{getattr(dvl_noise, 'floor_bi_mps', None)}"
-        #         )
-        #         print(
-        #             f"  dvl_noise.floor_be_mps: "
-        #             f"{getattr(dvl_noise, 'floor_be_mps', None)}"
-        #         )
-        #         print(f"  dvl_noise.be_inflate: {getattr(dvl_noise, 'be_inflate', None)}")
-
-        #     print(f"  sigma_dvl_xy_mps: {getattr(eskf_cfg, 'sigma_dvl_xy_mps', None)}")
-        #     print(f"  sigma_dvl_z_mps:  {getattr(eskf_cfg, 'sigma_dvl_z_mps', None)}")
-        #     print(f"  use_dvl_BI_vel: {getattr(eskf_cfg, 'use_dvl_BI_vel', None)}")
-        #     print(f"  use_dvl_BE_vel: {getattr(eskf_cfg, 'use_dvl_BE_vel', None)}")
-        #     print(
-        #         f"  imu_yaw_source: "
-        #         f"{getattr(eskf_cfg, 'imu_yaw_source', None)!r}"
-        #     )
-        #     print(
-        #         f"  imu_rollpitch_source: "
-        #         f"{getattr(eskf_cfg, 'imu_rollpitch_source', None)!r}"
-        #     )
-        #     print(
-        #         f"  init_yaw_source: "
-        #         f"{getattr(eskf_cfg, 'init_yaw_source', None)!r}"
-        #     )
-        #     print(
-        #         f"  use_dvl_yaw_from_vel: "
-        #         f"{getattr(eskf_cfg, 'use_dvl_yaw_from_vel', None)}"
-        #     )
-
-        # 构造 ESKF 输入 & 时间线（用 eskf_runner 的 build_eskf_timeline）
-        eskf_inputs = EskfInputs(
-            imu_proc=imu_proc,
-            dvl_be_df=df_dvl_be,
-            dvl_bi_df=df_dvl_bi,
+    def _inputs() -> EskfInputs:
+        if not loaded:
+            loaded.append(load_eskf_inputs(proc_dir, run_id))
+        return loaded[0]
+
+    def _run_filter() -> Tuple[EskfOutputs, TimeAlignmentReport]:
+        # 构造时间线（用 eskf_runner 的 build_eskf_timeline）
+        timeline, rep = cache.cached(
+            "eskf_timeline", k_timeline, lambda: build_eskf_timeline(nav_cfg, _inputs())
         )
-        timeline, rep = build_eskf_timeline(nav_cfg, eskf_inputs)
+        # 运行 ESKF 管线（eskf_runner.run_eskf_pipeline）；
+        # 对齐报告随滤波输出一起缓存，滤波命中时不再构造 timeline 也能写诊断
+        return run_eskf_pipeline(nav_cfg, _inputs(), timeline), rep
+
+    eskf_out, rep = cache.cached("eskf_filter", k_filter, _run_filter)
 
-        # 运行 ESKF 管线（eskf_runner.run_eskf_pipeline）
-        eskf_out: EskfOutputs = run_eskf_pipeline(nav_cfg, eskf_inputs, timeline)
+    traj = eskf_out.traj_df
+    diag = eskf_out.diag
+    df_audit = eskf_out.audit_df
 
-        traj = eskf_out.traj_df
-        diag = eskf_out.diag
-        df_audit = eskf_out.audit_df
+    suffix = f"eskf_{mode}"
+    traj_path = out_root / f"{run_id}_traj_{suffix}.csv"
+    traj.to_csv(traj_path, index=False)
 
-        suffix = f"eskf_{mode}"
-        traj_path = out_root / f"{run_id}_traj_{suffix}.csv"
-        traj.to_csv(traj_path, index=False)
+    audit_path = out_root / f"{run_id}_{suffix}_update_audit.csv"
+    df_audit.to_csv(audit_path, index=False)
 
-        audit_path = out_root / f"{run_id}_{suffix}_update_audit.csv"
-        df_audit.to_csv(audit_path, index=False)
+    method_name = f"ESKF-{mode}"
+    fig_en = save_planar_en(traj=traj, out_dir=out_root, run_id=run_id, method_name=method_name)
+    fig_depth = save_depth_ut(traj=traj, out_dir=out_root, run_id=run_id, method_name=method_name)
 
-        method_name = f"ESKF-{mode}"
-        fig_en = save_planar_en(traj=traj, out_dir=out_root, run_id=run_id, method_name=method_name)
-        fig_depth = save_depth_ut(traj=traj, out_dir=out_root, run_id=run_id, method_name=method_name)
+    diag_csv_path = _dump_eskf_update_diag_if_any(diag, out_root, f"{run_id}_{mode}")
 
-        diag_csv_path = _dump_eskf_update_diag_if_any(diag, out_root, f"{run_id}_{mode}")
+    # 文本诊断写入 txt
+    diag_txt_path = out_root / f"{run_id}_{suffix}_diagnostics.txt"
+    with open(diag_txt_path, "w", encoding="utf-8") as f:
+        f.write(
+            f"[TIME][IMU]      t0={rep.imu_t0:.6f}  "
+            f"t1={rep.imu_t1:.6f}  N={rep.imu_n}\n"
+        )
+        f.write(
+            f"[TIME][DVL-BE]   t0={rep.dvl_t0:.6f}  "
+            f"t1={rep.dvl_t1:.6f}  N={rep.dvl_n}\n"
+        )
+        f.write(
+            f"[TIME][IMU-DVL]  dt0={rep.dt0_imu_minus_dvl:+.6f}  "
+            f"dt1={rep.dt1_imu_minus_dvl:+.6f}\n\n"
+        )
 
-        # 文本诊断写入 txt
-        diag_txt_path = out_root / f"{run_id}_{suffix}_diagnostics.txt"
-        with open(diag_txt_path, "w", encoding="utf-8") as f:
+        if hasattr(diag, "n_imu") and hasattr(diag, "n_dvl"):
+            f.write(f"[ESKF] n_imu={diag.n_imu}  n_dvl={diag.n_dvl}\n")
+        if hasattr(diag, "nav_started"):
+            if getattr(diag, "nav_started"):
+                f.write(
+                    "[ESKF][GATE] nav_started=1  "
+                    f"t_start={getattr(diag, 'nav_start_t', 0.0):.3f}  "
+                    f"reason={getattr(diag, 'nav_start_reason', '')}\n"
+                )
+            else:
+                f.write("[ESKF][GATE] nav_started=0  (IMU-only integration disabled)\n")
+        if hasattr(diag, "n_dt_guard_skip"):
             f.write(
-                f"[TIME][IMU]      t0={rep.imu_t0:.6f}  "
-                f"t1={rep.imu_t1:.6f}  N={rep.imu_n}\n"
+                "[ESKF][DT] n_dt_guard_skip="
+                f"{getattr(diag, 'n_dt_guard_skip', 0)}  "
+                f"max_gap_s={nav_cfg.eskf.max_gap_s:.3f}\n"
             )
+        if hasattr(diag, "n_gyro_z_fallback"):
             f.write(
-                f"[TIME][DVL-BE]   t0={rep.dvl_t0:.6f}  "
-                f"t1={rep.dvl_t1:.6f}  N={rep.dvl_n}\n"
+                "[ESKF][GYROZ] n_fallback="
+                f"{getattr(diag, 'n_gyro_z_fallback', 0)}\n"
             )
+        if hasattr(diag, "n_vu_pseudo"):
             f.write(
-                f"[TIME][IMU-DVL]  dt0={rep.dt0_imu_minus_dvl:+.6f}  "
-                f"dt1={rep.dt1_imu_minus_dvl:+.6f}\n\n"
+                "[ESKF][VU-PSEUDO] n_apply="
+                f"{getattr(diag, 'n_vu_pseudo', 0)}\n"
+            )
+        if any(
+            hasattr(diag, n)
+            for n in ("n_dvl_used_vel_BE", "n_dvl_used_vel_BI", "n_dvl_used_yaw")
+        ):
+            f.write(
+                "[ESKF][DVL-USED] "
+                f"BE_vel={getattr(diag, 'n_dvl_used_vel_BE', 0)}  "
+                f"BI_vel={getattr(diag, 'n_dvl_used_vel_BI', 0)}  "
+                f"yaw_from_vel={getattr(diag, 'n_dvl_used_yaw', 0)}\n"
             )
 
-            if hasattr(diag, "n_imu") and hasattr(diag, "n_dvl"):
-                f.write(f"[ESKF] n_imu={diag.n_imu}  n_dvl={diag.n_dvl}\n")
-            if hasattr(diag, "nav_started"):
-                if getattr(diag, "nav_started"):
-                    f.write(
-                        "[ESKF][GATE] nav_started=1  "
-                        f"t_start={getattr(diag, 'nav_start_t', 0.0):.3f}  "
-                        f"reason={getattr(diag, 'nav_start_reason', '')}\n"
-                    )
-                else:
-                    f.write("[ESKF][GATE] nav_started=0  (IMU-only integration disabled)\n")
-            if hasattr(diag, "n_dt_guard_skip"):
-                f.write(
-                    "[ESKF][DT] n_dt_guard_skip="
-                    f"{getattr(diag, 'n_dt_guard_skip', 0)}  "
-                    f"max_gap_s={nav_cfg.eskf.max_gap_s:.3f}\n"
+        f.write("\n[ESKF][AUDIT]\n")
+        if not df_audit.empty:
+            with redirect_stdout(f):
+                print_audit_summary(df_audit)
+                print_audit_deep_diagnostics(
+                    df_audit,
+                    robust_expected=False,
+                    gate_possible_expected=False,
                 )
-            if hasattr(diag, "n_gyro_z_fallback"):
-                f.write(
-                    "[ESKF][GYROZ] n_fallback="
-                    f"{getattr(diag, 'n_gyro_z_fallback', 0)}\n"
-                )
-            if hasattr(diag, "n_vu_pseudo"):
-                f.write(
-                    "[ESKF][VU-PSEUDO] n_apply="
-                    f"{getattr(diag, 'n_vu_pseudo', 0)}\n"
-                )
-            if any(
-                hasattr(diag, n)
-                for n in ("n_dvl_used_vel_BE", "n_dvl_used_vel_BI", "n_dvl_used_yaw")
-            ):
-                f.write(
-                    "[ESKF][DVL-USED] "
-                    f"BE_vel={getattr(diag, 'n_dvl_used_vel_BE', 0)}  "
-                    f"BI_vel={getattr(diag, 'n_dvl_used_vel_BI', 0)}  "
-                    f"yaw_from_vel={getattr(diag, 'n_dvl_used_yaw', 0)}\n"
+                print_frame_consistency_diagnostics(
+                    df_audit,
+                    speed_min_mps=0.05,
+                    topk=10,
                 )
 
-            f.write("\n[ESKF][AUDIT]\n")
-            if not df_audit.empty:
-                with redirect_stdout(f):
-                    print_audit_summary(df_audit)
-                    print_audit_deep_diagnostics(
-                        df_audit,
-                        robust_expected=False,
-                        gate_possible_expected=False,
-                    )
-                    print_frame_consistency_diagnostics(
-                        df_audit,
-                        speed_min_mps=0.05,
-                        topk=10,
-                    )
-
-        print(f"[ESKF] Trajectory saved to:        {traj_path}")
-        print(f"[ESKF] EN figure saved to:         {fig_en}")
-        print(f"[ESKF] Depth figure saved to:      {fig_depth}")
-        print(f"[ESKF] Update-audit saved to:      {audit_path}")
-        if diag_csv_path is not None:
-            print(f"[ESKF] Update-diagnostics CSV:    {diag_csv_path}")
-        print(f"[ESKF] Text diagnostics saved to:  {diag_txt_path}")
+    print(f"[ESKF] Trajectory saved to:        {traj_path}")
+    print(f"[ESKF] EN figure saved to:         {fig_en}")
+    print(f"[ESKF] Depth figure saved to:      {fig_depth}")
+    print(f"[ESKF] Update-audit saved to:      {audit_path}")
+    if diag_csv_path is not None:
+        print(f"[ESKF] Update-diagnostics CSV:    {diag_csv_path}")
+    print(f"[ESKF] Text diagnostics saved to:  {diag_txt_path}")
+
+    return diag
+
+
+def run_graph_for_run(
+    idx: DatasetIndex,
+    nav_cfg: NavConfig,
+    run_id: str,
+    out_dir: str | Path,
+    proc_dir: str | Path,
+) -> GraphDiagnostics:
+    """
+    单个 run 的因子图平滑：读原始 run（graph 配置可改用预处理 CSV）、求解、落盘轨迹与图。
+    """
+    raw = idx.load_run(run_id)
+
+    out_root = Path(out_dir) / run_id
+    out_root.mkdir(parents=True, exist_ok=True)
+
+    traj, diag = run_graph_pipeline(
+        raw.imu,
+        raw.dvl,
+        nav_cfg.graph,
+        proc_dir=Path(proc_dir) / run_id,
+        run_id=run_id,
+    )
+
+    traj_path = out_root / f"{run_id}_traj_graph.csv"
+    traj.as_dataframe().to_csv(traj_path, index=False)
+
+    method_name = "Graph"
+    fig_en = save_planar_en(traj=traj, out_dir=out_root, run_id=run_id, method_name=method_name)
+    fig_depth = save_depth_ut(traj=traj, out_dir=out_root, run_id=run_id, method_name=method_name)
+
+    print(f"[GRAPH] Trajectory saved to: {traj_path}")
+    print(f"[GRAPH] EN figure saved to:  {fig_en}")
+    print(f"[GRAPH] Depth figure saved:  {fig_depth}")
+    print(
+        f"[GRAPH] n_states={diag.n_states}  factors={diag.n_factors_total}  "
+        f"converged={diag.gn_converged}  iters={diag.gn_iters}"
+    )
+    return diag
+
+
+def run_eskf_sweep_for_run(
+    nav_cfg: NavConfig,
+    run_id: str,
+    spec_path: str | Path,
+    out_dir: str | Path,
+    proc_dir: str | Path,
+    max_workers: int = 0,
+    top: int = 10,
+) -> pd.DataFrame:
+    """
+    单个 run 的 ESKF 参数扫描：输入与 timeline 只构造一次，trial 在进程池里并行评估。
+    """
+    spec = load_sweep_spec(spec_path)
+    eskf_inputs = load_eskf_inputs(Path(proc_dir) / run_id, run_id)
+    timeline, _rep = build_eskf_timeline(nav_cfg, eskf_inputs)
+
+    out_root = Path(out_dir) / run_id
+    df = run_eskf_sweep(
+        nav_cfg,
+        eskf_inputs,
+        timeline,
+        spec,
+        out_dir=out_root,
+        max_workers=max_workers,
+    )
+
+    print(summarize_sweep(df, list(spec.params.keys()), top=top))
+    print(f"[SWEEP] Results saved to:   {out_root / 'sweep_results.csv'}")
+    print(f"[SWEEP] Best overrides:     {out_root / 'sweep_best.yaml'}")
+    return df
+
+
+def run_graph_sweep_for_run(
+    idx: DatasetIndex,
+    nav_cfg: NavConfig,
+    run_id: str,
+    spec_path: str | Path,
+    out_dir: str | Path,
+    proc_dir: str | Path,
+    top: int = 10,
+) -> pd.DataFrame:
+    """
+    单个 run 的因子图 DVL 门限扫描：原始 run 只读一次，trial 在同一个 GraphSession 上增量求解。
+    """
+    spec = load_sweep_spec(spec_path)
+    raw = idx.load_run(run_id)
+
+    out_root = Path(out_dir) / run_id
+    df = run_graph_sweep(
+        raw.imu,
+        raw.dvl,
+        nav_cfg.graph,
+        spec,
+        out_dir=out_root,
+        proc_dir=Path(proc_dir) / run_id,
+        run_id=run_id,
+    )
+
+    print(summarize_graph_sweep(df, list(spec.params.keys()), top=top))
+    print(f"[GSWEEP] Results saved to:     {out_root / 'graph_sweep_results.csv'}")
+    print(f"[GSWEEP] Trajectories saved to: {out_root / 'trials'}")
+    return df
+
+
+# =============================================================================
+# Main
+# =============================================================================
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    dataset_cfg = Path(args.dataset_config)
+    idx = DatasetIndex(dataset_cfg)
+
+    nav_cfg: NavConfig = load_nav_config(args.nav_config)
+
+    # --------------------------------------------------
+    # deadreckon pipeline
+    # --------------------------------------------------
+    if args.cmd == "deadreckon":
+        run_deadreckon_for_run(
+            idx, nav_cfg, args.run, args.out_dir, args.proc_dir,
+            cli_mode=getattr(args, "mode", None),
+        )
+        return 0
+
+    # --------------------------------------------------
+    # ESKF pipeline
+    # --------------------------------------------------
+    if args.cmd == "eskf":
+        cache = StageCache(
+            args.stage_cache_dir,
+            int(float(args.stage_cache_mb) * 2**20),
+            enabled=not bool(args.no_stage_cache),
+        )
+        run_eskf_for_run(
+            idx, nav_cfg, args.run, args.out_dir, args.proc_dir,
+            cli_mode=getattr(args, "mode", None),
+            cache=cache,
+        )
+        return 0
+
+    # --------------------------------------------------
+    # graph pipeline
+    # --------------------------------------------------
+    if args.cmd == "graph":
+        run_graph_for_run(idx, nav_cfg, args.run, args.out_dir, args.proc_dir)
+        return 0
+
+    # --------------------------------------------------
+    # batch：多 run × 多管线，进程池并行
+    # --------------------------------------------------
+    if args.cmd == "batch":
+        return run_nav_batch(
+            dataset_config=args.dataset_config,
+            nav_config=args.nav_config,
+            idx=idx,
+            runs=args.runs,
+            methods=args.methods,
+            out_dir=args.out_dir,
+            proc_dir=args.proc_dir,
+            max_workers=args.max_workers,
+            mem_per_worker_mb=args.mem_per_worker_mb,
+        )
 
+    # --------------------------------------------------
+    # sweep：ESKF 参数扫描
+    # --------------------------------------------------
+    if args.cmd == "sweep":
+        run_eskf_sweep_for_run(
+            nav_cfg,
+            args.run,
+            args.spec,
+            args.out_dir,
+            args.proc_dir,
+            max_workers=args.max_workers,
+            top=args.top,
+        )
+        return 0
+
+    # --------------------------------------------------
+    # graph-sweep：因子图 DVL 门限扫描（增量求解）
+    # --------------------------------------------------
+    if args.cmd == "graph-sweep":
+        run_graph_sweep_for_run(
+            idx,
+            nav_cfg,
+            args.run,
+            args.spec,
+            args.out_dir,
+            args.proc_dir,
+            top=args.top,
+        )
         return 0
 
     return 0
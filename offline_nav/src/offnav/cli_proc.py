@@ -8,6 +8,8 @@ from typing import Optional, List
 import numpy as np
 import pandas as pd
 
+from offnav.core.stage_cache import DEFAULT_STAGE_CACHE_DIR, DEFAULT_STAGE_CACHE_MB, StageCache
+from offnav.io.colcache import write_colcache
 from offnav.io.dataset import DatasetIndex
 from offnav.preprocess import (
     # IMU
@@ -16,6 +18,7 @@ from offnav.preprocess import (
     # DVL
     DvlPreprocessConfig,
     preprocess_dvl_simple,
+    dvl_gate_audit_df,
 )
 from offnav.viz.imu_processed import save_imu_filtered_9axis
 from offnav.viz.dvl_processed import save_dvl_filtered_velocity
@@ -41,6 +44,29 @@ def _build_parser() -> argparse.ArgumentParser:
         default="config/dataset.yaml",
         help="Path to dataset.yaml (default: config/dataset.yaml)",
     )
+    p.add_argument(
+        "--stage-cache-dir",
+        type=str,
+        default=str(DEFAULT_STAGE_CACHE_DIR),
+        help="Stage cache for raw load / IMU / DVL preprocessing outputs (content-addressed)",
+    )
+    p.add_argument(
+        "--stage-cache-mb",
+        type=float,
+        default=DEFAULT_STAGE_CACHE_MB,
+        help="Disk budget of the stage cache in MB; least recently used entries are evicted",
+    )
+    p.add_argument(
+        "--no-stage-cache",
+        action="store_true",
+        help="Always recompute every stage (do not read or write the stage cache)",
+    )
+    p.add_argument(
+        "--stream-load",
+        action="store_true",
+        help="Load raw IMU/DVL logs as time-merged typed chunks (pipeline columns only); "
+             "lower peak memory for long multi-file runs",
+    )
 
     sub = p.add_subparsers(dest="cmd", required=True)
 
@@ -158,6 +184,22 @@ def _build_parser() -> argparse.ArgumentParser:
 # =============================================================================
 
 
+def _raw_source_paths(idx: DatasetIndex, run_id: str, kind: str) -> List[str]:
+    """dataset.yaml 中该 run 的原始 IMU / DVL 文件列表（用于缓存 key）."""
+    imu_paths, dvl_paths = idx.raw_paths(run_id)
+    return imu_paths if kind == "imu" else dvl_paths
+
+
+def _write_colcache(csv_path: Path, source_paths: List[str], config) -> None:
+    try:
+        npz = write_colcache(csv_path, source_paths=source_paths, config=config)
+    except Exception as e:
+        print(f"[CACHE][WARN] binary cache for {csv_path.name} failed: {type(e).__name__}: {e}")
+        return
+    if npz is not None:
+        print(f"[CACHE] Binary cache saved to: {npz}")
+
+
 def _parse_rpy_deg_csv(s: str) -> tuple[float, float, float]:
     """
     Parse 'roll,pitch,yaw' (degrees) -> (roll,pitch,yaw) (radians).
@@ -497,13 +539,37 @@ def _diagnose_dvl_events(dvl_proc, run_id: str) -> None:
             f"dv_axis_max={getattr(cfg, 'dv_axis_max_m_s', float('nan')):.3f}, "
             f"dv_xy_max={getattr(cfg, 'dv_xy_max_m_s', float('nan')):.3f}, "
             f"be_vu_abs_max={getattr(cfg, 'be_vu_abs_max_m_s', float('nan')):.3f}, "
-            f"lowpass_window_s={getattr(cfg, 'lowpass_window_s', float('nan')):.2f}"
+            f"lowpass_window_s={getattr(cfg, 'lowpass_window_s', float('nan')):.2f}, "
+            f"lowpass_kind={getattr(cfg, 'lowpass_kind', 'box')}"
         )
 
     _diag_one("BI", df_bi)
     _diag_one("BE", df_be)
+
+    # gate 剔除统计：直接按位计数，不解码原因字符串
+    for name in ("BI", "BE"):
+        g = getattr(dvl_proc, f"gate_{name.lower()}", None)
+        if g is None:
+            continue
+        n_all = int(len(g.bits))
+        n_drop = int(np.count_nonzero(g.bits))
+        per_gate = ", ".join(f"{k}={v}" for k, v in g.counts().items() if v > 0)
+        print(
+            f"[DVL-DIAG][{run_id}] {name} gate: dropped {n_drop}/{n_all}"
+            + (f" ({per_gate})" if per_gate else "")
+        )
     print(f"[DVL-DIAG][{run_id}] ====================================")
 
+
+def _write_dvl_gate_audit(dvl_ev, run_out: Path, run_id: str) -> None:
+    """被 gate 剔除的 DVL 样本及原因 -> {run_id}_dvl_gate_audit.csv（原因在此处才解码）."""
+    if getattr(dvl_ev, "gate_bi", None) is None and getattr(dvl_ev, "gate_be", None) is None:
+        return
+    df_audit = dvl_gate_audit_df(dvl_ev)
+    csv_audit = run_out / f"{run_id}_dvl_gate_audit.csv"
+    df_audit.to_csv(csv_audit, index=False)
+    print(f"[DVL][{run_id}] DVL gate audit CSV saved to: {csv_audit} (n={len(df_audit)})")
+
 # =============================================================================
 # Pipelines
 # =============================================================================
@@ -515,6 +581,8 @@ def _run_imu_preprocess(
     imu_sensor_to_body_map: str,
     imu_mount_rpy_deg: str,
     skip_diag: bool = False,
+    source_paths: Optional[List[str]] = None,
+    cache: Optional[StageCache] = None,
 ) -> None:
     if run is None:
         raise RuntimeError("[IMU] run is None")
@@ -534,13 +602,19 @@ def _run_imu_preprocess(
         keep_raw_df=True,
     )
 
-    imu_proc = preprocess_imu_simple(imu_raw, imu_cfg)
+    imu_sources = source_paths or [str(imu_raw.source_path)]
+    if cache is not None and cache.enabled:
+        key = cache.key("imu_preprocess", cache.file_key(imu_sources), imu_cfg)
+        imu_proc = cache.cached("imu_preprocess", key, lambda: preprocess_imu_simple(imu_raw, imu_cfg))
+    else:
+        imu_proc = preprocess_imu_simple(imu_raw, imu_cfg)
 
     # 1) CSV 输出
     df_out = _imu_processed_to_dataframe(imu_proc)
     csv_path = run_out / f"{run.run_id}_imu_filtered.csv"
     df_out.to_csv(csv_path, index=False)
     print(f"[IMU] Filtered IMU CSV saved to: {csv_path}")
+    _write_colcache(csv_path, imu_sources, imu_cfg)
 
     # 2) 图像输出（兼容旧版绘图接口）
     fig_path = None
@@ -575,6 +649,8 @@ def _run_dvl_preprocess(
     run,
     run_out: Path,
     skip_diag: bool = False,
+    source_paths: Optional[List[str]] = None,
+    cache: Optional[StageCache] = None,
 ) -> None:
     if run is None:
         raise RuntimeError("[DVL] run is None")
@@ -585,7 +661,12 @@ def _run_dvl_preprocess(
 
     # 1) 预处理（事件流）
     dvl_cfg = DvlPreprocessConfig()  # alias of DvlEventsConfig
-    dvl_ev = preprocess_dvl_simple(run.dvl, dvl_cfg)  # returns DvlEventsData / DvlProcessedData
+    dvl_sources = source_paths or [str(run.dvl.source_path)]
+    if cache is not None and cache.enabled:
+        key = cache.key("dvl_preprocess", cache.file_key(dvl_sources), dvl_cfg)
+        dvl_ev = cache.cached("dvl_preprocess", key, lambda: preprocess_dvl_simple(run.dvl, dvl_cfg))
+    else:
+        dvl_ev = preprocess_dvl_simple(run.dvl, dvl_cfg)  # returns DvlEventsData / DvlProcessedData
 
     # 2) 保存 BI / BE CSV
     run_out.mkdir(parents=True, exist_ok=True)
@@ -595,6 +676,8 @@ def _run_dvl_preprocess(
     dvl_ev.df_be.to_csv(csv_be, index=False)
     print(f"[DVL][{run.run_id}] DVL BI CSV saved to: {csv_bi} (n={len(dvl_ev.df_bi)})")
     print(f"[DVL][{run.run_id}] DVL BE CSV saved to: {csv_be} (n={len(dvl_ev.df_be)})")
+    _write_colcache(csv_bi, dvl_sources, dvl_cfg)
+    _write_colcache(csv_be, dvl_sources, dvl_cfg)
 
     # 3) 绘图：滤波后的 DVL 速度曲线（BI + BE）
     plots_dir = run_out / "plots"
@@ -614,6 +697,7 @@ def _run_dvl_preprocess(
     if not skip_diag:
         try:
             _diagnose_dvl_events(dvl_ev, run.run_id)
+            _write_dvl_gate_audit(dvl_ev, run_out, run.run_id)
         except Exception as e:
             print(f"[DVL][{run.run_id}] Diagnostics failed: {e!r}")
 
@@ -639,7 +723,12 @@ def main(argv: List[str] | None = None) -> int:
     cfg_path = Path(args.dataset_config)
     idx = DatasetIndex(cfg_path)
 
-    run = idx.load_run(args.run)
+    cache = StageCache(
+        args.stage_cache_dir,
+        int(float(args.stage_cache_mb) * 2**20),
+        enabled=not bool(args.no_stage_cache),
+    )
+    run = idx.load_run_cached(args.run, cache, streaming=bool(args.stream_load))
 
     out_root = Path(args.out_dir)
     run_out = out_root / run.run_id
@@ -652,6 +741,8 @@ def main(argv: List[str] | None = None) -> int:
             imu_sensor_to_body_map=str(args.imu_sensor_to_body_map),
             imu_mount_rpy_deg=str(args.imu_mount_rpy_deg),
             skip_diag=bool(getattr(args, "skip_imu_diag", False)),
+            source_paths=_raw_source_paths(idx, run.run_id, "imu"),
+            cache=cache,
         )
         return 0
 
@@ -660,6 +751,8 @@ def main(argv: List[str] | None = None) -> int:
             run,
             run_out,
             skip_diag=bool(getattr(args, "skip_dvl_diag", False)),
+            source_paths=_raw_source_paths(idx, run.run_id, "dvl"),
+            cache=cache,
         )
         return 0
 
@@ -670,11 +763,15 @@ def main(argv: List[str] | None = None) -> int:
             imu_sensor_to_body_map=str(args.imu_sensor_to_body_map),
             imu_mount_rpy_deg=str(args.imu_mount_rpy_deg),
             skip_diag=bool(getattr(args, "skip_imu_diag", False)),
+            source_paths=_raw_source_paths(idx, run.run_id, "imu"),
+            cache=cache,
         )
         _run_dvl_preprocess(
             run,
             run_out,
             skip_diag=bool(getattr(args, "skip_dvl_diag", False)),
+            source_paths=_raw_source_paths(idx, run.run_id, "dvl"),
+            cache=cache,
         )
         return 0
 
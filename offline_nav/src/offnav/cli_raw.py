@@ -206,7 +206,8 @@ def main(argv: list[str] | None = None) -> int:
         return 0
 
     if args.cmd == "plot-raw":
-        run = idx.load_run(args.run)
+        # 只读 [t0, t1] 覆盖的部分（run store 的 time_index / CSV 旁路稀疏时间索引）
+        run = idx.load_run(args.run, t0=args.t0, t1=args.t1)
         out_root = Path(args.out_dir)
         run_out = out_root / run.run_id
         run_out.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,116 @@
+# src/offnav/cli_store.py
+from __future__ import annotations
+
+"""
+offnav-store：把原始 IMU / DVL CSV 转成内存映射列式 store（见 io/run_store.py）。
+
+    offnav-store ingest --run 2026-01-10_pooltest01
+    offnav-store ingest --all
+    offnav-store info   --run 2026-01-10_pooltest01
+
+ingest 之后 DatasetIndex.load_run（cli_raw / cli_proc / cli_dvl / 各类 inspector）会自动
+内存映射打开 store；原始 CSV 变化后 store 自动失效，重新 ingest 即可。
+"""
+
+import argparse
+from pathlib import Path
+from typing import List
+
+from offnav.io.dataset import DatasetIndex
+from offnav.io.raw_stream import DEFAULT_CHUNK_ROWS
+from offnav.io.run_store import read_store_schema
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="offnav-store",
+        description="Offline navigation toolkit - memory-mapped columnar store for raw IMU/DVL logs",
+    )
+    p.add_argument(
+        "--dataset-config",
+        type=str,
+        default="config/dataset.yaml",
+        help="Path to dataset.yaml (default: config/dataset.yaml)",
+    )
+
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    p_ing = sub.add_parser("ingest", help="Convert raw IMU/DVL CSVs of a run into the run store")
+    g = p_ing.add_mutually_exclusive_group(required=True)
+    g.add_argument("--run", help="run_id defined in dataset.yaml")
+    g.add_argument("--all", action="store_true", help="Ingest every run in dataset.yaml")
+    p_ing.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help=f"Rows parsed per file per chunk while ingesting (default: {DEFAULT_CHUNK_ROWS})",
+    )
+    p_ing.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-ingest even if the store is up to date",
+    )
+
+    p_info = sub.add_parser("info", help="Show run store status")
+    p_info.add_argument("--run", required=True, help="run_id defined in dataset.yaml")
+
+    return p
+
+
+def _ingest_one(idx: DatasetIndex, run_id: str, chunk_rows: int, force: bool) -> None:
+    if not force and idx.has_current_store(run_id, "imu") and idx.has_current_store(run_id, "dvl"):
+        print(f"[STORE][{run_id}] up to date, skip (use --force to rebuild)")
+        return
+    metas = idx.ingest_run(run_id, chunk_rows=chunk_rows)
+    for sensor, meta in metas.items():
+        print(
+            f"[STORE][{run_id}] {sensor.upper()}: n={meta['n_rows']}  "
+            f"t=[{meta['t_min']}, {meta['t_max']}]  cols={len(meta['columns'])}  "
+            f"-> {idx.run_store_dir(run_id, sensor)}"
+        )
+
+
+def _info(idx: DatasetIndex, run_id: str) -> None:
+    for sensor in ("imu", "dvl"):
+        sdir = idx.run_store_dir(run_id, sensor)
+        meta = read_store_schema(sdir)
+        if meta is None:
+            print(f"[STORE][{run_id}] {sensor.upper()}: not ingested ({sdir})")
+            continue
+        size = sum(f.stat().st_size for f in Path(sdir).glob("*") if f.is_file())
+        state = "current" if idx.has_current_store(run_id, sensor) else "STALE (raw files changed)"
+        print(
+            f"[STORE][{run_id}] {sensor.upper()}: {state}  n={meta['n_rows']}  "
+            f"t=[{meta['t_min']}, {meta['t_max']}]  size={size / 2**20:.1f} MB  ({sdir})"
+        )
+
+
+# =============================================================================
+# Main
+# =============================================================================
+
+def main(argv: List[str] | None = None) -> int:
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    idx = DatasetIndex(Path(args.dataset_config))
+
+    if args.cmd == "ingest":
+        run_ids = [r.run_id for r in idx.list_runs()] if args.all else [args.run]
+        for run_id in run_ids:
+            _ingest_one(idx, run_id, int(args.chunk_rows), bool(args.force))
+        return 0
+
+    if args.cmd == "info":
+        _info(idx, args.run)
+        return 0
+
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -91,6 +91,7 @@ class DeadReckonConfig:
     init_pose: DeadReckonInitPose = DeadReckonInitPose()
     use_imu_angles: bool = True
     max_gap_s: float = 0.05
+    attitude_interp: str = "nearest"   # nearest / linear / slerp：DVL 时刻取 IMU 姿态的方式
 
     @classmethod
     def from_dict(cls, d: Mapping[str, Any] | None) -> "DeadReckonConfig":
@@ -105,6 +106,7 @@ class DeadReckonConfig:
             init_pose=init_pose,
             use_imu_angles=_as_bool(d, "use_imu_angles", True),
             max_gap_s=_as_float(d, "max_gap_s", 0.05),
+            attitude_interp=_as_str(d, "attitude_interp", "nearest"),
         )
 
 # =====================================================================
@@ -253,6 +255,7 @@ class EskfConfig:
     # IMU 积分类别 / 时间间隔防护
     imu_acc_kind: str = "linear"
     max_gap_s: float  = 0.05
+    batch_propagate: bool = True   # 两次 DVL 更新之间的 IMU 段批量传播
 
     # DVL 匹配 / 过滤
     dvl_match_policy: str    = "anchor_next"
@@ -281,6 +284,10 @@ class EskfConfig:
     smooth_traj_enable: bool = False
     smooth_traj_window_samples: int = 9
 
+    # 轨迹记录（TrajectoryRecorder）：抽稀 / float32 存储
+    traj_decimate: int = 1
+    traj_float32: bool = False
+
     @classmethod
     def from_dict(cls, d: Mapping[str, Any] | None) -> "EskfConfig":
         if d is None:
@@ -323,6 +330,7 @@ class EskfConfig:
 
             imu_acc_kind=_as_str(d, "imu_acc_kind", "linear"),
             max_gap_s=_as_float(d, "max_gap_s", 0.05),
+            batch_propagate=_as_bool(d, "batch_propagate", True),
 
             dvl_match_policy=_as_str(d, "dvl_match_policy", "anchor_next"),
             dvl_match_window_s=_as_float(d, "dvl_match_window_s", 0.05),
@@ -348,6 +356,9 @@ class EskfConfig:
             smooth_traj_window_samples=int(
                 _as_float(d, "smooth_traj_window_samples", 9)
             ),
+
+            traj_decimate=int(_as_float(d, "traj_decimate", 1)),
+            traj_float32=_as_bool(d, "traj_float32", False),
         )
 
     def to_eskf_kwargs(self) -> Dict[str, Any]:
@@ -422,9 +433,14 @@ class GraphConfig:
     verbose: bool = True
 
     max_iterations: int = 10
-    lambda_init: float = 1.0
-    lambda_min: float = 1.0e-6
+    optimizer: str = "gn"          # "gn" | "lm"（lambda_* 仅 lm 使用）
+    line_search: bool = False      # 仅 gn：cost 上升时回溯减半步长
+    lambda_init: float = 0.0       # 相对阻尼（× max diag(H)），0 = 首步即 GN 步
+    lambda_min: float = 1.0e-4
     lambda_max: float = 1.0e3
+    linear_solver: str = "block"  # "dense" | "block"（块三对角 + bias Schur 补）
+    check_jacobians: bool = False  # 测试模式：求解前用有限差分校验解析雅可比
+    group_factors: bool = True     # 同类型因子打包成结构数组整组求值
 
     use_robust_loss: bool = True
     robust_loss_type: str = "huber"
@@ -433,6 +449,10 @@ class GraphConfig:
     keyframe_stride: int = 50
     max_nodes: int = 200
 
+    window_size: int = 0           # >0: 滑窗平滑（每窗结点数），忽略 max_nodes
+    window_step: int = 0           # 每次滑动边缘化的结点数，<=0 取 window_size//2
+    relin_threshold: float = 1.0   # 增量会话（GraphSession）重线性化阈值（以 sqrt(H_ii) 缩放，单位 σ）
+
     max_imu_samples: int = 0
     max_dvl_samples: int = 0
 
@@ -450,14 +470,22 @@ class GraphConfig:
             node_timebase=_as_str(d, "node_timebase", "imu"),
             verbose=_as_bool(d, "verbose", True),
             max_iterations=int(d.get("max_iterations", 10)),
-            lambda_init=_as_float(d, "lambda_init", 1.0),
-            lambda_min=_as_float(d, "lambda_min", 1.0e-6),
+            optimizer=_as_str(d, "optimizer", "gn"),
+            line_search=_as_bool(d, "line_search", False),
+            lambda_init=_as_float(d, "lambda_init", 0.0),
+            lambda_min=_as_float(d, "lambda_min", 1.0e-4),
             lambda_max=_as_float(d, "lambda_max", 1.0e3),
+            linear_solver=_as_str(d, "linear_solver", "block"),
+            check_jacobians=_as_bool(d, "check_jacobians", False),
+            group_factors=_as_bool(d, "group_factors", True),
             use_robust_loss=_as_bool(d, "use_robust_loss", True),
             robust_loss_type=_as_str(d, "robust_loss_type", "huber"),
             robust_loss_param=_as_float(d, "robust_loss_param", 1.0),
             keyframe_stride=int(d.get("keyframe_stride", 50)),
             max_nodes=int(d.get("max_nodes", 200)),
+            window_size=int(d.get("window_size", 0)),
+            window_step=int(d.get("window_step", 0)),
+            relin_threshold=float(d.get("relin_threshold", 1.0)),
             max_imu_samples=int(d.get("max_imu_samples", 0)),
             max_dvl_samples=int(d.get("max_dvl_samples", 0)),
             use_dvl_BE_vel=_as_bool(d, "use_dvl_BE_vel", True),
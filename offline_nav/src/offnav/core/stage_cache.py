@@ -0,0 +1,184 @@
+# src/offnav/core/stage_cache.py
+from __future__ import annotations
+
+"""
+按内容寻址的管线阶段缓存（raw load -> IMU/DVL 预处理 -> ESKF timeline -> 滤波）。
+
+- 每个阶段的输出以 pickle 存在 <root>/<stage>/<key>.pkl；
+- key = sha1(阶段名 + 版本 + 上游阶段 key + 本阶段相关配置子集的 hash)，
+  因此只改 ESKF 噪声参数时，预处理 / timeline 的 key 不变、直接命中，只有滤波阶段重跑；
+- 命中时刷新文件 mtime，写入后按磁盘预算（max_bytes）以 mtime 做 LRU 淘汰。
+
+用法：
+    cache = StageCache(Path("out/.stage_cache"), max_bytes=2 << 30)
+    k_imu = cache.key("imu_preprocess", raw_key, imu_cfg)
+    imu_proc = cache.cached("imu_preprocess", k_imu, lambda: preprocess_imu_simple(raw, imu_cfg))
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+import numpy as np
+
+from offnav.io.colcache import hash_config, hash_files
+
+
+T = TypeVar("T")
+
+# 缓存格式版本：阶段输出的数据结构变化时递增，使旧缓存整体失效
+STAGE_CACHE_VERSION = 3
+
+DEFAULT_STAGE_CACHE_DIR = Path("out/.stage_cache")
+DEFAULT_STAGE_CACHE_MB = 2048.0
+
+
+def _part_digest(part: Any) -> str:
+    """key 组成部分 -> 字符串摘要（hash 字符串原样使用，配置对象取 hash_config）."""
+    if part is None:
+        return "none"
+    if isinstance(part, str):
+        return part
+    if isinstance(part, (bool, int, float)):
+        return repr(part)
+    if isinstance(part, np.ndarray):
+        return hashlib.sha1(np.ascontiguousarray(part).tobytes()).hexdigest()
+    return hash_config(part)
+
+
+class StageCache:
+    """
+    磁盘上的阶段缓存。
+
+    参数
+    ----
+    root : Path
+        缓存根目录.
+    max_bytes : int
+        磁盘预算；put 之后超出时按最近使用时间淘汰.
+    enabled : bool
+        False 时 cached() 直接调用计算函数，不读不写.
+    verbose : bool
+        打印 [CACHE] 命中 / 重算信息.
+    """
+
+    def __init__(
+        self,
+        root: str | Path = DEFAULT_STAGE_CACHE_DIR,
+        max_bytes: int = int(DEFAULT_STAGE_CACHE_MB * 2**20),
+        *,
+        enabled: bool = True,
+        verbose: bool = True,
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.enabled = bool(enabled)
+        self.verbose = bool(verbose)
+
+    # ------------------------------------------------------------------
+    # key
+    # ------------------------------------------------------------------
+    def key(self, stage: str, *parts: Any) -> str:
+        h = hashlib.sha1()
+        h.update(f"{stage}:v{STAGE_CACHE_VERSION}".encode("utf-8"))
+        for p in parts:
+            h.update(b"|")
+            h.update(_part_digest(p).encode("utf-8"))
+        return h.hexdigest()
+
+    @staticmethod
+    def file_key(paths: List[str | Path]) -> str:
+        """一组输入文件的内容 hash（作为首个阶段的 key 部件）."""
+        return hash_files(paths)
+
+    # ------------------------------------------------------------------
+    # get / put
+    # ------------------------------------------------------------------
+    def _path(self, stage: str, key: str) -> Path:
+        return self.root / stage / f"{key}.pkl"
+
+    def get(self, stage: str, key: str) -> Tuple[bool, Any]:
+        if not self.enabled:
+            return False, None
+        p = self._path(stage, key)
+        if not p.is_file():
+            return False, None
+        try:
+            with p.open("rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+            if self.verbose:
+                print(f"[CACHE][WARN] stage={stage} unreadable entry ({type(e).__name__}); recomputing")
+            p.unlink(missing_ok=True)
+            return False, None
+        os.utime(p)  # LRU：命中即刷新
+        return True, value
+
+    def put(self, stage: str, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        p = self._path(stage, key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f"{p.stem}.{os.getpid()}.tmp")
+        try:
+            with tmp.open("wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, p)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+            tmp.unlink(missing_ok=True)
+            if self.verbose:
+                print(f"[CACHE][WARN] stage={stage} not cached ({type(e).__name__}: {e})")
+            return
+        self.evict()
+
+    def cached(self, stage: str, key: str, compute: Callable[[], T]) -> T:
+        """命中则读缓存，否则调用 compute() 并写入缓存."""
+        hit, value = self.get(stage, key)
+        if hit:
+            if self.verbose:
+                print(f"[CACHE] stage={stage} hit ({key[:12]})")
+            return value
+        if self.verbose and self.enabled:
+            print(f"[CACHE] stage={stage} miss ({key[:12]}), computing")
+        value = compute()
+        self.put(stage, key, value)
+        return value
+
+    # ------------------------------------------------------------------
+    # LRU 淘汰
+    # ------------------------------------------------------------------
+    def entries(self) -> List[Tuple[float, int, Path]]:
+        """(mtime, size, path)，按最近使用时间升序."""
+        if not self.root.is_dir():
+            return []
+        out: List[Tuple[float, int, Path]] = []
+        for p in self.root.glob("*/*.pkl"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, p))
+        out.sort(key=lambda e: e[0])
+        return out
+
+    def evict(self) -> int:
+        """超出 max_bytes 时删除最久未用的条目，返回删除数量."""
+        ents = self.entries()
+        total = sum(e[1] for e in ents)
+        n = 0
+        for _mtime, size, p in ents:
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            n += 1
+        if n and self.verbose:
+            print(f"[CACHE] evicted {n} entries (budget {self.max_bytes / 2**20:.0f} MB)")
+        return n
+
+    def usage(self) -> Dict[str, Any]:
+        ents = self.entries()
+        return {"entries": len(ents), "bytes": int(sum(e[1] for e in ents))}
+
@@ -0,0 +1,151 @@
+# src/offnav/core/traj_recorder.py
+from __future__ import annotations
+
+"""
+预分配的结构化轨迹记录器（ESKF / ESKF2D / dead-reckon 共用）。
+
+原先各管线在主循环里逐样本 append tuple/dict 到 Python list，
+最后一次性 pd.DataFrame(rows)：长航次上要付出百万级的小对象分配，
+以及转换时的内存峰值。TrajectoryRecorder 改为：
+
+- 按时间线长度预分配一个 NumPy 结构化数组（每列一个字段），容量不足时倍增；
+- 可选抽稀 decimate（每 decimate 个样本记录一个，按 append/extend 的样本计数）；
+- 可选 float32 存储（时间列始终 float64，避免绝对时间戳丢精度）；
+- to_dataframe() 直接以字段视图构造 DataFrame（pandas 支持时零拷贝）。
+"""
+
+from typing import Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# 时间类字段：float32 模式下仍保留 float64
+TIME_FIELDS = ("t_s", "t")
+
+
+class TrajectoryRecorder:
+    """
+    结构化数组轨迹缓冲。
+
+    参数
+    ----
+    fields : Sequence[str]
+        列名（同时是结构化 dtype 的字段名，顺序即输出列顺序）.
+    capacity : int
+        预期记录的样本数（抽稀前）；内部按 ceil(capacity / decimate) 预分配.
+    decimate : int
+        抽稀因子，<=1 表示全部记录.
+    float32 : bool
+        非时间列以 float32 存储.
+    int_fields : Iterable[str]
+        以 int8 存储的标志列（如 prop_ok）.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        capacity: int,
+        *,
+        decimate: int = 1,
+        float32: bool = False,
+        int_fields: Iterable[str] = (),
+    ) -> None:
+        self.fields = tuple(str(f) for f in fields)
+        self.decimate = max(1, int(decimate))
+        int_set = set(int_fields)
+        val_dt = np.float32 if float32 else np.float64
+        self.dtype = np.dtype(
+            [
+                (
+                    f,
+                    np.float64 if f in TIME_FIELDS
+                    else np.int8 if f in int_set
+                    else val_dt,
+                )
+                for f in self.fields
+            ]
+        )
+
+        cap = -(-max(0, int(capacity)) // self.decimate)
+        self._buf = np.empty(max(cap, 16), dtype=self.dtype)
+        self._n = 0       # 已记录行数
+        self._seen = 0    # 已提交样本数（抽稀前）
+
+    # ------------------------------------------------------------------
+    # 容量
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return self._n
+
+    def _reserve(self, n_total: int) -> None:
+        if n_total <= self._buf.shape[0]:
+            return
+        new_cap = max(n_total, 2 * self._buf.shape[0])
+        buf = np.empty(new_cap, dtype=self.dtype)
+        buf[:self._n] = self._buf[:self._n]
+        self._buf = buf
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+    def append(self, *values: float) -> None:
+        """按 fields 顺序记录一行（受 decimate 控制）."""
+        keep = self._seen % self.decimate == 0
+        self._seen += 1
+        if not keep:
+            return
+        if self._n >= self._buf.shape[0]:
+            self._reserve(self._n + 1)
+        self._buf[self._n] = values
+        self._n += 1
+
+    def extend(self, columns: Mapping[str, np.ndarray]) -> None:
+        """
+        一次记录 M 行：columns 为 {字段名: (M,) 数组}，缺失字段填 NaN（整型列填 0）.
+        抽稀相位与逐行 append 一致.
+        """
+        m = 0
+        for arr in columns.values():
+            m = int(np.shape(arr)[0])
+            break
+        if m == 0:
+            return
+
+        if self.decimate > 1:
+            first = (-self._seen) % self.decimate
+            sel: Optional[np.ndarray] = np.arange(first, m, self.decimate)
+        else:
+            sel = None
+        self._seen += m
+
+        m_keep = m if sel is None else int(sel.size)
+        if m_keep == 0:
+            return
+        self._reserve(self._n + m_keep)
+        out = self._buf[self._n:self._n + m_keep]
+        for name in self.fields:
+            col = columns.get(name)
+            if col is None:
+                out[name] = 0 if out[name].dtype.kind == "i" else np.nan
+            else:
+                col = np.asarray(col)
+                out[name] = col if sel is None else col[sel]
+        self._n += m_keep
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+    @property
+    def records(self) -> np.ndarray:
+        """已记录部分的结构化数组视图（不拷贝）."""
+        return self._buf[:self._n]
+
+    def column(self, name: str) -> np.ndarray:
+        """单列视图（不拷贝）."""
+        return self._buf[name][:self._n]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """以字段视图构造 DataFrame；pandas 支持时不复制数据."""
+        rec = self.records
+        return pd.DataFrame({name: rec[name] for name in self.fields}, copy=False)
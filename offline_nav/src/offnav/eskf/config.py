@@ -78,6 +78,7 @@ class Eskf2DConfig:
     # --------------------------
     output_full_rate: bool = True
     output_stride: int = 5
+    output_float32: bool = False   # 轨迹非时间列 float32 存储
 
     # 诊断 CSV（聚焦：dt、v_pre、v_meas、ratio、nis）
     focus_csv_path: Optional[str] = "out/diag/eskf2d_focus.csv"
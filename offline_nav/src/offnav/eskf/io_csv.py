@@ -8,6 +8,9 @@ from typing import Tuple, Optional
 import numpy as np
 import pandas as pd
 
+from offnav.io.colcache import read_csv_cached
+from offnav.models.angles import wrap_pm_pi
+
 
 _TIME_COL_CANDIDATES = ("t_s", "EstS", "MonoS", "EstNS", "MonoNS", "time_s", "TimeS")
 _NS_TIME_COLS = ("EstNS", "MonoNS")
@@ -96,8 +99,7 @@ def apply_yaw_sign_offset(yaw_rad: np.ndarray, yaw_sign: float, yaw_offset_rad:
     """
     y = np.asarray(yaw_rad, dtype=float) * float(yaw_sign) + float(yaw_offset_rad)
     if wrap:
-        # 等价 wrap_pm_pi，但 io_csv 不依赖 math_utils，避免循环依赖
-        y = (y + np.pi) % (2.0 * np.pi) - np.pi
+        y = wrap_pm_pi(y)
     return y
 
 
@@ -129,7 +131,7 @@ def load_imu_filtered_csv(path: str | Path) -> Imu2DSeries:
     yaw 默认优先 yaw_nav_rad -> yaw_device_rad -> yaw_rad -> yaw
     """
     p = Path(path)
-    df = pd.read_csv(p)
+    df = read_csv_cached(p)
 
     t = _pick_time_s(df)
 
@@ -182,7 +184,7 @@ def load_imu_filtered_csv(path: str | Path) -> Imu2DSeries:
 
 def load_dvl_bi_csv(path: str | Path) -> DvlBISeries:
     p = Path(path)
-    df = pd.read_csv(p)
+    df = read_csv_cached(p)
     t = _pick_time_s(df)
 
     vx = _pick_first(
@@ -208,7 +210,7 @@ def load_dvl_bi_csv(path: str | Path) -> DvlBISeries:
 
 def load_dvl_be_csv(path: str | Path) -> DvlBESeries:
     p = Path(path)
-    df = pd.read_csv(p)
+    df = read_csv_cached(p)
     t = _pick_time_s(df)
 
     vE = _pick_first(df, ("Ve_enu(m_s)", "Ve_enu", "vE", "VelE", "ve", "E_vel", "V_E"), "BE vE")
@@ -3,15 +3,16 @@ from __future__ import annotations
 
 import numpy as np
 
+from offnav.models.angles import wrap_pm_pi as _wrap_pm_pi
+
 
 def wrap_pm_pi(a):
     """
     Wrap angle(s) to [-pi, pi).
     Supports float or ndarray.
     """
-    x = np.asarray(a, dtype=float)
-    y = (x + np.pi) % (2.0 * np.pi) - np.pi
-    return float(y) if y.ndim == 0 else y
+    y = _wrap_pm_pi(np.asarray(a, dtype=float))   # 实现见 models/angles.py
+    return float(y) if np.ndim(y) == 0 else y
 
 
 def rot_x(phi: float) -> np.ndarray:
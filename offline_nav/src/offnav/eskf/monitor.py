@@ -8,6 +8,8 @@ from typing import Any, Dict, List, Optional, Sequence, Mapping
 import numpy as np
 import pandas as pd
 
+from offnav.models.angles import angle_diff
+
 
 # =============================================================================
 # helpers
@@ -334,8 +336,7 @@ class FocusMonitor:
         yaw_used = _finite(yaw_used_rad)
         yaw_err = float("nan")
         if bool(self.cfg.record_state_yaw) and np.isfinite(yaw_state) and np.isfinite(yaw_used):
-            # wrap to [-pi, pi] difference
-            yaw_err = float(((yaw_state - yaw_used + np.pi) % (2.0 * np.pi)) - np.pi)
+            yaw_err = float(angle_diff(yaw_state, yaw_used))
 
         # triggers
         triggered = False
@@ -12,30 +12,21 @@ from .io_csv import load_imu_filtered_csv, load_dvl_bi_csv, load_dvl_be_csv
 from .math_utils import wrap_pm_pi, rpy_to_R_nb_enu
 from .filter import Eskf2D
 
+from offnav.core.traj_recorder import TrajectoryRecorder
+from offnav.models.attitude_series import TimeIndex
 from offnav.eskf.monitor import FocusMonitor, FocusMonitorConfig
 
 
+TRAJ2D_COLUMNS = (
+    "t_s", "E", "N", "yaw_rad", "yaw_deg", "vE", "vN",
+    "vU_be_ref", "bgz", "prop_ok", "dt_prop_s",
+)
+
+
 # =============================================================================
 # helpers
 # =============================================================================
 
-def _nearest_index(t_arr: np.ndarray, t: float, start_hint: int = 0) -> int:
-    """
-    两指针友好：从 start_hint 开始向前推进，找到最接近 t 的索引。
-    假设 t_arr 单调递增。
-    """
-    n = int(t_arr.size)
-    if n <= 0:
-        return 0
-    i = max(0, min(int(start_hint), n - 1))
-    while i + 1 < n and float(t_arr[i + 1]) <= t:
-        i += 1
-    if i + 1 < n:
-        if abs(float(t_arr[i + 1]) - t) < abs(float(t_arr[i]) - t):
-            return i + 1
-    return i
-
-
 def _sanitize_sort_imu(imu) -> None:
     idx = np.argsort(imu.t)
     imu.t = imu.t[idx]
@@ -296,8 +287,8 @@ def run_eskf2d(
     f.set_time(float(imu.t[k0]))
     _init_filter_state(f, cfg, imu)
 
-    # pointers for BE reference
-    be_ptr = 0
+    # BE reference: time index with a cursor (queries advance with time)
+    be_index = TimeIndex(be.t)
 
     # Focus monitor
     mon = _build_monitor(cfg)
@@ -307,8 +298,14 @@ def run_eskf2d(
     j = int(np.searchsorted(bi_t, t0, side="left"))
     n_bi = int(bi_t.size)
 
-    # trajectory rows
-    traj_rows: List[Dict[str, Any]] = []
+    # trajectory buffer（按窗口内 IMU 数 / 输出步长预分配）
+    stride = 1 if cfg.output_full_rate else max(1, int(cfg.output_stride))
+    traj_rec = TrajectoryRecorder(
+        TRAJ2D_COLUMNS,
+        -(-int(imu_ids.size) // stride),
+        float32=bool(getattr(cfg, "output_float32", False)),
+        int_fields=("prop_ok",),
+    )
 
     # IMU dt tracker for monitoring
     t_last_imu = float(imu.t[k0])
@@ -373,7 +370,7 @@ def run_eskf2d(
             p_post_enu = np.array([p_post_2[0], p_post_2[1], 0.0], dtype=float)
 
             # BE-U reference (optional)
-            be_ptr = _nearest_index(be.t, t_dvl, start_hint=be_ptr)
+            be_ptr = be_index.nearest_one(t_dvl)
             vU_be = float(be.v_enu[be_ptr, 2]) if be.t.size > 0 else float("nan")
 
             dt_match = float(tk - t_dvl)
@@ -400,28 +397,26 @@ def run_eskf2d(
             j += 1
 
         # 3) trajectory output
-        if cfg.output_full_rate or (k % max(1, int(cfg.output_stride)) == 0):
-            be_ptr = _nearest_index(be.t, tk, start_hint=be_ptr)
+        if stride == 1 or (k % stride == 0):
+            be_ptr = be_index.nearest_one(tk)
             vU_be = float(be.v_enu[be_ptr, 2]) if be.t.size > 0 else float("nan")
 
             s = f.snapshot()
-            traj_rows.append(
-                {
-                    "t_s": tk,
-                    "E": s["E"],
-                    "N": s["N"],
-                    "yaw_rad": s["yaw_rad"],
-                    "yaw_deg": float(np.rad2deg(s["yaw_rad"])),
-                    "vE": s["vE"],
-                    "vN": s["vN"],
-                    "vU_be_ref": vU_be,
-                    "bgz": s["bgz"],
-                    "prop_ok": int(bool(ok_prop)),
-                    "dt_prop_s": float(dt_prop),
-                }
+            traj_rec.append(
+                tk,
+                s["E"],
+                s["N"],
+                s["yaw_rad"],
+                float(np.rad2deg(s["yaw_rad"])),
+                s["vE"],
+                s["vN"],
+                vU_be,
+                s["bgz"],
+                int(bool(ok_prop)),
+                float(dt_prop),
             )
 
-    traj_df = pd.DataFrame(traj_rows)
+    traj_df = traj_rec.to_dataframe()
     focus_df = mon.to_dataframe() if mon.enabled else pd.DataFrame()
 
     # write focus csv if configured
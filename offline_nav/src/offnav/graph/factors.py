@@ -8,6 +8,7 @@ Factor definitions for offline factor-graph navigation (IMU + DVL, LV1 bias mode
 - IMU 过程因子: ImuProcessFactor
 - DVL 速度因子 (BE/BI): DvlBEVelFactor, DvlBIVelFactor
 - DVL yaw-from-velocity 因子: YawFromVelFactor
+- 边缘化先验因子（滑窗）: MarginalPriorFactor
 
 所有因子都基于同一个参数向量 θ:
     θ = [x_0(7), x_1(7), ..., x_{N-1}(7), ba(3), bgz(1)]
@@ -16,11 +17,14 @@ Factor definitions for offline factor-graph navigation (IMU + DVL, LV1 bias mode
 
 注意:
 - 本模块只负责“局部数学”和“从 θ 中取块”的 glue，不负责整体矩阵拼接和求解；
-- 雅可比在第一版采用有限差分实现，后续可逐步替换为解析形式。
+- 雅可比为解析形式: jacobian_blocks(θ) 返回 (cols, J_loc)，
+  J_loc 只包含因子实际依赖的列，组装代价 O(因子维度) 而非 O(D)；
+  jacobian(θ) 仍返回 (m×D) 稠密矩阵，兼容旧调用方；
+- check_jacobians() 为测试模式: 用有限差分校验解析雅可比。
 """
 
 from dataclasses import dataclass, field
-from typing import Protocol, Callable, List, Sequence
+from typing import Protocol, Callable, List, Sequence, Tuple
 
 import numpy as np
 
@@ -46,6 +50,8 @@ class Factor(Protocol):
     每个因子 f_j(θ) 提供:
     - residual(θ): 返回局部残差 r_j ∈ R^m
     - jacobian(θ): 返回对全局 θ 的雅可比 J_j ∈ R^{m×D}
+    - jacobian_blocks(θ): 返回紧凑雅可比 (cols, J_loc)，
+                     cols 为 θ 中的列索引 (n,)，J_loc ∈ R^{m×n}
     - weight_chol(): 返回观测噪声协方差 R_j 的 Cholesky 逆 (R^{-1/2}),
                      第一版默认对角协方差 -> 返回 diag(1/std_i).
     """
@@ -56,6 +62,9 @@ class Factor(Protocol):
     def jacobian(self, theta: np.ndarray) -> np.ndarray:
         ...
 
+    def jacobian_blocks(self, theta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        ...
+
     def weight_chol(self) -> np.ndarray:
         ...
 
@@ -91,6 +100,90 @@ def _finite_diff_jacobian(
     return J
 
 
+def _scatter_jacobian(
+    cols: np.ndarray,
+    J_loc: np.ndarray,
+    dim: int,
+) -> np.ndarray:
+    """把紧凑雅可比 (cols, J_loc) 展开为 (m×D) 稠密矩阵."""
+    J = np.zeros((J_loc.shape[0], dim), dtype=float)
+    J[:, cols] = J_loc
+    return J
+
+
+def _state_cols(k: int, num_states: int, offsets: Sequence[int]) -> np.ndarray:
+    """x_k 中若干分量 (offsets ⊂ [0,7)) 在 θ 中的列索引."""
+    s = state_slice(k, num_states)
+    return s.start + np.asarray(offsets, dtype=int)
+
+
+# ============================================================
+# 测试模式: 解析雅可比 vs 有限差分
+# ============================================================
+
+
+@dataclass
+class JacobianCheckResult:
+    """单个因子的雅可比校验结果."""
+
+    index: int
+    name: str
+    max_abs_err: float
+    ok: bool
+
+
+def check_jacobians(
+    factors: Sequence[Factor],
+    theta: np.ndarray,
+    *,
+    eps: float = 1e-6,
+    atol: float = 1e-4,
+    rtol: float = 1e-3,
+    verbose: bool = True,
+) -> List[JacobianCheckResult]:
+    """
+    测试模式: 在 θ 处用有限差分校验每个因子的解析雅可比.
+
+    有限差分只在因子的参数支撑集 (_param_indices) 上计算，
+    同时要求解析雅可比在支撑集以外全为 0。
+
+    返回每个因子的校验结果；verbose=True 时打印失败项与汇总。
+    """
+    theta = np.asarray(theta, dtype=float).reshape(-1)
+    D = theta.shape[0]
+    results: List[JacobianCheckResult] = []
+
+    for i, f in enumerate(factors):
+        J_ana = f.jacobian(theta)
+        idxs = f._param_indices()
+        J_num = _finite_diff_jacobian(theta, f.residual, idxs, eps=eps)
+
+        outside = np.ones(D, dtype=bool)
+        outside[idxs] = False
+        err_in = np.abs(J_ana[:, idxs] - J_num[:, idxs])
+        tol = atol + rtol * np.abs(J_num[:, idxs])
+        err_out = np.abs(J_ana[:, outside])
+
+        max_err = float(max(err_in.max(initial=0.0), err_out.max(initial=0.0)))
+        ok = bool(np.all(err_in <= tol) and np.all(err_out == 0.0))
+        results.append(
+            JacobianCheckResult(index=i, name=type(f).__name__, max_abs_err=max_err, ok=ok)
+        )
+
+        if verbose and not ok:
+            print(f"[FACTOR][JAC-CHECK] FAIL #{i} {type(f).__name__}: max|ΔJ|={max_err:.3e}")
+
+    if verbose:
+        n_bad = sum(1 for r in results if not r.ok)
+        worst = max((r.max_abs_err for r in results), default=0.0)
+        print(
+            f"[FACTOR][JAC-CHECK] n_factors={len(results)}  n_fail={n_bad}  "
+            f"max|ΔJ|={worst:.3e}"
+        )
+
+    return results
+
+
 # ============================================================
 # 1) 先验因子: 状态 + bias
 # ============================================================
@@ -181,15 +274,23 @@ class PriorStateBiasFactor:
 
         return r
 
-    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+    def _param_indices(self) -> np.ndarray:
         # 关联变量: x_0(前 7 维) + bias(最后 4 维)
         s0 = state_slice(0, self.num_states)
         sb = bias_slice(self.num_states)
-        idxs: List[int] = []
-        idxs.extend(range(s0.start, s0.stop))
-        idxs.extend(range(sb.start, sb.stop))
+        return np.r_[s0.start:s0.stop, sb.start:sb.stop]
+
+    def jacobian_blocks(self, theta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        残差对 [x_0, bias] 逐分量为恒等映射（yaw 的 wrap 导数为 1）:
 
-        return _finite_diff_jacobian(theta, self.residual, idxs, eps=self.eps)
+            ∂r/∂[x_0, b] = I_11
+        """
+        return self._param_indices(), np.eye(11, dtype=float)
+
+    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+        cols, J_loc = self.jacobian_blocks(theta)
+        return _scatter_jacobian(cols, J_loc, np.asarray(theta).size)
 
     def weight_chol(self) -> np.ndarray:
         """
@@ -301,22 +402,46 @@ class ImuProcessFactor:
 
         return r
 
-    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+    def _param_indices(self) -> np.ndarray:
+        sk = state_slice(self.k, self.num_states)
+        sk1 = state_slice(self.k + 1, self.num_states)
+        sb = bias_slice(self.num_states)
+        return np.r_[sk.start:sk.stop, sk1.start:sk1.stop, sb.start:sb.stop]
+
+    def jacobian_blocks(self, theta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
-        当前使用有限差分 Jacobian（对 [x_k, x_{k+1}, bias] 求导），
-        保证正确性优先；后续如需提速可替换为解析形式。
+        解析 Jacobian（LV1 模型与 bias 无关，只对 [x_k, x_{k+1}] 非零）:
+
+            ∂r_pos/∂p_k = -I/σp   ∂r_pos/∂v_k = -dt·I/σp   ∂r_pos/∂p_{k+1} = I/σp
+            ∂r_vel/∂v_k = -I/σv   ∂r_vel/∂v_{k+1} = I/σv
+            ∂r_yaw/∂yaw_k = -1/σψ ∂r_yaw/∂yaw_{k+1} = 1/σψ
         """
-        theta = np.asarray(theta, dtype=float).reshape(-1)
         sk = state_slice(self.k, self.num_states)
         sk1 = state_slice(self.k + 1, self.num_states)
-        sb = bias_slice(self.num_states)
+        cols = np.r_[sk.start:sk.stop, sk1.start:sk1.stop]
 
-        idxs: List[int] = []
-        idxs.extend(range(sk.start, sk.stop))
-        idxs.extend(range(sk1.start, sk1.stop))
-        idxs.extend(range(sb.start, sb.stop))
+        inv_pos = 1.0 / float(self.std_pos)
+        inv_vel = 1.0 / float(self.std_vel)
+        inv_yaw = 1.0 / float(self.std_yaw)
+        dt = float(self.dt)
+
+        I3 = np.eye(3, dtype=float)
+        J = np.zeros((7, 14), dtype=float)
+        # x_k
+        J[0:3, 0:3] = -inv_pos * I3
+        J[0:3, 3:6] = -dt * inv_pos * I3
+        J[3:6, 3:6] = -inv_vel * I3
+        J[6, 6] = -inv_yaw
+        # x_{k+1}
+        J[0:3, 7:10] = inv_pos * I3
+        J[3:6, 10:13] = inv_vel * I3
+        J[6, 13] = inv_yaw
 
-        return _finite_diff_jacobian(theta, self.residual, idxs, eps=self.eps)
+        return cols, J
+
+    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+        cols, J_loc = self.jacobian_blocks(theta)
+        return _scatter_jacobian(cols, J_loc, np.asarray(theta).size)
 
     def weight_chol(self) -> np.ndarray:
         std = self._std_vec()
@@ -369,26 +494,21 @@ class DvlBEVelFactor:
 
         return r.astype(float)
 
-    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+    def _param_indices(self) -> np.ndarray:
+        sk = state_slice(self.k, self.num_states)
+        return np.arange(sk.start, sk.stop)
+
+    def jacobian_blocks(self, theta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
         残差只依赖于 x_k 的速度分量 v_k，因此:
 
             ∂r/∂v_k = I, 其它维度为 0
         """
-        theta = np.asarray(theta, dtype=float).reshape(-1)
-        D = theta.shape[0]
-        J = np.zeros((3, D), dtype=float)
+        return _state_cols(self.k, self.num_states, (3, 4, 5)), np.eye(3, dtype=float)
 
-        sk = state_slice(self.k, self.num_states)
-        idx_v0 = sk.start + 3
-        idx_v1 = sk.start + 4
-        idx_v2 = sk.start + 5
-
-        J[0, idx_v0] = 1.0
-        J[1, idx_v1] = 1.0
-        J[2, idx_v2] = 1.0
-
-        return J
+    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+        cols, J_loc = self.jacobian_blocks(theta)
+        return _scatter_jacobian(cols, J_loc, np.asarray(theta).size)
 
     def weight_chol(self) -> np.ndarray:
         std = float(self.std_be)
@@ -463,19 +583,45 @@ class DvlBIVelFactor:
 
         return r.astype(float)
 
-    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+    def _param_indices(self) -> np.ndarray:
+        sk = state_slice(self.k, self.num_states)
+        return np.arange(sk.start, sk.stop)
+
+    def jacobian_blocks(self, theta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
-        为了稳妥，BI 因子用有限差分 Jacobian（只对 x_k 的 7 个维度求导）。
+        解析 Jacobian（只对 v_k, yaw_k 非零）:
+
+            R_bn = Rx(roll)^T Ry(pitch)^T Rz(yaw)^T
+            ∂r/∂v_k   = R_bn
+            ∂r/∂yaw_k = Rx^T Ry^T (dRz^T/dyaw) v_k
         """
         theta = np.asarray(theta, dtype=float).reshape(-1)
         sk = state_slice(self.k, self.num_states)
-        active_idx = list(range(sk.start, sk.stop))
+        xk = theta[sk]
+        v_enu = xk[3:6]
+        yaw = float(xk[6])
+
+        cr, sr = np.cos(self.roll_rad), np.sin(self.roll_rad)
+        cp, sp = np.cos(self.pitch_rad), np.sin(self.pitch_rad)
+        cy, sy = np.cos(yaw), np.sin(yaw)
+
+        # (Ry Rx)^T = Rx^T Ry^T
+        Rx = np.array([[1.0, 0.0, 0.0], [0.0, cr, -sr], [0.0, sr, cr]], dtype=float)
+        Ry = np.array([[cp, 0.0, sp], [0.0, 1.0, 0.0], [-sp, 0.0, cp]], dtype=float)
+        R_rp_T = (Ry @ Rx).T
 
-        def _res(theta_vec: np.ndarray) -> np.ndarray:
-            return self.residual(theta_vec)
+        Rz_T = np.array([[cy, sy, 0.0], [-sy, cy, 0.0], [0.0, 0.0, 1.0]], dtype=float)
+        dRz_T = np.array([[-sy, cy, 0.0], [-cy, -sy, 0.0], [0.0, 0.0, 0.0]], dtype=float)
 
-        J = _finite_diff_jacobian(theta, _res, active_idx, eps=self.eps)
-        return J
+        J = np.empty((3, 4), dtype=float)
+        J[:, 0:3] = R_rp_T @ Rz_T
+        J[:, 3] = R_rp_T @ (dRz_T @ v_enu)
+
+        return _state_cols(self.k, self.num_states, (3, 4, 5, 6)), J
+
+    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+        cols, J_loc = self.jacobian_blocks(theta)
+        return _scatter_jacobian(cols, J_loc, np.asarray(theta).size)
 
     def weight_chol(self) -> np.ndarray:
         std = float(self.std_bi)
@@ -537,13 +683,78 @@ class YawFromVelFactor:
 
         return r
 
-    def jacobian(self, theta: np.ndarray) -> np.ndarray:
-        theta = np.asarray(theta, dtype=float).reshape(-1)
+    def _param_indices(self) -> np.ndarray:
         sk = state_slice(self.k, self.num_states)
-        idxs = list(range(sk.start, sk.stop))
-        return _finite_diff_jacobian(theta, self.residual, idxs, eps=self.eps)
+        return np.arange(sk.start, sk.stop)
+
+    def jacobian_blocks(self, theta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """r = wrap(z_yaw - yaw_k) -> ∂r/∂yaw_k = -1."""
+        return _state_cols(self.k, self.num_states, (6,)), np.array([[-1.0]], dtype=float)
+
+    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+        cols, J_loc = self.jacobian_blocks(theta)
+        return _scatter_jacobian(cols, J_loc, np.asarray(theta).size)
 
     def weight_chol(self) -> np.ndarray:
         std = float(self.std_yaw)
         inv_std = 1.0 / std if std > 0.0 else 0.0
         return np.array([[inv_std]], dtype=float)
+
+
+# ============================================================
+# 6) 边缘化先验因子（滑窗平滑）
+# ============================================================
+
+
+@dataclass
+class MarginalPriorFactor:
+    """
+    边缘化先验因子: 滑窗移出旧状态后，对 [x_k, bias] 留下的稠密高斯先验.
+
+    由 offnav.graph.sliding_window.marginalize_leading_states 构造:
+        H_marg = R^T R,  g_marg = R^T e   (在 θ_lin 处的 Schur 补)
+
+    残差:
+        d = [x_k, b] - θ_lin   (yaw 分量 wrap)
+        r = R d + e ∈ R^{11}
+
+    R 已是信息矩阵平方根，weight_chol 为单位阵；
+    robust=False: 该因子不参与鲁棒核。
+    """
+
+    num_states: int
+    k: int
+    theta_lin: np.ndarray   # shape (11,), 线性化点 [x_k(7), b(4)]
+    sqrt_info: np.ndarray   # shape (11, 11), R
+    e: np.ndarray           # shape (11,)
+
+    robust: bool = False
+    debug: bool = False
+    _printed_once: bool = field(default=False, init=False, repr=False)
+
+    def _param_indices(self) -> np.ndarray:
+        sk = state_slice(self.k, self.num_states)
+        sb = bias_slice(self.num_states)
+        return np.r_[sk.start:sk.stop, sb.start:sb.stop]
+
+    def residual(self, theta: np.ndarray) -> np.ndarray:
+        theta = np.asarray(theta, dtype=float).reshape(-1)
+        d = theta[self._param_indices()] - self.theta_lin
+        d[6] = wrap_yaw(float(d[6]))
+        r = self.sqrt_info @ d + self.e
+
+        if self.debug and not self._printed_once:
+            self._printed_once = True
+            print(f"[FACTOR][MARG] k={self.k} |r|={np.linalg.norm(r):.3e}")
+
+        return r
+
+    def jacobian_blocks(self, theta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self._param_indices(), np.asarray(self.sqrt_info, dtype=float)
+
+    def jacobian(self, theta: np.ndarray) -> np.ndarray:
+        cols, J_loc = self.jacobian_blocks(theta)
+        return _scatter_jacobian(cols, J_loc, np.asarray(theta).size)
+
+    def weight_chol(self) -> np.ndarray:
+        return np.eye(self.sqrt_info.shape[0], dtype=float)
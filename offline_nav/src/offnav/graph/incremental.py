@@ -0,0 +1,481 @@
+# src/offnav/graph/incremental.py
+from __future__ import annotations
+
+"""
+Incremental (iSAM-style) smoother for the keyframe factor graph.
+
+gauss_newton_solve 每次都从头线性化全部因子、重新分解整个法方程。
+对同一航次反复调整 DVL 门限 / 增删少量因子时，大部分工作是重复的。
+本模块提供 IncrementalSmoother:
+
+- 每个因子的线性化贡献 (cols, H_loc, g_loc) 按句柄缓存，
+  累加在一个常驻的 BlockNormalEquations 中；
+- add_factors / remove_factors 只加 / 减对应贡献，并记录受影响的最小结点；
+- 块三对角 Cholesky 按结点顺序消元，结点 k 之前的因子块与前代结果
+  不受 k 及其后变化的影响，因此只需从“最小脏结点”起部分重分解；
+- 流体重线性化（fluid relinearization）: 只有 sqrt(H_ii)·|θ - θ_lin| 超过阈值
+  （以信息矩阵对角线缩放，约为“几个 σ”）的变量才更新线性化点，并重线性化与其相连的因子；
+- 流体迭代到不动点后做一次全量重线性化的 GN 步，按 gauss_newton_solve 相同的
+  tol_step / tol_cost_rel 判据确认收敛，因此收敛解与批处理求解的差别只来自判据本身；
+- 因子集合没变且上次已收敛时 update() 直接返回，不再迭代。
+
+线性系统以各变量的线性化点 θ_lin 为原点: H δ = -g，θ = θ_lin ⊕ δ。
+relin_threshold=0 时每次迭代全部重线性化，等价于普通 Gauss-Newton。
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from offnav.graph.factor_groups import _GROUP_TYPES, build_factor_groups
+from offnav.graph.factors import Factor
+from offnav.graph.linear_solver import (
+    BlockNormalEquations,
+    _bias_schur_solve,
+    _block_tridiag_backward,
+    _block_tridiag_cholesky,
+    _block_tridiag_forward,
+    _stack_rhs,
+)
+from offnav.graph.smoothing import (
+    GaussNewtonStats,
+    _factor_robust,
+    _robust_rho,
+    _robust_weights,
+    _solve_dense,
+    linearize_factor,
+)
+from offnav.graph.states import BIAS_SIZE, STATE_SIZE, theta_dim
+from offnav.models.angles import wrap_pm_pi
+
+
+# ============================================================
+# 单因子缓存
+# ============================================================
+
+
+@dataclass
+class _CachedFactor:
+    """一个因子在其线性化点处的法方程贡献."""
+
+    factor: Factor
+    cols: np.ndarray      # (n,) θ 列索引
+    H_loc: np.ndarray     # (n,n)
+    g_loc: np.ndarray     # (n,)
+    nodes: np.ndarray     # 涉及的状态结点
+    touches_bias: bool
+
+
+# ============================================================
+# 增量平滑器
+# ============================================================
+
+
+class IncrementalSmoother:
+    """
+    增量因子图平滑器（块三对角结构，θ = [x_0..x_{N-1}, bias]）.
+
+    典型用法（参数扫描）:
+        sm = IncrementalSmoother(theta0, N, robust_loss="huber")
+        base = sm.add_factors(prior_and_imu_factors)
+        h = sm.add_factors(dvl_factors_a)
+        theta_a, st = sm.update()
+        sm.remove_factors(h[:10])       # 门限收紧，剔除部分 DVL 因子
+        theta_b, st = sm.update()       # 只重分解受影响结点之后的部分
+    """
+
+    def __init__(
+        self,
+        theta0: np.ndarray,
+        num_states: int,
+        *,
+        robust_loss: Optional[str] = None,
+        robust_param: float = 1.0,
+        relin_threshold: float = 1.0,
+        verbose: bool = False,
+    ) -> None:
+        theta0 = np.asarray(theta0, dtype=float).reshape(-1)
+        N = int(num_states)
+        if N <= 0 or theta0.shape[0] != theta_dim(N):
+            raise ValueError(
+                f"IncrementalSmoother: len(theta0)={theta0.shape[0]} != 7N+4 (N={N})"
+            )
+
+        self.num_states = N
+        self.robust_loss = robust_loss
+        self.robust_param = float(robust_param)
+        self.relin_threshold = float(relin_threshold)
+        self.verbose = bool(verbose)
+
+        self._theta = theta0.copy()
+        self._theta_lin = theta0.copy()
+
+        self._neq = BlockNormalEquations(N)
+        self._cache: Dict[int, _CachedFactor] = {}
+        self._next_handle = 0
+
+        # 变量 -> 因子句柄（结点 0..N-1，bias 记为 N）
+        self._var_factors: List[set] = [set() for _ in range(N + 1)]
+
+        # 块 Cholesky 因子 + 前代结果缓存；_dirty 为需重算的最小结点
+        self._Ld: Optional[np.ndarray] = None
+        self._Lo: Optional[np.ndarray] = None
+        self._Y: Optional[np.ndarray] = None
+        self._dirty = 0
+
+        # 上次 update 是否已收敛（增删因子后清除）；收敛时的 cost
+        self._converged = False
+        self._cost: Optional[float] = None
+
+        # 统计
+        self.n_relinearized_total = 0
+        self.last_refactor_from = 0
+
+    # ------------------------------------------------------------
+    # 属性
+    # ------------------------------------------------------------
+
+    @property
+    def theta(self) -> np.ndarray:
+        """当前估计 θ（副本）."""
+        return self._theta.copy()
+
+    @property
+    def num_factors(self) -> int:
+        return len(self._cache)
+
+    @property
+    def factors(self) -> List[Factor]:
+        return [c.factor for c in self._cache.values()]
+
+    # ------------------------------------------------------------
+    # 因子增删
+    # ------------------------------------------------------------
+
+    def _make_cache(
+        self, f: Factor, cols: np.ndarray, H_loc: np.ndarray, g_loc: np.ndarray
+    ) -> _CachedFactor:
+        n_x = self.num_states * STATE_SIZE
+        return _CachedFactor(
+            factor=f,
+            cols=cols,
+            H_loc=H_loc,
+            g_loc=g_loc,
+            nodes=np.unique(cols[cols < n_x] // STATE_SIZE),
+            touches_bias=bool(np.any(cols >= n_x)),
+        )
+
+    def _linearize_one(self, f: Factor) -> _CachedFactor:
+        cols, J_w, r_w = linearize_factor(
+            f,
+            self._theta_lin,
+            robust_loss=self.robust_loss,
+            robust_param=self.robust_param,
+        )
+        if cols is None:
+            cols = np.flatnonzero(np.any(J_w != 0.0, axis=0))
+            J_w = J_w[:, cols]
+        cols = np.asarray(cols, dtype=int).reshape(-1)
+        return self._make_cache(f, cols, J_w.T @ J_w, J_w.T @ r_w)
+
+    def _linearize(
+        self,
+        factors: List[Factor],
+        old: Optional[List[_CachedFactor]] = None,
+    ) -> List[_CachedFactor]:
+        """
+        在 θ_lin 处线性化一批因子；可向量化的类型走 factor_groups.
+
+        old 给定时（重线性化）沿用其 cols / nodes，只替换 H_loc / g_loc.
+        """
+        out: List[Optional[_CachedFactor]] = [None] * len(factors)
+        buckets: Dict[type, List[int]] = {}
+        for i, f in enumerate(factors):
+            if type(f) in _GROUP_TYPES:
+                buckets.setdefault(type(f), []).append(i)
+            else:
+                out[i] = self._linearize_one(f)
+
+        for ftype, idx in buckets.items():
+            grp = _GROUP_TYPES[ftype].from_factors([factors[i] for i in idx])
+            cols, J_w, r_w = grp.linearize(self._theta_lin)
+            w = _robust_weights(np.linalg.norm(r_w, axis=1), self.robust_loss, self.robust_param)
+            H = w[:, None, None] * np.einsum("kmi,kmj->kij", J_w, J_w)
+            g = w[:, None] * np.einsum("kmi,km->ki", J_w, r_w)
+            if old is None:
+                for j, i in enumerate(idx):
+                    out[i] = self._make_cache(factors[i], cols[j], H[j], g[j])
+            else:
+                for j, i in enumerate(idx):
+                    c = old[i]
+                    out[i] = _CachedFactor(c.factor, c.cols, H[j], g[j], c.nodes, c.touches_bias)
+        return out  # type: ignore[return-value]
+
+    def _apply(self, caches: Iterable[_CachedFactor], sign: float) -> None:
+        """把一批缓存贡献加到 (sign=+1) / 减出 (sign=-1) 法方程，按列数分组向量化."""
+        by_n: Dict[int, List[_CachedFactor]] = {}
+        for c in caches:
+            by_n.setdefault(c.cols.shape[0], []).append(c)
+        for cs in by_n.values():
+            cols = np.stack([c.cols for c in cs])
+            H = np.stack([c.H_loc for c in cs])
+            g = np.stack([c.g_loc for c in cs])
+            if sign != 1.0:
+                H, g = sign * H, sign * g
+            k_min = self._neq.add_hessian_batch(cols, H, g)
+            self._dirty = min(self._dirty, k_min)
+
+    def _index(self, h: int, c: _CachedFactor, add: bool) -> None:
+        vars_ = c.nodes.tolist() + ([self.num_states] if c.touches_bias else [])
+        for v in vars_:
+            if add:
+                self._var_factors[v].add(h)
+            else:
+                self._var_factors[v].discard(h)
+
+    def add_factors(self, factors: Iterable[Factor]) -> List[int]:
+        """在当前线性化点线性化并加入因子，返回句柄列表."""
+        caches = self._linearize(list(factors))
+        handles: List[int] = []
+        for c in caches:
+            h = self._next_handle
+            self._next_handle += 1
+            self._cache[h] = c
+            self._index(h, c, add=True)
+            handles.append(h)
+        self._apply(caches, +1.0)
+        if handles:
+            self._converged = False
+        return handles
+
+    def remove_factors(self, handles: Iterable[int]) -> None:
+        """按句柄移除因子（减去其缓存贡献）；未知句柄抛出 KeyError."""
+        removed: List[_CachedFactor] = []
+        for h in handles:
+            c = self._cache.pop(int(h))
+            self._index(int(h), c, add=False)
+            removed.append(c)
+        self._apply(removed, -1.0)
+        if removed:
+            self._converged = False
+
+    def _rebuild(self) -> None:
+        """由缓存重新累加法方程，并标记全量重分解."""
+        self._neq = BlockNormalEquations(self.num_states)
+        self._dirty = 0
+        self._apply(self._cache.values(), +1.0)
+
+    # ------------------------------------------------------------
+    # 重线性化
+    # ------------------------------------------------------------
+
+    def _variable_deltas(self) -> np.ndarray:
+        """
+        每个变量（结点 0..N-1 + bias）的 max_i sqrt(H_ii)·|θ_i - θ_lin,i|，yaw 取 wrap 后的差.
+
+        按当前信息矩阵对角线缩放：各分量（m、m/s、rad）统一成“几个标准差”，
+        阈值与单位、噪声设置无关.
+        """
+        N = self.num_states
+        n_x = N * STATE_SIZE
+        d = self._theta - self._theta_lin
+        d_yaw = d[6:n_x:STATE_SIZE]
+        wrap_pm_pi(d_yaw, out=d_yaw)
+        d = np.abs(d) * np.sqrt(np.maximum(self._neq.hessian_diagonal(), 0.0))
+
+        out = np.empty(N + 1, dtype=float)
+        out[:N] = np.max(d[:n_x].reshape(N, STATE_SIZE), axis=1)
+        out[N] = float(np.max(d[n_x:], initial=0.0))
+        return out
+
+    def relinearize(self, *, force: bool = False) -> int:
+        """
+        更新超阈值变量的线性化点，并重线性化与其相连的因子.
+
+        返回被重线性化的因子数.
+        """
+        N = self.num_states
+        n_x = N * STATE_SIZE
+        if force:
+            marked = np.arange(N + 1)
+        else:
+            marked = np.flatnonzero(self._variable_deltas() > self.relin_threshold)
+        if marked.size == 0:
+            return 0
+
+        handles: set = set()
+        for v in marked:
+            if v < N:
+                sl = slice(v * STATE_SIZE, (v + 1) * STATE_SIZE)
+            else:
+                sl = slice(n_x, n_x + BIAS_SIZE)
+            self._theta_lin[sl] = self._theta[sl]
+            handles |= self._var_factors[v]
+
+        hs = sorted(handles)
+        old = [self._cache[h] for h in hs]
+        new = self._linearize([c.factor for c in old], old)
+        for h, c in zip(hs, new):
+            self._cache[h] = c
+
+        if 2 * len(hs) > len(self._cache):
+            # 大部分因子都要更新：直接重新累加，顺带消除 +/- 累积的舍入误差
+            self._rebuild()
+        else:
+            self._apply(old, -1.0)
+            self._apply(new, +1.0)
+
+        self.n_relinearized_total += len(handles)
+        if self.verbose:
+            print(
+                f"[GN][ISAM] relinearize vars={marked.size}  factors={len(handles)}  "
+                f"dirty_from={self._dirty}"
+            )
+        return len(handles)
+
+    # ------------------------------------------------------------
+    # 求解
+    # ------------------------------------------------------------
+
+    def _solve_delta(self) -> np.ndarray:
+        """从最小脏结点起部分重分解 + 前代，回代 / bias Schur 补全量计算."""
+        neq = self._neq
+        N = self.num_states
+        start = self._dirty if self._Ld is not None else 0
+        self.last_refactor_from = start
+
+        try:
+            if start < N or self._Ld is None:
+                self._Ld, self._Lo = _block_tridiag_cholesky(
+                    neq.diag, neq.lower, self._Ld, self._Lo, start=start
+                )
+                self._Y = _block_tridiag_forward(
+                    self._Ld, self._Lo, _stack_rhs(neq), self._Y, start=start
+                )
+            sol = _block_tridiag_backward(self._Ld, self._Lo, self._Y)
+            delta = _bias_schur_solve(neq, sol, neq.bb)
+        except np.linalg.LinAlgError:
+            # 欠约束结点（无任何因子）等情况：退回稠密最小二乘，下次全量重分解
+            if self.verbose:
+                print("[GN][ISAM][WARN] block factorization failed, fallback to dense")
+            self._Ld = self._Lo = self._Y = None
+            self._dirty = 0
+            H, g = neq.to_dense()
+            return _solve_dense(H, g)
+
+        self._dirty = N
+        return delta
+
+    def _retract(self, delta: np.ndarray) -> np.ndarray:
+        """θ = θ_lin + δ，并 wrap 各结点 yaw."""
+        theta = self._theta_lin + delta
+        yaw = theta[6:self.num_states * STATE_SIZE:STATE_SIZE]
+        wrap_pm_pi(yaw, out=yaw)
+        return theta
+
+    def cost(self, theta: Optional[np.ndarray] = None) -> float:
+        """当前全部因子的鲁棒 cost（0.5 Σ ρ(||W r||^2)）."""
+        theta = self._theta if theta is None else np.asarray(theta, dtype=float)
+        groups, singles = build_factor_groups(self.factors)
+        total = 0.0
+        for grp in groups:
+            r_w = grp.whitened_residuals(theta)
+            sq = np.einsum("ki,ki->k", r_w, r_w)
+            total += 0.5 * float(np.sum(_robust_rho(sq, self.robust_loss, self.robust_param)))
+        for f in singles:
+            r_w = f.weight_chol() @ f.residual(theta).reshape(-1)
+            loss = self.robust_loss if _factor_robust(f) else None
+            total += 0.5 * float(_robust_rho(float(r_w @ r_w), loss, self.robust_param))
+        return total
+
+    def update(
+        self,
+        *,
+        max_iters: int = 5,
+        tol_step: float = 1e-6,
+        tol_cost_rel: float = 1e-6,
+        print_summary: bool = True,
+    ) -> Tuple[np.ndarray, GaussNewtonStats]:
+        """
+        增量 Gauss-Newton: 重线性化超阈值变量 -> 部分重分解 -> 求解 δ.
+
+        流体迭代的步长或 cost 相对变化满足判据（或没有变量超阈值）后，下一次迭代
+        全量重线性化；这一步同样满足 tol_step / |Δcost| / max(cost, 1) < tol_cost_rel
+        （与 gauss_newton_solve 相同）才算收敛。因子集合自上次收敛后未变时直接返回.
+        """
+        t_start = time.time()
+        if self._converged and self._cost is not None:
+            stats = GaussNewtonStats(
+                num_iters=0,
+                converged=True,
+                initial_cost=self._cost,
+                final_cost=self._cost,
+                final_step_norm=0.0,
+                final_cost_change=0.0,
+                elapsed_time_s=time.time() - t_start,
+                method="isam",
+            )
+            if print_summary:
+                print("[GN] incremental: factors unchanged since last converged update, skip")
+            return self._theta.copy(), stats
+
+        initial_cost = self.cost()
+        cost_old = initial_cost
+
+        converged = False
+        full = False          # 本次迭代是否全量重线性化（确认收敛用）
+        step_norm = 0.0
+        cost_change = 0.0
+        n_iters = 0
+        for it in range(max(1, int(max_iters))):
+            self.relinearize(force=full)
+
+            theta_new = self._retract(self._solve_delta())
+            step = theta_new - self._theta
+            step_yaw = step[6:self.num_states * STATE_SIZE:STATE_SIZE]
+            wrap_pm_pi(step_yaw, out=step_yaw)
+            step_norm = float(np.linalg.norm(step))
+            self._theta = theta_new
+            n_iters = it + 1
+
+            cost_new = self.cost()
+            cost_change = cost_new - cost_old
+            rel = abs(cost_change) / max(cost_old, 1.0)
+            if self.verbose:
+                print(
+                    f"[GN][ISAM] iter={n_iters:02d}  cost={cost_new:.6e}  |step|={step_norm:.3e}  "
+                    f"full={int(full)}  refactor_from={self.last_refactor_from}/{self.num_states}"
+                )
+            cost_old = cost_new
+            if step_norm < tol_step or rel < tol_cost_rel:
+                if full:
+                    converged = True
+                    break
+                full = True
+            else:
+                full = False
+
+        final_cost = cost_old
+        self._converged = converged
+        self._cost = final_cost
+        elapsed = time.time() - t_start
+        stats = GaussNewtonStats(
+            num_iters=n_iters,
+            converged=converged,
+            initial_cost=initial_cost,
+            final_cost=final_cost,
+            final_step_norm=step_norm,
+            final_cost_change=cost_change,
+            elapsed_time_s=elapsed,
+            method="isam",
+            n_accepted=n_iters,
+        )
+        if print_summary:
+            print(
+                f"[GN] incremental wall-time = {elapsed:.3f} s "
+                f"(iters={n_iters}, factors={self.num_factors}, "
+                f"relinearized={self.n_relinearized_total}, converged={converged})"
+            )
+        return self._theta.copy(), stats
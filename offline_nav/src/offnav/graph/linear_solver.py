@@ -0,0 +1,413 @@
+# src/offnav/graph/linear_solver.py
+from __future__ import annotations
+
+"""
+Block-structured normal-equation solver for the offline factor graph.
+
+θ 布局:
+    θ = [x_0(7), x_1(7), ..., x_{N-1}(7), ba(3), bgz(1)]
+
+当前所有因子（Prior / IMU 过程 / DVL BE/BI / yaw-from-vel）只连接:
+- 单个状态 x_k，或相邻两个状态 x_k, x_{k+1}
+- 以及全局 bias 块
+
+因此信息矩阵 H 具有 "块三对角 + bias 箭头" 结构:
+
+    H = [ A    B ]      A: N×N 个 7×7 块，块三对角
+        [ B^T  C ]      B: (7N)×4，C: 4×4
+
+求解思路（bias Schur 补）:
+    1) 对 A 做块三对角 Cholesky: A = L L^T，O(N·7^3)
+    2) 解 A [y, Y] = [g_x, B]
+    3) S = C - B^T Y  (4×4)，解 S δb = g_b - B^T y
+    4) δx = y - Y δb
+
+内存 O(N)，计算 O(N)，替代原来 dense H (D×D) + np.linalg.solve 的 O(D^3)。
+
+若因子连接了非相邻状态（结构不满足），add() 抛出 BlockStructureError，
+调用方可退回 dense 求解。
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from offnav.graph.states import STATE_SIZE, BIAS_SIZE
+
+
+class BlockStructureError(ValueError):
+    """因子稀疏结构不满足 "块三对角 + bias" 假设."""
+
+
+# ============================================================
+# 块结构法方程
+# ============================================================
+
+
+@dataclass
+class BlockNormalEquations:
+    """
+    以块形式累加的法方程 H δ = -g.
+
+    存储:
+        diag[k]   : H[x_k, x_k]          (N,7,7)
+        lower[k]  : H[x_{k+1}, x_k]      (N-1,7,7)
+        xb[k]     : H[x_k, bias]         (N,7,4)
+        bb        : H[bias, bias]        (4,4)
+        g         : 梯度 J^T r            (D,)
+    """
+
+    num_states: int
+    diag: np.ndarray = field(init=False, repr=False)
+    lower: np.ndarray = field(init=False, repr=False)
+    xb: np.ndarray = field(init=False, repr=False)
+    bb: np.ndarray = field(init=False, repr=False)
+    g: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        N = int(self.num_states)
+        if N <= 0:
+            raise ValueError(f"BlockNormalEquations: num_states must be > 0, got {N}")
+        self.diag = np.zeros((N, STATE_SIZE, STATE_SIZE), dtype=float)
+        self.lower = np.zeros((max(N - 1, 0), STATE_SIZE, STATE_SIZE), dtype=float)
+        self.xb = np.zeros((N, STATE_SIZE, BIAS_SIZE), dtype=float)
+        self.bb = np.zeros((BIAS_SIZE, BIAS_SIZE), dtype=float)
+        self.g = np.zeros(N * STATE_SIZE + BIAS_SIZE, dtype=float)
+
+    @property
+    def dim(self) -> int:
+        return self.g.shape[0]
+
+    def add(self, cols: np.ndarray, J_w: np.ndarray, r_w: np.ndarray) -> None:
+        """
+        累加一个 (已白化 / 已乘鲁棒权重) 因子的贡献.
+
+        参数
+        ----
+        cols : (n,) int
+            局部雅可比各列对应的全局 θ 索引（升序）.
+        J_w : (m, n)
+            局部雅可比（仅 cols 对应列）.
+        r_w : (m,)
+            白化残差.
+        """
+        cols = np.asarray(cols, dtype=int).reshape(-1)
+        if cols.size == 0:
+            return
+
+        self.add_hessian(cols, J_w.T @ J_w, J_w.T @ r_w)
+
+    def add_hessian(
+        self,
+        cols: np.ndarray,
+        H_loc: np.ndarray,
+        g_loc: np.ndarray,
+        sign: float = 1.0,
+    ) -> int:
+        """
+        直接累加 (sign=+1) 或移除 (sign=-1) 一个因子的 (H_loc, g_loc) 贡献.
+
+        返回该贡献涉及的最小状态结点编号（只涉及 bias 时返回 num_states），
+        供增量分解确定需要重算的起点。
+        """
+        cols = np.asarray(cols, dtype=int).reshape(-1)
+        N = self.num_states
+        if cols.size == 0:
+            return N
+        n_x = N * STATE_SIZE
+
+        if sign != 1.0:
+            H_loc = sign * H_loc
+            g_loc = sign * g_loc
+        self.g[cols] += g_loc
+
+        is_state = cols < n_x
+        node = np.where(is_state, cols // STATE_SIZE, -1)
+        off = np.where(is_state, cols % STATE_SIZE, cols - n_x)
+
+        nodes = np.unique(node[is_state])
+        if nodes.size > 2 or (nodes.size == 2 and nodes[1] - nodes[0] != 1):
+            raise BlockStructureError(
+                f"factor couples non-adjacent states {nodes.tolist()}"
+            )
+
+        sel_b = np.flatnonzero(~is_state)
+        ob = off[sel_b]
+        if sel_b.size:
+            self.bb[np.ix_(ob, ob)] += H_loc[np.ix_(sel_b, sel_b)]
+
+        for k in nodes:
+            sel_k = np.flatnonzero(node == k)
+            ok = off[sel_k]
+            self.diag[k][np.ix_(ok, ok)] += H_loc[np.ix_(sel_k, sel_k)]
+            if sel_b.size:
+                self.xb[k][np.ix_(ok, ob)] += H_loc[np.ix_(sel_k, sel_b)]
+
+        if nodes.size == 2:
+            k0, k1 = int(nodes[0]), int(nodes[1])
+            sel0 = np.flatnonzero(node == k0)
+            sel1 = np.flatnonzero(node == k1)
+            self.lower[k0][np.ix_(off[sel1], off[sel0])] += H_loc[np.ix_(sel1, sel0)]
+
+        return int(nodes[0]) if nodes.size else N
+
+    def add_batch(self, cols: np.ndarray, J_w: np.ndarray, r_w: np.ndarray) -> None:
+        """
+        向量化累加一组同结构因子（见 offnav.graph.factor_groups）.
+
+        参数
+        ----
+        cols : (M, n) int
+        J_w : (M, m, n)
+        r_w : (M, m)
+        """
+        cols = np.asarray(cols, dtype=int)
+        if cols.size == 0:
+            return
+
+        H_loc = np.einsum("kmi,kmj->kij", J_w, J_w)           # (M,n,n)
+        g_loc = np.einsum("kmi,km->ki", J_w, r_w)             # (M,n)
+        self.add_hessian_batch(cols, H_loc, g_loc)
+
+    def add_hessian_batch(
+        self,
+        cols: np.ndarray,
+        H_loc: np.ndarray,
+        g_loc: np.ndarray,
+    ) -> int:
+        """
+        add_hessian 的向量化版本: cols (M,n)、H_loc (M,n,n)、g_loc (M,n).
+
+        移除贡献时传入取负的 H_loc / g_loc；返回涉及的最小状态结点.
+        """
+        cols = np.asarray(cols, dtype=int)
+        N = self.num_states
+        if cols.size == 0:
+            return N
+        n_x = N * STATE_SIZE
+
+        self.g += np.bincount(cols.ravel(), weights=g_loc.ravel(), minlength=self.dim)
+
+        is_state = cols < n_x
+        node = np.where(is_state, cols // STATE_SIZE, -1)
+        off = np.where(is_state, cols % STATE_SIZE, cols - n_x)
+
+        # 列对 (a, b) 展开为 (M,n,n)
+        na, nb = node[:, :, None], node[:, None, :]
+        oa, ob = off[:, :, None], off[:, None, :]
+        sa, sb = is_state[:, :, None], is_state[:, None, :]
+        na, nb, oa, ob, sa, sb = np.broadcast_arrays(na, nb, oa, ob, sa, sb)
+
+        if np.any(sa & sb & (np.abs(na - nb) > 1)):
+            raise BlockStructureError("factor group couples non-adjacent states")
+
+        def _acc(target: np.ndarray, mask: np.ndarray, flat_idx: np.ndarray) -> None:
+            if np.any(mask):
+                target += np.bincount(
+                    flat_idx[mask], weights=H_loc[mask], minlength=target.size
+                ).reshape(target.shape)
+
+        S, B = STATE_SIZE, BIAS_SIZE
+        _acc(self.diag, sa & sb & (na == nb), (na * S + oa) * S + ob)
+        _acc(self.lower, sa & sb & (na == nb + 1), (nb * S + oa) * S + ob)
+        _acc(self.xb, sa & ~sb, (na * S + oa) * B + ob)
+        _acc(self.bb, ~sa & ~sb, oa * B + ob)
+
+        state_nodes = node[is_state]
+        return int(state_nodes.min()) if state_nodes.size else N
+
+    def add_dense(self, J_w: np.ndarray, r_w: np.ndarray) -> None:
+        """
+        兼容旧因子接口: J_w 为 (m, D) 稠密雅可比，自动提取非零列.
+        """
+        cols = np.flatnonzero(np.any(J_w != 0.0, axis=0))
+        self.add(cols, J_w[:, cols], r_w)
+
+    def hessian_diagonal(self) -> np.ndarray:
+        """H 的对角线 (D,)，供 LM 的 Marquardt 缩放使用."""
+        n_x = self.num_states * STATE_SIZE
+        out = np.empty(self.dim, dtype=float)
+        out[:n_x] = np.diagonal(self.diag, axis1=1, axis2=2).reshape(-1)
+        out[n_x:] = np.diagonal(self.bb)
+        return out
+
+    def to_dense(self) -> Tuple[np.ndarray, np.ndarray]:
+        """展开为稠密 (H, g)，仅用于调试 / 退化回退."""
+        N = self.num_states
+        n_x = N * STATE_SIZE
+        H = np.zeros((self.dim, self.dim), dtype=float)
+        for k in range(N):
+            sk = slice(k * STATE_SIZE, (k + 1) * STATE_SIZE)
+            H[sk, sk] = self.diag[k]
+            H[sk, n_x:] = self.xb[k]
+            H[n_x:, sk] = self.xb[k].T
+            if k < N - 1:
+                sk1 = slice((k + 1) * STATE_SIZE, (k + 2) * STATE_SIZE)
+                H[sk1, sk] = self.lower[k]
+                H[sk, sk1] = self.lower[k].T
+        H[n_x:, n_x:] = self.bb
+        return H, self.g.copy()
+
+
+# ============================================================
+# 块三对角 Cholesky
+# ============================================================
+
+
+def _block_tridiag_cholesky(
+    diag: np.ndarray,
+    lower: np.ndarray,
+    Ld: Optional[np.ndarray] = None,
+    Lo: Optional[np.ndarray] = None,
+    start: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    对称正定块三对角矩阵 A 的块 Cholesky 分解 A = L L^T.
+
+    返回:
+        Ld[k] : L 的对角块 (下三角)
+        Lo[k] : L 的次对角块 L[k+1, k]
+
+    增量用法: 传入已有 (Ld, Lo) 与 start，只重算结点 k >= start 的块
+    （块 k < start 只依赖 A 的前 start 行块，保持不变）。
+
+    非正定时 np.linalg.cholesky 抛出 LinAlgError.
+    """
+    N = diag.shape[0]
+    if Ld is None or Lo is None:
+        Ld = np.empty_like(diag)
+        Lo = np.empty_like(lower)
+        start = 0
+
+    for k in range(max(0, start), N):
+        if k == 0:
+            Ld[0] = np.linalg.cholesky(diag[0])
+            continue
+        # Lo[k-1] = A[k,k-1] L[k-1]^{-T}
+        Lo[k - 1] = np.linalg.solve(Ld[k - 1], lower[k - 1].T).T
+        Ld[k] = np.linalg.cholesky(diag[k] - Lo[k - 1] @ Lo[k - 1].T)
+    return Ld, Lo
+
+
+def _block_tridiag_forward(
+    Ld: np.ndarray,
+    Lo: np.ndarray,
+    rhs: np.ndarray,
+    y: Optional[np.ndarray] = None,
+    start: int = 0,
+) -> np.ndarray:
+    """前代: L y = rhs，rhs 形状 (N, 7, m)；可从 start 起增量重算."""
+    N = Ld.shape[0]
+    if y is None:
+        y = np.empty_like(rhs)
+        start = 0
+
+    for k in range(max(0, start), N):
+        if k == 0:
+            y[0] = np.linalg.solve(Ld[0], rhs[0])
+        else:
+            y[k] = np.linalg.solve(Ld[k], rhs[k] - Lo[k - 1] @ y[k - 1])
+    return y
+
+
+def _block_tridiag_backward(
+    Ld: np.ndarray,
+    Lo: np.ndarray,
+    y: np.ndarray,
+) -> np.ndarray:
+    """回代: L^T x = y."""
+    N = Ld.shape[0]
+    x = np.empty_like(y)
+    x[N - 1] = np.linalg.solve(Ld[N - 1].T, y[N - 1])
+    for k in range(N - 2, -1, -1):
+        x[k] = np.linalg.solve(Ld[k].T, y[k] - Lo[k].T @ x[k + 1])
+    return x
+
+
+def _block_tridiag_solve(
+    Ld: np.ndarray,
+    Lo: np.ndarray,
+    rhs: np.ndarray,
+) -> np.ndarray:
+    """
+    利用块 Cholesky 因子求解 A X = rhs.
+
+    rhs 形状 (N, 7, m)，返回同形状.
+    """
+    return _block_tridiag_backward(Ld, Lo, _block_tridiag_forward(Ld, Lo, rhs))
+
+
+def _bias_schur_solve(
+    neq: "BlockNormalEquations",
+    sol: np.ndarray,
+    bb: np.ndarray,
+) -> np.ndarray:
+    """
+    由 A^{-1}[-g_x, B] (sol, 形状 (N,7,5)) 完成 bias Schur 补求解，返回 δ (D,).
+    """
+    N = neq.num_states
+    n_x = N * STATE_SIZE
+
+    y = sol[:, :, 0].reshape(n_x)
+    Y = sol[:, :, 1:].reshape(n_x, BIAS_SIZE)
+    B = neq.xb.reshape(n_x, BIAS_SIZE)
+
+    # bias Schur 补
+    S = bb - B.T @ Y
+    rhs_b = -neq.g[n_x:] - B.T @ y
+    delta_b = np.linalg.solve(S, rhs_b)
+
+    delta = np.empty(n_x + BIAS_SIZE, dtype=float)
+    delta[:n_x] = y - Y @ delta_b
+    delta[n_x:] = delta_b
+    return delta
+
+
+def _stack_rhs(neq: "BlockNormalEquations") -> np.ndarray:
+    """[-g_x, B] 按结点堆叠为 (N, 7, 1+4)."""
+    N = neq.num_states
+    rhs = np.empty((N, STATE_SIZE, 1 + BIAS_SIZE), dtype=float)
+    rhs[:, :, 0] = -neq.g[:N * STATE_SIZE].reshape(N, STATE_SIZE)
+    rhs[:, :, 1:] = neq.xb
+    return rhs
+
+
+def solve_block_normal_equations(
+    neq: BlockNormalEquations,
+    *,
+    damping: Union[float, np.ndarray] = 0.0,
+) -> np.ndarray:
+    """
+    求解 (H + diag(damping)) δ = -g，利用块三对角 + bias Schur 补.
+
+    参数
+    ----
+    neq : BlockNormalEquations
+        已累加完成的块法方程.
+    damping : float or (D,) array
+        对角阻尼（LM 用），标量表示 damping·I，默认 0.
+
+    返回
+    ----
+    delta : (D,)
+
+    A 或 Schur 补非正定时抛出 np.linalg.LinAlgError.
+    """
+    N = neq.num_states
+    n_x = N * STATE_SIZE
+
+    diag = neq.diag
+    bb = neq.bb
+    damp = np.broadcast_to(np.asarray(damping, dtype=float), (neq.dim,))
+    if np.any(damp != 0.0):
+        ar = np.arange(STATE_SIZE)
+        diag = diag.copy()
+        diag[:, ar, ar] += damp[:n_x].reshape(N, STATE_SIZE)
+        bb = bb + np.diag(damp[n_x:])
+
+    Ld, Lo = _block_tridiag_cholesky(diag, neq.lower)
+
+    # 同时解 A [y, Y] = [-g_x, B]
+    sol = _block_tridiag_solve(Ld, Lo, _stack_rhs(neq))
+    return _bias_schur_solve(neq, sol, bb)
@@ -0,0 +1,310 @@
+# src/offnav/graph/sliding_window.py
+from __future__ import annotations
+
+"""
+Fixed-lag / sliding-window smoothing on top of gauss_newton_solve.
+
+全局因子图（所有关键帧一次求解）在长航次上要么被 max_nodes 截断，
+要么内存爆炸。本模块提供滑窗平滑:
+
+- 窗口: 连续 window_size 个状态结点 + 全局 bias；
+- 每个窗口求解后，最旧的 window_step 个结点被“定稿”输出，
+  并通过 Schur 补边缘化为作用在 [x_first, bias] 上的 MarginalPriorFactor；
+- 下一个窗口 = 剩余结点 + 新结点 + 该边缘化先验。
+
+每步的内存/计算只与 window_size 有关，与航次长度无关；
+所有结点都会被定稿一次，输出仍是覆盖整个航次的连续轨迹。
+
+要求: 因子只连接单个结点或相邻结点（+ bias），与 block 求解器的结构假设一致；
+因子以 (k, num_states) 字段定位结点，滑窗内通过 dataclasses.replace 重新编号。
+"""
+
+import dataclasses
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from offnav.graph.factors import Factor, ImuProcessFactor, MarginalPriorFactor
+from offnav.graph.smoothing import GaussNewtonStats, gauss_newton_solve, linearize_factor
+from offnav.graph.states import BIAS_SIZE, STATE_SIZE, theta_dim, wrap_yaw
+
+
+# ============================================================
+# 因子结点索引 / 重编号
+# ============================================================
+
+
+def _factor_nodes(f: Factor) -> Tuple[int, int]:
+    """返回因子连接的 (最小结点, 最大结点)；无 k 字段的先验因子视为作用于 x_0."""
+    k = int(getattr(f, "k", 0))
+    if isinstance(f, ImuProcessFactor):
+        return k, k + 1
+    return k, k
+
+
+def _reindex_factor(f: Factor, k0: int, num_states: int) -> Factor:
+    """把全局结点编号的因子平移到以 k0 为起点、共 num_states 个结点的窗口."""
+    if hasattr(f, "k"):
+        return dataclasses.replace(f, k=int(f.k) - k0, num_states=num_states)
+    return dataclasses.replace(f, num_states=num_states)
+
+
+def _window_theta(theta: np.ndarray, num_states: int, k0: int, k1: int) -> np.ndarray:
+    """从全局 θ 中取出结点 [k0, k1) + bias，组成窗口 θ."""
+    n_x = num_states * STATE_SIZE
+    return np.concatenate([theta[k0 * STATE_SIZE:k1 * STATE_SIZE], theta[n_x:n_x + BIAS_SIZE]])
+
+
+# ============================================================
+# 边缘化
+# ============================================================
+
+
+def marginalize_leading_states(
+    factors: Sequence[Factor],
+    theta: np.ndarray,
+    num_states: int,
+    n_marg: int,
+    *,
+    robust_loss: Optional[str] = None,
+    robust_param: float = 1.0,
+    eig_rel_floor: float = 1e-12,
+) -> MarginalPriorFactor:
+    """
+    在 θ 处线性化 factors，边缘化结点 x_0..x_{n_marg-1}，
+    得到作用于 [x_{n_marg}, bias] 的 MarginalPriorFactor.
+
+    参数
+    ----
+    factors : Sequence[Factor]
+        与被边缘化结点相连的全部因子（窗口编号）.
+        这些因子只能依赖 x_0..x_{n_marg}、bias.
+    theta : np.ndarray
+        窗口 θ（线性化点，通常为窗口最优解）.
+    num_states : int
+        窗口结点数.
+    n_marg : int
+        被边缘化的最旧结点数（>=1）.
+
+    返回
+    ----
+    MarginalPriorFactor
+        k = n_marg，num_states 为窗口结点数（由调用方重编号）.
+    """
+    theta = np.asarray(theta, dtype=float).reshape(-1)
+    D = theta.shape[0]
+    n_x = num_states * STATE_SIZE
+    if not (1 <= n_marg < num_states):
+        raise ValueError(f"marginalize: n_marg={n_marg} out of [1, {num_states})")
+
+    n_m = n_marg * STATE_SIZE
+    keep_cols = np.r_[n_m:n_m + STATE_SIZE, n_x:n_x + BIAS_SIZE]
+    union_cols = np.r_[0:n_m, keep_cols]
+    n_u = union_cols.shape[0]
+
+    lookup = np.full(D, -1, dtype=int)
+    lookup[union_cols] = np.arange(n_u)
+
+    H = np.zeros((n_u, n_u), dtype=float)
+    g = np.zeros(n_u, dtype=float)
+    for f in factors:
+        cols, J_w, r_w = linearize_factor(
+            f, theta, robust_loss=robust_loss, robust_param=robust_param
+        )
+        if cols is None:
+            cols = np.flatnonzero(np.any(J_w != 0.0, axis=0))
+            J_w = J_w[:, cols]
+        loc = lookup[np.asarray(cols, dtype=int)]
+        if np.any(loc < 0):
+            raise ValueError(
+                f"marginalize: {type(f).__name__} touches variables outside x_0..x_{n_marg} + bias"
+            )
+        H[np.ix_(loc, loc)] += J_w.T @ J_w
+        g[loc] += J_w.T @ r_w
+
+    # Schur 补: H_s = H_kk - H_km H_mm^{-1} H_mk
+    H_mm = H[:n_m, :n_m]
+    H_mk = H[:n_m, n_m:]
+    try:
+        L = np.linalg.cholesky(H_mm)
+        X = np.linalg.solve(L.T, np.linalg.solve(L, np.column_stack([H_mk, g[:n_m]])))
+    except np.linalg.LinAlgError:
+        X = np.linalg.pinv(H_mm) @ np.column_stack([H_mk, g[:n_m]])
+
+    H_s = H[n_m:, n_m:] - H_mk.T @ X[:, :-1]
+    g_s = g[n_m:] - H_mk.T @ X[:, -1]
+    H_s = 0.5 * (H_s + H_s.T)
+
+    # H_s = R^T R，R = Λ^{1/2} V^T；丢弃（近）零特征方向
+    lam, V = np.linalg.eigh(H_s)
+    floor = eig_rel_floor * max(float(lam.max(initial=0.0)), 1e-300)
+    valid = lam > floor
+    sqrt_lam = np.sqrt(np.where(valid, lam, 0.0))
+
+    R = sqrt_lam[:, None] * V.T
+    e = np.zeros_like(g_s)
+    e[valid] = (V.T @ g_s)[valid] / sqrt_lam[valid]
+
+    return MarginalPriorFactor(
+        num_states=num_states,
+        k=n_marg,
+        theta_lin=theta[keep_cols].copy(),
+        sqrt_info=R,
+        e=e,
+    )
+
+
+# ============================================================
+# 滑窗求解主入口
+# ============================================================
+
+
+def sliding_window_solve(
+    factors: Sequence[Factor],
+    theta0: np.ndarray,
+    num_states: int,
+    *,
+    window_size: int,
+    window_step: int = 0,
+    verbose: bool = False,
+    **solve_kwargs: Any,
+) -> Tuple[np.ndarray, GaussNewtonStats, List[GaussNewtonStats]]:
+    """
+    固定滞后滑窗平滑.
+
+    参数
+    ----
+    factors : Sequence[Factor]
+        全局编号的因子列表（num_states = 全部结点数）.
+    theta0 : np.ndarray, shape (7N+4,)
+        全局初值.
+    num_states : int
+        全局结点数 N.
+    window_size : int
+        每个窗口的结点数 (>= 2).
+    window_step : int
+        每次滑动边缘化的结点数；<=0 时取 window_size // 2.
+    verbose : bool
+        打印每个窗口的摘要.
+    **solve_kwargs
+        透传给 gauss_newton_solve（max_iters / robust_loss / linear_solver / method ...）.
+
+    返回
+    ----
+    theta_opt : np.ndarray
+        全局 θ（每个结点取其被定稿时的估计）.
+    stats : GaussNewtonStats
+        所有窗口的汇总（iters / accepted / rejected 求和，cost 为各窗口之和）.
+    window_stats : List[GaussNewtonStats]
+        每个窗口的统计.
+    """
+    t_start = time.time()
+
+    N = int(num_states)
+    W = max(2, int(window_size))
+    S = int(window_step) if int(window_step) > 0 else max(1, W // 2)
+    S = min(S, W - 1)
+
+    theta0 = np.asarray(theta0, dtype=float).reshape(-1)
+    if theta0.shape[0] != theta_dim(N):
+        raise ValueError(
+            f"sliding_window_solve: len(theta0)={theta0.shape[0]} != 7N+4 (N={N})"
+        )
+    theta = theta0.copy()
+    n_x = N * STATE_SIZE
+
+    robust_loss = solve_kwargs.get("robust_loss")
+    robust_param = float(solve_kwargs.get("robust_param", 1.0))
+
+    # 按“最大结点”分桶，窗口 [k0,k1) 只需扫描桶 k0..k1-1
+    by_max: List[List[Factor]] = [[] for _ in range(N)]
+    for f in factors:
+        lo, hi = _factor_nodes(f)
+        if hi >= N or lo < 0:
+            raise IndexError(f"sliding_window_solve: factor nodes ({lo},{hi}) out of [0,{N})")
+        by_max[hi].append(f)
+
+    window_stats: List[GaussNewtonStats] = []
+    marg_prior: Optional[MarginalPriorFactor] = None
+    k0 = 0
+    k1_prev = 0
+
+    while True:
+        k1 = min(k0 + W, N)
+        Wn = k1 - k0
+
+        # 新进入窗口的结点：沿用上一窗口末结点的 p / yaw 修正量
+        if 0 < k1_prev < k1:
+            i_last = (k1_prev - 1) * STATE_SIZE
+            dp = theta[i_last:i_last + 3] - theta0[i_last:i_last + 3]
+            dyaw = theta[i_last + 6] - theta0[i_last + 6]
+            new_nodes = np.arange(k1_prev, k1)
+            base = new_nodes * STATE_SIZE
+            theta[base[:, None] + np.arange(3)] = theta0[base[:, None] + np.arange(3)] + dp
+            theta[base + 6] = [wrap_yaw(float(y)) for y in theta0[base + 6] + dyaw]
+        k1_prev = k1
+
+        win_factors: List[Factor] = []
+        if marg_prior is not None:
+            win_factors.append(_reindex_factor(marg_prior, k0, Wn))
+        for n in range(k0, k1):
+            for f in by_max[n]:
+                if _factor_nodes(f)[0] >= k0:
+                    win_factors.append(_reindex_factor(f, k0, Wn))
+
+        theta_win0 = _window_theta(theta, N, k0, k1)
+        theta_win, st = gauss_newton_solve(
+            win_factors, theta_win0, print_summary=False, **solve_kwargs
+        )
+        window_stats.append(st)
+
+        theta[k0 * STATE_SIZE:k1 * STATE_SIZE] = theta_win[:Wn * STATE_SIZE]
+        theta[n_x:n_x + BIAS_SIZE] = theta_win[Wn * STATE_SIZE:]
+
+        if verbose:
+            print(
+                f"[GRAPH][WIN] #{len(window_stats):03d} nodes=[{k0},{k1})  "
+                f"factors={len(win_factors)}  iters={st.num_iters}  "
+                f"cost {st.initial_cost:.3e}->{st.final_cost:.3e}"
+            )
+
+        if k1 >= N:
+            break
+
+        # 边缘化最旧的 S 个结点
+        n_marg = min(S, Wn - 1)
+        marg_factors = [f for f in win_factors if _factor_nodes(f)[0] < n_marg]
+        prior_loc = marginalize_leading_states(
+            marg_factors,
+            theta_win,
+            Wn,
+            n_marg,
+            robust_loss=robust_loss,
+            robust_param=robust_param,
+        )
+        marg_prior = _reindex_factor(prior_loc, -k0, N)
+        k0 += n_marg
+
+    elapsed = time.time() - t_start
+    stats = GaussNewtonStats(
+        num_iters=sum(s.num_iters for s in window_stats),
+        converged=all(s.converged for s in window_stats),
+        initial_cost=sum(s.initial_cost for s in window_stats),
+        final_cost=sum(s.final_cost for s in window_stats),
+        final_step_norm=window_stats[-1].final_step_norm,
+        final_cost_change=window_stats[-1].final_cost_change,
+        elapsed_time_s=elapsed,
+        method=window_stats[-1].method,
+        n_accepted=sum(s.n_accepted for s in window_stats),
+        n_rejected=sum(s.n_rejected for s in window_stats),
+        lambda_history=[lam for s in window_stats for lam in s.lambda_history],
+    )
+
+    print(
+        f"[GN] sliding-window total wall-time = {elapsed:.3f} s "
+        f"(N={N}, window={W}, step={S}, windows={len(window_stats)}, "
+        f"iters={stats.num_iters}, converged={stats.converged})"
+    )
+
+    return theta, stats, window_stats
@@ -12,22 +12,45 @@ Nonlinear least-squares smoothing (Gauss-Newton) for offline factor-graph naviga
 - 支持任意实现 Factor 协议的因子 (see offnav.graph.factors)
 - 每个因子提供 residual / jacobian / weight_chol
 - 可选鲁棒核 (Huber / Cauchy 等，第一版实现 Huber)
+- 线性求解后端可选:
+    "dense": 稠密 H (D×D) + np.linalg.solve（原实现）
+    "block": 块三对角 + bias Schur 补（见 offnav.graph.linear_solver），O(N)
+- 迭代策略可选:
+    "gn": 经典 Gauss-Newton（可选回溯线搜索 line_search）
+    "lm": Levenberg-Marquardt（Nielsen 阻尼 μ·I，μ = λ·max diag(H)，增益比自适应 + 拒绝步），
+          λ 默认从 0 起步（步步下降时与 GN 逐步相同），首次被拒才从 lambda_min 开始加阻尼；
+          拒绝步只重解阻尼法方程 + 重算 cost，不重新线性化
+- 可选因子分组 (group_factors): 同类型因子打包成结构数组整组求值
+  （见 offnav.graph.factor_groups），每次迭代 Python 开销 ~ 因子类型数
 """
 
-from dataclasses import dataclass
-from typing import Sequence, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Sequence, Dict, Any, List, Optional, Tuple, Union
 
 import numpy as np
 import time  # 新增：用于统计 wall-time
 
+from offnav.graph.factor_groups import FactorGroup, build_factor_groups
 from offnav.graph.factors import Factor
-from offnav.graph.states import STATE_SIZE, BIAS_SIZE, state_slice, wrap_yaw
+from offnav.graph.linear_solver import (
+    BlockNormalEquations,
+    BlockStructureError,
+    solve_block_normal_equations,
+)
+from offnav.graph.states import STATE_SIZE, BIAS_SIZE, state_matrix
+from offnav.models.angles import wrap_pm_pi
+
+LINEAR_SOLVERS = ("dense", "block")
+SOLVER_METHODS = ("gn", "lm")
 
 
 @dataclass
 class GaussNewtonStats:
     """
     Gauss-Newton 迭代统计信息.
+
+    cost = 0.5 Σ ρ(||r_w||^2)，ρ 为 _robust_rho 的 Huber 核；旧版按 0.5·w·s 计，
+    启用鲁棒核时 initial_cost / final_cost 与旧版运行结果不可直接比较.
     """
 
     num_iters: int
@@ -38,6 +61,12 @@ class GaussNewtonStats:
     final_cost_change: float
     elapsed_time_s: float  # 新增：总耗时（秒）
 
+    # 迭代策略统计（LM / 线搜索）
+    method: str = "gn"
+    n_accepted: int = 0
+    n_rejected: int = 0
+    lambda_history: List[float] = field(default_factory=list)
+
 
 # ------------------------------
 # 内部工具: yaw wrap
@@ -60,10 +89,9 @@ def _wrap_yaw_all_states(theta: np.ndarray) -> None:
     if num_states <= 0:
         return
 
-    for k in range(num_states):
-        s = state_slice(k, num_states)
-        idx_yaw = s.start + 6  # x_k 的第 7 维是 yaw
-        theta[idx_yaw] = wrap_yaw(theta[idx_yaw])
+    # x_k 的第 7 维是 yaw；state_matrix 为 θ 的视图，原地 wrap
+    yaw = state_matrix(theta, num_states)[:, 6]
+    wrap_pm_pi(yaw, out=yaw)
 
 
 # ------------------------------
@@ -104,6 +132,95 @@ def _robust_weight(
 
     # 可以在此扩展其他核 (Cauchy, Tukey 等)，暂不实现
     return 1.0
+
+
+def _robust_weights(
+    norm_r: np.ndarray,
+    loss_type: Optional[str],
+    loss_param: float,
+) -> np.ndarray:
+    """_robust_weight 的向量化版本（逐因子残差范数 -> 权重数组）."""
+    norm_r = np.asarray(norm_r, dtype=float)
+    if loss_type is None or loss_type.lower() not in ("huber", "h"):
+        return np.ones_like(norm_r)
+
+    delta = float(max(loss_param, 1e-6))
+    return np.where(norm_r <= delta, 1.0, delta / np.maximum(norm_r, 1e-6))
+
+
+def _robust_rho(
+    sq_norm: np.ndarray,
+    loss_type: Optional[str],
+    loss_param: float,
+) -> np.ndarray:
+    """
+    鲁棒核 ρ(s)，s = ||r||^2；cost = 0.5 Σ ρ(s_j).
+
+    与 _robust_weight 的 IRLS 权重一致（w = ρ'(s)），
+    保证 cost 的梯度等于 Σ w J^T r，LM 的增益比才有意义。
+    """
+    s = np.asarray(sq_norm, dtype=float)
+    if loss_type is None or loss_type.lower() not in ("huber", "h"):
+        return s
+
+    delta = float(max(loss_param, 1e-6))
+    return np.where(s <= delta * delta, s, 2.0 * delta * np.sqrt(s) - delta * delta)
+
+
+def _factor_robust(f: Factor) -> bool:
+    """因子是否参与鲁棒核（边缘化先验等因子置 robust=False 豁免）."""
+    return bool(getattr(f, "robust", True))
+
+
+# ------------------------------
+# 单因子线性化
+# ------------------------------
+def linearize_factor(
+    f: Factor,
+    theta: np.ndarray,
+    *,
+    robust_loss: Optional[str] = None,
+    robust_param: float = 1.0,
+) -> Tuple[Optional[np.ndarray], np.ndarray, np.ndarray]:
+    """
+    单个因子的白化 + 鲁棒加权线性化.
+
+    返回 (cols, J_w, r_w)；cols=None 表示 J_w 为 (m×D) 稠密雅可比
+    （因子未实现 jacobian_blocks 时）.
+    """
+    r = f.residual(theta).reshape(-1)   # (m,)
+    W = f.weight_chol()                 # (m,m)
+    if hasattr(f, "jacobian_blocks"):
+        cols, J = f.jacobian_blocks(theta)   # (n,), (m,n)
+    else:
+        cols, J = None, f.jacobian(theta)    # (m,D)
+
+    # 加权
+    r_w = W @ r
+    J_w = W @ J
+
+    # 鲁棒核
+    if _factor_robust(f):
+        w = _robust_weight(np.linalg.norm(r_w), robust_loss, robust_param)
+        if w < 1.0:
+            scale = np.sqrt(w)
+            r_w = scale * r_w
+            J_w = scale * J_w
+    return cols, J_w, r_w
+
+
+# ------------------------------
+# 内部工具: 稠密线性求解
+# ------------------------------
+def _solve_dense(H: np.ndarray, g: np.ndarray) -> np.ndarray:
+    try:
+        return np.linalg.solve(H, -g)
+    except np.linalg.LinAlgError:
+        # 数值不稳定时，可以退回为最小二乘或直接中止
+        delta, *_ = np.linalg.lstsq(H, -g, rcond=None)
+        return delta
+
+
 # ------------------------------
 # 主入口: Gauss-Newton 求解
 # ------------------------------
@@ -116,7 +233,15 @@ def gauss_newton_solve(
     tol_cost_rel: float = 1e-6,
     robust_loss: Optional[str] = None,
     robust_param: float = 1.0,
+    linear_solver: str = "dense",
+    group_factors: bool = False,
+    method: str = "gn",
+    line_search: bool = False,
+    lambda_init: float = 0.0,
+    lambda_min: float = 1.0e-4,
+    lambda_max: float = 1.0e3,
     verbose: bool = False,
+    print_summary: bool = True,
 ) -> Tuple[np.ndarray, GaussNewtonStats]:
     """
     使用 Gauss-Newton 对给定的因子图进行非线性最小二乘优化.
@@ -137,8 +262,25 @@ def gauss_newton_solve(
         鲁棒核类型，如 "huber" 或 None.
     robust_param : float
         鲁棒核参数 δ.
+    linear_solver : str
+        法方程求解后端: "dense"（默认）或 "block"（块三对角 + bias Schur 补）.
+        block 模式遇到非链式结构或非正定时自动退回 dense.
+    group_factors : bool
+        若为 True，则把 IMU / DVL 因子按类型打包为向量化因子组整组求值.
+    method : str
+        "gn"（默认，每步无条件接受）或 "lm"（Levenberg-Marquardt）.
+    line_search : bool
+        仅 method="gn": cost 上升时对步长做回溯减半，仍无下降则拒绝该步并停止.
+    lambda_init, lambda_min, lambda_max : float
+        仅 method="lm": 相对阻尼 λ（阻尼项 μ·I，μ = λ·max diag(H)，随问题尺度缩放）.
+        lambda_init=0: 不加阻尼（与 GN 相同）直到第一次被拒，此时 λ = lambda_min（τ）；
+        之后按 Nielsen 规则：拒绝 λ *= ν, ν *= 2；接受 λ *= max(1/3, 1-(2ρ-1)^3), ν = 2.
+        λ 超过 lambda_max 仍无法下降时停止.
+        被拒步的相对 cost 变化已低于 tol_cost_rel（或 ||δ|| < tol_step）时按收敛处理.
     verbose : bool
         若为 True，则在每次迭代打印 cost / step 等信息.
+    print_summary : bool
+        是否打印一行 wall-time 摘要（滑窗等多次调用场景由上层汇总打印）.
 
     返回
     ----
@@ -167,17 +309,30 @@ def gauss_newton_solve(
         )
         return theta.copy(), stats
 
+    if group_factors:
+        groups, singles = build_factor_groups(factors)
+    else:
+        groups, singles = [], list(factors)
+
+    # 因子组的白化 + 鲁棒加权: 返回 (r_w, 每个因子的 sqrt(w))
+    def _group_robust_scale(r_w: np.ndarray) -> np.ndarray:
+        w = _robust_weights(np.linalg.norm(r_w, axis=1), robust_loss, robust_param)
+        return np.sqrt(w)
+
     # 计算初始 cost
     def _compute_cost(theta_vec: np.ndarray) -> float:
         cost_val = 0.0
-        for f in factors:
+        for grp in groups:
+            r_w = grp.whitened_residuals(theta_vec)
+            sq = np.einsum("ki,ki->k", r_w, r_w)
+            cost_val += 0.5 * float(np.sum(_robust_rho(sq, robust_loss, robust_param)))
+        for f in singles:
             r = f.residual(theta_vec).reshape(-1)
             W = f.weight_chol()
             r_w = W @ r
-            w = _robust_weight(np.linalg.norm(r_w), robust_loss, robust_param)
-            if w < 1.0:
-                r_w = np.sqrt(w) * r_w
-            cost_val += 0.5 * float(r_w.T @ r_w)
+            sq = float(r_w.T @ r_w)
+            loss = robust_loss if _factor_robust(f) else None
+            cost_val += 0.5 * float(_robust_rho(sq, loss, robust_param))
         return cost_val
 
     cost_old = _compute_cost(theta)
@@ -190,54 +345,190 @@ def gauss_newton_solve(
     if verbose:
         print(f"[GN] initial cost = {initial_cost:.6e}")
 
-    for it in range(1, max_iters + 1):
-        # --- 构建 Normal Equations: H δ = -g ---
+    solver = str(linear_solver or "dense").lower()
+    if solver not in LINEAR_SOLVERS:
+        print(f"[GN][WARN] unknown linear_solver={linear_solver!r}, fallback to 'dense'")
+        solver = "dense"
+    num_states = (D - BIAS_SIZE) // STATE_SIZE
+    if solver == "block" and (num_states <= 0 or num_states * STATE_SIZE + BIAS_SIZE != D):
+        print(f"[GN][WARN] dim={D} does not match θ layout, fallback to 'dense'")
+        solver = "dense"
+
+    def _linearize(
+        f: Factor, theta_vec: np.ndarray
+    ) -> Tuple[Optional[np.ndarray], np.ndarray, np.ndarray]:
+        return linearize_factor(f, theta_vec, robust_loss=robust_loss, robust_param=robust_param)
+
+    def _linearize_group(
+        grp: FactorGroup, theta_vec: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        cols, J_w, r_w = grp.linearize(theta_vec)
+        scale = _group_robust_scale(r_w)
+        return cols, J_w * scale[:, None, None], r_w * scale[:, None]
+
+    def _build_dense(theta_vec: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         H = np.zeros((D, D), dtype=float)
         g = np.zeros(D, dtype=float)
+        for grp in groups:
+            cols, J_w, r_w = _linearize_group(grp, theta_vec)
+            H_loc = np.einsum("kmi,kmj->kij", J_w, J_w)
+            flat = cols[:, :, None] * D + cols[:, None, :]
+            H += np.bincount(flat.ravel(), weights=H_loc.ravel(), minlength=D * D).reshape(D, D)
+            g += np.bincount(
+                cols.ravel(), weights=np.einsum("kmi,km->ki", J_w, r_w).ravel(), minlength=D
+            )
+        for f in singles:
+            cols, J_w, r_w = _linearize(f, theta_vec)
+            if cols is None:
+                H += J_w.T @ J_w
+                g += J_w.T @ r_w
+            else:
+                H[np.ix_(cols, cols)] += J_w.T @ J_w
+                g[cols] += J_w.T @ r_w
+        return H, g
+
+    method_norm = str(method or "gn").lower()
+    if method_norm not in SOLVER_METHODS:
+        print(f"[GN][WARN] unknown method={method!r}, fallback to 'gn'")
+        method_norm = "gn"
+
+    # --- 构建 Normal Equations: H δ = -g ---
+    # 返回 BlockNormalEquations 或稠密 (H, g)
+    def _assemble(theta_vec: np.ndarray) -> Union[BlockNormalEquations, Tuple[np.ndarray, np.ndarray]]:
+        nonlocal solver
+        if solver == "block":
+            neq = BlockNormalEquations(num_states)
+            try:
+                for grp in groups:
+                    neq.add_batch(*_linearize_group(grp, theta_vec))
+                for f in singles:
+                    cols, J_w, r_w = _linearize(f, theta_vec)
+                    if cols is None:
+                        neq.add_dense(J_w, r_w)
+                    else:
+                        neq.add(cols, J_w, r_w)
+            except BlockStructureError as exc:
+                print(f"[GN][WARN] block solver disabled ({exc}), fallback to 'dense'")
+                solver = "dense"
+            else:
+                return neq
+        return _build_dense(theta_vec)
+
+    # --- 解 (H + diag(damp)) δ = -g ---
+    def _solve(system, damp: Optional[np.ndarray]) -> np.ndarray:
+        if isinstance(system, BlockNormalEquations):
+            try:
+                return solve_block_normal_equations(
+                    system, damping=0.0 if damp is None else damp
+                )
+            except np.linalg.LinAlgError:
+                # 非正定（欠约束节点等）：本次退回稠密最小二乘
+                if verbose:
+                    print("[GN][WARN] block Cholesky failed, dense fallback")
+                H, g = system.to_dense()
+        else:
+            H, g = system
+        if damp is not None:
+            H = H + np.diag(damp)
+        return _solve_dense(H, g)
+
+    def _grad_and_diag(system) -> Tuple[np.ndarray, np.ndarray]:
+        if isinstance(system, BlockNormalEquations):
+            return system.g, system.hessian_diagonal()
+        H, g = system
+        return g, np.diag(H).copy()
+
+    lam = float(lambda_init)
+    nu = 2.0
+    n_accepted = 0
+    n_rejected = 0
+    lambda_history: List[float] = []
+
+    system = None
+    it = 0
+    for it in range(1, max_iters + 1):
+        if system is None:
+            system = _assemble(theta)
 
-        for f in factors:
-            r = f.residual(theta).reshape(-1)   # (m,)
-            W = f.weight_chol()                # (m,m)
-            J = f.jacobian(theta)              # (m,D)
-
-            # 加权
-            r_w = W @ r
-            J_w = W @ J
-
-            # 鲁棒核
-            w = _robust_weight(np.linalg.norm(r_w), robust_loss, robust_param)
-            if w < 1.0:
-                scale = np.sqrt(w)
-                r_w = scale * r_w
-                J_w = scale * J_w
-
-            # 累加到 H, g
-            H += J_w.T @ J_w
-            g += J_w.T @ r_w
-
-        # --- 解 H δ = -g ---
-        try:
-            delta = np.linalg.solve(H, -g)
-        except np.linalg.LinAlgError:
-            # 数值不稳定时，可以退回为最小二乘或直接中止
-            delta, *_ = np.linalg.lstsq(H, -g, rcond=None)
+        damp = None
+        if method_norm == "lm":
+            g_vec, h_diag = _grad_and_diag(system)
+            mu = lam * float(np.max(h_diag, initial=0.0))
+            damp = np.full(D, mu) if mu > 0.0 else None
+            lambda_history.append(lam)
 
+        delta = _solve(system, damp)
         step_norm = float(np.linalg.norm(delta))
         final_step_norm = step_norm
 
-        theta = theta + delta
-        _wrap_yaw_all_states(theta)
+        theta_new = theta + delta
+        _wrap_yaw_all_states(theta_new)
 
         # --- 计算新 cost ---
-        cost_new = _compute_cost(theta)
+        cost_new = _compute_cost(theta_new)
+
+        if method_norm == "lm":
+            # 增益比 ρ = 实际下降 / 线性模型预测下降
+            # 预测下降 L(0) - L(δ) = 0.5 δ^T (μ δ - g)
+            pred = 0.5 * float(delta @ (mu * delta - g_vec))
+            actual = cost_old - cost_new
+            rho = actual / pred if pred > 0.0 else -1.0
+
+            if not (rho > 0.0 and np.isfinite(cost_new)):
+                n_rejected += 1
+                if verbose:
+                    print(
+                        f"[GN][LM] iter={it:02d}  REJECT  cost={cost_new:.6e}  "
+                        f"ρ={rho:.3e}  λ={lam:.3e}  ||δ||={step_norm:.3e}"
+                    )
+                # 已到数值噪声水平：与 GN 的收敛判据一致，保留当前 θ
+                if step_norm < tol_step or abs(actual) / max(cost_old, 1.0) < tol_cost_rel:
+                    converged = True
+                    break
+                lam = lambda_min if lam < lambda_min else lam * nu
+                nu *= 2.0
+                if lam > lambda_max:
+                    if verbose:
+                        print(f"[GN][LM] λ={lam:.3e} > lambda_max={lambda_max:.3e}, stop")
+                    break
+                continue
+
+            lam *= max(1.0 / 3.0, 1.0 - (2.0 * rho - 1.0) ** 3)
+            nu = 2.0
+
+        elif line_search and not cost_new < cost_old:
+            # 回溯线搜索：只重算 cost，不重新线性化
+            alpha = 1.0
+            for _ in range(5):
+                alpha *= 0.5
+                theta_try = theta + alpha * delta
+                _wrap_yaw_all_states(theta_try)
+                cost_try = _compute_cost(theta_try)
+                if cost_try < cost_old:
+                    theta_new, cost_new = theta_try, cost_try
+                    step_norm = alpha * step_norm
+                    final_step_norm = step_norm
+                    break
+            else:
+                n_rejected += 1
+                if verbose:
+                    print(f"[GN] iter={it:02d}  line search failed, stop")
+                break
+
+        # --- 接受该步 ---
+        n_accepted += 1
+        theta = theta_new
+        system = None
+
         cost_change = cost_new - cost_old
         rel_change = abs(cost_change) / max(cost_old, 1.0)
         final_cost_change = cost_change
 
         if verbose:
+            lam_str = f"  λ={lam:.3e}" if method_norm == "lm" else ""
             print(
                 f"[GN] iter={it:02d}  cost={cost_new:.6e}  "
-                f"Δcost={cost_change:.3e}  ||δ||={step_norm:.3e}"
+                f"Δcost={cost_change:.3e}  ||δ||={step_norm:.3e}{lam_str}"
             )
 
         # 收敛判据
@@ -254,21 +545,27 @@ def gauss_newton_solve(
     elapsed = time.time() - t_start
 
     stats = GaussNewtonStats(
-        num_iters=it if 'it' in locals() else 0,
+        num_iters=it,
         converged=converged,
         initial_cost=initial_cost,
         final_cost=final_cost,
         final_step_norm=final_step_norm,
         final_cost_change=final_cost_change,
         elapsed_time_s=elapsed,
+        method=method_norm,
+        n_accepted=n_accepted,
+        n_rejected=n_rejected,
+        lambda_history=lambda_history,
     )
 
     # 无论 verbose 与否，都打印一行总耗时摘要，方便评估部署
-    print(
-        f"[GN] total wall-time = {elapsed:.3f} s "
-        f"(dim={D}, factors={len(factors)}, iters={stats.num_iters}, "
-        f"converged={stats.converged})"
-    )
+    if print_summary:
+        print(
+            f"[GN] total wall-time = {elapsed:.3f} s "
+            f"(dim={D}, factors={len(factors)}, iters={stats.num_iters}, "
+            f"converged={stats.converged}, solver={solver}, method={method_norm}, "
+            f"accepted={n_accepted}, rejected={n_rejected})"
+        )
 
     if verbose:
         flag = "CONVERGED" if converged else "NOT CONVERGED"
@@ -15,10 +15,12 @@ Graph-level state representation for offline factor-graph navigation.
 """
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 
+from offnav.models.angles import wrap_pm_pi
+
 
 # 每个状态结点的维度: p(3) + v(3) + yaw(1)
 STATE_SIZE: int = 7
@@ -95,7 +97,7 @@ def wrap_yaw(yaw: float) -> float:
     在更新 θ 或构造 GraphState 时，建议统一调用本函数，
     确保所有模块使用一致的角度范围约定。
     """
-    return (yaw + np.pi) % (2.0 * np.pi) - np.pi
+    return wrap_pm_pi(yaw)
 
 
 # ------------------------------
@@ -168,12 +170,163 @@ def bias_slice(num_states: int) -> slice:
     return slice(start, end)
 
 
+# ------------------------------
+# θ 视图: struct-of-arrays 状态容器
+# ------------------------------
+
+
+def state_matrix(theta: np.ndarray, num_states: int) -> np.ndarray:
+    """θ 中全部状态结点的 (N, 7) 视图（零拷贝，写入即修改 θ）."""
+    return theta[:num_states * STATE_SIZE].reshape(num_states, STATE_SIZE)
+
+
+class GraphStateArray:
+    """
+    N 个状态结点 + 全局 bias 的 struct-of-arrays 容器，底层就是一个 θ 缓冲区.
+
+    p / v / yaw / ba 都是 θ 的视图（读写均零拷贝）:
+        p   : (N, 3)  = θ[x_k][0:3]
+        v   : (N, 3)  = θ[x_k][3:6]
+        yaw : (N,)    = θ[x_k][6]
+        ba  : (3,)    = θ[bias][0:3]
+    因此 pack_theta 不再逐结点拷贝，求解器也无需为每个结点构造 GraphState.
+
+    t_s 不编码进 θ，单独保存.
+    """
+
+    __slots__ = ("t_s", "theta", "_X")
+
+    def __init__(self, t_s: np.ndarray, theta: Optional[np.ndarray] = None) -> None:
+        t_s = np.asarray(t_s, dtype=float).reshape(-1)
+        num_states = int(t_s.shape[0])
+        if theta is None:
+            theta = np.zeros(theta_dim(num_states), dtype=float)
+        elif theta.dtype != np.float64 or theta.ndim != 1:
+            raise ValueError("GraphStateArray: theta 必须是一维 float64 数组")
+        if theta.shape[0] != theta_dim(num_states):
+            raise ValueError(
+                f"GraphStateArray: len(theta)={theta.shape[0]}, "
+                f"期望={theta_dim(num_states)} (N={num_states})"
+            )
+        self.t_s = t_s
+        self.theta = theta
+        self._X = state_matrix(theta, num_states)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        t_s: np.ndarray,
+        p: np.ndarray,
+        v: np.ndarray,
+        yaw: np.ndarray,
+        bias: Optional[BiasState] = None,
+    ) -> GraphStateArray:
+        """由分量数组构造（写入新分配的 θ），yaw wrap 到 (-pi, pi]."""
+        out = cls(t_s)
+        out.p = p
+        out.v = v
+        out.yaw = wrap_pm_pi(yaw)
+        if bias is not None:
+            out.set_bias(bias)
+        return out
+
+    # ---------- 视图 ----------
+
+    @property
+    def num_states(self) -> int:
+        return int(self._X.shape[0])
+
+    @property
+    def X(self) -> np.ndarray:
+        """(N, 7) 状态矩阵视图."""
+        return self._X
+
+    @property
+    def p(self) -> np.ndarray:
+        return self._X[:, 0:3]
+
+    @p.setter
+    def p(self, value: np.ndarray) -> None:
+        self._X[:, 0:3] = value
+
+    @property
+    def v(self) -> np.ndarray:
+        return self._X[:, 3:6]
+
+    @v.setter
+    def v(self, value: np.ndarray) -> None:
+        self._X[:, 3:6] = value
+
+    @property
+    def yaw(self) -> np.ndarray:
+        return self._X[:, 6]
+
+    @yaw.setter
+    def yaw(self, value: np.ndarray) -> None:
+        self._X[:, 6] = value
+
+    @property
+    def ba(self) -> np.ndarray:
+        return self.theta[bias_slice(self.num_states)][0:3]
+
+    @property
+    def bgz(self) -> float:
+        return float(self.theta[bias_slice(self.num_states).start + 3])
+
+    def state(self, k: int) -> np.ndarray:
+        """x_k 的 (7,) 视图 = θ[state_slice(k)]."""
+        return self.theta[state_slice(k, self.num_states)]
+
+    def bias_block(self) -> np.ndarray:
+        """bias 的 (4,) 视图 = θ[bias_slice]."""
+        return self.theta[bias_slice(self.num_states)]
+
+    def set_bias(self, bias: BiasState) -> None:
+        blk = self.bias_block()
+        blk[0:3] = np.asarray(bias.ba, dtype=float).reshape(3)
+        blk[3] = float(bias.bgz)
+
+    def bias(self) -> BiasState:
+        return BiasState(ba=self.ba.copy(), bgz=self.bgz)
+
+    # ---------- 容器接口 ----------
+
+    def __len__(self) -> int:
+        return self.num_states
+
+    def __getitem__(self, k: int) -> GraphState:
+        """取单个结点（拷贝为 GraphState，兼容旧接口）."""
+        return GraphState(
+            t_s=float(self.t_s[k]),
+            p=self.p[k].copy(),
+            v=self.v[k].copy(),
+            yaw=float(self.yaw[k]),
+        )
+
+    def take(self, idx: np.ndarray) -> GraphStateArray:
+        """按索引数组取结点子集（如关键帧）；bias 一并带上，返回新 θ."""
+        idx = np.asarray(idx, dtype=int)
+        out = GraphStateArray(self.t_s[idx])
+        out.X[:] = self._X[idx]
+        out.bias_block()[:] = self.bias_block()
+        return out
+
+    def copy(self) -> GraphStateArray:
+        return GraphStateArray(self.t_s.copy(), self.theta.copy())
+
+    def to_list(self) -> List[GraphState]:
+        return [self[k] for k in range(len(self))]
+
+
 # ------------------------------
 # pack / unpack: 状态 <-> θ
 # ------------------------------
 
 
-def pack_theta(states: List[GraphState], bias: BiasState) -> np.ndarray:
+def pack_theta(
+    states: Union[List[GraphState], GraphStateArray],
+    bias: BiasState,
+) -> np.ndarray:
     """
     将 N 个 GraphState + 一个 BiasState 打平成参数向量 θ.
 
@@ -190,8 +343,10 @@ def pack_theta(states: List[GraphState], bias: BiasState) -> np.ndarray:
 
     参数
     ----
-    states : List[GraphState]
-        长度为 N 的状态结点列表.
+    states : List[GraphState] or GraphStateArray
+        长度为 N 的状态结点.
+        GraphStateArray 时不拷贝: bias 写入其 θ 缓冲区并原地 wrap yaw，
+        返回值即 states.theta 本身.
     bias : BiasState
         全局 bias 结点.
 
@@ -204,6 +359,12 @@ def pack_theta(states: List[GraphState], bias: BiasState) -> np.ndarray:
     if num_states <= 0:
         raise ValueError("pack_theta: states 列表不能为空")
 
+    if isinstance(states, GraphStateArray):
+        # θ 视图容器: 写入 bias + wrap yaw 后直接返回底层缓冲区（零拷贝）
+        states.set_bias(bias)
+        wrap_pm_pi(states.yaw, out=states.yaw)  # θ 的列视图，原地 wrap
+        return states.theta
+
     theta = np.zeros(theta_dim(num_states), dtype=float)
 
     # 逐结点写入 p, v, yaw
@@ -299,3 +460,12 @@ def unpack_theta(theta: np.ndarray, t_imu: np.ndarray) -> Tuple[List[GraphState]
     bias = BiasState(ba=ba, bgz=bgz)
 
     return states, bias
+
+
+def unpack_theta_array(theta: np.ndarray, t_s: np.ndarray) -> GraphStateArray:
+    """
+    unpack_theta 的零拷贝版本: 返回以 θ 为底层缓冲区的 GraphStateArray.
+
+    yaw 不做 wrap（避免修改调用方的 θ）；需要时对 .yaw 自行 wrap.
+    """
+    return GraphStateArray(t_s, np.asarray(theta, dtype=float).reshape(-1))
@@ -0,0 +1,210 @@
+# src/offnav/io/colcache.py
+from __future__ import annotations
+
+"""
+预处理产物（*_imu_filtered.csv / *_dvl_BE.csv / *_dvl_BI.csv）的二进制列式缓存。
+
+cli_proc 写完 CSV 后调用 write_colcache()：
+  - 把 CSV 按 pd.read_csv 的解析结果逐列存成同名 .npz（未压缩，每列一个数组）；
+  - 在同目录的 colcache_manifest.json 中登记：
+        key           = sha1(原始输入文件内容) + sha1(预处理配置)   —— 产物来源
+        csv_size / csv_mtime_ns                                    —— 该 npz 对应的那份 CSV
+        columns / dtypes                                           —— 列顺序与 pandas dtype
+
+下游 loader 统一改用 read_csv_cached()：manifest 登记的 CSV 指纹与磁盘上的 CSV 一致时直接读 npz，
+否则（旧产物、CSV 被手工改过 / 重新生成）退回 pd.read_csv。读出的 DataFrame 与 pd.read_csv 一致。
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+MANIFEST_NAME = "colcache_manifest.json"
+CACHE_SUFFIX = ".npz"
+_NA_PREFIX = "__na__"
+
+
+# =============================================================================
+# hash helpers
+# =============================================================================
+
+
+def hash_files(paths: Iterable[str | Path], chunk_bytes: int = 1 << 20) -> str:
+    """按内容对一组输入文件做 sha1（顺序无关）."""
+    h = hashlib.sha1()
+    for p in sorted(str(x) for x in paths):
+        h.update(os.path.basename(p).encode("utf-8"))
+        with open(p, "rb") as f:
+            while True:
+                b = f.read(chunk_bytes)
+                if not b:
+                    break
+                h.update(b)
+    return h.hexdigest()
+
+
+def hash_config(cfg: Any) -> str:
+    """预处理配置（dataclass / dict / 其他）-> 稳定 sha1."""
+    if dataclasses.is_dataclass(cfg) and not isinstance(cfg, type):
+        obj: Any = dataclasses.asdict(cfg)
+    elif isinstance(cfg, dict):
+        obj = cfg
+    else:
+        obj = repr(cfg)
+    s = json.dumps(obj, sort_keys=True, default=repr)
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+
+# =============================================================================
+# manifest
+# =============================================================================
+
+
+def _manifest_path(csv_path: Path) -> Path:
+    return csv_path.parent / MANIFEST_NAME
+
+
+def _load_manifest(path: Path) -> Dict[str, Any]:
+    if not path.is_file():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_manifest(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(".json.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _csv_fingerprint(csv_path: Path) -> Dict[str, int]:
+    st = csv_path.stat()
+    return {"csv_size": int(st.st_size), "csv_mtime_ns": int(st.st_mtime_ns)}
+
+
+def cache_path_for(csv_path: str | Path) -> Path:
+    p = Path(csv_path)
+    return p.with_suffix(CACHE_SUFFIX)
+
+
+# =============================================================================
+# write
+# =============================================================================
+
+
+def _column_to_arrays(name: str, s: pd.Series) -> Optional[Dict[str, np.ndarray]]:
+    """单列 -> npz 数组；无法无损表示（混合类型的 object 列）时返回 None."""
+    if s.dtype.kind in "biuf":
+        return {name: s.to_numpy()}
+    obj = s.to_numpy(dtype=object)
+    na = pd.isna(obj)
+    vals = obj[~na]
+    if not all(isinstance(v, str) for v in vals):
+        return None
+    filled = np.where(na, "", obj).astype(str)
+    return {name: filled, _NA_PREFIX + name: na.astype(bool)}
+
+
+def write_colcache(
+    csv_path: str | Path,
+    *,
+    source_paths: Iterable[str | Path] = (),
+    config: Any = None,
+) -> Optional[Path]:
+    """
+    为刚写好的 CSV 生成 .npz 缓存并登记到 manifest；无法缓存时返回 None（loader 继续读 CSV）.
+    """
+    csv_path = Path(csv_path)
+    df = pd.read_csv(csv_path, low_memory=False)
+
+    arrays: Dict[str, np.ndarray] = {}
+    for i, name in enumerate(df.columns):
+        part = _column_to_arrays(f"c{i}", df[name])
+        if part is None:
+            print(f"[CACHE][WARN] column {name!r} of {csv_path.name} has mixed types; not cached")
+            return None
+        arrays.update(part)
+
+    npz_path = cache_path_for(csv_path)
+    tmp = npz_path.with_name(npz_path.stem + ".tmp" + CACHE_SUFFIX)
+    np.savez(tmp, **arrays)
+    os.replace(tmp, npz_path)
+
+    src = [str(p) for p in source_paths]
+    key = (hash_files(src) if src else "") + ":" + (hash_config(config) if config is not None else "")
+
+    mpath = _manifest_path(csv_path)
+    manifest = _load_manifest(mpath)
+    manifest[csv_path.name] = {
+        "cache": npz_path.name,
+        "key": key,
+        "sources": [os.path.basename(p) for p in src],
+        **_csv_fingerprint(csv_path),
+        "columns": [str(c) for c in df.columns],
+        "dtypes": [str(t) for t in df.dtypes],
+    }
+    _save_manifest(mpath, manifest)
+    return npz_path
+
+
+def lookup_key(csv_path: str | Path) -> Optional[str]:
+    """manifest 中登记的产物来源 key（原始输入 hash + 配置 hash）；未登记时返回 None."""
+    p = Path(csv_path)
+    entry = _load_manifest(_manifest_path(p)).get(p.name)
+    return None if entry is None else str(entry.get("key", ""))
+
+
+# =============================================================================
+# read
+# =============================================================================
+
+
+def _read_npz(npz_path: Path, entry: Dict[str, Any]) -> pd.DataFrame:
+    cols: Dict[str, Any] = {}
+    with np.load(npz_path, allow_pickle=False) as z:
+        for i, (name, dtype) in enumerate(zip(entry["columns"], entry["dtypes"])):
+            arr = z[f"c{i}"]
+            na_key = f"{_NA_PREFIX}c{i}"
+            if na_key in z.files:
+                obj = arr.astype(object)
+                obj[z[na_key]] = np.nan
+                cols[name] = pd.Series(obj, dtype=None if dtype == "object" else dtype)
+            else:
+                cols[name] = arr
+    return pd.DataFrame(cols, columns=entry["columns"])
+
+
+def read_csv_cached(csv_path: str | Path, **read_csv_kwargs: Any) -> pd.DataFrame:
+    """
+    pd.read_csv 的透明替代：CSV 有有效的 .npz 缓存时读缓存，否则读 CSV.
+    传入额外 read_csv 参数（usecols / nrows 等）时总是读 CSV.
+    """
+    p = Path(csv_path)
+    extra = {k: v for k, v in read_csv_kwargs.items() if k != "low_memory"}
+    if not extra:
+        entry = _load_manifest(_manifest_path(p)).get(p.name)
+        npz_path = p.parent / str(entry.get("cache", "")) if entry else None
+        if (
+            entry is not None
+            and npz_path is not None
+            and npz_path.is_file()
+            and p.is_file()
+            and _csv_fingerprint(p) == {k: entry.get(k) for k in ("csv_size", "csv_mtime_ns")}
+        ):
+            try:
+                return _read_npz(npz_path, entry)
+            except (OSError, KeyError, ValueError) as e:
+                print(f"[CACHE][WARN] failed to read {npz_path.name} ({e}); falling back to CSV")
+    return pd.read_csv(p, **read_csv_kwargs)
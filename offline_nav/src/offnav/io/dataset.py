@@ -1,14 +1,58 @@
 # src/offnav/io/dataset.py
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, Iterator, List, Literal, Optional, Tuple
 
 import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import yaml
 
 from offnav.core.types import ImuRawData, DvlRawData, RunMeta, RawRunData
 from offnav.io.imu_csv import load_imu_csv
 from offnav.io.dvl_csv import load_dvl_csv
+from offnav.io.raw_schema import get_raw_schema
+from offnav.io.run_store import ingest_sensor, open_store_df, store_dir, store_is_current
+from offnav.io.time_index import csv_overlaps_window
+from offnav.io.raw_stream import (
+    DEFAULT_CHUNK_ROWS,
+    DVL_STREAM_SCHEMA,
+    IMU_STREAM_SCHEMA,
+    collect_chunks,
+    concat_frames,
+    iter_raw_chunks,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from offnav.core.stage_cache import StageCache
+
+
+def _load_frames_parallel(paths: List[str], loader, workers: Optional[int] = None) -> List["pd.DataFrame"]:
+    """
+    多个 CSV 用线程池并发解析（pandas C 解析器在分词 / 类型转换时释放 GIL），结果保持 paths 顺序.
+    workers=None -> min(文件数, CPU 核数)；workers<=1 -> 串行.
+    """
+    n = len(paths) if workers is None else int(workers)
+    n = max(1, min(n, len(paths), os.cpu_count() or 1))
+    if n <= 1:
+        return [loader(p).df for p in paths]
+    with ThreadPoolExecutor(max_workers=n) as ex:
+        return [r.df for r in ex.map(loader, paths)]
+
+
+def _paths_in_window(paths: List[str], time_col: str, t0: Optional[float], t1: Optional[float]) -> List[str]:
+    """
+    多文件 run 按时间窗读取：按旁路时间索引只保留与 [t0, t1] 相交的文件.
+    一个都不相交时保留第一个（读出带正确列 / dtype 的空表）.
+    """
+    if t0 is None and t1 is None:
+        return paths
+    keep = [p for p in paths if csv_overlaps_window(p, t0, t1, time_col=time_col)]
+    return keep or paths[:1]
 
 
 @dataclass
@@ -65,7 +109,101 @@ class DatasetIndex:
             raise KeyError(f"Unknown run_id={run_id!r}, available={list(self.runs.keys())}")
         return self.runs[run_id]
 
-    def load_run(self, run_id: str) -> RawRunData:
+    def raw_paths(self, run_id: str) -> Tuple[List[str], List[str]]:
+        """该 run 匹配到的原始 IMU / DVL 文件（已排序）."""
+        spec = self.get_run_spec(run_id)
+        run_dir = self.data_root / spec.path
+        imu_paths = sorted(glob.glob(str(run_dir / spec.imu_glob)))
+        dvl_paths = sorted(glob.glob(str(run_dir / spec.dvl_glob)))
+        return imu_paths, dvl_paths
+
+    def iter_raw_chunks(
+        self,
+        run_id: str,
+        sensor: Literal["imu", "dvl"],
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    ) -> Iterator["pd.DataFrame"]:
+        """
+        该 run 的原始 IMU / DVL 日志按时间有序的分块流（跨文件 k 路归并，只含管线用到的列，
+        dtype 固定；见 io/raw_stream.py）。不整表加载，适合长时间多文件的会话。
+        """
+        imu_paths, dvl_paths = self.raw_paths(run_id)
+        if sensor == "imu":
+            return iter_raw_chunks(imu_paths, IMU_STREAM_SCHEMA, chunk_rows)
+        if sensor == "dvl":
+            return iter_raw_chunks(dvl_paths, DVL_STREAM_SCHEMA, chunk_rows)
+        raise ValueError(f"Unknown sensor={sensor!r}, expected 'imu' or 'dvl'")
+
+    # ---- run store（io/run_store.py）----
+
+    def run_store_dir(self, run_id: str, sensor: Literal["imu", "dvl"]) -> Path:
+        return store_dir(self.data_root / self.get_run_spec(run_id).path, sensor)
+
+    def has_current_store(self, run_id: str, sensor: Literal["imu", "dvl"]) -> bool:
+        """该 run 的 sensor 已 ingest 且原始文件未变化."""
+        imu_paths, dvl_paths = self.raw_paths(run_id)
+        paths = imu_paths if sensor == "imu" else dvl_paths
+        return bool(paths) and store_is_current(self.run_store_dir(run_id, sensor), paths, get_raw_schema(sensor))
+
+    def ingest_run(self, run_id: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, Dict]:
+        """原始 IMU / DVL CSV -> 内存映射列式 store（<run_dir>/.offnav_store），返回各自的 schema.json 内容."""
+        imu_paths, dvl_paths = self.raw_paths(run_id)
+        out: Dict[str, Dict] = {}
+        for sensor, paths in (("imu", imu_paths), ("dvl", dvl_paths)):
+            if not paths:
+                raise FileNotFoundError(f"No {sensor.upper()} CSV for run={run_id}")
+            out[sensor] = ingest_sensor(paths, get_raw_schema(sensor), self.run_store_dir(run_id, sensor), chunk_rows)
+        return out
+
+    def load_run_cached(
+        self,
+        run_id: str,
+        cache: Optional["StageCache"] = None,
+        *,
+        streaming: bool = False,
+        t0: Optional[float] = None,
+        t1: Optional[float] = None,
+    ) -> RawRunData:
+        """
+        load_run 的阶段缓存版本：key = 原始 IMU/DVL/meta 文件内容 hash（+ 是否流式读取）.
+        cache 为 None 或未启用时等价于 load_run；run 已有最新的 store 时直接内存映射打开，不走缓存；
+        按时间窗读取（t0/t1）本身只读覆盖的块，也不走缓存.
+        """
+        if cache is None or not cache.enabled or t0 is not None or t1 is not None:
+            return self.load_run(run_id, streaming=streaming, t0=t0, t1=t1)
+        if self.has_current_store(run_id, "imu") and self.has_current_store(run_id, "dvl"):
+            return self.load_run(run_id)
+        imu_paths, dvl_paths = self.raw_paths(run_id)
+        if not imu_paths or not dvl_paths:
+            return self.load_run(run_id, streaming=streaming)  # 由 load_run 给出缺文件的报错
+        meta_path = self.data_root / self.get_run_spec(run_id).path / "meta.yaml"
+        files = imu_paths + dvl_paths + ([str(meta_path)] if meta_path.exists() else [])
+        key = cache.key("raw_load", run_id, cache.file_key(files), "stream" if streaming else "full")
+        return cache.cached("raw_load", key, lambda: self.load_run(run_id, streaming=streaming))
+
+    def load_run(
+        self,
+        run_id: str,
+        *,
+        streaming: bool = False,
+        workers: Optional[int] = None,
+        use_store: bool = True,
+        t0: Optional[float] = None,
+        t1: Optional[float] = None,
+    ) -> RawRunData:
+        """
+        已 ingest 且原始文件未变化（use_store=True）：直接内存映射打开 run store，数值列零拷贝；
+        否则解析 CSV：
+        streaming=False：多个文件用线程池并发解析（workers，默认 min(文件数, 核数)），
+                         dtype 按 raw_schema 固定，再按预分配缓冲拼接（保留 CSV 全部列）。
+        streaming=True ：经 iter_raw_chunks 分块归并、只保留管线用到的列并按列拼接，
+                         时间有序；多文件长会话的峰值内存约为结果本身。
+        t0/t1（EstS，闭区间）：只读时间窗内的行 —— store 按 time_index 只映射覆盖的行，
+                         CSV 按旁路稀疏时间索引（io/time_index.py）只解析覆盖的字节块；
+                         多文件时按索引里的 [t_min, t_max] 跳过与窗不相交的文件；
+                         此时 streaming 不起作用（窗口读取本来就只解析需要的块）。
+        """
+        windowed = t0 is not None or t1 is not None
         spec = self.get_run_spec(run_id)
         run_dir = self.data_root / spec.path
 
@@ -76,25 +214,45 @@ class DatasetIndex:
         imu_paths = sorted(glob.glob(str(run_dir / spec.imu_glob)))
         if not imu_paths:
             raise FileNotFoundError(f"No IMU CSV for run={run_id} with glob={spec.imu_glob}")
-        if len(imu_paths) > 1:
-            import pandas as pd
-            imu_dfs = [load_imu_csv(p).df for p in imu_paths]
-            imu_df = pd.concat(imu_dfs, ignore_index=True)
+        if use_store and store_is_current(store_dir(run_dir, "imu"), imu_paths, get_raw_schema("imu")):
+            imu_df = open_store_df(store_dir(run_dir, "imu"), t0=t0, t1=t1)
+            imu_raw = ImuRawData(df=imu_df, source_path=Path(imu_paths[0]))
+        elif streaming and not windowed:
+            imu_df = collect_chunks(iter_raw_chunks(imu_paths, IMU_STREAM_SCHEMA))
+            imu_raw = ImuRawData(df=imu_df, source_path=Path(imu_paths[0]))
+        elif len(imu_paths) > 1:
+            imu_df = concat_frames(
+                _load_frames_parallel(
+                    _paths_in_window(imu_paths, get_raw_schema("imu").time_col, t0, t1),
+                    partial(load_imu_csv, t0=t0, t1=t1),
+                    workers,
+                )
+            )
             imu_raw = ImuRawData(df=imu_df, source_path=Path(imu_paths[0]))
         else:
-            imu_raw = load_imu_csv(imu_paths[0])
+            imu_raw = load_imu_csv(imu_paths[0], t0=t0, t1=t1)
 
         # DVL
         dvl_paths = sorted(glob.glob(str(run_dir / spec.dvl_glob)))
         if not dvl_paths:
             raise FileNotFoundError(f"No DVL CSV for run={run_id} with glob={spec.dvl_glob}")
-        if len(dvl_paths) > 1:
-            import pandas as pd
-            dvl_dfs = [load_dvl_csv(p).df for p in dvl_paths]
-            dvl_df = pd.concat(dvl_dfs, ignore_index=True)
+        if use_store and store_is_current(store_dir(run_dir, "dvl"), dvl_paths, get_raw_schema("dvl")):
+            dvl_df = open_store_df(store_dir(run_dir, "dvl"), t0=t0, t1=t1)
+            dvl_raw = DvlRawData(df=dvl_df, source_path=Path(dvl_paths[0]))
+        elif streaming and not windowed:
+            dvl_df = collect_chunks(iter_raw_chunks(dvl_paths, DVL_STREAM_SCHEMA))
+            dvl_raw = DvlRawData(df=dvl_df, source_path=Path(dvl_paths[0]))
+        elif len(dvl_paths) > 1:
+            dvl_df = concat_frames(
+                _load_frames_parallel(
+                    _paths_in_window(dvl_paths, get_raw_schema("dvl").time_col, t0, t1),
+                    partial(load_dvl_csv, t0=t0, t1=t1),
+                    workers,
+                )
+            )
             dvl_raw = DvlRawData(df=dvl_df, source_path=Path(dvl_paths[0]))
         else:
-            dvl_raw = load_dvl_csv(dvl_paths[0])
+            dvl_raw = load_dvl_csv(dvl_paths[0], t0=t0, t1=t1)
 
         # meta.yaml（可选）
         meta_path = run_dir / "meta.yaml"
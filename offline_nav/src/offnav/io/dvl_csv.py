@@ -1,22 +1,16 @@
 # src/offnav/io/dvl_csv.py
 from pathlib import Path
-from typing import Iterable, Union
+from typing import Iterable, Optional, Union
 
 import pandas as pd
 
 from offnav.core.types import DvlRawData
+from offnav.io.raw_schema import DVL_SCHEMA
+from offnav.io.time_index import read_csv_window
 
 PathLike = Union[str, Path]
 
-REQUIRED_COLUMNS = [
-    "MonoNS", "EstNS", "MonoS", "EstS",
-    "SensorID", "Src",
-    "Vx_body(m_s)", "Vy_body(m_s)", "Vz_body(m_s)",
-    "Ve_enu(m_s)", "Vn_enu(m_s)", "Vu_enu(m_s)",
-    "De_enu(m)", "Dn_enu(m)", "Du_enu(m)",
-    "Depth(m)", "E(m)", "N(m)", "U(m)",
-    "Valid", "ValidFlag", "IsWaterMass",
-]
+REQUIRED_COLUMNS = list(DVL_SCHEMA.columns)
 
 
 def _check_required_columns(df: pd.DataFrame, required: Iterable[str], path: Path) -> None:
@@ -28,12 +22,21 @@ def _check_required_columns(df: pd.DataFrame, required: Iterable[str], path: Pat
         )
 
 
-def load_dvl_csv(path: PathLike, encoding: str = "utf-8") -> DvlRawData:
+def load_dvl_csv(
+    path: PathLike,
+    encoding: str = "utf-8",
+    *,
+    t0: Optional[float] = None,
+    t1: Optional[float] = None,
+) -> DvlRawData:
+    """t0/t1 给定时只解析 EstS 落在 [t0, t1] 的行（见 io/time_index.py）."""
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"DVL CSV not found: {p}")
 
-    df = pd.read_csv(p, encoding=encoding)
+    df = DVL_SCHEMA.read_csv(  # dtype 见 raw_schema.DVL_SCHEMA
+        read_csv_window, p, t0, t1, time_col=DVL_SCHEMA.time_col, encoding=encoding
+    )
     _check_required_columns(df, REQUIRED_COLUMNS, p)
 
     return DvlRawData(df=df, source_path=p)
@@ -2,21 +2,18 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Iterable, Union
+from typing import Iterable, Optional, Union
 
 import pandas as pd
 
 from offnav.core.types import ImuRawData
+from offnav.io.raw_schema import IMU_SCHEMA
+from offnav.io.time_index import read_csv_window
 
 PathLike = Union[str, Path]
 
-# 你刚给出的 IMU 列字段：
-REQUIRED_COLUMNS_IMU = [
-    "MonoNS", "EstNS", "MonoS", "EstS",
-    "AccX", "AccY", "AccZ",
-    "GyroX", "GyroY", "GyroZ",
-    "YawDeg", "AngX", "AngY", "AngZ",
-]
+# 你刚给出的 IMU 列字段（定义与 dtype 见 raw_schema.IMU_SCHEMA）：
+REQUIRED_COLUMNS_IMU = list(IMU_SCHEMA.columns)
 
 
 def _check_required_columns(df: pd.DataFrame, required: Iterable[str], path: Path) -> None:
@@ -28,7 +25,13 @@ def _check_required_columns(df: pd.DataFrame, required: Iterable[str], path: Pat
         )
 
 
-def load_imu_csv(path: PathLike, encoding: str = "utf-8") -> ImuRawData:
+def load_imu_csv(
+    path: PathLike,
+    encoding: str = "utf-8",
+    *,
+    t0: Optional[float] = None,
+    t1: Optional[float] = None,
+) -> ImuRawData:
     """
     加载单个 IMU CSV 文件，返回 ImuRawData.
 
@@ -38,19 +41,16 @@ def load_imu_csv(path: PathLike, encoding: str = "utf-8") -> ImuRawData:
       GyroX, GyroY, GyroZ,
       YawDeg, AngX, AngY, AngZ
     - 将空字符串视为缺失值（NaN），例如 YawDeg 为空的情况
+    - dtype 按 IMU_SCHEMA 固定（MonoNS/EstNS int64，其余 float64），不做类型推断
     - 暂不做单位转换（Acc 仍是 g，Gyro/角度仍是 deg），
       后续统一在 preprocess 层转换。
+    - 给定 t0/t1 时只解析 EstS 落在 [t0, t1] 的行（经 CSV 旁路稀疏时间索引，见 io/time_index.py）
     """
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"IMU CSV not found: {p}")
 
-    df = pd.read_csv(
-        p,
-        encoding=encoding,
-        na_values=["", "NaN", "nan"],
-        keep_default_na=True,
-    )
+    df = IMU_SCHEMA.read_csv(read_csv_window, p, t0, t1, time_col=IMU_SCHEMA.time_col, encoding=encoding)
 
     _check_required_columns(df, REQUIRED_COLUMNS_IMU, p)
 
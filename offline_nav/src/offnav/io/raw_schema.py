@@ -0,0 +1,133 @@
+# src/offnav/io/raw_schema.py
+from __future__ import annotations
+
+"""
+原始 IMU / DVL CSV 的列与 dtype 约定（schema 注册表）。
+
+- REQUIRED_COLUMNS_IMU / REQUIRED_COLUMNS_DVL：必需列（imu_csv / dvl_csv 的检查沿用这里的定义）；
+- dtype 固定：MonoNS/EstNS -> int64，MonoS/EstS 与测量值 -> float64，
+  SensorID/Src -> category；其余（Valid / IsWaterMass 等标志位，各设备写法不一）交给 pandas 推断；
+- int64 列直接按 numpy int64 解析；只有时间单元为空（截断的末行等）导致整数解析失败时，
+  read_csv() 才改按可空 Int64 重读，再由 drop_na_time() 丢弃时间缺失的行并转回 int64；
+- RawCsvSchema.subset() 派生只含部分列的 schema（例如流式读取只要管线用到的列）。
+
+用法：
+    schema = get_raw_schema("dvl")
+    df = schema.read_csv(pd.read_csv, path)
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+REQUIRED_COLUMNS_IMU = [
+    "MonoNS", "EstNS", "MonoS", "EstS",
+    "AccX", "AccY", "AccZ",
+    "GyroX", "GyroY", "GyroZ",
+    "YawDeg", "AngX", "AngY", "AngZ",
+]
+
+REQUIRED_COLUMNS_DVL = [
+    "MonoNS", "EstNS", "MonoS", "EstS",
+    "SensorID", "Src",
+    "Vx_body(m_s)", "Vy_body(m_s)", "Vz_body(m_s)",
+    "Ve_enu(m_s)", "Vn_enu(m_s)", "Vu_enu(m_s)",
+    "De_enu(m)", "Dn_enu(m)", "Du_enu(m)",
+    "Depth(m)", "E(m)", "N(m)", "U(m)",
+    "Valid", "ValidFlag", "IsWaterMass",
+]
+
+_TIME_DTYPES = {"MonoNS": "int64", "EstNS": "int64", "MonoS": "float64", "EstS": "float64"}
+_DVL_FLAG_COLUMNS = ("Valid", "ValidFlag", "IsWaterMass")
+
+
+@dataclass(frozen=True)
+class RawCsvSchema:
+    """一类原始日志的列 / dtype 约定（dtypes 里没有的列交给 pandas 推断）."""
+    name: str
+    columns: Sequence[str]
+    dtypes: Dict[str, str] = field(default_factory=dict)
+    time_col: str = "EstS"
+
+    def subset(self, columns: Sequence[str]) -> "RawCsvSchema":
+        missing = [c for c in columns if c not in self.columns]
+        if missing:
+            raise KeyError(f"{self.name} schema has no columns {missing}")
+        return RawCsvSchema(
+            name=self.name,
+            columns=tuple(columns),
+            dtypes={c: d for c, d in self.dtypes.items() if c in columns},
+            time_col=self.time_col,
+        )
+
+    def read_kwargs(self, nullable_int: bool = False) -> Dict[str, Any]:
+        """
+        pd.read_csv 的 dtype / 缺失值参数（不限定 usecols，CSV 里多出的列照常读入并推断）.
+        nullable_int=True 时 int64 列改按可空 Int64 读入（比 int64 慢一倍多，只作回退）.
+        """
+        int_dtype = "Int64" if nullable_int else "int64"
+        return {
+            "dtype": {c: (int_dtype if d == "int64" else d) for c, d in self.dtypes.items()},
+            "na_values": ["", "NaN", "nan"],
+            "keep_default_na": True,
+        }
+
+    def read_csv(self, read: Callable[..., pd.DataFrame], *args: Any, **kwargs: Any) -> pd.DataFrame:
+        """
+        read(*args, **kwargs, **read_kwargs())，再 drop_na_time().
+        整数列有空单元时 pandas 报 ValueError，此时才按 nullable_int=True 重读一次.
+        """
+        try:
+            df = read(*args, **kwargs, **self.read_kwargs())
+        except ValueError:
+            df = read(*args, **kwargs, **self.read_kwargs(nullable_int=True))
+        return self.drop_na_time(df)
+
+    def drop_na_time(self, df: pd.DataFrame) -> pd.DataFrame:
+        """丢弃 int64 时间列或 time_col 缺失的行，并把按 Int64 读入的列转回 int64（保留原行号 index）."""
+        int_cols = [c for c, d in self.dtypes.items() if d == "int64" and c in df.columns]
+        # 已是 numpy int64 的列不可能缺失，只检查按 Int64 读入的列与 time_col
+        nullable = [c for c in int_cols if df[c].dtype != "int64"]
+        need = nullable + [self.time_col] if self.time_col in df.columns else nullable
+        if need:
+            ok = np.logical_and.reduce([df[c].notna().to_numpy() for c in need])
+            if not ok.all():
+                df = df[ok]
+        return df.astype({c: "int64" for c in nullable}) if nullable else df
+
+
+IMU_SCHEMA = RawCsvSchema(
+    name="IMU",
+    columns=tuple(REQUIRED_COLUMNS_IMU),
+    dtypes={**_TIME_DTYPES, **{c: "float64" for c in REQUIRED_COLUMNS_IMU if c not in _TIME_DTYPES}},
+)
+
+DVL_SCHEMA = RawCsvSchema(
+    name="DVL",
+    columns=tuple(REQUIRED_COLUMNS_DVL),
+    dtypes={
+        **_TIME_DTYPES,
+        "SensorID": "category",
+        "Src": "category",
+        **{
+            c: "float64"
+            for c in REQUIRED_COLUMNS_DVL
+            if c not in _TIME_DTYPES and c not in ("SensorID", "Src") and c not in _DVL_FLAG_COLUMNS
+        },
+    },
+)
+
+RAW_SCHEMAS: Dict[str, RawCsvSchema] = {
+    "imu": IMU_SCHEMA,
+    "dvl": DVL_SCHEMA,
+}
+
+
+def get_raw_schema(sensor: str) -> RawCsvSchema:
+    key = str(sensor).lower()
+    if key not in RAW_SCHEMAS:
+        raise KeyError(f"Unknown raw schema {sensor!r}, available={list(RAW_SCHEMAS)}")
+    return RAW_SCHEMAS[key]
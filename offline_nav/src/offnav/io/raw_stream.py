@@ -0,0 +1,249 @@
+# src/offnav/io/raw_stream.py
+from __future__ import annotations
+
+"""
+原始 IMU / DVL 日志的流式读取：跨多个 CSV 按时间列做 k 路归并，逐块产出有类型的 DataFrame。
+
+- 只读管线实际用到的列（usecols），并按 schema 指定 dtype，避免整表 object 列 / 类型推断；
+- 每个文件用 pd.read_csv(chunksize=...) 分块读；要求单个文件内时间非递减（记录器按时间顺序写）；
+- 归并结果等价于 "concat 全部文件 + 按时间稳定排序"（同一时刻按文件顺序、文件内顺序），
+  但任一时刻只在内存中保留每个文件的一个块；
+- 时间列非有限（空 / NaN）的行直接丢弃（预处理本来也用不上）。
+
+用法：
+    for chunk in iter_raw_chunks(imu_paths, IMU_STREAM_SCHEMA):
+        ...
+    df = collect_chunks(iter_raw_chunks(dvl_paths, DVL_STREAM_SCHEMA))  # 需要整表时按列拼接
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from offnav.io.raw_schema import DVL_SCHEMA, IMU_SCHEMA, RawCsvSchema
+
+PathLike = Union[str, Path]
+
+DEFAULT_CHUNK_ROWS = 200_000
+
+
+IMU_STREAM_SCHEMA = IMU_SCHEMA
+
+# DVL：只保留 preprocess_dvl_events 用到的列（位移 / 深度 / ValidFlag 等不进管线）
+DVL_STREAM_SCHEMA = DVL_SCHEMA.subset(
+    (
+        "MonoNS", "EstNS", "MonoS", "EstS", "SensorID", "Src",
+        "Vx_body(m_s)", "Vy_body(m_s)", "Vz_body(m_s)",
+        "Ve_enu(m_s)", "Vn_enu(m_s)", "Vu_enu(m_s)",
+        "Valid", "IsWaterMass",
+    )
+)
+
+
+# =============================================================================
+# 单文件分块
+# =============================================================================
+
+
+def _check_header(path: Path, schema: RawCsvSchema, encoding: str) -> None:
+    header = pd.read_csv(path, encoding=encoding, nrows=0)
+    missing = [c for c in schema.columns if c not in header.columns]
+    if missing:
+        raise ValueError(
+            f"{schema.name} CSV {path} missing required columns: {missing}\n"
+            f"Available columns: {list(header.columns)}"
+        )
+
+
+def iter_csv_chunks(
+    path: PathLike,
+    schema: RawCsvSchema,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    encoding: str = "utf-8",
+) -> Iterator[pd.DataFrame]:
+    """单个 CSV -> 有类型的块（列顺序 = schema.columns，时间非有限的行已丢弃）."""
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"{schema.name} CSV not found: {p}")
+    _check_header(p, schema, encoding)
+
+    def _open(nullable_int: bool, skip_rows: int):
+        return pd.read_csv(
+            p,
+            encoding=encoding,
+            usecols=list(schema.columns),
+            chunksize=int(chunk_rows),
+            skiprows=range(1, 1 + skip_rows) if skip_rows else None,
+            **schema.read_kwargs(nullable_int=nullable_int),
+        )
+
+    # 先按 int64 解析；某块的整数时间列有空单元时（ValueError），从该块起按 Int64 重开 reader
+    rows_done = 0
+    nullable_int = False
+    reader = _open(False, 0)
+    try:
+        while True:
+            try:
+                chunk = next(reader, None)
+            except ValueError:
+                if nullable_int:
+                    raise
+                reader.close()
+                nullable_int = True
+                reader = _open(True, rows_done)
+                continue
+            if chunk is None:
+                break
+            rows_done += len(chunk)
+            chunk = schema.drop_na_time(chunk[list(schema.columns)])
+            t = chunk[schema.time_col].to_numpy(dtype=float)
+            ok = np.isfinite(t)
+            if not ok.all():
+                chunk = chunk[ok]
+            if len(chunk):
+                yield chunk
+    finally:
+        reader.close()
+
+
+# =============================================================================
+# 多文件 k 路归并
+# =============================================================================
+
+
+class _Source:
+    """一个文件的块迭代器 + 当前未产出的缓冲."""
+
+    def __init__(self, it: Iterator[pd.DataFrame], time_col: str) -> None:
+        self.it = it
+        self.time_col = time_col
+        self.buf: Optional[pd.DataFrame] = None
+        self.t = np.empty(0, dtype=float)
+        self.done = False
+
+    def fill(self) -> None:
+        """读下一块并接到缓冲后面；文件读完则标记 done."""
+        chunk = next(self.it, None)
+        if chunk is None:
+            self.done = True
+            return
+        self.buf = chunk if self.buf is None or not len(self.buf) else concat_frames([self.buf, chunk])
+        self.t = self.buf[self.time_col].to_numpy(dtype=float)
+
+    def last_t(self) -> float:
+        return float(self.t[-1]) if self.t.size else -np.inf
+
+    def take_before(self, horizon: float) -> Optional[pd.DataFrame]:
+        """取出缓冲中 t < horizon 的前缀（文件内时间非递减）."""
+        if self.buf is None or not self.t.size:
+            return None
+        k = int(np.searchsorted(self.t, horizon, side="left"))
+        if k == 0:
+            return None
+        out = self.buf.iloc[:k]
+        self.buf = self.buf.iloc[k:]
+        self.t = self.t[k:]
+        return out
+
+
+def iter_raw_chunks(
+    paths: Iterable[PathLike],
+    schema: RawCsvSchema,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    encoding: str = "utf-8",
+) -> Iterator[pd.DataFrame]:
+    """
+    多个原始 CSV -> 按 schema.time_col 全局有序的块序列（k 路归并，见模块说明）.
+
+    每轮补读 "缓冲末尾时间最小" 的那个文件，然后产出所有文件里 t < horizon 的行，
+    horizon = 未读完文件的缓冲末尾时间的最小值；因此之后读到的行时间都不会早于已产出的行。
+    chunk_rows 是每个文件单次读入的行数，产出块的行数随归并进度变化（不超过各文件缓冲之和）。
+    """
+    srcs = [_Source(iter_csv_chunks(p, schema, chunk_rows, encoding), schema.time_col) for p in paths]
+    for s in srcs:
+        s.fill()
+
+    while True:
+        active = [s for s in srcs if not s.done]
+        horizon = min((s.last_t() for s in active), default=np.inf)
+
+        parts = [part for part in (s.take_before(horizon) for s in srcs) if part is not None]
+        if parts:
+            if len(parts) == 1:
+                out = parts[0]
+            else:
+                out = concat_frames(parts).sort_values(schema.time_col, kind="mergesort")
+            yield out.reset_index(drop=True)
+
+        if not active:
+            break
+        min(active, key=lambda s: s.last_t()).fill()
+
+
+def _union_categoricals(parts: List[pd.Series]) -> pd.Categorical:
+    if len({p.cat.categories.dtype for p in parts}) == 1:
+        return union_categoricals(parts)
+    cats = pd.Index(pd.unique(np.concatenate([p.cat.categories.to_numpy(dtype=object) for p in parts])))
+    dtype = pd.CategoricalDtype(cats)
+    return union_categoricals([p.astype(dtype) for p in parts])
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    按行拼接列相同的 DataFrame（会清空传入的 list）：
+      - 数值 / bool 列：按总行数预分配整列缓冲，逐个 frame 拷入，拷完即释放该 frame；
+        np.empty 的页按写入才占物理内存，峰值约为结果本身 + 一个 frame，而不是 "全部输入 + 结果"；
+      - category 列：union_categoricals 合并类别（pd.concat 遇到类别不同会退化成 object）；
+        各块类别本身的 dtype 不同时（例如空块推断成 object、非空块为 str）先统一成同一个 CategoricalDtype；
+      - 其余（字符串等）：pd.concat。
+    空 frame 先丢弃（全部为空时保留第一个，结果带正确的列 / dtype）。
+    """
+    if not frames:
+        return pd.DataFrame()
+    frames[:] = [f for f in frames if len(f)] or frames[:1]
+    if len(frames) == 1:
+        return frames.pop().reset_index(drop=True)
+
+    columns = list(frames[0].columns)
+    n = sum(len(f) for f in frames)
+
+    bufs: Dict[str, np.ndarray] = {}
+    others: Dict[str, List[pd.Series]] = {}
+    for c in columns:
+        dts = {f[c].dtype for f in frames}
+        dt = next(iter(dts))
+        if len(dts) == 1 and isinstance(dt, np.dtype) and dt.kind in "biuf":
+            bufs[c] = np.empty(n, dtype=dt)
+        else:
+            others[c] = []
+
+    pos = 0
+    while frames:
+        f = frames.pop(0)
+        m = len(f)
+        for c, buf in bufs.items():
+            buf[pos:pos + m] = f[c].to_numpy()
+        for c, lst in others.items():
+            lst.append(f[c])
+        pos += m
+        del f
+
+    data: Dict[str, object] = {}
+    for c in columns:
+        if c in bufs:
+            data[c] = bufs.pop(c)
+            continue
+        parts = others.pop(c)
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            data[c] = _union_categoricals(parts)
+        else:
+            data[c] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(data, columns=columns, copy=False)
+
+
+def collect_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """把块序列拼成一张表（concat_frames，峰值内存约为结果本身 + 一块）."""
+    return concat_frames(list(chunks))
@@ -0,0 +1,273 @@
+# src/offnav/io/run_store.py
+from __future__ import annotations
+
+"""
+原始 IMU / DVL 日志的内存映射列式存储（run store）。
+
+offnav-store ingest 把一个 run 的原始 CSV 转成：
+    <run_dir>/.offnav_store/<imu|dvl>/
+        schema.json        列名 / 编码 / dtype / 行数 / 原始文件指纹 / 时间索引参数
+        c<i>.npy           每列一个 .npy：数值列原样；其它列（Src、标志位等）为字典编码的整数 codes
+        time_index.npy     稀疏时间索引：每 INDEX_BLOCK_ROWS 行记录一次该块首行时间
+
+- 数据来自 raw_stream.iter_raw_chunks：列 / dtype 按 raw_schema 固定，跨文件按时间归并（行按时间有序，
+  时间非有限的行已丢弃），逐块写盘，ingest 本身不需要整表内存；
+- open_store_df() 用 np.load(mmap_mode="c") 打开各列，数值列零拷贝（多个进程共享同一份页缓存；
+  写入只落在进程私有页，不会改动磁盘上的 store）；
+- 原始文件（名字 / 大小 / mtime）变化后 store 视为过期，DatasetIndex.load_run 自动退回解析 CSV。
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from offnav.io.raw_schema import RawCsvSchema
+from offnav.io.raw_stream import DEFAULT_CHUNK_ROWS, iter_raw_chunks
+
+PathLike = Union[str, Path]
+
+STORE_DIRNAME = ".offnav_store"
+STORE_FORMAT_VERSION = 1
+SCHEMA_NAME = "schema.json"
+TIME_INDEX_NAME = "time_index.npy"
+INDEX_BLOCK_ROWS = 4096
+
+
+# =============================================================================
+# 路径 / 指纹
+# =============================================================================
+
+
+def store_dir(run_dir: PathLike, sensor: str) -> Path:
+    return Path(run_dir) / STORE_DIRNAME / str(sensor).lower()
+
+
+def source_fingerprint(paths: Iterable[PathLike]) -> List[Dict[str, Any]]:
+    """原始文件指纹（名字 + 大小 + mtime），不读内容，open 时检查足够便宜."""
+    out: List[Dict[str, Any]] = []
+    for p in sorted(str(x) for x in paths):
+        st = os.stat(p)
+        out.append({"name": os.path.basename(p), "size": int(st.st_size), "mtime_ns": int(st.st_mtime_ns)})
+    return out
+
+
+def read_store_schema(sdir: PathLike) -> Optional[Dict[str, Any]]:
+    p = Path(sdir) / SCHEMA_NAME
+    if not p.is_file():
+        return None
+    try:
+        with p.open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if isinstance(meta, dict) else None
+
+
+def store_is_current(sdir: PathLike, paths: Iterable[PathLike], schema: RawCsvSchema) -> bool:
+    """store 存在、格式版本一致、列集合与 schema 一致、原始文件未变化."""
+    meta = read_store_schema(sdir)
+    if meta is None or meta.get("format_version") != STORE_FORMAT_VERSION:
+        return False
+    if [c["name"] for c in meta.get("columns", [])] != list(schema.columns):
+        return False
+    try:
+        return meta.get("sources") == source_fingerprint(paths)
+    except OSError:
+        return False
+
+
+# =============================================================================
+# ingest
+# =============================================================================
+
+
+class _ColumnWriter:
+    """
+    单列的增量写入：数值列直接追加原始字节；其它列按值做全局字典编码，追加 int32 codes（缺失 = -1）.
+    finish() 时转成 .npy（codes 按类别数收窄 dtype）。
+    """
+
+    def __init__(self, name: str, dtype: Optional[str], tmp_dir: Path, idx: int) -> None:
+        self.name = name
+        self.numeric = dtype is not None and dtype != "category" and np.dtype(dtype).kind in "biuf"
+        self.np_dtype = np.dtype(dtype) if self.numeric else np.dtype(np.int32)
+        self.pd_dtype = dtype
+        self.file = f"c{idx}.npy"
+        self.bin_path = tmp_dir / f"c{idx}.bin"
+        self.fh = self.bin_path.open("wb")
+        self.categories: List[Any] = []
+        self._lut: Dict[Any, int] = {}
+
+    def append(self, s: pd.Series) -> None:
+        if self.pd_dtype is None:
+            self.pd_dtype = str(s.dtype)  # 未固定 dtype 的列：记录首块推断出的 dtype
+        if self.numeric:
+            np.ascontiguousarray(s.to_numpy(dtype=self.np_dtype)).tofile(self.fh)
+            return
+        local_codes, uniques = pd.factorize(s, use_na_sentinel=True)
+        remap = np.empty(len(uniques) + 1, dtype=np.int32)
+        remap[-1] = -1
+        for j, v in enumerate(uniques):
+            v = v.item() if hasattr(v, "item") else v
+            code = self._lut.get(v)
+            if code is None:
+                code = len(self.categories)
+                self._lut[v] = code
+                self.categories.append(v)
+            remap[j] = code
+        np.ascontiguousarray(remap[local_codes]).tofile(self.fh)
+
+    def finish(self, out_dir: Path, n: int) -> Dict[str, Any]:
+        self.fh.close()
+        raw = np.memmap(self.bin_path, dtype=self.np_dtype, mode="r", shape=(n,)) if n else np.empty(0, self.np_dtype)
+        if self.numeric:
+            np.save(out_dir / self.file, raw)
+            entry: Dict[str, Any] = {"name": self.name, "file": self.file, "encoding": "numeric", "dtype": str(self.np_dtype)}
+        else:
+            code_dtype = np.int8 if len(self.categories) < 127 else (np.int16 if len(self.categories) < 32767 else np.int32)
+            np.save(out_dir / self.file, np.asarray(raw, dtype=code_dtype))
+            entry = {
+                "name": self.name,
+                "file": self.file,
+                "encoding": "dict",
+                "dtype": self.pd_dtype or "object",
+                "categories": self.categories,
+            }
+        del raw
+        self.bin_path.unlink(missing_ok=True)
+        return entry
+
+
+def ingest_sensor(
+    paths: List[str],
+    schema: RawCsvSchema,
+    out_dir: PathLike,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Dict[str, Any]:
+    """一类传感器的原始 CSV -> out_dir 下的列式 store，返回写入的 schema.json 内容."""
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(f"{out_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    try:
+        writers = [_ColumnWriter(c, schema.dtypes.get(c), tmp_dir, i) for i, c in enumerate(schema.columns)]
+        n = 0
+        for chunk in iter_raw_chunks(paths, schema, chunk_rows):
+            for w in writers:
+                w.append(chunk[w.name])
+            n += len(chunk)
+        columns = [w.finish(tmp_dir, n) for w in writers]
+
+        t_col = next(c for c in columns if c["name"] == schema.time_col)
+        t = np.load(tmp_dir / t_col["file"], mmap_mode="r")
+        t_index = np.asarray(t[::INDEX_BLOCK_ROWS], dtype=float)
+        np.save(tmp_dir / TIME_INDEX_NAME, t_index)
+
+        meta = {
+            "format_version": STORE_FORMAT_VERSION,
+            "name": schema.name,
+            "n_rows": int(n),
+            "time_col": schema.time_col,
+            "t_min": float(t[0]) if n else None,
+            "t_max": float(t[-1]) if n else None,
+            "index_block_rows": INDEX_BLOCK_ROWS,
+            "sources": source_fingerprint(paths),
+            "columns": columns,
+        }
+        del t
+        with (tmp_dir / SCHEMA_NAME).open("w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return meta
+
+
+# =============================================================================
+# open
+# =============================================================================
+
+
+def _dict_column(codes: np.ndarray, entry: Dict[str, Any]) -> Any:
+    """codes -> 原 dtype 的列数组（返回 array 而不是 Series，避免按行 index 对齐）."""
+    cats = entry["categories"]
+    if entry["dtype"] == "category":
+        return pd.Categorical.from_codes(codes, categories=cats)
+    lut = np.empty(len(cats) + 1, dtype=object)
+    lut[: len(cats)] = cats
+    lut[-1] = np.nan  # code -1
+    s = pd.Series(lut[codes]).infer_objects()
+    try:
+        return s.astype(entry["dtype"]).array
+    except (TypeError, ValueError):
+        return s.array
+
+
+def _window_rows(sdir: Path, meta: Dict[str, Any], t0: Optional[float], t1: Optional[float]) -> Tuple[int, int]:
+    """
+    [t0, t1] 对应的行区间 [i0, i1)：先用稀疏时间索引定位块，再只在覆盖的块内对时间列二分
+    （行按时间有序；映射页只有被二分触到的才会读盘）.
+    """
+    n = int(meta["n_rows"])
+    block_rows, t_first = read_time_index(sdir)
+    t_entry = next(c for c in meta["columns"] if c["name"] == meta["time_col"])
+    t = np.load(sdir / t_entry["file"], mmap_mode="r")
+
+    i0, i1 = 0, n
+    if t0 is not None:
+        k = max(0, int(np.searchsorted(t_first, t0, side="left")) - 1)
+        lo, hi = k * block_rows, min(n, (k + 2) * block_rows)
+        i0 = lo + int(np.searchsorted(t[lo:hi], t0, side="left"))
+    if t1 is not None:
+        k = max(0, int(np.searchsorted(t_first, t1, side="right")) - 1)
+        lo, hi = k * block_rows, min(n, (k + 1) * block_rows)
+        i1 = lo + int(np.searchsorted(t[lo:hi], t1, side="right"))
+    return i0, max(i0, i1)
+
+
+def open_store_df(
+    sdir: PathLike,
+    t0: Optional[float] = None,
+    t1: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    以内存映射方式打开 store（数值列零拷贝，字典编码列解码成原 dtype）.
+    给定 t0/t1 时只映射时间落在 [t0, t1] 的行（行 index 保持在整表中的行号）.
+    """
+    sdir = Path(sdir)
+    meta = read_store_schema(sdir)
+    if meta is None:
+        raise FileNotFoundError(f"run store not found: {sdir}")
+
+    i0, i1 = 0, int(meta["n_rows"])
+    if t0 is not None or t1 is not None:
+        i0, i1 = _window_rows(sdir, meta, t0, t1)
+
+    data: Dict[str, Any] = {}
+    for entry in meta["columns"]:
+        arr = np.load(sdir / entry["file"], mmap_mode="c").view(np.ndarray)[i0:i1]  # 仍指向映射页，只是去掉 memmap 子类
+        data[entry["name"]] = arr if entry["encoding"] == "numeric" else _dict_column(arr, entry)
+    return pd.DataFrame(
+        data,
+        columns=[c["name"] for c in meta["columns"]],
+        index=pd.RangeIndex(i0, i1),
+        copy=False,
+    )
+
+
+def read_time_index(sdir: PathLike) -> Tuple[int, np.ndarray]:
+    """(block_rows, 每块首行时间)；块 k 覆盖行 [k*block_rows, (k+1)*block_rows)."""
+    sdir = Path(sdir)
+    meta = read_store_schema(sdir)
+    if meta is None:
+        raise FileNotFoundError(f"run store not found: {sdir}")
+    return int(meta["index_block_rows"]), np.load(sdir / TIME_INDEX_NAME)
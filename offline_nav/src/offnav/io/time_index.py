@@ -0,0 +1,267 @@
+# src/offnav/io/time_index.py
+from __future__ import annotations
+
+"""
+CSV 的稀疏时间索引 + 按时间窗读取。
+
+每个 CSV 旁边一个 <name>.tidx.npz（首次按时间窗读取时自动生成，CSV 变化后自动重建）：
+    t_first[k]   第 k 块（每 block_rows 行一块）首行时间
+    offsets[k]   第 k 块首行在文件中的字节偏移
+以及 CSV 指纹（size / mtime_ns）、时间列名、行数、时间是否非递减、有效时间的 [t_min, t_max]。
+
+read_csv_window(path, t0, t1) 只 seek + 解析覆盖 [t0, t1] 的那几块字节，再按时间列精确截取；
+结果与 "整表读入后按 (t >= t0) & (t <= t1) 取行" 相同（行 index 也保持原始行号）。
+时间列不是非递减、或索引无法建立时退回整表读取。csv_overlaps_window() 按 [t_min, t_max]
+判断整个文件是否与时间窗相交（多文件 run 按窗读取时跳过窗外文件）。注意：只解析部分行时，未指定 dtype 的列
+的类型推断可能与整表不同（raw 日志的列 dtype 已由 raw_schema 固定）。
+"""
+
+import io
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+PathLike = Union[str, Path]
+
+TIDX_SUFFIX = ".tidx.npz"
+DEFAULT_BLOCK_ROWS = 4096
+TIME_COL_CANDIDATES: Tuple[str, ...] = ("t_s", "EstS", "MonoS")
+
+_SCAN_BYTES = 64 << 20
+
+
+@dataclass
+class CsvTimeIndex:
+    time_col: str
+    block_rows: int
+    n_rows: int
+    t_first: np.ndarray
+    offsets: np.ndarray
+    file_size: int
+    mtime_ns: int
+    monotonic: bool
+    t_min: float = np.nan
+    t_max: float = np.nan
+
+    def block_range(self, t0: Optional[float], t1: Optional[float]) -> Tuple[int, int]:
+        """覆盖 [t0, t1] 的块区间 [k0, k1)."""
+        nb = int(self.t_first.size)
+        k0 = 0 if t0 is None else max(0, int(np.searchsorted(self.t_first, t0, side="left")) - 1)
+        k1 = nb if t1 is None else int(np.searchsorted(self.t_first, t1, side="right"))
+        return k0, max(k0, k1)
+
+    def overlaps(self, t0: Optional[float], t1: Optional[float]) -> bool:
+        """有效时间范围 [t_min, t_max] 是否与 [t0, t1] 相交（没有有效时间时为 False）."""
+        if not (np.isfinite(self.t_min) and np.isfinite(self.t_max)):
+            return False
+        return (t0 is None or self.t_max >= t0) and (t1 is None or self.t_min <= t1)
+
+    def byte_range(self, k0: int, k1: int) -> Tuple[int, int]:
+        stop = int(self.offsets[k1]) if k1 < self.offsets.size else int(self.file_size)
+        return int(self.offsets[k0]), stop
+
+
+def tidx_path_for(csv_path: PathLike) -> Path:
+    p = Path(csv_path)
+    return p.with_name(p.name + TIDX_SUFFIX)
+
+
+def _read_header(p: Path, encoding: str) -> Tuple[bytes, list]:
+    with p.open("rb") as f:
+        header = f.readline()
+    cols = [c.strip().strip('"') for c in header.decode(encoding).rstrip("\r\n").split(",")]
+    return header, cols
+
+
+def _pick_time_col(cols: Sequence[str], time_col: Optional[str]) -> Optional[str]:
+    if time_col is not None:
+        return time_col if time_col in cols else None
+    return next((c for c in TIME_COL_CANDIDATES if c in cols), None)
+
+
+def _data_line_starts(p: Path, header_len: int) -> np.ndarray:
+    """数据行（跳过表头与空行）起始字节偏移；按块扫描换行符，不整文件读入."""
+    size = p.stat().st_size
+    buf = np.memmap(p, dtype=np.uint8, mode="r") if size else np.empty(0, np.uint8)
+    nl_parts = []
+    for s in range(0, size, _SCAN_BYTES):
+        nl_parts.append(np.flatnonzero(buf[s:s + _SCAN_BYTES] == 10) + s)
+    nl = np.concatenate(nl_parts) if nl_parts else np.empty(0, dtype=np.int64)
+
+    starts = np.concatenate(([0], nl + 1))
+    ends = np.concatenate((nl, [size]))
+    length = ends - starts
+    blank = length == 0
+    cr = length == 1
+    if cr.any():
+        blank[cr] = buf[starts[cr]] == 13
+    starts = starts[~blank]
+    del buf
+    return starts[starts >= header_len]
+
+
+def build_csv_time_index(
+    csv_path: PathLike,
+    time_col: Optional[str] = None,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+    encoding: str = "utf-8",
+) -> Optional[CsvTimeIndex]:
+    """扫描 CSV 建立稀疏时间索引；找不到时间列或行数对不上（引号内换行等）时返回 None."""
+    p = Path(csv_path)
+    header, cols = _read_header(p, encoding)
+    tc = _pick_time_col(cols, time_col)
+    if tc is None:
+        return None
+
+    st = p.stat()
+    starts = _data_line_starts(p, len(header))
+    t = pd.read_csv(p, usecols=[tc], encoding=encoding)[tc].to_numpy(dtype=float)
+    if t.size != starts.size:
+        return None
+
+    t_first = t[:: int(block_rows)].copy()
+    # 块首行时间缺失时用前一块的值（保持非递减，块区间只会放宽）
+    t_first = pd.Series(t_first).ffill().fillna(-np.inf).to_numpy(dtype=float)
+    tf = t[np.isfinite(t)]
+    return CsvTimeIndex(
+        time_col=tc,
+        block_rows=int(block_rows),
+        n_rows=int(t.size),
+        t_first=t_first,
+        offsets=starts[:: int(block_rows)].astype(np.int64),
+        file_size=int(st.st_size),
+        mtime_ns=int(st.st_mtime_ns),
+        monotonic=bool(tf.size < 2 or np.all(np.diff(tf) >= 0)),
+        t_min=float(tf.min()) if tf.size else np.nan,
+        t_max=float(tf.max()) if tf.size else np.nan,
+    )
+
+
+def _save_index(idx: CsvTimeIndex, path: Path) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp.npz")
+    np.savez(
+        tmp,
+        t_first=idx.t_first,
+        offsets=idx.offsets,
+        meta=np.array([idx.block_rows, idx.n_rows, idx.file_size, idx.mtime_ns, int(idx.monotonic)], dtype=np.int64),
+        t_range=np.array([idx.t_min, idx.t_max], dtype=float),
+        time_col=np.array(idx.time_col),
+    )
+    os.replace(tmp, path)
+
+
+def _load_index(path: Path) -> Optional[CsvTimeIndex]:
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            block_rows, n_rows, size, mtime_ns, mono = (int(x) for x in z["meta"])
+            t_min, t_max = (float(x) for x in z["t_range"])   # 旧索引没有 t_range -> KeyError -> 重建
+            return CsvTimeIndex(
+                time_col=str(z["time_col"]),
+                block_rows=block_rows,
+                n_rows=n_rows,
+                t_first=z["t_first"],
+                offsets=z["offsets"],
+                file_size=size,
+                mtime_ns=mtime_ns,
+                monotonic=bool(mono),
+                t_min=t_min,
+                t_max=t_max,
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def csv_time_index(
+    csv_path: PathLike,
+    time_col: Optional[str] = None,
+    encoding: str = "utf-8",
+) -> Optional[CsvTimeIndex]:
+    """读取旁路索引；不存在 / CSV 已变化 / 时间列不同则重建并尽量写回（目录只读时只在内存里用）."""
+    p = Path(csv_path)
+    ip = tidx_path_for(p)
+    st = p.stat()
+    if ip.is_file():
+        idx = _load_index(ip)
+        if (
+            idx is not None
+            and idx.file_size == st.st_size
+            and idx.mtime_ns == st.st_mtime_ns
+            and (time_col is None or idx.time_col == time_col)
+        ):
+            return idx
+
+    idx = build_csv_time_index(p, time_col, encoding=encoding)
+    if idx is not None:
+        try:
+            _save_index(idx, ip)
+        except OSError:
+            pass
+    return idx
+
+
+def csv_overlaps_window(
+    csv_path: PathLike,
+    t0: Optional[float],
+    t1: Optional[float],
+    *,
+    time_col: Optional[str] = None,
+    encoding: str = "utf-8",
+) -> bool:
+    """CSV 是否有时间落在 [t0, t1] 的行（按旁路索引的 [t_min, t_max]；索引无法建立时保守返回 True）."""
+    if t0 is None and t1 is None:
+        return True
+    idx = csv_time_index(csv_path, time_col, encoding=encoding)
+    return True if idx is None else idx.overlaps(t0, t1)
+
+
+def window_mask(t: np.ndarray, t0: Optional[float], t1: Optional[float]) -> np.ndarray:
+    """[t0, t1] 闭区间掩码（None 表示不限）."""
+    mask = np.ones(t.shape, dtype=bool)
+    if t0 is not None:
+        mask &= t >= t0
+    if t1 is not None:
+        mask &= t <= t1
+    return mask
+
+
+def read_csv_window(
+    csv_path: PathLike,
+    t0: Optional[float] = None,
+    t1: Optional[float] = None,
+    *,
+    time_col: Optional[str] = None,
+    encoding: str = "utf-8",
+    **read_csv_kwargs: Any,
+) -> pd.DataFrame:
+    """
+    只读 CSV 中时间落在 [t0, t1] 的行（见模块说明）；t0/t1 都为 None 时等价于 pd.read_csv.
+    time_col=None 时按 TIME_COL_CANDIDATES 自动选列.
+    """
+    p = Path(csv_path)
+    if t0 is None and t1 is None:
+        return pd.read_csv(p, encoding=encoding, **read_csv_kwargs)
+
+    idx = csv_time_index(p, time_col, encoding=encoding)
+    if idx is None or not idx.monotonic:
+        df = pd.read_csv(p, encoding=encoding, **read_csv_kwargs)
+        tc = _pick_time_col(list(df.columns), time_col)
+        if tc is None:
+            raise KeyError(f"CSV {p} has no time column (tried {time_col or TIME_COL_CANDIDATES})")
+        return df[window_mask(df[tc].to_numpy(dtype=float), t0, t1)]
+
+    k0, k1 = idx.block_range(t0, t1)
+    if k0 >= k1:
+        return pd.read_csv(p, encoding=encoding, nrows=0, **read_csv_kwargs)
+
+    start, stop = idx.byte_range(k0, k1)
+    with p.open("rb") as f:
+        header = f.readline()
+        f.seek(start)
+        body = f.read(stop - start)
+    df = pd.read_csv(io.BytesIO(header + body), encoding=encoding, **read_csv_kwargs)
+    df.index = pd.RangeIndex(k0 * idx.block_rows, k0 * idx.block_rows + len(df))
+    return df[window_mask(df[idx.time_col].to_numpy(dtype=float), t0, t1)]
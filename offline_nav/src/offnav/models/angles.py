@@ -0,0 +1,185 @@
+# src/offnav/models/angles.py
+from __future__ import annotations
+
+"""
+向量化角度工具（rad）。
+
+- wrap_pm_pi(x, out=None)        : wrap 到 [-pi, pi)，整段数组一次 ufunc；out 可传入自身做原地 wrap；
+- angle_diff(a, b)               : wrap(a - b)，航向残差 / dyaw；
+- unwrap_with_reset(x, reset)    : NaN 跳过的 unwrap，reset 处重新从原始值起算（设备 yaw 复位、断帧等）；
+- circular_mean / circular_std   : 沿轴的圆周均值 / 标准差（sqrt(-2 ln R)）；
+- rolling_circular_mean_std      : 居中滑窗的圆周均值 / 标准差，sin/cos 前缀和 O(n)，
+                                   窗口语义同 pandas rolling(win, center=True, min_periods)。
+
+wrap 公式统一为 (x + pi) % 2pi - pi（与各模块原有写法逐位一致），非有限值输出 NaN。
+"""
+
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[float, np.ndarray]
+
+TWO_PI = 2.0 * np.pi
+
+
+# =============================================================================
+# wrap
+# =============================================================================
+
+
+def wrap_pm_pi(x: ArrayLike, out: Optional[np.ndarray] = None) -> ArrayLike:
+    """
+    Wrap angle(s) to [-pi, pi). 标量返回 float；数组整段向量化（NaN/inf -> NaN）.
+    out 给定时结果写入 out（可与 x 相同，原地 wrap，不再分配）.
+    """
+    if out is None and np.ndim(x) == 0:
+        xv = float(x)
+        if not np.isfinite(xv):
+            return np.nan
+        return (xv + np.pi) % TWO_PI - np.pi
+
+    a = np.asarray(x, dtype=float)
+    if out is None:
+        out = np.empty_like(a)
+    with np.errstate(invalid="ignore"):
+        np.add(a, np.pi, out=out)
+        np.remainder(out, TWO_PI, out=out)
+        np.subtract(out, np.pi, out=out)
+    return out
+
+
+def angle_diff(a: ArrayLike, b: ArrayLike) -> ArrayLike:
+    """wrap(a - b)，结果在 [-pi, pi)."""
+    if np.ndim(a) == 0 and np.ndim(b) == 0:
+        return wrap_pm_pi(float(a) - float(b))
+    d = np.subtract(a, b, dtype=float)
+    return wrap_pm_pi(d, out=d)
+
+
+# =============================================================================
+# unwrap
+# =============================================================================
+
+
+def unwrap_with_reset(
+    x: np.ndarray,
+    reset: Optional[np.ndarray] = None,
+    *,
+    period: float = TWO_PI,
+) -> np.ndarray:
+    """
+    1D 角度序列 unwrap（每步跳变按 period 取最近的分支，同 np.unwrap）：
+      - NaN/inf 样本原样输出 NaN，且不打断展开（跨过缺失值比较前后两个有效样本）；
+        np.unwrap 遇到 NaN 会让之后全部变成 NaN；
+      - reset[k]=True：从样本 k 起重新累计，unwrapped[k] = x[k]（之前累计的整圈数清零）。
+    无 NaN、无 reset 时与 np.unwrap 结果一致。
+    """
+    a = np.asarray(x, dtype=float).reshape(-1)
+    ok = np.isfinite(a)
+    dense = bool(ok.all())
+    v = a.copy() if dense else a[ok]
+    out = v if dense else np.full_like(a, np.nan)
+    if v.size == 0:
+        return out
+
+    half = 0.5 * period
+    d = np.diff(v)
+    dd = np.remainder(d + half, period) - half
+    dd[(dd == -half) & (d > 0)] = half          # 与 np.unwrap 相同的 +pi 边界约定
+    corr = dd - d
+    corr[np.abs(d) < half] = 0.0
+
+    if reset is not None:
+        r = np.asarray(reset, dtype=bool).reshape(-1)
+        r = r if dense else r[ok]
+        corr[r[1:]] = 0.0                        # 跳进 reset 样本的那一步不修正
+        c = np.concatenate(([0.0], np.cumsum(corr)))
+        start = np.where(r, np.arange(v.size), 0)
+        np.maximum.accumulate(start, out=start)  # 每个样本所在段的起点
+        v += c - c[start]
+    else:
+        v[1:] += np.cumsum(corr)
+    if not dense:
+        out[ok] = v
+    return out
+
+
+# =============================================================================
+# circular statistics
+# =============================================================================
+
+
+def _resultant_to_std(R: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.sqrt(-2.0 * np.log(np.clip(R, 1e-300, 1.0)))
+
+
+def _mean_sin_cos(a: np.ndarray, axis: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """忽略 NaN 的 (mean sin, mean cos)；整段 / 整个切片都是 NaN 时为 NaN（不告警）."""
+    ok = np.isfinite(a)
+    z = np.where(ok, a, 0.0)
+    cnt = np.sum(ok, axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s = np.sum(np.where(ok, np.sin(z), 0.0), axis=axis) / cnt
+        c = np.sum(np.where(ok, np.cos(z), 0.0), axis=axis) / cnt
+    return s, c
+
+
+def circular_mean(x: np.ndarray, axis: Optional[int] = None) -> ArrayLike:
+    """圆周均值 atan2(mean sin, mean cos)，忽略 NaN；全 NaN -> NaN."""
+    s, c = _mean_sin_cos(np.asarray(x, dtype=float), axis)
+    out = np.arctan2(s, c)
+    return float(out) if np.ndim(out) == 0 else out
+
+
+def circular_std(x: np.ndarray, axis: Optional[int] = None) -> ArrayLike:
+    """圆周标准差 sqrt(-2 ln R)，R = 平均合矢量长度；忽略 NaN."""
+    s, c = _mean_sin_cos(np.asarray(x, dtype=float), axis)
+    out = _resultant_to_std(np.hypot(s, c))
+    return float(out) if np.ndim(out) == 0 else out
+
+
+def rolling_circular_mean_std(
+    x: np.ndarray,
+    win: int,
+    min_periods: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    居中滑窗的 (圆周均值, 圆周标准差)，1D，NaN 不计入窗口样本数.
+
+    窗口同 pandas rolling(win, center=True)：样本 i 的窗口为 [i - win//2, i + (win-1)//2]，
+    有效样本数 < min_periods（默认 win）时输出 NaN。sin/cos/计数一次前缀和，O(n)、与窗口长度无关。
+    """
+    a = np.asarray(x, dtype=float).reshape(-1)
+    n = a.size
+    win = max(1, int(win))
+    mp = win if min_periods is None else min(win, max(1, int(min_periods)))
+    ahead = (win - 1) // 2 + 1
+
+    ok = np.isfinite(a)
+    z = np.where(ok, a, 0.0)
+    sn = np.sin(z)
+    cs = np.cos(z)
+    sn[~ok] = 0.0
+    cs[~ok] = 0.0
+
+    def _window_sums(v: np.ndarray) -> np.ndarray:
+        # 前缀和左补 0、右补末值：样本 i 的窗口和 = E[i + win] - E[i]（连续切片，无 gather）
+        e = np.empty(n + win + 1, dtype=float)
+        e[: win - ahead + 1] = 0.0
+        np.cumsum(v, out=e[win - ahead + 1: win - ahead + 1 + n])
+        e[win - ahead + 1 + n:] = e[win - ahead + n] if n else 0.0
+        return e[win: win + n] - e[:n]
+
+    ss = _window_sums(sn)
+    cc = _window_sums(cs)
+    cnt = _window_sums(ok.astype(float))
+
+    mean = np.arctan2(ss, cc)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = _resultant_to_std(np.hypot(ss, cc) / cnt)
+    bad = cnt < mp
+    mean[bad] = np.nan
+    std[bad] = np.nan
+    return mean, std
@@ -6,6 +6,8 @@ from typing import Tuple, Optional,Union
 
 import numpy as np
 
+from offnav.models.angles import wrap_pm_pi
+
 EPS = 1e-12
 
 ArrayLike = Union[float, np.ndarray]
@@ -27,24 +29,15 @@ def wrap_angle_pm_pi(x: ArrayLike, *, keep_nan: bool = True) -> ArrayLike:
         xv = float(x)
         if not np.isfinite(xv):
             return np.nan if keep_nan else 0.0
-        return (xv + np.pi) % (2.0 * np.pi) - np.pi
+        return wrap_pm_pi(xv)
 
     a = np.asarray(x, dtype=float)
     if a.size == 0:
         return a  # empty array, keep shape
 
-    m = np.isfinite(a)
-    out = np.empty_like(a, dtype=float)
-
-    if keep_nan:
-        out[~m] = np.nan
-        out[m] = (a[m] + np.pi) % (2.0 * np.pi) - np.pi
-    else:
-        aa = a.copy()
-        aa[~m] = 0.0
-        out = (aa + np.pi) % (2.0 * np.pi) - np.pi
-
-    return out
+    if not keep_nan:
+        a = np.where(np.isfinite(a), a, 0.0)
+    return wrap_pm_pi(a)  # 整段向量化（非有限 -> NaN），见 models/angles.py
 
 
 def wrap_angle_0_2pi(x: ArrayLike) -> ArrayLike:
@@ -114,6 +107,43 @@ def rpy_to_R_bn(att: AttitudeRPY) -> np.ndarray:
     return R_nb.T
 
 
+def rpy_to_R_nb_batch(
+    roll: np.ndarray,
+    pitch: np.ndarray,
+    yaw: np.ndarray,
+) -> np.ndarray:
+    """
+    批量版本：roll/pitch/yaw 形状 (N,) → R_nb 形状 (N,3,3)。
+
+    与 rpy_to_R_nb 相同约定 R_nb = Rz(yaw) * Ry(pitch) * Rx(roll)，
+    三个基本旋转一次 einsum 相乘。
+    """
+    r = np.asarray(roll, dtype=float).reshape(-1)
+    p = np.asarray(pitch, dtype=float).reshape(-1)
+    y = np.asarray(yaw, dtype=float).reshape(-1)
+    n = r.shape[0]
+    cr, sr = np.cos(r), np.sin(r)
+    cp, sp = np.cos(p), np.sin(p)
+    cy, sy = np.cos(y), np.sin(y)
+
+    Rz = np.zeros((n, 3, 3), dtype=float)
+    Rz[:, 0, 0], Rz[:, 0, 1] = cy, -sy
+    Rz[:, 1, 0], Rz[:, 1, 1] = sy, cy
+    Rz[:, 2, 2] = 1.0
+
+    Ry = np.zeros((n, 3, 3), dtype=float)
+    Ry[:, 0, 0], Ry[:, 0, 2] = cp, sp
+    Ry[:, 1, 1] = 1.0
+    Ry[:, 2, 0], Ry[:, 2, 2] = -sp, cp
+
+    Rx = np.zeros((n, 3, 3), dtype=float)
+    Rx[:, 0, 0] = 1.0
+    Rx[:, 1, 1], Rx[:, 1, 2] = cr, -sr
+    Rx[:, 2, 1], Rx[:, 2, 2] = sr, cr
+
+    return np.einsum("nij,njk,nkl->nil", Rz, Ry, Rx, optimize=True)
+
+
 # =========================
 # 体/导航坐标变换
 # =========================
@@ -235,6 +265,83 @@ def quat_unrotate(q_nb: np.ndarray, v_nav: np.ndarray) -> np.ndarray:
     return quat_mul(quat_mul(quat_conj(q_nb), qv), q_nb)[1:]
 
 
+def quat_from_rpy_batch(
+    roll: np.ndarray,
+    pitch: np.ndarray,
+    yaw: np.ndarray,
+) -> np.ndarray:
+    """
+    批量 roll/pitch/yaw (N,) → q_nb (N,4) [w,x,y,z]，
+    与 rpy_to_R_nb 同一约定：q = qz(yaw) ⊗ qy(pitch) ⊗ qx(roll)。
+    """
+    hr = 0.5 * np.asarray(roll, dtype=np.float64).reshape(-1)
+    hp = 0.5 * np.asarray(pitch, dtype=np.float64).reshape(-1)
+    hy = 0.5 * np.asarray(yaw, dtype=np.float64).reshape(-1)
+    cr, sr = np.cos(hr), np.sin(hr)
+    cp, sp = np.cos(hp), np.sin(hp)
+    cy, sy = np.cos(hy), np.sin(hy)
+    return np.stack(
+        [
+            cr * cp * cy + sr * sp * sy,
+            sr * cp * cy - cr * sp * sy,
+            cr * sp * cy + sr * cp * sy,
+            cr * cp * sy - sr * sp * cy,
+        ],
+        axis=1,
+    )
+
+
+def quat_to_rpy_batch(q_nb: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    批量 q_nb (N,4) → (roll, pitch, yaw)，ZYX 分解（同 R_nb_to_rpy，不做万向锁特判），
+    角度 wrap 到 (-pi, pi]。
+    """
+    q = np.asarray(q_nb, dtype=np.float64).reshape(-1, 4)
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    ww, xx, yy, zz = w * w, x * x, y * y, z * z
+    sp = np.clip(-2.0 * (x * z - w * y), -1.0, 1.0)
+    roll = np.arctan2(2.0 * (y * z + w * x), ww - xx - yy + zz)
+    pitch = np.arcsin(sp)
+    yaw = np.arctan2(2.0 * (x * y + w * z), ww + xx - yy - zz)
+    return wrap_angle_pm_pi(roll), wrap_angle_pm_pi(pitch), wrap_angle_pm_pi(yaw)
+
+
+def quat_to_R_nb_batch(q_nb: np.ndarray) -> np.ndarray:
+    """批量 q_nb (N,4) → R_nb (N,3,3)（先归一化）。"""
+    q = np.asarray(q_nb, dtype=np.float64).reshape(-1, 4)
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    ww, xx, yy, zz = w * w, x * x, y * y, z * z
+    R = np.empty((q.shape[0], 3, 3), dtype=np.float64)
+    R[:, 0, 0], R[:, 0, 1], R[:, 0, 2] = ww + xx - yy - zz, 2 * (x * y - w * z), 2 * (x * z + w * y)
+    R[:, 1, 0], R[:, 1, 1], R[:, 1, 2] = 2 * (x * y + w * z), ww - xx + yy - zz, 2 * (y * z - w * x)
+    R[:, 2, 0], R[:, 2, 1], R[:, 2, 2] = 2 * (x * z - w * y), 2 * (y * z + w * x), ww - xx - yy + zz
+    return R
+
+
+def quat_slerp_batch(q0: np.ndarray, q1: np.ndarray, frac: np.ndarray) -> np.ndarray:
+    """
+    批量球面线性插值：q0/q1 (N,4)，frac (N,) ∈ [0,1]。
+    走最短弧（点积为负时翻转 q1），夹角很小时退化为归一化线性插值。
+    """
+    a = np.asarray(q0, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(q1, dtype=np.float64).reshape(-1, 4).copy()
+    f = np.asarray(frac, dtype=np.float64).reshape(-1, 1)
+
+    dot = np.sum(a * b, axis=1, keepdims=True)
+    b = np.where(dot < 0.0, -b, b)
+    dot = np.clip(np.abs(dot), 0.0, 1.0)
+
+    theta = np.arccos(dot)
+    sin_t = np.sin(theta)
+    small = sin_t < 1e-6
+    with np.errstate(invalid="ignore", divide="ignore"):
+        w0 = np.where(small, 1.0 - f, np.sin((1.0 - f) * theta) / sin_t)
+        w1 = np.where(small, f, np.sin(f * theta) / sin_t)
+    out = w0 * a + w1 * b
+    return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+
 # =========================
 # 简单姿态积分（旧接口保留 + 新增四元数版）
 # =========================
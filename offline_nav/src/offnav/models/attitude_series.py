@@ -0,0 +1,351 @@
+# src/offnav/models/attitude_series.py
+from __future__ import annotations
+
+"""
+按航次构建一次的 IMU 姿态时间序列服务。
+
+原先 deadreckon / ESKF 观测构造 / ESKF-2D runner / Graph 各自在每次查询时
+做最近邻搜索并重新解析 DataFrame 列（iloc 取行、探测 yaw 列名、逐次 rpy_to_R_nb）。
+这里统一为：
+
+- TimeIndex：单调时间轴 + 批量最近邻 / 相邻区间查询（一次 searchsorted，O(log n)），
+  以及带游标的单点最近邻（按时间递增查询时摊还 O(1)）；
+- AttitudeTimeSeries：IMU 时间轴上的 roll/pitch/yaw，预先（惰性一次）算好
+  四元数 q_nb 与旋转矩阵 R_nb，支持 nearest / linear / slerp 三种批量查询。
+
+最近邻规则与原 deadreckon._interp_attitude_from_imu 相同：两侧等距时取左侧样本，
+越界时夹到端点。
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from offnav.models.attitude import (
+    quat_from_rpy_batch,
+    quat_slerp_batch,
+    quat_to_R_nb_batch,
+    quat_to_rpy_batch,
+    rpy_to_R_nb_batch,
+    wrap_angle_pm_pi,
+)
+
+
+ATTITUDE_INTERP_METHODS = ("nearest", "linear", "slerp")
+
+# 单点查询时游标最多向前走的步数，超过则改用 searchsorted
+_CURSOR_MAX_STEPS = 16
+
+_warned_no_yaw = False
+
+
+# =============================================================================
+# 单调时间索引
+# =============================================================================
+
+
+class TimeIndex:
+    """
+    单调递增时间轴上的最近邻 / 区间查询。
+
+    参数
+    ----
+    t_s : np.ndarray
+        (N,) 时间轴 [s]，调用方保证单调不减.
+    """
+
+    def __init__(self, t_s: np.ndarray) -> None:
+        self.t = np.asarray(t_s, dtype=float).reshape(-1)
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return int(self.t.size)
+
+    # ------------------------------------------------------------------
+    # 批量
+    # ------------------------------------------------------------------
+    def _nearest_from_pos(self, idx: np.ndarray, t_query: np.ndarray) -> np.ndarray:
+        """searchsorted(left) 插入位置 -> 最近邻索引（等距取左，越界夹端点）."""
+        n = self.t.size
+        lo = np.clip(idx - 1, 0, n - 1)
+        hi = np.clip(idx, 0, n - 1)
+        pick_hi = np.abs(self.t[hi] - t_query) < np.abs(self.t[lo] - t_query)
+        return np.where(idx <= 0, 0, np.where(idx >= n, n - 1, np.where(pick_hi, hi, lo)))
+
+    def nearest(self, t_query: np.ndarray, max_gap_s: Optional[float] = None) -> np.ndarray:
+        """
+        批量最近邻索引 (M,)；给定 max_gap_s 时，时间差超过门限（或非有限）的查询返回 -1.
+        """
+        tq = np.asarray(t_query, dtype=float).reshape(-1)
+        if self.t.size == 0:
+            return np.full(tq.size, -1, dtype=np.int64)
+        i = self._nearest_from_pos(np.searchsorted(self.t, tq), tq).astype(np.int64)
+        if max_gap_s is not None:
+            with np.errstate(invalid="ignore"):
+                ok = np.abs(self.t[i] - tq) <= float(max_gap_s)
+            i = np.where(ok, i, -1)
+        return i
+
+    def nearest_one(self, t: float, max_gap_s: Optional[float] = None) -> int:
+        """
+        单点最近邻（结果同 nearest）。内部保留游标，按时间递增查询时摊还 O(1)，
+        回退或跳跃较远时改用 searchsorted.
+        """
+        n = self.t.size
+        t = float(t)
+        if n == 0 or not np.isfinite(t):
+            return int(self.nearest(np.array([t]), max_gap_s)[0])
+
+        c = self._cursor
+        if c > 0 and self.t[c - 1] >= t:
+            c = int(np.searchsorted(self.t, t))
+        else:
+            steps = 0
+            while c < n and self.t[c] < t:
+                c += 1
+                steps += 1
+                if steps >= _CURSOR_MAX_STEPS:
+                    c += int(np.searchsorted(self.t[c:], t))
+                    break
+        self._cursor = c
+
+        i = int(self._nearest_from_pos(np.array([c]), np.array([t]))[0])
+        if max_gap_s is not None and not abs(float(self.t[i]) - t) <= float(max_gap_s):
+            return -1
+        return i
+
+    def bracket(self, t_query: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        相邻区间 (i0, i1, frac)：t[i0] <= t_q < t[i1]，frac ∈ [0,1]；
+        越界夹到首/末区间端点（frac 截断为 0 或 1）。要求 N >= 2.
+        """
+        tq = np.asarray(t_query, dtype=float).reshape(-1)
+        n = self.t.size
+        i0 = np.clip(np.searchsorted(self.t, tq, side="right") - 1, 0, n - 2)
+        i1 = i0 + 1
+        span = self.t[i1] - self.t[i0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = np.where(span > 0.0, (tq - self.t[i0]) / span, 0.0)
+        frac = np.clip(np.nan_to_num(frac, nan=0.0), 0.0, 1.0)
+        return i0, i1, frac
+
+
+# =============================================================================
+# IMU DataFrame 姿态列解析
+# =============================================================================
+
+
+def pick_yaw_column(df_imu: pd.DataFrame) -> str | None:
+    """
+    从 IMU DataFrame 中挑选一个“最合理的 yaw 列名”：
+
+      优先级（从高到低）：
+        1) yaw_nav_rad, yaw_device_rad, yaw_rad
+        2) YawEst_rad, YawEst_unwrapped_rad
+        3) YawEst_deg, YawDeg, AngZ_deg, AngZ
+
+      返回列名字符串；如果一个都找不到，返回 None。
+    """
+    # 1) 明确标成 rad 的 yaw
+    cand_rad = [
+        "yaw_nav_rad",
+        "yaw_device_rad",
+        "yaw_rad",
+        "YawEst_rad",
+        "YawEst_unwrapped_rad",
+    ]
+    for c in cand_rad:
+        if c in df_imu.columns:
+            return c
+
+    # 2) 退回到 deg 版本
+    cand_deg = [
+        "YawEst_deg",
+        "YawEst_unwrapped_deg",
+        "YawDeg",
+        "AngZ_deg",
+        "AngZ",
+    ]
+    for c in cand_deg:
+        if c in df_imu.columns:
+            return c
+
+    return None
+
+
+def attitude_columns_from_df(df_imu: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    IMU DataFrame -> 逐样本 (roll, pitch, yaw) [rad]（yaw 未 wrap）。
+
+    优先使用预处理列 roll_rad / pitch_rad / pick_yaw_column()（非有限值置 0）；
+    没有预处理列时回退到原始 AngX/AngY/AngZ 或 YawDeg（deg，缺列置 0）。
+    """
+    global _warned_no_yaw
+
+    n = len(df_imu)
+    zeros = np.zeros(n, dtype=float)
+
+    # ---- 1) 预处理版：roll_rad / pitch_rad / yaw_*_rad ----
+    if "roll_rad" in df_imu.columns and "pitch_rad" in df_imu.columns:
+        roll = df_imu["roll_rad"].to_numpy(dtype=float)
+        pitch = df_imu["pitch_rad"].to_numpy(dtype=float)
+
+        yaw_col = pick_yaw_column(df_imu)
+        if yaw_col is None:
+            if not _warned_no_yaw:
+                print("[IMU-YAW][WARN] No yaw column found in IMU processed CSV.")
+                print("              Available columns:", list(df_imu.columns))
+                _warned_no_yaw = True
+            yaw = zeros.copy()
+        else:
+            yaw = df_imu[yaw_col].to_numpy(dtype=float)
+            if "deg" in yaw_col.lower():
+                yaw = np.deg2rad(yaw)
+
+        # 防止 NaN
+        roll = np.where(np.isfinite(roll), roll, 0.0)
+        pitch = np.where(np.isfinite(pitch), pitch, 0.0)
+        yaw = np.where(np.isfinite(yaw), yaw, 0.0)
+        return roll, pitch, yaw
+
+    # ---- 2) 原始版：AngX/AngY/AngZ / YawDeg (deg) ----
+    roll = np.deg2rad(df_imu["AngX"].to_numpy(dtype=float)) if "AngX" in df_imu.columns else zeros
+    pitch = np.deg2rad(df_imu["AngY"].to_numpy(dtype=float)) if "AngY" in df_imu.columns else zeros.copy()
+    if "AngZ" in df_imu.columns:
+        yaw = np.deg2rad(df_imu["AngZ"].to_numpy(dtype=float))
+    elif "YawDeg" in df_imu.columns:
+        yaw = np.deg2rad(df_imu["YawDeg"].to_numpy(dtype=float))
+    else:
+        yaw = zeros.copy()
+    return roll, pitch, yaw
+
+
+# =============================================================================
+# 姿态时间序列
+# =============================================================================
+
+
+class AttitudeTimeSeries:
+    """
+    IMU 时间轴上的姿态序列（每个航次构建一次，供各管线共享）。
+
+    参数
+    ----
+    t_s : np.ndarray
+        (N,) IMU 时间轴，单调不减.
+    roll, pitch, yaw : np.ndarray
+        (N,) 姿态角 [rad]；yaw 可以是 unwrap 过的连续角，查询结果统一 wrap 到 (-pi, pi].
+    """
+
+    def __init__(
+        self,
+        t_s: np.ndarray,
+        roll: np.ndarray,
+        pitch: np.ndarray,
+        yaw: np.ndarray,
+    ) -> None:
+        self.index = TimeIndex(t_s)
+        n = len(self.index)
+        self.roll = np.asarray(roll, dtype=float).reshape(-1)[:n]
+        self.pitch = np.asarray(pitch, dtype=float).reshape(-1)[:n]
+        self.yaw = np.asarray(yaw, dtype=float).reshape(-1)[:n]
+        if not (self.roll.size == self.pitch.size == self.yaw.size == n):
+            raise ValueError(
+                f"AttitudeTimeSeries: length mismatch t={n} roll={self.roll.size} "
+                f"pitch={self.pitch.size} yaw={self.yaw.size}"
+            )
+        self._R_nb: Optional[np.ndarray] = None
+        self._quat: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_imu_df(cls, df_imu: pd.DataFrame, t_s: np.ndarray) -> "AttitudeTimeSeries":
+        """按 attitude_columns_from_df 的选列规则从 IMU DataFrame 构建."""
+        roll, pitch, yaw = attitude_columns_from_df(df_imu)
+        return cls(t_s, roll, pitch, yaw)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def t(self) -> np.ndarray:
+        return self.index.t
+
+    # ------------------------------------------------------------------
+    # 预计算（首次访问时批量构造一次）
+    # ------------------------------------------------------------------
+    @property
+    def R_nb(self) -> np.ndarray:
+        """(N,3,3) nav(ENU) <- body(FRD)."""
+        if self._R_nb is None:
+            self._R_nb = rpy_to_R_nb_batch(self.roll, self.pitch, self.yaw)
+        return self._R_nb
+
+    @property
+    def quat(self) -> np.ndarray:
+        """(N,4) q_nb [w,x,y,z]."""
+        if self._quat is None:
+            self._quat = quat_from_rpy_batch(self.roll, self.pitch, self.yaw)
+        return self._quat
+
+    # ------------------------------------------------------------------
+    # 批量查询
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _check_method(method: str) -> str:
+        m = (method or "nearest").lower()
+        if m not in ATTITUDE_INTERP_METHODS:
+            raise ValueError(
+                f"Unknown attitude interp method {method!r}, expected one of {ATTITUDE_INTERP_METHODS}"
+            )
+        return m
+
+    def rpy(
+        self,
+        t_query: np.ndarray,
+        method: str = "nearest",
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        查询 (roll, pitch, yaw)，各 (M,)，yaw wrap 到 (-pi, pi]。
+
+          - nearest : 最近邻样本；
+          - linear  : 欧拉角逐分量线性插值，yaw 走最短角差；
+          - slerp   : 四元数球面插值后再分解为欧拉角。
+
+        序列为空时返回全 0；只有一个样本时三种方式都退化为最近邻。
+        """
+        m = self._check_method(method)
+        tq = np.asarray(t_query, dtype=float).reshape(-1)
+        n = len(self)
+        if n == 0:
+            z = np.zeros(tq.size, dtype=float)
+            return z, z.copy(), z.copy()
+
+        if m == "nearest" or n < 2:
+            i = self.index.nearest(tq)
+            roll, pitch, yaw = self.roll[i], self.pitch[i], self.yaw[i]
+        elif m == "linear":
+            i0, i1, frac = self.index.bracket(tq)
+            roll = self.roll[i0] + frac * (self.roll[i1] - self.roll[i0])
+            pitch = self.pitch[i0] + frac * (self.pitch[i1] - self.pitch[i0])
+            yaw = self.yaw[i0] + frac * wrap_angle_pm_pi(self.yaw[i1] - self.yaw[i0])
+        else:
+            i0, i1, frac = self.index.bracket(tq)
+            q = quat_slerp_batch(self.quat[i0], self.quat[i1], frac)
+            return quat_to_rpy_batch(q)
+
+        return roll, pitch, np.asarray(wrap_angle_pm_pi(yaw), dtype=float)
+
+    def R_nb_at(self, t_query: np.ndarray, method: str = "nearest") -> np.ndarray:
+        """查询 R_nb (M,3,3)；nearest 直接复用预计算矩阵."""
+        m = self._check_method(method)
+        tq = np.asarray(t_query, dtype=float).reshape(-1)
+        if len(self) == 0:
+            return np.broadcast_to(np.eye(3), (tq.size, 3, 3)).copy()
+        if m == "nearest" or len(self) < 2:
+            return self.R_nb[self.index.nearest(tq)]
+        if m == "slerp":
+            i0, i1, frac = self.index.bracket(tq)
+            return quat_to_R_nb_batch(quat_slerp_batch(self.quat[i0], self.quat[i1], frac))
+        roll, pitch, yaw = self.rpy(tq, m)
+        return rpy_to_R_nb_batch(roll, pitch, yaw)
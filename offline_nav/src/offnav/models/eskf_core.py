@@ -16,7 +16,12 @@ from typing import Tuple, Optional
 
 import numpy as np
 
-from offnav.models.attitude import AttitudeRPY, rpy_to_R_nb, wrap_angle_pm_pi
+from offnav.models.attitude import (
+    AttitudeRPY,
+    rpy_to_R_nb,
+    rpy_to_R_nb_batch,
+    wrap_angle_pm_pi,
+)
 
 # 仅用于类型对接（避免循环依赖：没有强制导入 eskf_state）
 try:
@@ -371,6 +376,164 @@ def eskf_propagate(
         P=P_new,
     )
 
+# =============================================================================
+# 批量预测：两次观测更新之间的整段 IMU 一次传播
+# =============================================================================
+def _compose_phi_q(Phi: np.ndarray, Q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把逐步离散模型 (Phi_k, Q_k), k=0..M-1 合成为整段的 (Phi, Q)：
+
+        P_M = Phi P_0 Phi^T + Q
+
+    两段合成 (b 在 a 之后) 满足结合律:
+        Phi = Phi_b Phi_a,   Q = Phi_b Q_a Phi_b^T + Q_b
+    因此按二叉树逐层两两合成，每层一次批量 matmul，共 log2(M) 层。
+    """
+    n = Phi.shape[-1]
+    while Phi.shape[0] > 1:
+        if Phi.shape[0] % 2 == 1:
+            # 奇数段：末尾补单位步 (I, 0)
+            Phi = np.concatenate([Phi, np.eye(n, dtype=float)[None]], axis=0)
+            Q = np.concatenate([Q, np.zeros((1, n, n), dtype=float)], axis=0)
+        Pa, Pb = Phi[0::2], Phi[1::2]
+        Qa, Qb = Q[0::2], Q[1::2]
+        Phi = Pb @ Pa
+        Q = Pb @ Qa @ np.swapaxes(Pb, 1, 2) + Qb
+    return Phi[0], Q[0]
+
+
+def eskf_propagate_batch(
+    state: EskfState,
+    dt: np.ndarray,
+    acc_b_mps2: np.ndarray,
+    gyro_z_rad_s: np.ndarray,
+    roll_rad: np.ndarray,
+    pitch_rad: np.ndarray,
+    params: EskfCoreParams,
+) -> Tuple[EskfState, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    eskf_propagate 的批量版本：沿 M 个 IMU 样本连续传播（中间无观测更新）。
+
+    - dt: (M,)，dt<=0 的样本视为“不传播”（与 eskf_propagate 的早返回一致）；
+    - acc_b_mps2: (M,3)，gyro_z_rad_s / roll_rad / pitch_rad: (M,)；
+    - 段内 ba / bgz 恒定，因此 yaw / v / p 都是累加和：
+        yaw_k = yaw_{k-1} + rate_k dt_k
+        v_k   = v_{k-1} + a_k dt_k
+        p_k   = p_{k-1} + v_{k-1} dt_k + 0.5 a_k dt_k^2
+      其中 a_k 用中点航向 yaw_{k-1} + 0.5 rate_k dt_k 的旋转（一次批量构造）；
+    - 协方差：逐步 (Phi_k, Q_k) 批量构造后由 _compose_phi_q 合成，
+      只得到段末 P（中间样本只需要名义状态用于轨迹输出）。
+
+    返回
+    ----
+    state_end : EskfState
+        段末状态（t 为最后一个有效步之后的时间）.
+    p, v : (M,3)
+        每个样本处理后的名义位置 / 速度.
+    yaw : (M,)
+        每个样本处理后的 yaw（wrap 到 (-pi, pi]）.
+
+    与逐样本 eskf_propagate 在浮点舍入量级内一致。
+    """
+    params.assert_valid()
+    x = state
+
+    dt = np.asarray(dt, dtype=float).reshape(-1)
+    M = dt.shape[0]
+    active = dt > 0.0
+    dt_eff = np.where(active, dt, 0.0)
+
+    acc_b = np.asarray(acc_b_mps2, dtype=float).reshape(M, 3)
+    acc_eff_b = acc_b - x.ba
+
+    # 1) yaw 积分（段内 bgz 恒定）
+    yaw_rate = params.yaw_sign * np.asarray(gyro_z_rad_s, dtype=float).reshape(M) - x.bgz
+    yaw_cum = np.cumsum(np.concatenate([[float(x.yaw)], yaw_rate * dt_eff]))
+    yaw_prev = yaw_cum[:-1]
+    yaw_mid = wrap_angle_pm_pi(yaw_prev + 0.5 * yaw_rate * dt_eff)
+
+    # 2) 中点姿态（整段一次构造）
+    R_nb_mid = rpy_to_R_nb_batch(roll_rad, pitch_rad, yaw_mid)          # (M,3,3)
+
+    # 3) a_nav_mid
+    a_nav_mid = np.einsum("mij,mj->mi", R_nb_mid, acc_eff_b)
+    if params.imu_acc_kind == "specific_force":
+        a_nav_mid = a_nav_mid + np.array([0.0, 0.0, -float(params.gravity)], dtype=float)
+
+    # 4) integrate v,p（前置初值的累加和 = 逐步递推的求和顺序）
+    dt_col = dt_eff[:, None]
+    v_cum = np.cumsum(np.vstack([x.v[None, :], a_nav_mid * dt_col]), axis=0)
+    v_prev = v_cum[:-1]
+    p_inc = v_prev * dt_col + 0.5 * a_nav_mid * (dt_col * dt_col)
+    p_cum = np.cumsum(np.vstack([x.p[None, :], p_inc]), axis=0)
+
+    p_out = p_cum[1:]
+    v_out = v_cum[1:]
+    yaw_out = wrap_angle_pm_pi(yaw_cum[1:])
+
+    if not np.any(active):
+        return x.copy(), p_out, v_out, yaw_out
+
+    # 5) linearization（仅有效步）
+    Ra = R_nb_mid[active]
+    dta = dt_eff[active]
+    Ma = Ra.shape[0]
+
+    F_c = np.zeros((Ma, N_STATE, N_STATE), dtype=float)
+    F_c[:, IDX_P, IDX_V] = np.eye(3, dtype=float)
+    F_c[:, IDX_V, IDX_BA] = -Ra
+    # yaw effect: R_nb_mid (e3x acc_eff)
+    F_c[:, IDX_V, IDX_YAW] = np.einsum("mij,mj->mi", Ra, acc_eff_b[active] @ _skew_z().T)
+    F_c[:, IDX_YAW, IDX_BGZ] = -1.0
+
+    G_c = np.zeros((Ma, N_STATE, 8), dtype=float)
+    G_c[:, IDX_V, 0:3] = Ra
+    G_c[:, IDX_YAW, 3] = 1.0
+    G_c[:, IDX_BA, 4:7] = np.eye(3, dtype=float)
+    G_c[:, IDX_BGZ, 7] = 1.0
+
+    sigma_a = float(params.sigma_acc_mps2)
+    sigma_g = float(params.sigma_gyro_rad_s)
+    sigma_ba = float(params.sigma_ba_rw_mps2_sqrt_s)
+    sigma_bg = float(params.sigma_bgz_rw_rad_s_sqrt_s)
+    q_c = np.array(
+        [sigma_a**2] * 3 + [sigma_g**2] + [sigma_ba**2] * 3 + [sigma_bg**2],
+        dtype=float,
+    )
+
+    # 离散化（与 _discretize_F_Q 相同的公式，批量）
+    I = np.eye(N_STATE, dtype=float)
+    Fdt = F_c * dta[:, None, None]
+    Phi = I + Fdt + 0.5 * (Fdt @ Fdt)
+
+    Qc_eff = np.einsum("mik,k,mjk->mij", G_c, q_c, G_c)
+    Q_d = Qc_eff * dta[:, None, None]
+    Qvv = Qc_eff[:, IDX_V, IDX_V]
+    Q_d[:, IDX_P, IDX_P] += Qvv * (dta**3 / 3.0)[:, None, None]
+    Q_d[:, IDX_P, IDX_V] += Qvv * (dta**2 / 2.0)[:, None, None]
+    Q_d[:, IDX_V, IDX_P] += Qvv * (dta**2 / 2.0)[:, None, None]
+
+    q_vel = float(getattr(params, "q_vel", 0.0))
+    if q_vel > 0.0:
+        Q_d[:, IDX_V, IDX_V] += (q_vel * dta)[:, None, None] * np.eye(3, dtype=float)
+    Q_d = 0.5 * (Q_d + np.swapaxes(Q_d, 1, 2))
+
+    Phi_seg, Q_seg = _compose_phi_q(Phi, Q_d)
+    P_new = Phi_seg @ x.P @ Phi_seg.T + Q_seg
+    P_new = 0.5 * (P_new + P_new.T)
+
+    state_end = EskfState(
+        t=x.t + float(np.sum(dta)),
+        p=p_out[-1].copy(),
+        v=v_out[-1].copy(),
+        yaw=float(yaw_out[-1]),
+        ba=x.ba.copy(),
+        bgz=x.bgz,
+        P=P_new,
+    )
+    return state_end, p_out, v_out, yaw_out
+
+
 # =============================================================================
 # 观测更新：DVL BE / BI / yaw / 垂向伪测量
 # =============================================================================
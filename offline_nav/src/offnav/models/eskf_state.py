@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
 
 import numpy as np
 
@@ -23,6 +23,7 @@ from offnav.models.eskf_core import (
     N_STATE,
     make_initial_state,
     eskf_propagate,
+    eskf_propagate_batch,
     eskf_update_dvl_be_vel,
     eskf_update_dvl_bi_vel,
     eskf_update_yaw_from_dvl,
@@ -348,6 +349,67 @@ class EskfFilter:
             self.diag.nav_start_t = t_cur
             self.diag.nav_start_reason = "first_imu"
 
+    def propagate_imu_batch(
+        self,
+        t_s: np.ndarray,
+        acc_b_mps2: np.ndarray,
+        gyro_b_rad_s: np.ndarray,
+        roll_rad: np.ndarray,
+        pitch_rad: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        对连续 M 个 IMU 样本（中间无观测更新）依次执行 propagate_imu 的批量版本。
+
+        dt 守恒规则与逐样本版本相同：
+          - dt<=0：只对齐时间基；
+          - dt>max_gap_s：计入 n_dt_guard_skip，只对齐时间基；
+          - 其余样本由 eskf_propagate_batch 一次传播。
+
+        返回每个样本处理后的 (p_enu (M,3), v_enu (M,3), yaw (M,))，供轨迹记录。
+        """
+        t = np.asarray(t_s, dtype=float).reshape(-1)
+        M = t.shape[0]
+        if M == 0:
+            empty = np.zeros((0, 3), dtype=float)
+            return empty, empty.copy(), np.zeros(0, dtype=float)
+
+        acc_b = np.asarray(acc_b_mps2, dtype=float).reshape(M, 3)
+        gyro_z = np.asarray(gyro_b_rad_s, dtype=float).reshape(M, 3)[:, 2]
+
+        # 逐样本的 dt：相对上一个样本（首个相对 last_t_s）
+        t_prev = np.empty(M, dtype=float)
+        t_prev[1:] = t[:-1]
+        t_prev[0] = t[0] if self.last_t_s is None else float(self.last_t_s)
+        dt = t - t_prev
+
+        guard = dt > self.cfg.max_gap_s
+        active = (dt > 0.0) & ~guard
+        dt_eff = np.where(active, dt, 0.0)
+
+        state_end, p, v, yaw = eskf_propagate_batch(
+            state=self.state,
+            dt=dt_eff,
+            acc_b_mps2=acc_b,
+            gyro_z_rad_s=gyro_z,
+            roll_rad=roll_rad,
+            pitch_rad=pitch_rad,
+            params=self.params,
+        )
+
+        self.state = state_end
+        self.state.t = float(t[-1])
+        self.last_t_s = float(t[-1])
+        self.diag.n_dt_guard_skip += int(np.count_nonzero(guard))
+
+        n_active = int(np.count_nonzero(active))
+        self.diag.n_imu += n_active
+        if n_active > 0 and not self.diag.nav_started:
+            self.diag.nav_started = True
+            self.diag.nav_start_t = float(t[int(np.argmax(active))])
+            self.diag.nav_start_reason = "first_imu"
+
+        return p, v, yaw
+
     # -------------------------------------------------------------------------
     # 观测模型：DVL BE（ENU 速度）
     # -------------------------------------------------------------------------
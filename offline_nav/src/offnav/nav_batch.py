@@ -0,0 +1,313 @@
+# src/offnav/nav_batch.py
+from __future__ import annotations
+
+"""
+offnav-nav batch：多 run × 多管线（deadreckon / eskf / graph）的进程池执行器。
+
+- 每个 (run, method) 是一个任务，在子进程里调用 cli_nav 的 run_*_for_run；
+  子进程的终端输出写到 <out_dir>/<method>/<run_id>/<run_id>_<method>_batch.log，
+  主进程只逐条打印任务状态（完成即打印，不等全部结束）；
+- worker 数 = min(--max-workers 或 CPU 数, 任务数, 可用内存 / 单任务估计内存)；
+- 全部结束后把各任务的诊断（EskfDiagnostics / GraphDiagnostics / DeadReckonDiagnostics
+  中的标量字段）汇总成一张表，写到 <out_dir>/batch_summary.csv。
+"""
+
+import dataclasses
+import glob
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from offnav.io.dataset import DatasetIndex
+
+
+METHODS = ("deadreckon", "eskf", "graph")
+
+# 单任务内存估计：解释器 + numpy/pandas/matplotlib 基线，加输入 CSV 的倍数
+_BASE_MEM_MB = 300.0
+_CSV_MEM_FACTOR = 8.0
+
+
+# =============================================================================
+# 任务 / 结果
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class BatchTask:
+    run_id: str
+    method: str
+    dataset_config: str
+    nav_config: str
+    out_dir: str       # 该 method 的输出根目录（<out_dir>/<method>）
+    proc_dir: str
+
+
+@dataclass
+class BatchResult:
+    run_id: str
+    method: str
+    ok: bool
+    elapsed_s: float
+    error: str = ""
+    log_path: str = ""
+    diag: Dict[str, Any] = field(default_factory=dict)
+
+
+def _diag_to_row(diag: Any) -> Dict[str, Any]:
+    """诊断 dataclass -> 标量字段字典（列表 / 数组等非标量字段跳过）."""
+    if diag is None or not dataclasses.is_dataclass(diag):
+        return {}
+    out: Dict[str, Any] = {}
+    for f in dataclasses.fields(diag):
+        v = getattr(diag, f.name, None)
+        if isinstance(v, (bool, int, float, str)) or v is None:
+            out[f.name] = v
+    return out
+
+
+def _run_task(task: BatchTask) -> BatchResult:
+    """子进程入口：跑一个 (run, method)，输出重定向到日志文件."""
+    t0 = time.time()
+    run_root = Path(task.out_dir) / task.run_id
+    run_root.mkdir(parents=True, exist_ok=True)
+    log_path = run_root / f"{task.run_id}_{task.method}_batch.log"
+
+    with open(log_path, "w", encoding="utf-8") as log, redirect_stdout(log), redirect_stderr(log):
+        try:
+            # 延迟导入：避免 cli_nav <-> nav_batch 循环导入
+            from offnav import cli_nav
+            from offnav.core.nav_config import load_nav_config
+
+            idx = DatasetIndex(Path(task.dataset_config))
+            nav_cfg = load_nav_config(task.nav_config)
+
+            if task.method == "deadreckon":
+                diag = cli_nav.run_deadreckon_for_run(
+                    idx, nav_cfg, task.run_id, task.out_dir, task.proc_dir
+                )
+            elif task.method == "eskf":
+                diag = cli_nav.run_eskf_for_run(
+                    idx, nav_cfg, task.run_id, task.out_dir, task.proc_dir
+                )
+            elif task.method == "graph":
+                diag = cli_nav.run_graph_for_run(
+                    idx, nav_cfg, task.run_id, task.out_dir, task.proc_dir
+                )
+            else:
+                raise ValueError(f"Unknown batch method: {task.method!r}")
+        except Exception as e:
+            traceback.print_exc()
+            return BatchResult(
+                run_id=task.run_id,
+                method=task.method,
+                ok=False,
+                elapsed_s=time.time() - t0,
+                error=f"{type(e).__name__}: {e}",
+                log_path=str(log_path),
+            )
+
+    return BatchResult(
+        run_id=task.run_id,
+        method=task.method,
+        ok=True,
+        elapsed_s=time.time() - t0,
+        log_path=str(log_path),
+        diag=_diag_to_row(diag),
+    )
+
+
+# =============================================================================
+# worker 数规划（CPU / 内存）
+# =============================================================================
+
+
+def available_memory_mb() -> Optional[float]:
+    """当前可用物理内存（MB）；拿不到时返回 None."""
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return float(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def estimate_task_memory_mb(idx: DatasetIndex, run_id: str, proc_dir: Path) -> float:
+    """按该 run 的原始 CSV + 预处理 CSV 总大小粗估单任务峰值内存（MB）."""
+    n_bytes = 0
+    try:
+        spec = idx.get_run_spec(run_id)
+        run_dir = idx.data_root / spec.path
+        for pat in (spec.imu_glob, spec.dvl_glob):
+            n_bytes += sum(os.path.getsize(p) for p in glob.glob(str(run_dir / pat)))
+    except (KeyError, OSError):
+        pass
+    proc_run = proc_dir / run_id
+    if proc_run.is_dir():
+        n_bytes += sum(p.stat().st_size for p in proc_run.glob("*.csv"))
+    return _BASE_MEM_MB + _CSV_MEM_FACTOR * n_bytes / 2**20
+
+
+def plan_workers(
+    n_tasks: int,
+    max_workers: int,
+    mem_per_task_mb: float,
+    mem_avail_mb: Optional[float],
+    mem_budget_frac: float = 0.8,
+) -> int:
+    """worker 数 = min(CPU/上限, 任务数, 可用内存预算 / 单任务内存)，至少 1."""
+    n = int(max_workers) if max_workers and max_workers > 0 else (os.cpu_count() or 1)
+    n = min(n, max(1, n_tasks))
+    if mem_avail_mb is not None and mem_per_task_mb > 0:
+        n = min(n, int(mem_budget_frac * mem_avail_mb // mem_per_task_mb))
+    return max(1, n)
+
+
+# =============================================================================
+# 执行 + 汇总
+# =============================================================================
+
+
+def run_batch(tasks: Sequence[BatchTask], n_workers: int) -> pd.DataFrame:
+    """执行全部任务，逐条打印状态，返回汇总表（每个任务一行）."""
+    results: List[BatchResult] = []
+    n = len(tasks)
+
+    def _report(res: BatchResult) -> None:
+        results.append(res)
+        status = "ok" if res.ok else f"FAIL ({res.error})"
+        print(
+            f"[BATCH] [{len(results)}/{n}] run={res.run_id} method={res.method} "
+            f"{status}  {res.elapsed_s:.1f}s  log={res.log_path}",
+            flush=True,
+        )
+
+    if n_workers <= 1:
+        for t in tasks:
+            _report(_run_task(t))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as ex:
+            futs = {ex.submit(_run_task, t): t for t in tasks}
+            for fut in as_completed(futs):
+                t = futs[fut]
+                try:
+                    res = fut.result()
+                except Exception as e:  # worker 崩溃（如被 OOM kill）
+                    res = BatchResult(
+                        run_id=t.run_id,
+                        method=t.method,
+                        ok=False,
+                        elapsed_s=float("nan"),
+                        error=f"{type(e).__name__}: {e}",
+                    )
+                _report(res)
+
+    rows = [
+        {
+            "run_id": r.run_id,
+            "method": r.method,
+            "ok": r.ok,
+            "elapsed_s": r.elapsed_s,
+            "error": r.error,
+            **r.diag,
+            "log_path": r.log_path,
+        }
+        for r in results
+    ]
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df = df.sort_values(["run_id", "method"], kind="stable").reset_index(drop=True)
+    return df
+
+
+def _parse_list(spec: Optional[str], allowed: Sequence[str], what: str) -> List[str]:
+    if spec is None or str(spec).strip().lower() in ("", "all"):
+        return list(allowed)
+    items = [s.strip() for s in str(spec).split(",") if s.strip()]
+    bad = [s for s in items if s not in allowed]
+    if bad:
+        raise KeyError(f"Unknown {what}: {bad}, available={list(allowed)}")
+    return items
+
+
+def run_nav_batch(
+    *,
+    dataset_config: str,
+    nav_config: str,
+    idx: DatasetIndex,
+    runs: Optional[str],
+    methods: Optional[str],
+    out_dir: str,
+    proc_dir: str,
+    max_workers: int = 0,
+    mem_per_worker_mb: float = 0.0,
+) -> int:
+    """
+    `offnav-nav batch` 主体。返回进程退出码（有任务失败时为 1）.
+    """
+    run_ids = _parse_list(runs, list(idx.runs.keys()), "run_id")
+    meths = _parse_list(methods, METHODS, "method")
+    if not run_ids or not meths:
+        print("[BATCH] nothing to do (no runs / methods)")
+        return 0
+
+    out_root = Path(out_dir)
+    proc_root = Path(proc_dir)
+    tasks = [
+        BatchTask(
+            run_id=r,
+            method=m,
+            dataset_config=str(dataset_config),
+            nav_config=str(nav_config),
+            out_dir=str(out_root / m),
+            proc_dir=str(proc_root),
+        )
+        for r in run_ids
+        for m in meths
+    ]
+
+    if mem_per_worker_mb and mem_per_worker_mb > 0:
+        mem_task = float(mem_per_worker_mb)
+    else:
+        mem_task = max(estimate_task_memory_mb(idx, r, proc_root) for r in run_ids)
+    mem_avail = available_memory_mb()
+    n_workers = plan_workers(len(tasks), max_workers, mem_task, mem_avail)
+
+    mem_avail_str = f"{mem_avail:.0f}" if mem_avail is not None else "?"
+    print(
+        f"[BATCH] runs={len(run_ids)} methods={','.join(meths)} tasks={len(tasks)} "
+        f"workers={n_workers} (cpu={os.cpu_count()}, mem_avail={mem_avail_str} MB, "
+        f"est_per_task={mem_task:.0f} MB)",
+        flush=True,
+    )
+
+    t0 = time.time()
+    df = run_batch(tasks, n_workers)
+
+    out_root.mkdir(parents=True, exist_ok=True)
+    summary_path = out_root / "batch_summary.csv"
+    df.to_csv(summary_path, index=False)
+
+    n_fail = int((~df["ok"]).sum()) if not df.empty else 0
+    cols = [c for c in ("run_id", "method", "ok", "elapsed_s", "n_imu", "n_dvl",
+                        "n_states", "gn_converged", "gn_final_cost", "error") if c in df.columns]
+    if not df.empty:
+        with pd.option_context("display.width", 200, "display.max_columns", 20):
+            print(df[cols].to_string(index=False))
+    print(
+        f"[BATCH] done in {time.time() - t0:.1f}s  ok={len(df) - n_fail}  "
+        f"fail={n_fail}  summary={summary_path}"
+    )
+    return 1 if n_fail > 0 else 0
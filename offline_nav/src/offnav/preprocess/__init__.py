@@ -29,6 +29,9 @@ try:
         DvlEventsData,              # 新：更精简的数据封装（例如只含 df_bi/df_be）
         preprocess_dvl_events,      # 新：直接产出 BI/BE 两份“关键列”数据
         load_dvl_events_csv,        # 新：读回 BI/BE 两份简洁 CSV
+        DvlGateResult,              # 新：逐样本 gate 位掩码（剔除原因按需解码）
+        decode_gate_bits,
+        dvl_gate_audit_df,
     )
 
     _HAS_DVL_EVENTS_API = True
@@ -61,4 +64,7 @@ if _HAS_DVL_EVENTS_API:
         "DvlEventsData",
         "preprocess_dvl_events",
         "load_dvl_events_csv",
+        "DvlGateResult",
+        "decode_gate_bits",
+        "dvl_gate_audit_df",
     ]
@@ -7,6 +7,7 @@ from typing import Optional, Tuple, Dict, List
 import numpy as np
 import pandas as pd
 
+from offnav.io.colcache import read_csv_cached
 from .types import DvlDiagReport, DvlFrameSummary, ScalarStats
 
 
@@ -297,7 +298,7 @@ def diagnose_dvl_from_proc_dir(
             notes.append(f"missing file: {p.name}")
             return None
         try:
-            df = pd.read_csv(p)
+            df = read_csv_cached(p)
             if df.empty:
                 notes.append(f"empty file: {p.name}")
             return df
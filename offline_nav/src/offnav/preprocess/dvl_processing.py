@@ -3,12 +3,15 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Tuple, Literal, List
+from typing import Dict, Optional, Tuple, Literal, List
 
 import numpy as np
 import pandas as pd
 
+from offnav.io.colcache import read_csv_cached
 from offnav.core.types import DvlRawData
+from offnav.preprocess.filter_bank import box_filter, butter_lowpass, time_box_filter
+from offnav.preprocess.rolling_median import rolling_median_mad
 
 
 # =============================================================================
@@ -70,16 +73,65 @@ class DvlEventsConfig:
     # low-pass
     enable_lowpass: bool = True
     lowpass_window_s: float = 0.50
+    # "box"     : centered moving average over round(window_s * median fs) samples
+    # "box_time": centered window_s-second mean on the actual timestamps (DVL dt jitter / gaps)
+    # "butter"  : zero-phase Butterworth, cutoff = lowpass_cutoff_hz or 0.443 / window_s
+    #             (0.443 / T = -3 dB point of a T-second box)
+    lowpass_kind: Literal["box", "box_time", "butter"] = "box"
+    lowpass_order: int = 2
+    lowpass_cutoff_hz: Optional[float] = None
 
     # output columns
     keep_id_cols: bool = True   # keep SensorID, Src
 
 
+# gating bitmask: one bit per gate (order = reason string order)
+GATE_VALID = 1 << 0
+GATE_WATER_MASS = 1 << 1
+GATE_DV_JUMP = 1 << 2
+GATE_VU_ABS = 1 << 3
+GATE_OUTLIER = 1 << 4
+GATE_SPEED_RANGE = 1 << 5
+
+GATE_BIT_NAMES: Tuple[Tuple[int, str], ...] = (
+    (GATE_VALID, "valid"),
+    (GATE_WATER_MASS, "water_mass"),
+    (GATE_DV_JUMP, "dv_jump"),
+    (GATE_VU_ABS, "vu_abs"),
+    (GATE_OUTLIER, "outlier"),
+    (GATE_SPEED_RANGE, "speed_range"),
+)
+
+
+@dataclass
+class DvlGateResult:
+    """
+    Per-sample gating result of one stream (BI or BE), aligned with the
+    time-sorted raw rows before gating.
+
+    bits : uint16 bitmask, 0 if kept (force-kept static window is also 0)
+    keep : bool mask actually applied
+    """
+    t_s: np.ndarray
+    bits: np.ndarray
+    keep: np.ndarray
+
+    def reasons(self) -> np.ndarray:
+        """Human-readable reasons ('' if kept), decoded on demand."""
+        return decode_gate_bits(self.bits)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of samples rejected by each gate (a sample may hit several)."""
+        return gate_bit_counts(self.bits)
+
+
 @dataclass
 class DvlEventsData:
     df_bi: pd.DataFrame
     df_be: pd.DataFrame
     config: Optional[DvlEventsConfig] = None
+    gate_bi: Optional[DvlGateResult] = None
+    gate_be: Optional[DvlGateResult] = None
 
 
 # =============================================================================
@@ -133,28 +185,10 @@ def _estimate_fs_hz(t_s: np.ndarray) -> float:
     return 1.0 / float(np.median(dt))
 
 
-def _moving_average(x: np.ndarray, win: int) -> np.ndarray:
-    if win <= 1:
-        return x.astype(float, copy=True)
-    kernel = np.ones(win, dtype=float) / float(win)
-    y = np.empty_like(x, dtype=float)
-    for i in range(x.shape[1]):
-        y[:, i] = np.convolve(x[:, i], kernel, mode="same")
-    return y
-
-
 def _speed(v: np.ndarray) -> np.ndarray:
     return np.sqrt(np.sum(v * v, axis=1))
 
 
-def _rolling_median_mad(x: np.ndarray, win: int) -> Tuple[np.ndarray, np.ndarray]:
-    # simple pandas-based implementation for stability
-    s = pd.Series(x)
-    med = s.rolling(win, center=True, min_periods=max(3, win // 3)).median().to_numpy(dtype=float)
-    mad = (s - pd.Series(med)).abs().rolling(win, center=True, min_periods=max(3, win // 3)).median().to_numpy(dtype=float)
-    return med, mad
-
-
 def _gate_common(
     df: pd.DataFrame,
     t_s: np.ndarray,
@@ -162,30 +196,23 @@ def _gate_common(
     cfg: DvlEventsConfig,
     *,
     kind: Literal["BI", "BE"],
-) -> Tuple[np.ndarray, List[str]]:
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Returns keep_mask and reasons (len=N, '' if kept).
+    Returns keep_mask and gate bitmask (uint16, len=N, 0 if kept; see GATE_*).
     keep_mask is after all gating, BUT we will force-keep keep_first_s.
     """
     n = df.shape[0]
-    keep = np.ones(n, dtype=bool)
-    reason = [""] * n
+    bits = np.zeros(n, dtype=np.uint16)
 
     # validity
     if cfg.require_valid and "Valid" in df.columns:
         ok = _to_bool_series(df["Valid"]).to_numpy(dtype=bool)
-        bad = ~ok
-        for i in np.nonzero(bad)[0]:
-            keep[i] = False
-            reason[i] = (reason[i] + ";valid") if reason[i] else "valid"
+        bits[~ok] |= GATE_VALID
 
     # bottom track
     if cfg.require_bottom_track and "IsWaterMass" in df.columns:
         ok = (~_to_bool_series(df["IsWaterMass"])).to_numpy(dtype=bool)
-        bad = ~ok
-        for i in np.nonzero(bad)[0]:
-            keep[i] = False
-            reason[i] = (reason[i] + ";water_mass") if reason[i] else "water_mass"
+        bits[~ok] |= GATE_WATER_MASS
 
     # dv gate
     dv = np.zeros_like(v)
@@ -194,18 +221,14 @@ def _gate_common(
     dv_xy = np.sqrt(dv[:, 0] * dv[:, 0] + dv[:, 1] * dv[:, 1])
     bad = (dv_axis > float(cfg.dv_axis_max_m_s)) | (dv_xy > float(cfg.dv_xy_max_m_s))
     bad[0] = False
-    for i in np.nonzero(bad)[0]:
-        keep[i] = False
-        reason[i] = (reason[i] + ";dv_jump") if reason[i] else "dv_jump"
+    bits[bad] |= GATE_DV_JUMP
 
     # BE Vu gate
     if kind == "BE":
         vu = v[:, 2]  # ENU: (E,N,U)
         bad2 = np.abs(vu) > float(cfg.be_vu_abs_max_m_s)
         bad2[0] = False
-        for i in np.nonzero(bad2)[0]:
-            keep[i] = False
-            reason[i] = (reason[i] + ";vu_abs") if reason[i] else "vu_abs"
+        bits[bad2] |= GATE_VU_ABS
 
     # outlier gate on speed (rolling median/MAD)
     if cfg.enable_rolling_outlier:
@@ -213,7 +236,7 @@ def _gate_common(
         if np.isfinite(fs) and fs > 0:
             win = max(3, int(round(float(cfg.outlier_window_s) * fs)))
             spd = _speed(v)
-            med, mad = _rolling_median_mad(spd, win)
+            med, mad = rolling_median_mad(spd, win)
             # robust z: |x-med| / (1.4826*mad)
             denom = 1.4826 * mad
             z = np.zeros_like(spd)
@@ -222,26 +245,68 @@ def _gate_common(
             bad3 = z > float(cfg.outlier_k)
             # avoid gating if too few points overall
             if n >= int(cfg.outlier_min_points):
-                for i in np.nonzero(bad3)[0]:
-                    keep[i] = False
-                    reason[i] = (reason[i] + ";outlier") if reason[i] else "outlier"
+                bits[bad3] |= GATE_OUTLIER
 
     # speed range gate
     spd = _speed(v)
     bad4 = (spd < float(cfg.speed_min_m_s)) | (spd > float(cfg.speed_max_m_s))
-    for i in np.nonzero(bad4)[0]:
-        keep[i] = False
-        reason[i] = (reason[i] + ";speed_range") if reason[i] else "speed_range"
+    bits[bad4] |= GATE_SPEED_RANGE
 
     # force keep static window
     if n > 0 and float(cfg.keep_first_s) > 0:
         t0 = float(t_s[0])
         force = (t_s - t0) <= float(cfg.keep_first_s)
-        for i in np.nonzero(force)[0]:
-            keep[i] = True
-            reason[i] = ""  # explicitly clear, because this part is used for bias/statistics
+        bits[force] = 0  # explicitly clear, because this part is used for bias/statistics
+
+    keep = bits == 0
+    return keep, bits
+
+
+def decode_gate_bits(bits: np.ndarray) -> np.ndarray:
+    """
+    uint16 gate bitmask -> reason strings ('valid;dv_jump', '' if kept).
+    Each distinct code is decoded once, so this stays cheap on long logs.
+    """
+    bits = np.asarray(bits, dtype=np.uint16).reshape(-1)
+    codes, inv = np.unique(bits, return_inverse=True)
+    names = np.array(
+        [";".join(name for bit, name in GATE_BIT_NAMES if int(c) & bit) for c in codes],
+        dtype=object,
+    )
+    return names[inv.reshape(-1)]
+
+
+def gate_bit_counts(bits: np.ndarray) -> Dict[str, int]:
+    """Per-gate rejection counts straight from the bitmask (no string decoding)."""
+    bits = np.asarray(bits, dtype=np.uint16)
+    return {name: int(np.count_nonzero(bits & bit)) for bit, name in GATE_BIT_NAMES}
 
-    return keep, reason
+
+def dvl_gate_audit_df(ev: DvlEventsData, *, dropped_only: bool = True) -> pd.DataFrame:
+    """
+    Gate audit table (t_s, Src, keep, gate_bits, reason) for both streams;
+    reasons are decoded here, not during preprocessing.
+    """
+    parts = []
+    for src, g in (("BI", ev.gate_bi), ("BE", ev.gate_be)):
+        if g is None or len(g.bits) == 0:
+            continue
+        sel = (g.bits != 0) if dropped_only else np.ones(len(g.bits), dtype=bool)
+        bits = g.bits[sel]
+        parts.append(
+            pd.DataFrame(
+                {
+                    "t_s": np.asarray(g.t_s, dtype=float)[sel],
+                    "Src": src,
+                    "keep": g.keep[sel],
+                    "gate_bits": bits,
+                    "reason": decode_gate_bits(bits),
+                }
+            )
+        )
+    if not parts:
+        return pd.DataFrame(columns=["t_s", "Src", "keep", "gate_bits", "reason"])
+    return pd.concat(parts, ignore_index=True).sort_values("t_s", kind="mergesort").reset_index(drop=True)
 
 
 def _post_filter_velocity(
@@ -251,12 +316,20 @@ def _post_filter_velocity(
 ) -> np.ndarray:
     if (not cfg.enable_lowpass) or v.size == 0:
         return v
+    if cfg.lowpass_kind == "box_time":
+        return time_box_filter(t_s, v, float(cfg.lowpass_window_s))
     fs = _estimate_fs_hz(t_s)
+    if cfg.lowpass_kind == "butter":
+        fc = cfg.lowpass_cutoff_hz
+        fc = 0.443 / float(cfg.lowpass_window_s) if fc is None else float(fc)
+        if np.isfinite(fs) and 0.0 < fc < 0.5 * fs:
+            return butter_lowpass(v, fc, fs, order=int(cfg.lowpass_order))
+        print(f"[DVL][WARN] butter cutoff {fc:.3f} Hz not below Nyquist (fs={fs:.3f} Hz), fallback to box")
     if np.isfinite(fs) and fs > 0:
         win = max(1, int(round(float(cfg.lowpass_window_s) * fs)))
     else:
         win = 5
-    return _moving_average(v, win)
+    return box_filter(v, win)
 
 
 def _minimal_cols(df: pd.DataFrame) -> List[str]:
@@ -330,15 +403,15 @@ def preprocess_dvl_events(
     # gating (on raw)
     if df_bi0.empty:
         keep_bi = np.array([], dtype=bool)
-        reason_bi = []
+        bits_bi = np.array([], dtype=np.uint16)
     else:
-        keep_bi, reason_bi = _gate_common(df_bi0, t_bi, v_bi_raw, cfg, kind="BI")
+        keep_bi, bits_bi = _gate_common(df_bi0, t_bi, v_bi_raw, cfg, kind="BI")
 
     if df_be0.empty:
         keep_be = np.array([], dtype=bool)
-        reason_be = []
+        bits_be = np.array([], dtype=np.uint16)
     else:
-        keep_be, reason_be = _gate_common(df_be0, t_be, v_be_raw, cfg, kind="BE")
+        keep_be, bits_be = _gate_common(df_be0, t_be, v_be_raw, cfg, kind="BE")
 
     # apply gate
     df_bi1 = df_bi0.loc[keep_bi].copy() if df_bi0.shape[0] else df_bi0.copy()
@@ -372,10 +445,16 @@ def preprocess_dvl_events(
         out_be["Vu_enu(m_s)"] = v_be_lp[:, 2]
         out_be["Speed(m_s)"] = _speed(v_be_lp)
 
-    # keep a compact "why dropped" audit if you want: export separately in cli, not in main CSV
+    # compact "why dropped" audit: bitmasks only; decoded/exported separately in cli (dvl_gate_audit_df)
     # (we intentionally do NOT attach reasons into the main output to keep it clean)
 
-    return DvlEventsData(df_bi=out_bi, df_be=out_be, config=cfg)
+    return DvlEventsData(
+        df_bi=out_bi,
+        df_be=out_be,
+        config=cfg,
+        gate_bi=DvlGateResult(t_s=t_bi, bits=bits_bi, keep=keep_bi),
+        gate_be=DvlGateResult(t_s=t_be, bits=bits_be, keep=keep_be),
+    )
 
 
 def save_dvl_events_csv(
@@ -397,8 +476,8 @@ def load_dvl_events_csv(proc_dir: Path, run_id: str) -> DvlEventsData:
     p_be = proc_dir / f"{run_id}_dvl_BE.csv"
     if not p_bi.exists() and not p_be.exists():
         raise FileNotFoundError(f"DVL BI/BE CSV not found in {proc_dir} for run_id={run_id}")
-    df_bi = pd.read_csv(p_bi) if p_bi.exists() else pd.DataFrame()
-    df_be = pd.read_csv(p_be) if p_be.exists() else pd.DataFrame()
+    df_bi = read_csv_cached(p_bi) if p_bi.exists() else pd.DataFrame()
+    df_be = read_csv_cached(p_be) if p_be.exists() else pd.DataFrame()
     return DvlEventsData(df_bi=df_bi, df_be=df_be, config=None)
 
 
@@ -0,0 +1,409 @@
+# src/offnav/preprocess/filter_bank.py
+from __future__ import annotations
+
+"""
+IMU / DVL 预处理共用的低通滤波器组（批处理），以及逐样本的流式版本（见文件末尾）。
+
+批处理滤波器输入 x 形状为 (N,) 或 (N, C)，沿 axis 0 一次处理全部通道，输出形状与 x 相同。
+
+- box_filter(x, win)：居中滑动平均，前缀和 O(N)。样本 i 取 [i - win//2, i + (win-1)//2]
+  （截断到 [0, N)）：
+    normalize="window"：除以 win，窗内有非有限值则为 NaN
+                        （== np.convolve(x, ones(win)/win, mode="same")，即原 _moving_average）；
+    normalize="count" ：窗内有限样本的均值（边缘不向 0 收缩，忽略 NaN）；
+- time_box_filter(t, x, width_s)：按时间取居中窗口 [t_i - w/2, t_i + w/2] 内有限样本的均值，
+  用于时间戳抖动 / 不等间隔采样；
+- butter_sos(order, fc, fs)：数字 Butterworth 低通，二阶节（双线性变换 + 频率预畸变），
+  布局与 scipy 的 sos 相同；
+- sos_filter(x, sos, zero_phase)：在频域施加二阶节——在足够长（冲激响应衰减到 tol 以下）的 FFT 网格上
+  精确计算有理响应 H(e^jw)，结果与逐点递推相差约 tol，但没有逐样本的 Python 循环：
+    causal    ：稳态起步（常值输入时 y = x[0]）；
+    zero_phase：|H|^2（前向 + 反向），两端奇对称延拓；
+  非有限样本在滤波时线性桥接，输出中仍为 NaN。
+
+StreamingBoxFilter / SosFilter 逐样本复现 box_filter / 因果 sos_filter
+（box 输出延迟 (win-1)//2 个样本）。
+"""
+
+import math
+from collections import deque
+from typing import Deque, List, Literal, Optional, Tuple
+
+import numpy as np
+
+
+Normalize = Literal["window", "count"]
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+
+def _as_2d(x: np.ndarray) -> Tuple[np.ndarray, bool]:
+    a = np.asarray(x, dtype=float)
+    if a.ndim == 1:
+        return a[:, None], True
+    if a.ndim != 2:
+        raise ValueError(f"expected (N,) or (N, C) array, got shape {a.shape}")
+    return a, False
+
+
+def _window_sums(v: np.ndarray, before: int, after: int) -> np.ndarray:
+    """
+    Per-column sum of v[i - before : i + after + 1] (clipped), as contiguous
+    slice differences of a padded prefix sum.
+    """
+    n, c = v.shape
+    e = np.zeros((n + before + after + 1, c), dtype=float)
+    np.cumsum(v, axis=0, out=e[before + 1: before + 1 + n])
+    e[before + 1 + n:] = e[before + n]
+    return e[before + after + 1: before + after + 1 + n] - e[:n]
+
+
+def _fill_nonfinite(a: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Linear bridge over non-finite samples (per column); returns (filled, finite mask)."""
+    ok = np.isfinite(a)
+    if ok.all():
+        return a, ok
+    out = a.copy()
+    idx = np.arange(a.shape[0])
+    for j in range(a.shape[1]):
+        m = ok[:, j]
+        if m.any() and not m.all():
+            out[~m, j] = np.interp(idx[~m], idx[m], a[m, j])
+    return out, ok
+
+
+def _finite_level(a: np.ndarray, ok: np.ndarray) -> np.ndarray:
+    """Per-column mean of the finite samples (0 for all-NaN columns, no empty-slice warning)."""
+    return np.where(ok, a, 0.0).sum(axis=0) / np.maximum(ok.sum(axis=0), 1)
+
+
+# =============================================================================
+# Box filters
+# =============================================================================
+
+
+def box_filter(x: np.ndarray, win: int, *, normalize: Normalize = "window") -> np.ndarray:
+    """Centered moving average over `win` samples (see module contract)."""
+    a, flat = _as_2d(x)
+    win = int(win)
+    if win <= 1 or a.shape[0] == 0:
+        out = a.astype(float, copy=True)
+        return out[:, 0] if flat else out
+
+    n = a.shape[0]
+    ok = np.isfinite(a)
+    dense = bool(ok.all())
+    # remove a per-column level first: keeps the prefix sums small (no cancellation)
+    if dense:
+        level = a.mean(axis=0)
+        z = a - level
+    else:
+        level = _finite_level(a, ok)
+        z = np.where(ok, a - level, 0.0)
+
+    before, after = win // 2, (win - 1) // 2
+    s = _window_sums(z, before, after)
+    if normalize == "window":
+        s /= float(win)
+        s += level
+        # edge rows see fewer than win real samples (zero padding): undo their share of level
+        i = np.r_[0:min(before, n), max(n - after, 0):n]
+        cnt = np.minimum(i + after, n - 1) - np.maximum(i - before, 0) + 1
+        s[i] -= level * ((win - cnt) / float(win))[:, None]
+        if not dense:
+            s[_window_sums((~ok).astype(float), before, after) > 0] = np.nan
+        out = s
+    elif normalize == "count":
+        cnt = _window_sums(ok.astype(float), before, after)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = s / cnt + level
+        out[cnt == 0] = np.nan
+    else:
+        raise ValueError(f"normalize must be 'window' or 'count', got {normalize!r}")
+    return out[:, 0] if flat else out
+
+
+def time_box_filter(t_s: np.ndarray, x: np.ndarray, width_s: float) -> np.ndarray:
+    """
+    Centered time-window mean: y_i = mean of finite x_j with |t_j - t_i| <= width_s / 2.
+    t_s must be non-decreasing; samples with non-finite time get NaN.
+    """
+    a, flat = _as_2d(x)
+    t = np.asarray(t_s, dtype=float).reshape(-1)
+    if t.shape[0] != a.shape[0]:
+        raise ValueError(f"t_s has {t.shape[0]} samples, x has {a.shape[0]}")
+    n = a.shape[0]
+    if n == 0:
+        return a.copy()[:, 0] if flat else a.copy()
+
+    ok = np.isfinite(a) & np.isfinite(t)[:, None]
+    level = _finite_level(a, ok)
+    s = np.zeros((n + 1, a.shape[1]))
+    k = np.zeros((n + 1, a.shape[1]))
+    np.cumsum(np.where(ok, a - level, 0.0), axis=0, out=s[1:])
+    np.cumsum(ok, axis=0, out=k[1:])
+
+    half = 0.5 * float(width_s)
+    tt = np.where(np.isfinite(t), t, np.inf)
+    lo = np.searchsorted(tt, tt - half, side="left")
+    hi = np.searchsorted(tt, tt + half, side="right")
+    cnt = k[hi] - k[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = (s[hi] - s[lo]) / cnt + level
+    out[(cnt == 0) | ~np.isfinite(t)[:, None]] = np.nan
+    return out[:, 0] if flat else out
+
+
+# =============================================================================
+# Butterworth (no SciPy)
+# =============================================================================
+
+
+def butter_sos(order: int, cutoff_hz: float, fs_hz: float) -> np.ndarray:
+    """
+    Digital Butterworth low-pass, (n_sections, 6) rows [b0, b1, b2, 1, a1, a2].
+    Each section has unity DC gain and its zeros at z = -1.
+    """
+    order = int(order)
+    if order < 1:
+        raise ValueError(f"order must be >= 1, got {order}")
+    if not (0.0 < cutoff_hz < 0.5 * fs_hz):
+        raise ValueError(f"cutoff_hz must be in (0, fs/2), got {cutoff_hz} with fs={fs_hz}")
+
+    k2 = 2.0 * float(fs_hz)
+    wc = k2 * math.tan(math.pi * float(cutoff_hz) / float(fs_hz))   # pre-warped analog cutoff
+    sos: List[List[float]] = []
+    for k in range(order // 2):
+        p = wc * complex(np.exp(1j * math.pi * (2 * k + order + 1) / (2 * order)))
+        zp = (k2 + p) / (k2 - p)
+        a1, a2 = -2.0 * zp.real, abs(zp) ** 2
+        g = (1.0 + a1 + a2) / 4.0
+        sos.append([g, 2.0 * g, g, 1.0, a1, a2])
+    if order % 2:
+        zp = (k2 - wc) / (k2 + wc)
+        g = (1.0 - zp) / 2.0
+        sos.append([g, g, 0.0, 1.0, -zp, 0.0])
+    return np.asarray(sos, dtype=float)
+
+
+def _sos_pole_radius(sos: np.ndarray) -> float:
+    r = 0.0
+    for _, _, _, _, a1, a2 in sos:
+        r = max(r, float(np.max(np.abs(np.roots([1.0, a1, a2]))) if a2 != 0.0 else abs(a1)))
+    return r
+
+
+def sos_decay_length(sos: np.ndarray, tol: float = 1e-12) -> int:
+    """Samples until the impulse response envelope (~ r^n) drops below tol."""
+    r = _sos_pole_radius(sos)
+    if r >= 1.0:
+        raise ValueError("unstable sos (pole radius >= 1)")
+    if r <= 0.0:
+        return 8
+    return int(math.ceil(math.log(tol) / math.log(r))) + 8 * len(sos)
+
+
+def sos_freq_response(sos: np.ndarray, nfft: int) -> np.ndarray:
+    """H(e^{j 2 pi k / nfft}) for k = 0 .. nfft//2 (rfft grid)."""
+    zi = np.exp(-2j * np.pi * np.arange(nfft // 2 + 1) / nfft)   # z^-1
+    h = np.ones_like(zi)
+    for b0, b1, b2, _, a1, a2 in sos:
+        h *= (b0 + zi * (b1 + zi * b2)) / (1.0 + zi * (a1 + zi * a2))
+    return h
+
+
+def _fft_len(n: int) -> int:
+    """Smallest 2^a * 3^b * 5^c >= n (fast sizes for numpy's pocketfft)."""
+    best = 1 << max(0, (n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            m = p35
+            while m < n:
+                m *= 2
+            best = min(best, m)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def sos_filter(
+    x: np.ndarray,
+    sos: np.ndarray,
+    *,
+    zero_phase: bool = False,
+    tol: float = 1e-12,
+) -> np.ndarray:
+    """Apply second-order sections to every column of x (see module contract)."""
+    a, flat = _as_2d(x)
+    n = a.shape[0]
+    if n == 0:
+        return a.copy()[:, 0] if flat else a.copy()
+
+    filled, ok = _fill_nonfinite(a)
+    has_data = ok.any(axis=0)
+    filled = np.where(has_data[None, :], filled, 0.0)
+    L = sos_decay_length(sos, tol)
+
+    if zero_phase:
+        p = min(n - 1, L)
+        if p > 0:
+            left = 2.0 * filled[0] - filled[p:0:-1]
+            right = 2.0 * filled[-1] - filled[-2:-p - 2:-1]
+            xp = np.concatenate((left, filled, right), axis=0)
+        else:
+            xp = filled
+        m = xp.shape[0]
+        # remove the straight line through both ends (passes a symmetric unity-gain
+        # kernel unchanged) so the zero-filled FFT tail does not add a step
+        ramp = xp[0] + (xp[-1] - xp[0]) * (np.arange(m)[:, None] / max(m - 1, 1))
+        nfft = _fft_len(m + 2 * L)
+        H = sos_freq_response(sos, nfft)
+        y = np.fft.irfft(np.fft.rfft(xp - ramp, n=nfft, axis=0) * (np.abs(H) ** 2)[:, None], n=nfft, axis=0)
+        out = y[p: p + n] + ramp[p: p + n]
+    else:
+        x0 = filled[0]
+        nfft = _fft_len(n + L)
+        H = sos_freq_response(sos, nfft)
+        y = np.fft.irfft(np.fft.rfft(filled - x0, n=nfft, axis=0) * H[:, None], n=nfft, axis=0)
+        out = y[:n] + x0
+
+    out[~ok] = np.nan
+    return out[:, 0] if flat else out
+
+
+def butter_lowpass(
+    x: np.ndarray,
+    cutoff_hz: float,
+    fs_hz: float,
+    *,
+    order: int = 2,
+    zero_phase: bool = True,
+) -> np.ndarray:
+    """Butterworth low-pass of every column of x (zero-phase by default)."""
+    return sos_filter(x, butter_sos(order, cutoff_hz, fs_hz), zero_phase=zero_phase)
+
+
+# =============================================================================
+# Streaming (sample-at-a-time)
+# =============================================================================
+
+
+class StreamingBoxFilter:
+    """
+    Centered box filter fed one (C,) sample at a time; identical to
+    box_filter(x, win, normalize=...) over the whole stream.
+
+    push() returns (i, y_i) once sample i's window is complete, i.e. with a
+    delay of (win-1)//2 samples; flush() emits the tail at end of stream.
+    """
+
+    def __init__(self, win: int, channels: int = 1, normalize: Normalize = "window") -> None:
+        if normalize not in ("window", "count"):
+            raise ValueError(f"normalize must be 'window' or 'count', got {normalize!r}")
+        self.win = max(1, int(win))
+        self.channels = int(channels)
+        self.normalize = normalize
+        self.offset = (self.win - 1) // 2
+        self.reset()
+
+    def reset(self) -> None:
+        c = self.channels
+        self._buf: Deque[Tuple[np.ndarray, np.ndarray]] = deque()
+        self._sum = np.zeros(c)
+        self._n_ok = np.zeros(c)
+        self._n_bad = np.zeros(c)
+        self._k = 0          # samples pushed (incl. virtual tail)
+        self._n_real = 0     # real samples pushed
+        self._since_resum = 0
+
+    def _add(self, v: np.ndarray, ok: np.ndarray, real: bool) -> Optional[Tuple[int, np.ndarray]]:
+        self._buf.append((v, ok if real else None))
+        self._sum += v
+        if real:
+            self._n_ok += ok
+            self._n_bad += ~ok
+        if len(self._buf) > self.win:
+            v_old, ok_old = self._buf.popleft()
+            self._sum -= v_old
+            if ok_old is not None:
+                self._n_ok -= ok_old
+                self._n_bad -= ~ok_old
+        self._since_resum += 1
+        if self._since_resum >= self.win:   # bound running-sum drift
+            self._sum = np.sum([b[0] for b in self._buf], axis=0)
+            self._since_resum = 0
+
+        i = self._k - self.offset
+        self._k += 1
+        if i < 0 or i >= self._n_real:
+            return None
+        if self.normalize == "window":
+            y = self._sum / float(self.win)
+            y[self._n_bad > 0] = np.nan
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                y = self._sum / self._n_ok
+            y[self._n_ok == 0] = np.nan
+        return i, y
+
+    def push(self, x: np.ndarray) -> Optional[Tuple[int, np.ndarray]]:
+        v = np.asarray(x, dtype=float).reshape(self.channels)
+        ok = np.isfinite(v)
+        self._n_real += 1
+        return self._add(np.where(ok, v, 0.0), ok, True)
+
+    def flush(self) -> List[Tuple[int, np.ndarray]]:
+        out: List[Tuple[int, np.ndarray]] = []
+        zero = np.zeros(self.channels)
+        while self._k - self.offset < self._n_real:
+            r = self._add(zero, zero.astype(bool), False)
+            if r is not None:
+                out.append(r)
+        return out
+
+
+class SosFilter:
+    """
+    Causal second-order-section filter (direct form II transposed) for a
+    (C,) sample stream. The first finite sample initialises the state to
+    steady state, matching sos_filter(..., zero_phase=False). A non-finite
+    input yields NaN and leaves the state untouched (batch mode bridges gaps
+    linearly instead, so the two differ only around missing samples).
+    """
+
+    def __init__(self, sos: np.ndarray, channels: int = 1) -> None:
+        self.sos = np.asarray(sos, dtype=float)
+        self.channels = int(channels)
+        self.reset()
+
+    def reset(self, x0: Optional[np.ndarray] = None) -> None:
+        self._z = np.zeros((len(self.sos), 2, self.channels))
+        self._init = x0 is not None
+        if x0 is not None:
+            u = np.asarray(x0, dtype=float).reshape(self.channels)
+            for s, (_, b1, b2, _, a1, a2) in enumerate(self.sos):
+                # unity DC gain: section output == u at steady state
+                self._z[s, 1] = (b2 - a2) * u
+                self._z[s, 0] = (b1 - a1) * u + self._z[s, 1]
+
+    def push(self, x: np.ndarray) -> np.ndarray:
+        u = np.asarray(x, dtype=float).reshape(self.channels)
+        ok = np.isfinite(u)
+        if not self._init:
+            if not ok.all():
+                return np.full(self.channels, np.nan)
+            self.reset(u)
+        y = np.where(ok, u, 0.0)
+        z = self._z
+        for s, (b0, b1, b2, _, a1, a2) in enumerate(self.sos):
+            v = b0 * y + z[s, 0]
+            z0 = np.where(ok, b1 * y - a1 * v + z[s, 1], z[s, 0])
+            z[s, 1] = np.where(ok, b2 * y - a2 * v, z[s, 1])
+            z[s, 0] = z0
+            y = v
+        return np.where(ok, y, np.nan)
@@ -6,8 +6,11 @@ from typing import Optional, Tuple, Literal
 import numpy as np
 import pandas as pd
 
+from offnav.io.colcache import read_csv_cached
 from offnav.core.types import ImuRawData
-from offnav.models.attitude import AttitudeRPY, rpy_to_R_nb, wrap_angle_pm_pi
+from offnav.models.angles import unwrap_with_reset, wrap_pm_pi
+from offnav.models.attitude import AttitudeRPY, rpy_to_R_nb
+from offnav.preprocess.filter_bank import box_filter
 
 
 # =============================================================================
@@ -124,7 +127,7 @@ def load_imu_processed_csv(
     prefer_gyro_for_eskf: Literal["gyro_in", "gyro_out"] = "gyro_in",
     strict_gyro_in: bool = True,
 ) -> ImuProcessedData:
-    df = pd.read_csv(csv_path)
+    df = read_csv_cached(csv_path)
     if df is None or df.empty:
         raise RuntimeError(f"IMU processed CSV is empty: {csv_path!r}")
 
@@ -234,16 +237,6 @@ def _select_bias_window(t_s: np.ndarray, duration_s: float) -> np.ndarray:
     return m
 
 
-def _moving_average(x: np.ndarray, window: int) -> np.ndarray:
-    if window <= 1:
-        return x.astype(float, copy=True)
-    kernel = np.ones(window, dtype=float) / float(window)
-    y = np.empty_like(x, dtype=float)
-    for i in range(x.shape[1]):
-        y[:, i] = np.convolve(x[:, i], kernel, mode="same")
-    return y
-
-
 def _apply_threshold(x: np.ndarray, thr: float) -> np.ndarray:
     y = x.copy()
     y[np.abs(y) < thr] = 0.0
@@ -251,11 +244,7 @@ def _apply_threshold(x: np.ndarray, thr: float) -> np.ndarray:
 
 
 def _wrap_rpy_rad(rpy: np.ndarray) -> np.ndarray:
-    out = np.asarray(rpy, dtype=float).copy()
-    out[:, 0] = np.vectorize(wrap_angle_pm_pi)(out[:, 0])
-    out[:, 1] = np.vectorize(wrap_angle_pm_pi)(out[:, 1])
-    out[:, 2] = np.vectorize(wrap_angle_pm_pi)(out[:, 2])
-    return out
+    return wrap_pm_pi(np.asarray(rpy, dtype=float))
 
 
 # =============================================================================
@@ -304,16 +293,16 @@ def _rpy_to_R_nb_batch(rpy: np.ndarray) -> np.ndarray:
 
 
 def _R_to_rpy_zyx(R: np.ndarray) -> np.ndarray:
-    r20 = float(np.clip(R[2, 0], -1.0, 1.0))
-    pitch = -np.arcsin(r20)
-    cp = np.cos(pitch)
-    if abs(cp) < 1e-8:
-        roll = 0.0
-        yaw = np.arctan2(-float(R[0, 1]), float(R[1, 1]))
-    else:
-        roll = np.arctan2(float(R[2, 1]), float(R[2, 2]))
-        yaw = np.arctan2(float(R[1, 0]), float(R[0, 0]))
-    return np.array([wrap_angle_pm_pi(roll), wrap_angle_pm_pi(pitch), wrap_angle_pm_pi(yaw)], dtype=float)
+    """(N,3,3) R_nb -> (N,3) roll/pitch/yaw（ZYX），pitch=±90° 时 roll 取 0."""
+    pitch = -np.arcsin(np.clip(R[:, 2, 0], -1.0, 1.0))
+    gimbal = np.abs(np.cos(pitch)) < 1e-8
+    roll = np.where(gimbal, 0.0, np.arctan2(R[:, 2, 1], R[:, 2, 2]))
+    yaw = np.where(
+        gimbal,
+        np.arctan2(-R[:, 0, 1], R[:, 1, 1]),
+        np.arctan2(R[:, 1, 0], R[:, 0, 0]),
+    )
+    return wrap_pm_pi(np.stack([roll, pitch, yaw], axis=1))
 
 
 def _convert_device_angles_to_body_rpy(
@@ -323,10 +312,7 @@ def _convert_device_angles_to_body_rpy(
     R_ns = _rpy_to_R_nb_batch(angle_sensor_rad)          # sensor->nav(ENU)
     R_bs = R_sb_total.T                                   # body->sensor
     R_nb = R_ns @ R_bs
-    out = np.empty_like(angle_sensor_rad, dtype=float)
-    for k in range(out.shape[0]):
-        out[k] = _R_to_rpy_zyx(R_nb[k])
-    return _wrap_rpy_rad(out)
+    return _wrap_rpy_rad(_R_to_rpy_zyx(R_nb))
 
 
 def _gravity_in_body_ENU(angle_body_rad: np.ndarray, g: float) -> np.ndarray:
@@ -400,7 +386,7 @@ def preprocess_imu_simple(imu: ImuRawData, cfg: ImuPreprocessConfig) -> ImuProce
     else:
         win = 5
 
-    gyro_in = _moving_average(gyro_b_detrend, win)
+    gyro_in = box_filter(gyro_b_detrend, win)
     gyro_out = _apply_threshold(gyro_in, float(cfg.gyro_threshold_rad_s))
 
     # ---- angles -> body semantics, then gravity ----
@@ -431,15 +417,13 @@ def preprocess_imu_simple(imu: ImuRawData, cfg: ImuPreprocessConfig) -> ImuProce
     if yaw_src_deg is not None:
         yaw_rad_raw = np.deg2rad(yaw_src_deg)
         finite = np.isfinite(yaw_rad_raw)
-        yaw_wrapped = yaw_rad_raw.copy()
-        if np.any(finite):
-            yaw_wrapped[finite] = np.vectorize(wrap_angle_pm_pi)(yaw_rad_raw[finite])
-        yaw_device_rad = yaw_wrapped
+        yaw_device_rad = wrap_pm_pi(yaw_rad_raw)
+        yaw_device_rad[~finite] = yaw_rad_raw[~finite]  # 缺失值原样保留
 
     yaw_nav_rad: Optional[np.ndarray] = None
     if angle_body_rad is not None:
         yaw_body = angle_body_rad[:, 2]
-        yaw_unwrapped = np.unwrap(yaw_body)
+        yaw_unwrapped = unwrap_with_reset(yaw_body)
 
         if np.any(bw):
             yaw_bias = float(np.nanmean(yaw_unwrapped[bw]))
@@ -447,11 +431,9 @@ def preprocess_imu_simple(imu: ImuRawData, cfg: ImuPreprocessConfig) -> ImuProce
             yaw_bias = float(yaw_unwrapped[0])
 
         yaw_nav = yaw_unwrapped - yaw_bias
-        yaw_nav = np.vectorize(wrap_angle_pm_pi)(yaw_nav)
+        wrap_pm_pi(yaw_nav, out=yaw_nav)
 
-        yaw_nav_2d = yaw_nav.reshape(-1, 1)
-        yaw_nav_filt = _moving_average(yaw_nav_2d, win)[:, 0]
-        yaw_nav_rad = yaw_nav_filt
+        yaw_nav_rad = box_filter(yaw_nav, win)
 
     # ---- accel bias & linear acceleration (SPECIFIC FORCE MODEL) ----
     bias_acc = (f_b_mps2_raw[bw] + g_body[bw]).mean(axis=0)
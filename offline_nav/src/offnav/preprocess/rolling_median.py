@@ -0,0 +1,34 @@
+# src/offnav/preprocess/rolling_median.py
+from __future__ import annotations
+
+"""
+DVL 离群门限用的滚动中值 / MAD（速度序列）。
+
+- 窗口语义与 pandas rolling(win, center=True, min_periods=mp) 相同：
+  样本 i 的窗口为 [i - win//2, i + (win-1)//2]（两端截断）；
+  NaN 占位但不计数、不参与中值；有限值少于 min_periods 时输出 NaN；
+- MAD 为 |x - med| 的居中滚动中值（med 本身也是滚动中值），与 DVL 离群门限一直以来的两级定义一致；
+- 走 pandas 的 skiplist 滚动中值（C 实现，O(n log w)），纯 Python 的堆 / skiplist 实测慢 2~3 倍。
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def default_min_periods(win: int) -> int:
+    return min(int(win), max(3, int(win) // 3))
+
+
+def rolling_median_mad(
+    x: np.ndarray,
+    win: int,
+    min_periods: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """x 的居中滚动中值与 MAD（各 len=N），窗口语义见模块说明."""
+    x = np.asarray(x, dtype=float).reshape(-1)
+    mp = default_min_periods(win) if min_periods is None else int(min_periods)
+    med = pd.Series(x).rolling(win, center=True, min_periods=mp).median().to_numpy(dtype=float)
+    mad = pd.Series(np.abs(x - med)).rolling(win, center=True, min_periods=mp).median().to_numpy(dtype=float)
+    return med, mad
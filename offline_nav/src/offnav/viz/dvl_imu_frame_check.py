@@ -8,6 +8,9 @@ from typing import Dict, Tuple, Optional
 import numpy as np
 import pandas as pd
 
+from offnav.io.colcache import read_csv_cached
+from offnav.models.angles import angle_diff, unwrap_with_reset, wrap_pm_pi
+
 
 # =============================================================================
 # 小工具
@@ -16,11 +19,6 @@ import pandas as pd
 _TIME_COL_CANDIDATES = ("t_s", "EstS", "MonoS", "EstNS", "MonoNS")
 
 
-def _wrap_pm_pi(a: np.ndarray) -> np.ndarray:
-    """把角度 wrap 到 (-pi, pi]."""
-    return (a + np.pi) % (2.0 * np.pi) - np.pi
-
-
 def _pick_time_s(df: pd.DataFrame, src: str) -> np.ndarray:
     """从 DataFrame 中挑一个时间列，返回 float 秒数组。"""
     for c in _TIME_COL_CANDIDATES:
@@ -49,7 +47,7 @@ def _pick_yaw_from_imu(df_imu: pd.DataFrame) -> Tuple[np.ndarray, str]:
         if col in df_imu.columns:
             yaw = df_imu[col].to_numpy(dtype=float)
             # 做一次 unwrap，避免跨 ±pi 的断裂
-            yaw_un = np.unwrap(yaw)
+            yaw_un = unwrap_with_reset(yaw)
             print(f"[IMU] 使用 yaw 列( rad ): {col}")
             return yaw_un, col
 
@@ -65,7 +63,7 @@ def _pick_yaw_from_imu(df_imu: pd.DataFrame) -> Tuple[np.ndarray, str]:
         if col in df_imu.columns:
             yaw_deg = df_imu[col].to_numpy(dtype=float)
             yaw_rad = np.deg2rad(yaw_deg)
-            yaw_un = np.unwrap(yaw_rad)
+            yaw_un = unwrap_with_reset(yaw_rad)
             print(f"[IMU] 使用 yaw 列( deg ): {col}，内部已 unwrap")
             return yaw_un, col
 
@@ -353,7 +351,7 @@ def be_vs_imu_yaw_check(
     # 4) 在 IMU 时间轴上插值 yaw_unwrapped，再 wrap 回 [-pi,pi]
     # ------------------------------------------------------------------
     yaw_interp_un = np.interp(t_use, t_imu, yaw_unwrapped)
-    yaw_imu = _wrap_pm_pi(yaw_interp_un)
+    yaw_imu = wrap_pm_pi(yaw_interp_un)
 
     print(f"[CHECK-2] 使用 IMU yaw 列: {yaw_col}")
     print(f"[CHECK-2] 最终可用样本数 N={len(t_use)}")
@@ -403,7 +401,7 @@ def be_vs_imu_yaw_check(
         # ★ 关键：这里采用 yaw_dvl = atan2(Ve, Vn)，与 deadreckon / ESKF 保持一致
         yaw_dvl = np.arctan2(vE_c, vN_c)
 
-        dyaw = _wrap_pm_pi(yaw_imu - yaw_dvl)
+        dyaw = angle_diff(yaw_imu, yaw_dvl)
         dyaw_deg = np.rad2deg(dyaw)
 
         # N 小时 nanpercentile 也安全，min(N,4)=N
@@ -422,7 +420,7 @@ def be_vs_imu_yaw_check(
         best_off = 0.0
         for off_deg in offsets_deg:
             off_rad = np.deg2rad(off_deg)
-            dyaw_off = _wrap_pm_pi(dyaw - off_rad)
+            dyaw_off = angle_diff(dyaw, off_rad)
             dyaw_off_deg = np.rad2deg(dyaw_off)
             std_off  = float(np.nanstd(dyaw_off_deg))
             mean_off = float(np.nanmean(dyaw_off_deg))
@@ -502,9 +500,9 @@ def main(argv: Optional[list] = None) -> int:
         raise FileNotFoundError(f"DVL BI CSV 不存在: {bi_path}")
 
     # 读取 CSV
-    df_imu = pd.read_csv(imu_path)
-    df_be = pd.read_csv(be_path)
-    df_bi = pd.read_csv(bi_path) if bi_path is not None else None
+    df_imu = read_csv_cached(imu_path)
+    df_be = read_csv_cached(be_path)
+    df_bi = read_csv_cached(bi_path) if bi_path is not None else None
 
     # 诊断 1：BE vs BI（若有 BI）
     if df_bi is not None:
@@ -21,6 +21,7 @@ offnav.viz.imu_dvl_segment_inspect
     --t-min 500 --t-max 600
 
 如果不传 --t-min / --t-max，默认使用 [500, 600] 秒。
+两个 CSV 只读取时间窗覆盖的部分（offnav.io.time_index，旁路 .tidx.npz 索引）。
 """
 
 from __future__ import annotations
@@ -32,6 +33,9 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from offnav.io.time_index import read_csv_window
+from offnav.models.angles import angle_diff, wrap_pm_pi
+
 
 # ----------------------------------------------------------------------
 # 小工具
@@ -50,11 +54,6 @@ def _pick_time_s(df: pd.DataFrame, label: str) -> np.ndarray:
     raise RuntimeError(f"[TIME][{label}] 找不到合适的时间列，请检查 CSV 表头。")
 
 
-def _wrap_pm_pi(a: np.ndarray) -> np.ndarray:
-    """把角度（rad）wrap 到 [-pi, pi]"""
-    return (a + np.pi) % (2.0 * np.pi) - np.pi
-
-
 # ----------------------------------------------------------------------
 # 主逻辑
 # ----------------------------------------------------------------------
@@ -69,8 +68,9 @@ def analyze_segment(
     print(f"[SEG-ARGS] DVL BE CSV: {dvl_be_csv}")
     print(f"[SEG-ARGS] t_range   : [{t_min:.1f}, {t_max:.1f}] s")
 
-    df_imu = pd.read_csv(imu_csv)
-    df_be = pd.read_csv(dvl_be_csv)
+    # 只解析 [t_min, t_max] 覆盖的字节块（CSV 旁路稀疏时间索引，首次使用时自动生成）
+    df_imu = read_csv_window(imu_csv, t_min, t_max)
+    df_be = read_csv_window(dvl_be_csv, t_min, t_max)
 
     # 1) 取时间轴
     t_imu = _pick_time_s(df_imu, "IMU")
@@ -105,7 +105,7 @@ def analyze_segment(
     accX = df_imu.loc[mask_imu, "AccX_mps2"].to_numpy(dtype=float)
     accY = df_imu.loc[mask_imu, "AccY_mps2"].to_numpy(dtype=float)
     yaw_imu = df_imu.loc[mask_imu, "yaw_nav_rad"].to_numpy(dtype=float)
-    yaw_imu = _wrap_pm_pi(yaw_imu)
+    yaw_imu = wrap_pm_pi(yaw_imu, out=yaw_imu)
 
     # 4) 取 DVL BE 水平速度
     be_cols = ("Ve_enu(m_s)", "Vn_enu(m_s)")
@@ -168,7 +168,7 @@ def analyze_segment(
 
     # 7) 计算 DVL yaw，并与 IMU yaw 比较
     yaw_dvl = np.arctan2(Vn_be_i, Ve_be_i)
-    dyaw = _wrap_pm_pi(yaw_imu - yaw_dvl)
+    dyaw = angle_diff(yaw_imu, yaw_dvl)
     yaw_imu_deg = np.rad2deg(yaw_imu)
     yaw_dvl_deg = np.rad2deg(yaw_dvl)
     dyaw_deg = np.rad2deg(dyaw)
@@ -23,6 +23,8 @@ offnav.viz.yaw_dvl_inspect
       --imu-csv ../out/proc/2026-01-10_pooltest01/2026-01-10_pooltest01_imu_filtered.csv \
       --dvl-be-csv ../out/proc/2026-01-10_pooltest01/2026-01-10_pooltest01_dvl_BE.csv \
       --speed-min 0.10
+
+  可选 --t-min / --t-max 只检查一个时间窗（只读取两个 CSV 中覆盖该窗口的部分，见 offnav.io.time_index）。
 """
 
 from __future__ import annotations
@@ -34,6 +36,10 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from offnav.io.colcache import read_csv_cached
+from offnav.io.time_index import read_csv_window
+from offnav.models.angles import angle_diff, unwrap_with_reset, wrap_pm_pi
+
 
 # ----------------------------------------------------------------------
 # 小工具：时间列 / DVL 列 / yaw 处理
@@ -85,13 +91,6 @@ def _extract_be_vel_enu(df_be: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np
     raise RuntimeError("[DVL-BE] 无法识别 ENU 速度列，请在 _extract_be_vel_enu 中补充列名组合。")
 
 
-def _wrap_pm_pi(x: np.ndarray) -> np.ndarray:
-    """
-    把角度 wrap 到 (-pi, pi].
-    """
-    return (x + np.pi) % (2.0 * np.pi) - np.pi
-
-
 def _build_yaw_candidates(df_imu: pd.DataFrame) -> List[Tuple[str, np.ndarray]]:
     """
     从 IMU DataFrame 中提取所有可能的 yaw 候选，统一转为 rad。
@@ -105,9 +104,8 @@ def _build_yaw_candidates(df_imu: pd.DataFrame) -> List[Tuple[str, np.ndarray]]:
         arr = df_imu[col].to_numpy(dtype=float)
         if unit == "deg":
             arr = np.deg2rad(arr)
-        # 先做 unwrap，再统一到 (-pi,pi] 区间
-        arr_unwrap = np.unwrap(arr)
-        arr_wrap = _wrap_pm_pi(arr_unwrap)
+        # 统一到 [-pi,pi) 区间（缺失值保持 NaN）
+        arr_wrap = wrap_pm_pi(arr)
         cands.append((col, arr_wrap))
 
     # 1) 已有的工程列（rad）
@@ -185,7 +183,7 @@ def yaw_dvl_inspect(
 
     # DVL 水平航向：假定 Ve/Vn 已在 ENU（E,N）
     yaw_dvl = np.arctan2(Vn_use, Ve_use)
-    yaw_dvl = _wrap_pm_pi(yaw_dvl)
+    yaw_dvl = wrap_pm_pi(yaw_dvl)
 
     # ---------- 2) IMU yaw 候选 ----------
     yaw_cands = _build_yaw_candidates(df_imu)
@@ -203,11 +201,11 @@ def yaw_dvl_inspect(
             continue
 
         # 先用 IMU 时间轴做线性插值（对 unwrap 后的角）
-        yaw_unwrap = np.unwrap(yaw_arr)
+        yaw_unwrap = unwrap_with_reset(yaw_arr)
         yaw_interp_un = np.interp(t_use, t_imu, yaw_unwrap)
-        yaw_imu = _wrap_pm_pi(yaw_interp_un)
+        yaw_imu = wrap_pm_pi(yaw_interp_un)
 
-        dyaw = _wrap_pm_pi(yaw_imu - yaw_dvl)
+        dyaw = angle_diff(yaw_imu, yaw_dvl)
         dyaw_deg = np.rad2deg(dyaw)
 
         # 统计量
@@ -303,6 +301,8 @@ def main() -> int:
         default=0.10,
         help="只使用水平速度大于该阈值的样本，单位 m/s（默认 0.10）",
     )
+    parser.add_argument("--t-min", type=float, default=None, help="时间窗起点 [s]（默认不限）")
+    parser.add_argument("--t-max", type=float, default=None, help="时间窗终点 [s]（默认不限）")
 
     args = parser.parse_args()
 
@@ -310,8 +310,13 @@ def main() -> int:
     print("[ARGS] DVL BE CSV:", args.dvl_be_csv)
     print("[ARGS] speed_min :", args.speed_min, "m/s")
 
-    df_imu = pd.read_csv(args.imu_csv)
-    df_be = pd.read_csv(args.dvl_be_csv)
+    if args.t_min is not None or args.t_max is not None:
+        print("[ARGS] t_range   :", [args.t_min, args.t_max], "s")
+        df_imu = read_csv_window(args.imu_csv, args.t_min, args.t_max)
+        df_be = read_csv_window(args.dvl_be_csv, args.t_min, args.t_max)
+    else:
+        df_imu = read_csv_cached(args.imu_csv)
+        df_be = read_csv_cached(args.dvl_be_csv)
 
     yaw_dvl_inspect(df_imu, df_be, speed_min=args.speed_min)
     print("[YAW-DVL-INSPECT] Done.")
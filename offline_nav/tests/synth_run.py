@@ -0,0 +1,72 @@
+# tests/synth_run.py
+from __future__ import annotations
+
+"""
+测试用的合成 run：匀速直航 + 缓慢 yaw 摆动，IMU 100 Hz / DVL 5 Hz（BI、BE 交替），
+按时间切成多个 CSV，写出最小 dataset.yaml。列与 io/raw_schema.py 的必需列一致。
+"""
+
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+T0 = 1000.0
+
+
+def make_raw(duration_s: float = 60.0, fs_imu: float = 100.0, fs_dvl: float = 5.0, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+
+    t = T0 + np.arange(0.0, duration_s, 1.0 / fs_imu)
+    n = t.size
+    yaw = 0.3 * np.sin(0.05 * (t - T0))
+    ns = np.round(t * 1e9).astype(np.int64)
+    imu = pd.DataFrame({
+        "MonoNS": ns, "EstNS": ns, "MonoS": t, "EstS": t,
+        "AccX": rng.normal(0.0, 0.01, n), "AccY": rng.normal(0.0, 0.01, n), "AccZ": 1.0 + rng.normal(0.0, 0.01, n),
+        "GyroX": rng.normal(0.0, 0.1, n), "GyroY": rng.normal(0.0, 0.1, n),
+        "GyroZ": np.rad2deg(np.gradient(yaw, t)) + rng.normal(0.0, 0.1, n),
+        "YawDeg": np.rad2deg(yaw), "AngX": rng.normal(0.0, 0.5, n), "AngY": rng.normal(0.0, 0.5, n),
+        "AngZ": np.rad2deg(yaw),
+    })
+
+    td = T0 + 0.02 + np.arange(0.0, duration_s, 1.0 / fs_dvl)
+    m = td.size
+    yd = 0.3 * np.sin(0.05 * (td - T0))
+    vx = 0.5 + rng.normal(0.0, 0.01, m)
+    nsd = np.round(td * 1e9).astype(np.int64)
+    zeros = np.zeros(m)
+    dvl = pd.DataFrame({
+        "MonoNS": nsd, "EstNS": nsd, "MonoS": td, "EstS": td,
+        "SensorID": "DVL", "Src": np.where(np.arange(m) % 2 == 0, "BI", "BE"),
+        "Vx_body(m_s)": vx, "Vy_body(m_s)": rng.normal(0.0, 0.01, m), "Vz_body(m_s)": rng.normal(0.0, 0.01, m),
+        "Ve_enu(m_s)": vx * np.cos(yd), "Vn_enu(m_s)": vx * np.sin(yd), "Vu_enu(m_s)": zeros,
+        "De_enu(m)": zeros, "Dn_enu(m)": zeros, "Du_enu(m)": zeros,
+        "Depth(m)": zeros + 1.0, "E(m)": zeros, "N(m)": zeros, "U(m)": zeros,
+        "Valid": "Y", "ValidFlag": 1, "IsWaterMass": 0,
+    })
+    return imu, dvl
+
+
+def write_run(root: Path, run_id: str = "run1", n_files: int = 3, duration_s: float = 60.0) -> Path:
+    """把合成数据按时间等分写成 n_files 个 IMU / DVL CSV，返回 dataset.yaml 路径."""
+    imu, dvl = make_raw(duration_s)
+    for sensor, df in (("imu", imu), ("dvl", dvl)):
+        d = root / run_id / sensor
+        d.mkdir(parents=True, exist_ok=True)
+        edges = np.linspace(0, len(df), n_files + 1).astype(int)
+        for k in range(n_files):
+            df.iloc[edges[k]:edges[k + 1]].to_csv(d / f"{sensor}_{k:02d}.csv", index=False)
+
+    cfg = root / "dataset.yaml"
+    cfg.write_text(
+        f"data_root: {root.as_posix()}\n"
+        "runs:\n"
+        f"  - id: \"{run_id}\"\n"
+        f"    path: \"{run_id}\"\n"
+        "    imu_glob: \"imu/imu_*.csv\"\n"
+        "    dvl_glob: \"dvl/dvl_*.csv\"\n",
+        encoding="utf-8",
+    )
+    return cfg
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+import pandas as pd
+
+from offnav.io.dataset import DatasetIndex
+from offnav.io.imu_csv import load_imu_csv
+
+from synth_run import T0, write_run
+
+
+class WindowedMultiFileLoadTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.idx = DatasetIndex(write_run(self.root, n_files=3, duration_s=60.0))
+        self.full = self.idx.load_run("run1", use_store=False)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _check_window(self, t0, t1) -> None:
+        raw = self.idx.load_run("run1", use_store=False, t0=t0, t1=t1)
+        for got, full in ((raw.imu.df, self.full.imu.df), (raw.dvl.df, self.full.dvl.df)):
+            lo = -float("inf") if t0 is None else t0
+            hi = float("inf") if t1 is None else t1
+            want = full[full["EstS"].between(lo, hi)].reset_index(drop=True)
+            self.assertEqual(list(got.columns), list(full.columns))
+            pd.testing.assert_frame_equal(got.reset_index(drop=True), want, check_categorical=False)
+        self.assertIsInstance(raw.dvl.df["Src"].dtype, pd.CategoricalDtype)
+        self.assertEqual(raw.imu.df["EstNS"].dtype, "int64")
+
+    def test_window_inside_one_file(self) -> None:
+        self._check_window(T0 + 2.0, T0 + 10.0)
+
+    def test_window_spanning_files(self) -> None:
+        self._check_window(T0 + 15.0, T0 + 45.0)
+
+    def test_open_ended_windows(self) -> None:
+        self._check_window(None, T0 + 5.0)
+        self._check_window(T0 + 55.0, None)
+
+    def test_window_outside_run_is_empty(self) -> None:
+        raw = self.idx.load_run("run1", use_store=False, t0=T0 + 1000.0, t1=T0 + 2000.0)
+        self.assertEqual(len(raw.imu.df), 0)
+        self.assertEqual(len(raw.dvl.df), 0)
+        self.assertEqual(list(raw.dvl.df.columns), list(self.full.dvl.df.columns))
+
+    def test_files_outside_window_are_not_parsed(self) -> None:
+        with mock.patch("offnav.io.dataset.load_imu_csv", wraps=load_imu_csv) as imu_loader:
+            self.idx.load_run("run1", use_store=False, t0=T0 + 2.0, t1=T0 + 10.0)
+        parsed = [Path(c.args[0]).name for c in imu_loader.call_args_list]
+        self.assertEqual(parsed, ["imu_00.csv"])
+
+if __name__ == "__main__":
+    unittest.main()
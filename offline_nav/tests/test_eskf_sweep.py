@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import unittest
+from pathlib import Path
+
+from offnav.algo.eskf_sweep import SweepSpec, apply_overrides, expand_trials, load_sweep_spec
+from offnav.core.nav_config import load_nav_config
+
+CONFIGS = Path(__file__).resolve().parents[1] / "configs"
+
+
+class ExpandTrialsTest(unittest.TestCase):
+    def test_shipped_spec_only_sweeps_consumed_fields(self) -> None:
+        spec = load_sweep_spec(CONFIGS / "eskf_sweep.yaml")
+        trials = expand_trials(spec)
+        self.assertEqual(len(trials), 3 * 3 * 2 * 2)
+        base = load_nav_config(CONFIGS / "nav.yaml")
+        cfg = apply_overrides(base, trials[-1])
+        self.assertEqual(cfg.eskf.sigma_dvl_xy_mps, trials[-1]["eskf.sigma_dvl_xy_mps"])
+
+    def test_rejects_unused_fields(self) -> None:
+        for name in ("eskf.dvl_noise.floor_be_mps", "eskf.dvl_noise", "eskf.q_yaw"):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                expand_trials(SweepSpec(params={name: [0.1, 0.2]}))
+
+    def test_rejects_timeline_and_gate_fields(self) -> None:
+        for name in ("eskf.dvl_match_window_s", "dvl_gate.speed_max_m_s"):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                expand_trials(SweepSpec(params={name: [0.1, 0.2]}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from offnav.algo.graph_runner import _build_dvl_factors, _build_graph_setup, _solve_kwargs_from_cfg
+from offnav.core.nav_config import load_nav_config
+from offnav.core.types import ImuRawData
+from offnav.graph.smoothing import gauss_newton_solve
+
+from synth_run import T0, make_raw
+
+NAV_YAML = Path(__file__).resolve().parents[1] / "configs" / "nav.yaml"
+
+
+class LmVsGnTest(unittest.TestCase):
+    """DVL 中段缺失的 run 上，lm 不应比 gn 迭代更多、cost 更高."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cfg = load_nav_config(NAV_YAML).graph
+        for name in ("use_dvl_BE_vel", "use_dvl_BI_vel", "use_dvl_yaw_from_vel"):
+            setattr(cfg, name, True)
+        cfg.use_processed_imu = False
+        cfg.use_processed_dvl = False
+        cls.cfg = cfg
+
+        duration_s = 200.0
+        imu, dvl = make_raw(duration_s)
+        drop = dvl["EstS"].between(T0 + 0.3 * duration_s, T0 + 0.6 * duration_s)
+        cls.imu = ImuRawData(df=imu, source_path=Path("imu.csv"))
+        cls.dvl = dvl[~drop].reset_index(drop=True)
+
+    def _solve_both(self, dvl, **overrides):
+        with contextlib.redirect_stdout(io.StringIO()):
+            setup = _build_graph_setup(self.imu, self.cfg, None, None, max_nodes=int(self.cfg.max_nodes))
+            factors_dvl, *_ = _build_dvl_factors(dvl, setup, self.cfg)
+            factors = setup.base_factors + factors_dvl
+            stats = {}
+            for method in ("gn", "lm"):
+                kw = _solve_kwargs_from_cfg(self.cfg)
+                kw.update(method=method, max_iters=300, **overrides)
+                _, stats[method] = gauss_newton_solve(factors, setup.theta0.copy(), **kw)
+        return stats["gn"], stats["lm"]
+
+    def test_dropout_run_matches_gn(self) -> None:
+        gn, lm = self._solve_both(self.dvl)
+        self.assertTrue(lm.converged)
+        self.assertLessEqual(lm.num_iters, gn.num_iters)
+        self.assertLessEqual(lm.final_cost, gn.final_cost * (1.0 + 1e-9))
+
+    def test_rejected_steps_still_reach_gn_cost(self) -> None:
+        # 无鲁棒核 + 大离群：gn 中途 cost 会上升，lm 拒绝该步后加阻尼
+        dvl = self.dvl.copy()
+        rng = np.random.default_rng(1)
+        bad = rng.random(len(dvl)) < 0.2
+        for col in ("Vx_body(m_s)", "Vy_body(m_s)", "Ve_enu(m_s)", "Vn_enu(m_s)"):
+            dvl.loc[bad, col] += rng.normal(0.0, 5.0, int(bad.sum()))
+        gn, lm = self._solve_both(dvl, robust_loss=None)
+        self.assertTrue(lm.converged)
+        self.assertGreater(lm.n_rejected, 0)
+        self.assertLess(abs(lm.final_cost - gn.final_cost) / gn.final_cost, 1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from offnav import cli_proc
+from offnav.nav_batch import BatchTask, run_batch
+
+from synth_run import write_run
+
+NAV_YAML = Path(__file__).resolve().parents[1] / "configs" / "nav.yaml"
+
+
+class DeadreckonBatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.dataset_cfg = write_run(self.root / "data", n_files=2, duration_s=30.0)
+        self.proc_dir = self.root / "proc"
+        with contextlib.redirect_stdout(io.StringIO()):
+            rc = cli_proc.main([
+                "--dataset-config", str(self.dataset_cfg),
+                "preprocess-all", "--run", "run1", "--out-dir", str(self.proc_dir),
+            ])
+        self.assertEqual(rc, 0)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_deadreckon_task_through_pool(self) -> None:
+        out_dir = self.root / "out" / "deadreckon"
+        task = BatchTask(
+            run_id="run1",
+            method="deadreckon",
+            dataset_config=str(self.dataset_cfg),
+            nav_config=str(NAV_YAML),
+            out_dir=str(out_dir),
+            proc_dir=str(self.proc_dir),
+        )
+        # n_workers > 1：即使只有一个任务也走 ProcessPoolExecutor
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = run_batch([task], n_workers=2)
+
+        self.assertEqual(len(df), 1)
+        self.assertTrue(df["ok"].all(), df["error"].tolist())
+        (traj_csv,) = (out_dir / "run1").glob("run1_traj_deadreckon_*.csv")
+        traj = pd.read_csv(traj_csv)
+        self.assertEqual(list(traj.columns[:4]), ["t_s", "E", "N", "U"])
+        self.assertGreater(len(traj), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
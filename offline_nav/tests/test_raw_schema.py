@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from offnav.io.dvl_csv import load_dvl_csv
+from offnav.io.imu_csv import load_imu_csv
+from offnav.io.raw_schema import IMU_SCHEMA
+from offnav.io.raw_stream import iter_csv_chunks
+
+from synth_run import make_raw
+
+
+class BlankTimeCellTest(unittest.TestCase):
+    """MonoNS/EstNS 按 numpy int64 解析；有空单元时回退 Int64 并丢掉这些行."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.imu, self.dvl = make_raw(20.0)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _write(self, df: pd.DataFrame, name: str, blank_rows=()) -> Path:
+        path = self.root / name
+        df = df.astype({"MonoNS": object, "EstNS": object})
+        for i in blank_rows:
+            df.loc[i, "EstNS"] = ""
+        df.to_csv(path, index=False)
+        return path
+
+    def test_clean_file_keeps_all_rows(self) -> None:
+        raw = load_imu_csv(self._write(self.imu, "imu.csv"))
+        self.assertEqual(len(raw.df), len(self.imu))
+        self.assertEqual(raw.df["EstNS"].dtype, "int64")
+
+    def test_blank_cells_are_dropped(self) -> None:
+        blank = [7, len(self.imu) - 1]
+        raw = load_imu_csv(self._write(self.imu, "imu.csv", blank))
+        self.assertEqual(len(raw.df), len(self.imu) - len(blank))
+        self.assertEqual(raw.df["EstNS"].dtype, "int64")
+        self.assertNotIn(7, raw.df.index)
+
+        raw = load_dvl_csv(self._write(self.dvl, "dvl.csv", [3]))
+        self.assertEqual(len(raw.df), len(self.dvl) - 1)
+        self.assertEqual(raw.df["MonoNS"].dtype, "int64")
+
+    def test_chunks_fall_back_from_the_failing_chunk(self) -> None:
+        blank = [1234]
+        path = self._write(self.imu, "imu.csv", blank)
+        chunks = list(iter_csv_chunks(path, IMU_SCHEMA, chunk_rows=500))
+        got = pd.concat(chunks, ignore_index=True)
+        want = self.imu.drop(index=blank).reset_index(drop=True)
+        self.assertTrue(all(c["EstNS"].dtype == "int64" for c in chunks))
+        pd.testing.assert_series_equal(got["EstNS"], want["EstNS"])
+
+
+if __name__ == "__main__":
+    unittest.main()